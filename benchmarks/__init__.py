@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: benchmarks
+    :synopsis: Performance benchmarks, run with ``python -m benchmarks``
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: benchmarks.__main__
+    :synopsis: Benchmarks runner
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import sys
+import json
+import argparse
+
+from .documents import DOCUMENTS_DIR, get_documents
+from .imports import check_budgets
+from .suite import BENCHMARKS, run, compare
+
+RESULT_FORMAT = (
+    '%(benchmark)-34s %(document)-24s %(p50)10.6fs %(p99)10.6fs '
+    '%(mb_per_second)9.2f MB/s %(records_per_second)12.0f rec/s '
+    '%(peak_memory)10i B'
+)
+
+
+IMPORT_RESULT_FORMAT = (
+    '%(module)-34s %(min)10.6fs %(p50)10.6fs budget %(budget)10.6fs '
+    '%(imported)5i modules'
+)
+
+
+def print_result(result):
+    print(RESULT_FORMAT % result)
+
+
+def print_import_result(result):
+    print(IMPORT_RESULT_FORMAT % dict(result, imported=len(result['modules'])))
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('-d', '--documents', dest='documents_dir',
+                        default=DOCUMENTS_DIR, metavar='dir',
+                        help='directory with documents to benchmark')
+    parser.add_argument('-g', '--generate', dest='generated', type=int,
+                        nargs='*', default=[1000, 5000], metavar='N',
+                        help='generate udlg documents with N instances')
+    parser.add_argument('-b', '--benchmark', dest='selected',
+                        action='append', metavar='name',
+                        choices=[x.name for x in BENCHMARKS],
+                        help='run only given benchmarks')
+    parser.add_argument('-n', '--repeat', dest='repeat', type=int,
+                        default=5, help='minimal amount of calls per case')
+    parser.add_argument('-t', '--min-time', dest='min_time', type=float,
+                        default=0.0, help='minimal time per case, seconds')
+    parser.add_argument('-o', '--output', dest='output', metavar='file',
+                        help='save results as json')
+    parser.add_argument('-B', '--baseline', dest='baseline', metavar='file',
+                        help='compare results against stored baseline')
+    parser.add_argument('-T', '--threshold', dest='threshold', type=float,
+                        default=0.1,
+                        help='allowed slowdown against baseline, 0.1 is 10%%')
+    parser.add_argument('-m', '--metric', dest='metric', default='p50',
+                        choices=['mean', 'min', 'p50', 'p90', 'p99'],
+                        help='latency metric to compare with baseline')
+    parser.add_argument('-I', '--imports', dest='imports',
+                        action='store_true', default=False,
+                        help='measure cold import times against budgets '
+                             'instead of running benchmarks')
+    opts = parser.parse_args(arguments)
+
+    if opts.imports:
+        exceeded = check_budgets(repeat=opts.repeat,
+                                 progress=print_import_result)
+        for result in exceeded:
+            print('OVER BUDGET %(module)s: %(min).6fs > %(budget).6fs'
+                  % result)
+        return 1 if exceeded else 0
+
+    documents = get_documents(opts.documents_dir,
+                              generated=opts.generated)
+    results = run(documents, repeat=opts.repeat, min_time=opts.min_time,
+                  selected=opts.selected, progress=print_result)
+    if opts.output:
+        with open(opts.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+    if opts.baseline:
+        with open(opts.baseline, 'r') as baseline:
+            regressions = compare(results, json.load(baseline),
+                                  threshold=opts.threshold,
+                                  metric=opts.metric)
+        for regression in regressions:
+            print('REGRESSION %(case)s: %(metric)s %(baseline).6fs -> '
+                  '%(current).6fs (x%(ratio).2f)' % regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: benchmarks.documents
+    :synopsis: Benchmark inputs
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import os
+
+from udlg.builder import BinaryFormatterFileBuilder, UDLGBuilder
+from udlg.generator import generate
+
+DOCUMENTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'tests', 'documents'
+)
+
+
+class Document(object):
+    """
+    Benchmark input
+    """
+    def __init__(self, name, data, udlg):
+        self.name = name
+        self.data = data
+        self.udlg = udlg
+
+    @property
+    def builder(self):
+        return UDLGBuilder if self.udlg else BinaryFormatterFileBuilder
+
+    def build(self):
+        return self.builder.build(io.BytesIO(self.data))
+
+    def __len__(self):
+        return len(self.data)
+
+
+def generate_udlg(instances, **options):
+    """
+    generate udlg document with given amount of class instances
+
+    :param int instances: amount of class instances
+    :param options: :class:`udlg.generator.DocumentGenerator` options
+    :rtype: bytes
+    :return: udlg document
+    """
+    stream = io.BytesIO()
+    generate(stream, instances=instances, **options)
+    return stream.getvalue()
+
+
+def get_documents(documents_dir=DOCUMENTS_DIR, generated=(1000, 5000)):
+    """
+    collect benchmark documents: test documents which could be parsed and
+    generated ones
+
+    :param str documents_dir: directory with documents
+    :param tuple generated: amounts of instances of generated documents
+    :rtype: list[Document]
+    :return: documents
+    """
+    documents = []
+    for name in sorted(os.listdir(documents_dir)):
+        if not name.endswith(('.udlg', '.dat')):
+            continue
+        data = open(os.path.join(documents_dir, name), 'rb').read()
+        document = Document(name, data, name.endswith('.udlg'))
+        try:
+            document.build()
+        except NotImplementedError:
+            #: record types not supported yet, anything else is a failure
+            continue
+        documents.append(document)
+    for instances in generated:
+        documents.append(Document('generated_%i.udlg' % instances,
+                                  generate_udlg(instances), True))
+    return documents
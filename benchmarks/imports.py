@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: benchmarks.imports
+    :synopsis: Import time benchmark based on ``python -X importtime``
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Every measurement imports module in fresh interpreter, so import cost is
+measured cold (byte code is cached though) the way tools pay for it.
+"""
+import os
+import sys
+import subprocess
+
+from .suite import percentile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#: module: cumulative import time budget in seconds, generous enough for
+#: slow CI machines, but regressions like eagerly imported thread pool,
+#: logging or archive modules are over it
+IMPORT_BUDGETS = (
+    ('udlg', 0.005),
+    ('udlg.builder', 0.05),
+    ('udlg.storage', 0.02),
+    ('udlg.cli', 0.04),
+)
+
+
+def parse_importtime(output):
+    """
+    parse ``-X importtime`` output
+
+    :param str output: interpreter stderr
+    :rtype: list[tuple[str, float, float]]
+    :return: module name, self and cumulative import time in seconds
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            #: header line
+            continue
+        modules.append((fields[2].strip(), int(fields[0]) / 1e6,
+                        int(fields[1]) / 1e6))
+    return modules
+
+
+def trace_import(module, python=sys.executable):
+    """
+    import module in fresh interpreter
+
+    :param str module: module name
+    :param str python: interpreter path
+    :rtype: list[tuple[str, float, float]]
+    :return: imported modules with their import times
+    """
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join(
+        [ROOT_DIR] + [x for x in [environment.get('PYTHONPATH')] if x]
+    )
+    process = subprocess.run(
+        [python, '-X', 'importtime', '-c', 'import %s' % module],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        env=environment, universal_newlines=True, check=True
+    )
+    return parse_importtime(process.stderr)
+
+
+def measure_import(module, repeat=5, python=sys.executable):
+    """
+    :param str module: module name
+    :param int repeat: amount of interpreter runs
+    :param str python: interpreter path
+    :rtype: dict
+    :return: cumulative import time statistics and modules it imports
+    """
+    times = []
+    modules = []
+    for _ in range(repeat):
+        modules = trace_import(module, python=python)
+        times.extend(
+            cumulative for name, _, cumulative in modules if name == module
+        )
+    times.sort()
+    return {
+        'module': module,
+        'calls': len(times),
+        'min': times[0],
+        'p50': percentile(times, 0.5),
+        'max': times[-1],
+        'modules': [name for name, _, _ in modules],
+    }
+
+
+def check_budgets(budgets=IMPORT_BUDGETS, repeat=5, metric='min',
+                  progress=None):
+    """
+    :param tuple budgets: ``(module, seconds)`` pairs
+    :param int repeat: amount of interpreter runs per module
+    :param str metric: import time metric to check
+    :param callable progress: called with each module results
+    :rtype: list[dict]
+    :return: modules over budget with their results
+    """
+    exceeded = []
+    for module, budget in budgets:
+        result = measure_import(module, repeat=repeat)
+        result['budget'] = budget
+        if progress:
+            progress(result)
+        if result[metric] > budget:
+            exceeded.append(result)
+    return exceeded
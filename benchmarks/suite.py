@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: benchmarks.suite
+    :synopsis: Benchmark suite: parse, serialize and i18n round trips
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import gc
+import os
+import sys
+import time
+import shutil
+import platform
+import tempfile
+import tracemalloc
+
+from udlg.builder import BinaryFormatterFileBuilder, UDLGBuilder
+from udlg.compression import GZIP, XZ, compress_stream, decompress_stream
+from udlg.structure.structure import SIGNATURE_SIZE
+from udlg.utils.i18n import get_i18n_items
+
+MEGABYTE = 1024 * 1024.0
+
+
+def percentile(values, fraction):
+    """
+    get percentile of sorted values (nearest rank)
+
+    :param list values: sorted values
+    :param float fraction: percentile fraction, 0.5 for median
+    :rtype: float
+    :return: percentile value
+    """
+    idx = max(0, min(len(values) - 1, int(round(fraction * len(values))) - 1))
+    return values[idx]
+
+
+class Benchmark(object):
+    """
+    Benchmark case, ``setup`` prepares arguments outside of measurement,
+    ``call`` is measured
+    """
+    #: benchmark works with udlg documents only
+    udlg_only = False
+
+    name = None
+
+    def setup(self, document):
+        return ()
+
+    def call(self, document, *args):
+        raise NotImplementedError("Should be implemented in subclass")
+
+    def records(self, document):
+        """
+        amount of records processed by one call
+
+        :param benchmarks.documents.Document document: document
+        :rtype: int
+        :return: records count
+        """
+        instance = document.build()
+        data = instance.data if document.udlg else instance
+        return data.count
+
+
+class UDLGBuildBenchmark(Benchmark):
+    name = 'UDLGBuilder.build'
+    udlg_only = True
+
+    def call(self, document):
+        return UDLGBuilder.build(io.BytesIO(document.data))
+
+
+class BinaryFormatterBuildBenchmark(Benchmark):
+    name = 'BinaryFormatterFileBuilder.build'
+
+    def setup(self, document):
+        stream = io.BytesIO(document.data)
+        if document.udlg:
+            #: skip udlg header
+            stream.seek(SIGNATURE_SIZE)
+        return stream,
+
+    def call(self, document, stream):
+        return BinaryFormatterFileBuilder.build(stream)
+
+
+class ToBinBenchmark(Benchmark):
+    name = 'to_bin'
+
+    def setup(self, document):
+        return document.build(),
+
+    def call(self, document, instance):
+        return instance.to_bin()
+
+
+class ToDictBenchmark(Benchmark):
+    name = 'to_dict'
+
+    def setup(self, document):
+        return document.build(),
+
+    def call(self, document, instance):
+        return instance.to_dict()
+
+
+class UnpackI18nBenchmark(Benchmark):
+    name = 'unpack_i18n'
+    udlg_only = True
+
+    def setup(self, document):
+        return document.build(),
+
+    def call(self, document, instance):
+        return instance.unpack_i18n()
+
+
+class LoadI18nBenchmark(Benchmark):
+    name = 'load_i18n'
+    udlg_only = True
+
+    def setup(self, document):
+        instance = document.build()
+        return instance, instance.unpack_i18n().replace(b"=>'", b"=>'~")
+
+    def call(self, document, instance, block):
+        return instance.load_i18n(block)
+
+
+class GetI18nItemsBenchmark(Benchmark):
+    name = 'get_i18n_items'
+    udlg_only = True
+
+    def setup(self, document):
+        return document.build().unpack_i18n(),
+
+    def call(self, document, block):
+        return get_i18n_items(block)
+
+
+def compress(data, compression):
+    """
+    :param bytes data: data
+    :param str compression: compression
+    :rtype: bytes
+    :return: compressed data
+    """
+    output = io.BytesIO()
+    with compress_stream(output, compression) as stream:
+        stream.write(data)
+    return output.getvalue()
+
+
+class CompressedBuildBenchmark(Benchmark):
+    """
+    Build document from compressed data, it is decompressed while parsed
+    """
+    udlg_only = True
+
+    def __init__(self, compression):
+        self.compression = compression
+        self.name = 'UDLGBuilder.build[%s]' % compression
+        #: document name: compressed data, compression is not measured
+        self._compressed = {}
+
+    def get_compressed(self, document):
+        if document.name not in self._compressed:
+            self._compressed[document.name] = compress(document.data,
+                                                       self.compression)
+        return self._compressed[document.name]
+
+    def setup(self, document):
+        return self.get_compressed(document),
+
+    def call(self, document, data):
+        return UDLGBuilder.build(io.BytesIO(data))
+
+
+class DecompressThenBuildBenchmark(CompressedBuildBenchmark):
+    """
+    Decompress data to disk first and build document from file after, the
+    way documents were processed before builder could decompress them
+    """
+    def __init__(self, compression):
+        super(DecompressThenBuildBenchmark, self).__init__(compression)
+        self.name = 'decompress+UDLGBuilder.build[%s]' % compression
+
+    def setup(self, document):
+        return self.get_compressed(document), tempfile.mkdtemp()
+
+    def call(self, document, data, directory):
+        path = os.path.join(directory, document.name)
+        try:
+            source = decompress_stream(io.BytesIO(data))
+            with open(path, 'wb') as output:
+                shutil.copyfileobj(source, output)
+            with open(path, 'rb') as stream:
+                return UDLGBuilder.build(stream)
+        finally:
+            shutil.rmtree(directory)
+
+
+BENCHMARKS = (
+    UDLGBuildBenchmark(),
+    BinaryFormatterBuildBenchmark(),
+    ToBinBenchmark(),
+    ToDictBenchmark(),
+    UnpackI18nBenchmark(),
+    LoadI18nBenchmark(),
+    GetI18nItemsBenchmark(),
+    CompressedBuildBenchmark(GZIP),
+    DecompressThenBuildBenchmark(GZIP),
+    CompressedBuildBenchmark(XZ),
+    DecompressThenBuildBenchmark(XZ),
+)
+
+
+def measure(benchmark, document, repeat=5, min_time=0.0):
+    """
+    measure benchmark on given document
+
+    :param Benchmark benchmark: benchmark
+    :param benchmarks.documents.Document document: document
+    :param int repeat: minimal amount of measured calls
+    :param float min_time: minimal total measured time, in seconds
+    :rtype: dict
+    :return: measurement results
+    """
+    timer = time.perf_counter
+    latencies = []
+    total = 0.0
+    gc_enabled = gc.isenabled()
+    while len(latencies) < repeat or total < min_time:
+        args = benchmark.setup(document)
+        gc.disable()
+        try:
+            start = timer()
+            benchmark.call(document, *args)
+            elapsed = timer() - start
+        finally:
+            if gc_enabled:
+                gc.enable()
+        latencies.append(elapsed)
+        total += elapsed
+
+    #: separate run, tracing slows down calls a lot
+    args = benchmark.setup(document)
+    tracemalloc.start()
+    try:
+        benchmark.call(document, *args)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    mean = total / len(latencies)
+    records = benchmark.records(document)
+    return {
+        'benchmark': benchmark.name,
+        'document': document.name,
+        'bytes': len(document),
+        'records': records,
+        'calls': len(latencies),
+        'mean': mean,
+        'min': latencies[0],
+        'p50': percentile(latencies, 0.5),
+        'p90': percentile(latencies, 0.9),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1],
+        'mb_per_second': len(document) / MEGABYTE / mean if mean else 0.0,
+        'records_per_second': records / mean if mean else 0.0,
+        'peak_memory': peak
+    }
+
+
+def run(documents, benchmarks=BENCHMARKS, repeat=5, min_time=0.0,
+        selected=None, progress=None):
+    """
+    run benchmarks over documents
+
+    :param list documents: documents
+    :param tuple benchmarks: benchmarks
+    :param int repeat: minimal amount of measured calls
+    :param float min_time: minimal total measured time per case
+    :param collections.Container selected: benchmark names to run, all
+        benchmarks if nothing was given
+    :param callable progress: called with each case results
+    :rtype: dict
+    :return: run results
+    """
+    results = {}
+    for benchmark in benchmarks:
+        if selected and benchmark.name not in selected:
+            continue
+        for document in documents:
+            if benchmark.udlg_only and not document.udlg:
+                continue
+            result = measure(benchmark, document, repeat=repeat,
+                             min_time=min_time)
+            results['%s:%s' % (benchmark.name, document.name)] = result
+            if progress:
+                progress(result)
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'timestamp': time.time()
+        },
+        'results': results
+    }
+
+
+def compare(results, baseline, threshold=0.1, metric='p50'):
+    """
+    compare results with baseline ones
+
+    :param dict results: current run results
+    :param dict baseline: baseline run results
+    :param float threshold: allowed slowdown fraction, 0.1 is 10%
+    :param str metric: latency metric to compare
+    :rtype: list[dict]
+    :return: regressions, cases which are slower than allowed
+    """
+    regressions = []
+    baseline_results = baseline.get('results', {})
+    for key, result in sorted(results.get('results', {}).items()):
+        base = baseline_results.get(key)
+        if not base or not base.get(metric):
+            continue
+        ratio = result[metric] / base[metric]
+        if ratio > 1.0 + threshold:
+            regressions.append({
+                'case': key,
+                'metric': metric,
+                'baseline': base[metric],
+                'current': result[metric],
+                'ratio': ratio
+            })
+    return regressions
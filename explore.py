@@ -3,6 +3,8 @@
 import os
 import json
 
+from udlg.manifest import Manifest
+
 
 BASE_DIR = os.path.abspath(os.getcwd())
 DIALOGS_DIR = os.path.join(
@@ -10,24 +12,25 @@ DIALOGS_DIR = os.path.join(
         BASE_DIR, 'remote/Data/Dialogs'
     )
 )
+MANIFEST_PATH = 'manifest.json'
 
 
-def process(storage=None, path=None):
-    storage = storage if storage is not None else []
+def process(manifest, path=None):
     path = path or DIALOGS_DIR
-    for entry in os.scandir(path):
-        if entry.is_dir():
-            process(storage, entry.path)
-        else:
-            if not entry.name.endswith('.udlg'):
-                continue
-            print("Processing: %s" % entry.name)
-            storage.append(entry.path)
+    changes = manifest.refresh(path, extensions=('.udlg', ))
+    for state in ('added', 'changed', 'removed'):
+        for name in changes[state]:
+            print("%s: %s" % (state.capitalize(), name))
+    return [
+        os.path.join(path, *name.split('/'))
+        for name in manifest.get_names(path)
+    ]
 
 
 def main():
-    files = []
-    process(files)
+    manifest = Manifest(MANIFEST_PATH)
+    files = process(manifest)
+    manifest.save()
     open('dialogs.json', 'w').write(json.dumps(files))
 
 
@@ -37,7 +37,10 @@ setup(
     platforms=['OS Independent'],
     classifiers=CLASSIFIERS,
     install_requires=install_requires,
-    packages=find_packages(exclude=['tests', 'docs', 'tools']),
+    packages=find_packages(exclude=['tests', 'docs', 'tools', 'benchmarks']),
+    entry_points={
+        'console_scripts': ['udlg = udlg.cli:main'],
+    },
     test_suite='tests',
     include_package_data=True,
     zip_safe=False)
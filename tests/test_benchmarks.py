@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_benchmarks
+    :synopsis: Unit tests for benchmark suite helpers
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import allure
+from benchmarks.documents import Document, generate_udlg, get_documents
+from benchmarks.suite import (
+    ToBinBenchmark, LoadI18nBenchmark, measure, percentile, compare
+)
+from unittest import TestCase, mock
+
+
+@allure.feature('Benchmarks')
+class BenchmarkSuiteTest(TestCase):
+    @allure.story('documents')
+    def test_generate_udlg(self):
+        document = Document('generated', generate_udlg(10, reference=0),
+                            True)
+        instance = document.build()
+        self.assertEqual(instance.data.count, 12)
+        self.assertEqual(bytes(instance.to_bin()), document.data)
+        self.assertEqual(instance.data.records[4].members[2], 3)
+
+    @allure.story('documents')
+    def test_get_documents(self):
+        names = [x.name for x in get_documents(generated=())]
+        self.assertIn('Lucas1.udlg', names)
+        with allure.step('check unsupported documents are skipped'):
+            self.assertNotIn('hashtable.dat', names)
+        with allure.step('check build errors are not swallowed'):
+            with mock.patch.object(Document, 'build',
+                                   side_effect=TypeError('broken')):
+                self.assertRaises(TypeError, get_documents, generated=())
+
+    @allure.story('measure')
+    def test_measure(self):
+        document = Document('generated', generate_udlg(10, reference=0),
+                            True)
+        for benchmark in (ToBinBenchmark(), LoadI18nBenchmark()):
+            result = measure(benchmark, document, repeat=3)
+            self.assertEqual(result['calls'], 3)
+            self.assertEqual(result['records'], 12)
+            self.assertLessEqual(result['min'], result['p50'])
+            self.assertLessEqual(result['p50'], result['max'])
+            self.assertGreater(result['peak_memory'], 0)
+
+    @allure.story('compare')
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([3], 0.9), 3)
+
+    @allure.story('compare')
+    def test_compare(self):
+        baseline = {'results': {'a': {'p50': 1.0}, 'b': {'p50': 1.0}}}
+        results = {'results': {'a': {'p50': 1.05}, 'b': {'p50': 1.5},
+                               'c': {'p50': 9.0}}}
+        regressions = compare(results, baseline, threshold=0.1)
+        self.assertEqual([x['case'] for x in regressions], ['b'])
+        self.assertEqual(len(compare(results, baseline, threshold=0.01)), 2)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_cli
+    :synopsis: Unit tests for udlg command line entry point
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+import allure
+from contextlib import redirect_stdout
+from unittest import TestCase, mock
+from udlg.builder import UDLGBuilder
+from udlg.cli import RunCache, main
+from udlg.index import StringIndex
+from udlg.storage import DirectoryWriter
+
+DOCUMENTS = {
+    'Dialogs/Lucas1.udlg': 'tests/documents/Lucas1.udlg',
+    'Dialogs/cc/cc_dogInMotion.udlg': 'tests/documents/cc_dogInMotion.udlg',
+}
+
+
+@allure.feature('Command line')
+class CommandLineTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.root = os.path.join(self.directory, 'Data')
+        with DirectoryWriter(self.root) as writer:
+            for name, path in DOCUMENTS.items():
+                with writer.create(name) as output, open(path, 'rb') as src:
+                    output.write(src.read())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, *names):
+        return os.path.join(self.directory, *names)
+
+    def run_main(self, arguments):
+        with redirect_stdout(io.StringIO()), \
+                mock.patch.object(UDLGBuilder, 'build',
+                                  wraps=UDLGBuilder.build) as build:
+            code = main(arguments + ['-d', self.root, '-j', '2'])
+        return code, build.call_count
+
+    @allure.story('commands')
+    def test_commands(self):
+        code, builds = self.run_main([
+            'check', 'stats', 'index', 'dump', '-D', self.path('dump'),
+            '-x', self.path('strings.db'), '-s', self.path('stats.json'),
+            '-R', self.path('report.json')
+        ])
+        self.assertEqual(code, 0)
+        with allure.step('check every document is parsed once'):
+            self.assertEqual(builds, len(DOCUMENTS))
+        with allure.step('check i18n files are dumped'):
+            with open(self.path('dump', 'Dialogs', 'Lucas1.udlg.txt'),
+                      'rb') as dumped, \
+                    open('tests/documents/Lucas1.udlg', 'rb') as source:
+                self.assertEqual(dumped.read(),
+                                 UDLGBuilder.build(source).unpack_i18n())
+        with allure.step('check strings are indexed'):
+            with StringIndex(self.path('strings.db')) as index:
+                self.assertEqual(index.get_totals()['files'], 2)
+                self.assertTrue(index.search('English'))
+        with allure.step('check statistics and report are stored'):
+            with open(self.path('stats.json')) as stream:
+                self.assertEqual(json.loads(stream.read())['documents'], 2)
+            with open(self.path('report.json')) as stream:
+                totals = json.loads(stream.read())['totals']
+            self.assertEqual((totals['ok'], totals['records']), (2, 103))
+
+    @allure.story('apply')
+    def test_apply(self):
+        shutil.copytree(self.root, self.path('i18n'))
+        self.run_main(['dump', '-D', self.path('i18n')])
+        name = self.path('i18n', 'Dialogs', 'Lucas1.udlg.txt')
+        with open(name, 'rb') as stream:
+            block = stream.read()
+        with open(name, 'wb') as stream:
+            stream.write(block.replace(b"1,0=>'Merchant1'",
+                                       b"1,0=>'Trader1'"))
+        code, builds = self.run_main([
+            'check', 'dump', 'apply', '-D', self.path('dump'),
+            '-i', self.path('i18n'), '-o', self.path('out')
+        ])
+        self.assertEqual((code, builds), (0, len(DOCUMENTS)))
+        with allure.step('check applied translation is stored'):
+            with open(self.path('out', 'Dialogs', 'Lucas1.udlg'),
+                      'rb') as stream:
+                document = UDLGBuilder.build(stream)
+            self.assertIn(b"1,0=>'Trader1'", document.unpack_i18n())
+        with allure.step('check dump is made before translation'):
+            with open(self.path('dump', 'Dialogs', 'Lucas1.udlg.txt'),
+                      'rb') as stream:
+                self.assertIn(b"1,0=>'Merchant1'", stream.read())
+
+    @allure.story('cache')
+    def test_cache(self):
+        arguments = ['check', 'dump', '-D', self.path('dump'),
+                     '-c', self.path('cache.json')]
+        self.assertEqual(self.run_main(arguments), (0, 2))
+        with allure.step('check up to date documents are not parsed'):
+            self.assertEqual(self.run_main(arguments), (0, 0))
+        with allure.step('check new command parses documents again'):
+            self.assertEqual(self.run_main(
+                arguments + ['index', '-x', self.path('strings.db')]
+            ), (0, 2))
+        with allure.step('check changed document is parsed again'):
+            with open(os.path.join(self.root, 'Dialogs', 'Lucas1.udlg'),
+                      'ab') as stream:
+                stream.write(b'\0')
+            self.assertEqual(self.run_main(arguments), (0, 1))
+        with allure.step('check cache is stored per document and command'):
+            cache = RunCache(self.path('cache.json'))
+            self.assertEqual(sorted(cache.documents['Dialogs/Lucas1.udlg']),
+                             ['check', 'dump', 'index'])
+
+    @allure.story('errors')
+    def test_failed(self):
+        with open(os.path.join(self.root, 'broken.udlg'), 'wb') as stream:
+            stream.write(b'\0' * 32)
+        code, _ = self.run_main(['check', '-c', self.path('cache.json')])
+        self.assertEqual(code, 1)
+        with allure.step('check failed documents are not cached'):
+            cache = RunCache(self.path('cache.json'))
+            self.assertNotIn('broken.udlg', cache.documents)
+            self.assertIn('Dialogs/Lucas1.udlg', cache.documents)
+        with allure.step('check apply requires i18n and output'):
+            with mock.patch('sys.stderr', io.StringIO()):
+                self.assertRaises(SystemExit, main,
+                                  ['apply', '-d', self.root])
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_columns
+    :synopsis: Unit tests for columnar string table
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import os
+import shutil
+import tempfile
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.columns import (
+    COLUMNS, FORMAT_BIN, FORMAT_NPY, StringTable, StringTableWriter,
+    parse_npy_header
+)
+from udlg.diff import get_class_name, get_strings
+from unittest import TestCase
+
+DOCUMENTS = ('Lucas1.udlg', 'cc_dogInMotion.udlg')
+
+
+def get_expected(names):
+    expected = []
+    for name in names:
+        with open(os.path.join('tests/documents', name), 'rb') as stream:
+            document = UDLGBuilder.build(stream)
+        for idx, record in enumerate(document.data.records):
+            strings = get_strings(record)
+            class_name = get_class_name(record.entry)
+            for jdx in sorted(strings, key=lambda x: -1 if x is None else x):
+                expected.append((
+                    name, idx, jdx,
+                    None if jdx is None else class_name.decode('utf-8'),
+                    strings[jdx].decode('utf-8')
+                ))
+    return expected
+
+
+@allure.feature('String table')
+class StringTableTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def export(self, format, names=DOCUMENTS):
+        path = os.path.join(self.directory, format)
+        with StringTableWriter(path, format=format) as writer:
+            for name in names:
+                with open(os.path.join('tests/documents', name),
+                          'rb') as stream:
+                    writer.add_stream(name, stream)
+        return path
+
+    @allure.story('export')
+    def test_export(self):
+        expected = get_expected(DOCUMENTS)
+        for format in (FORMAT_BIN, FORMAT_NPY):
+            with allure.step('check %s table has every string' % format):
+                with StringTable(self.export(format)) as table:
+                    self.assertEqual(len(table), len(expected))
+                    self.assertEqual([table[x] for x in range(len(table))],
+                                     expected)
+                    offsets = table.get_column('offset')
+                    lengths = table.get_column('length')
+                    self.assertEqual(offsets[1], offsets[0] + lengths[0])
+                    self.assertEqual(
+                        len(table.get_column('strings')),
+                        offsets[len(table) - 1] + lengths[len(table) - 1]
+                    )
+
+    @allure.story('npy')
+    def test_npy_header(self):
+        path = self.export(FORMAT_NPY)
+        count = len(get_expected(DOCUMENTS))
+        for name, (_, dtype) in COLUMNS:
+            with open(os.path.join(path, name + '.npy'), 'rb') as stream:
+                data = stream.read()
+            descr, shape, offset = parse_npy_header(data)
+            self.assertEqual((descr, shape), (dtype, count))
+            self.assertEqual(offset % 64, 0)
+            self.assertEqual(len(data) - offset,
+                             count * int(dtype[2:]))
+        self.assertRaises(ValueError, parse_npy_header, b'\0' * 128)
+
+    @allure.story('errors')
+    def test_broken_document(self):
+        path = os.path.join(self.directory, 'broken')
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            data = stream.read()
+        for format in (FORMAT_BIN, FORMAT_NPY):
+            with StringTableWriter(path, format=format) as writer:
+                self.assertRaises(Exception, writer.add_stream, 'broken',
+                                  io.BytesIO(data[:len(data) // 2]))
+                self.assertEqual((writer.size, writer.files, writer.classes),
+                                 (0, [], {}))
+                with open('tests/documents/cc_dogInMotion.udlg',
+                          'rb') as stream:
+                    writer.add_stream('cc_dogInMotion.udlg', stream)
+            with StringTable(path) as table:
+                self.assertEqual(
+                    [table[x] for x in range(len(table))],
+                    get_expected(['cc_dogInMotion.udlg'])
+                )
+                with allure.step('check classes of broken document are '
+                                 'dropped'):
+                    self.assertEqual(
+                        sorted(table.classes),
+                        sorted(set(x[3] for x in table if x[3] is not None))
+                    )
+
+    @allure.story('empty')
+    def test_empty(self):
+        for format in (FORMAT_BIN, FORMAT_NPY):
+            with StringTable(self.export(format, names=())) as table:
+                self.assertEqual(len(table), 0)
+                self.assertEqual(len(table.get_column('offset')), 0)
+                self.assertEqual(len(table.get_column('strings')), 0)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_compression
+    :synopsis: Unit tests for compressed input and output
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import os
+import shutil
+import tempfile
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.compression import (
+    GZIP, XZ, BZIP2, EXTENSIONS, detect, decompress_stream, compress_stream,
+    get_extensions, strip_extension, open_compressed
+)
+from udlg.streams import make_peekable
+from udlg.validator import validate_file
+from unittest import TestCase
+
+
+def compress(data, compression, level=None):
+    output = io.BytesIO()
+    with compress_stream(output, compression, level=level) as stream:
+        stream.write(data)
+    return output.getvalue()
+
+
+@allure.feature('Compression')
+class CompressionTest(TestCase):
+    def setUp(self):
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            self.lucas = stream.read()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @allure.story('detect')
+    def test_detect(self):
+        for compression in (GZIP, XZ, BZIP2):
+            stream = make_peekable(io.BytesIO(
+                compress(self.lucas, compression)
+            ))
+            self.assertEqual(detect(stream), compression)
+            self.assertEqual(stream.tell(), 0)
+        self.assertIsNone(detect(make_peekable(io.BytesIO(self.lucas))))
+        self.assertIsNone(detect(make_peekable(io.BytesIO(b''))))
+
+    @allure.story('build')
+    def test_build(self):
+        expected = bytes(UDLGBuilder.build(io.BytesIO(self.lucas)).to_bin())
+        for compression in (GZIP, XZ, BZIP2):
+            with allure.step('check %s document is built' % compression):
+                data = compress(self.lucas, compression, level=1)
+                document = UDLGBuilder.build(io.BytesIO(data))
+                self.assertEqual(bytes(document.to_bin()), expected)
+                self.assertEqual(
+                    decompress_stream(io.BytesIO(data)).read(), self.lucas
+                )
+
+    @allure.story('output')
+    def test_open_compressed(self):
+        path = os.path.join(self.directory, 'Lucas1.udlg.xz')
+        with open_compressed(path, XZ, level=1) as output:
+            output.write(self.lucas)
+        with open(path, 'rb') as stream:
+            self.assertEqual(decompress_stream(stream).read(), self.lucas)
+        self.assertEqual(validate_file(path)['size'], len(self.lucas))
+        with allure.step('check text output'):
+            path = os.path.join(self.directory, 'Lucas1.udlg.txt.gz')
+            with open_compressed(path, GZIP, binary=False) as output:
+                output.write(u'1,0=>\'Торговец\'')
+            with open(path, 'rb') as stream:
+                self.assertEqual(decompress_stream(stream).read().decode(
+                    'utf-8'), u'1,0=>\'Торговец\'')
+        self.assertRaises(ValueError, compress_stream, io.BytesIO(), 'zip')
+
+    @allure.story('output')
+    def test_extensions(self):
+        self.assertEqual(strip_extension('a/Lucas1.udlg.gz'),
+                         'a/Lucas1.udlg')
+        self.assertEqual(strip_extension('a/Lucas1.udlg'), 'a/Lucas1.udlg')
+        extensions = get_extensions(('.udlg', ))
+        self.assertEqual(len(extensions), len(EXTENSIONS) + 1)
+        self.assertIn('.udlg.xz', extensions)
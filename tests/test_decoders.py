@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_decoders
+    :synopsis: Unit tests for json dump apply engine
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import json
+import allure
+from udlg.builder import BinaryFormatterFileBuilder, UDLGBuilder
+from udlg.encoders import JSONStreamEncoder
+from udlg.decoders import JSONStreamApplier, apply_json, iter_json_array
+from unittest import TestCase
+
+
+class ChunkedStream(io.BytesIO):
+    """
+    Stream which could not be read whole at once
+    """
+    def read(self, size=-1):
+        if size is None or size < 0:
+            raise AssertionError('Stream is read whole')
+        return super(ChunkedStream, self).read(size)
+
+
+@allure.feature('Decoders')
+class JSONStreamApplierTest(TestCase):
+    def setUp(self):
+        self.lucas = open('tests/documents/Lucas1.udlg', 'rb').read()
+        self.class_instance = open('tests/documents/simpleclass.dat',
+                                   'rb').read()
+
+    def dump(self, source, udlg=True):
+        output = io.StringIO()
+        JSONStreamEncoder(output).encode_stream(io.BytesIO(source), udlg=udlg)
+        return json.loads(output.getvalue())
+
+    @allure.story('apply')
+    def test_apply_unchanged(self):
+        document = self.dump(self.lucas)
+        output = io.BytesIO()
+        changed = apply_json(io.BytesIO(self.lucas),
+                             io.StringIO(json.dumps(document)), output)
+        self.assertEqual(changed, 0)
+        self.assertEqual(output.getvalue(), self.lucas)
+
+    @allure.story('apply')
+    def test_apply_streaming(self):
+        document = self.dump(self.lucas)
+        output = io.BytesIO()
+        apply_json(ChunkedStream(self.lucas + b'tail'),
+                   io.StringIO(json.dumps(document)), output)
+        self.assertEqual(output.getvalue(), self.lucas + b'tail')
+
+    @allure.story('apply')
+    def test_apply_changes(self):
+        document = self.dump(self.lucas)
+        record_list = document['data']['records']
+        with allure.step('modify strings and primitive member'):
+            record_list[5]['entry']['members'][2]['value']['value'] = (
+                "::Another:: string to set. Юникод"
+            )
+            record_list[5]['entry']['members'][1] = 7
+            record_list[4]['entry']['members'][0]['value']['value'] = 'nobody'
+        output = io.BytesIO()
+        applier = JSONStreamApplier()
+        changed = applier.apply(
+            io.BytesIO(self.lucas),
+            io.StringIO(json.dumps(document, indent=2)), output
+        )
+        with allure.step('check'):
+            self.assertEqual(changed, 3)
+            self.assertEqual(applier.records_changed, 2)
+            instance = UDLGBuilder.build(io.BytesIO(output.getvalue()))
+            self.assertEqual(
+                instance.data.records[5].members[2],
+                "::Another:: string to set. Юникод".encode('utf-8')
+            )
+            self.assertEqual(instance.data.records[5].members[1], 7)
+            self.assertEqual(instance.data.records[4].members[0], b'nobody')
+            self.assertEqual(instance.data.records[30].members[3],
+                             UDLGBuilder.build(io.BytesIO(self.lucas))
+                             .data.records[30].members[3])
+
+    @allure.story('apply')
+    def test_apply_primitive_array(self):
+        document = self.dump(self.class_instance, udlg=False)
+        document['records'][14]['entry']['members'][0] = 5
+        output = io.BytesIO()
+        apply_json(io.BytesIO(self.class_instance),
+                   io.StringIO(json.dumps(document)), output, udlg=False)
+        instance = BinaryFormatterFileBuilder.build(
+            io.BytesIO(output.getvalue())
+        )
+        self.assertEqual(instance.records[14].entry.get_member_list()[:2],
+                         [5, 200])
+
+    @allure.story('apply')
+    def test_apply_structure_mismatch(self):
+        document = self.dump(self.lucas)
+        document['data']['records'][5]['entry']['members'].pop()
+        with self.assertRaises(ValueError):
+            apply_json(io.BytesIO(self.lucas),
+                       io.StringIO(json.dumps(document)), io.BytesIO())
+
+    @allure.story('json array')
+    def test_iter_json_array(self):
+        block = '{"count": 2, "records":\n [{"a": "]"} ,\n{"b": [1, 2]}]}'
+        for chunk_size in (1, 5, 1024):
+            self.assertEqual(
+                list(iter_json_array(io.StringIO(block),
+                                     chunk_size=chunk_size)),
+                [{'a': ']'}, {'b': [1, 2]}]
+            )
+        self.assertEqual(
+            list(iter_json_array(io.StringIO('{"records": []}'))), []
+        )
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('{"records": [{"a": 1}')))
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_diff
+    :synopsis: Unit tests for structural documents diff
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import json
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.generator import generate
+from udlg.diff import (
+    diff, get_longest_increasing, get_record_hash, ADDED, REMOVED, CHANGED
+)
+from udlg.enums import BinaryTypeEnum, PrimitiveTypeEnum
+from udlg.writer import NRBFWriter
+from unittest import TestCase
+
+
+def build(instances, seed=0):
+    stream = io.BytesIO()
+    generate(stream, udlg=True, instances=instances, seed=seed)
+    stream.seek(0)
+    return UDLGBuilder.build(stream)
+
+
+def build_classes():
+    """
+    :rtype: udlg.structure.UDLGFile
+    :return: document with ``ClassWithId`` records of two classes sharing
+        members layout and values
+    """
+    stream = io.BytesIO()
+    writer = NRBFWriter(stream)
+    writer.udlg_header()
+    writer.serialization_header()
+    writer.binary_library(2, 'Library')
+    for object_id, name in ((1, 'First'), (3, 'Second')):
+        writer.class_with_members_and_types(object_id, name, [
+            ('Id', BinaryTypeEnum.Primitive, PrimitiveTypeEnum.Int32)
+        ], 2)
+        writer.primitive(PrimitiveTypeEnum.Int32, 0)
+    for object_id, metadata_id in ((4, 1), (5, 3)):
+        writer.class_with_id(object_id, metadata_id)
+        writer.primitive(PrimitiveTypeEnum.Int32, 7)
+    writer.message_end()
+    stream.seek(0)
+    return UDLGBuilder.build(stream)
+
+
+@allure.feature('Diff')
+class DocumentDiffTest(TestCase):
+    def setUp(self):
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            self.lucas = stream.read()
+
+    def load(self):
+        return UDLGBuilder.build(io.BytesIO(self.lucas))
+
+    @allure.story('helpers')
+    def test_longest_increasing(self):
+        self.assertEqual(
+            get_longest_increasing([(0, 3), (1, 1), (2, 4), (3, 2), (4, 5)]),
+            [(1, 1), (3, 2), (4, 5)]
+        )
+        self.assertEqual(get_longest_increasing([]), [])
+
+    @allure.story('helpers')
+    def test_record_hash_class(self):
+        first, second = build_classes().data.records[3:5]
+        self.assertEqual(first.entry.to_dict()['members'],
+                         second.entry.to_dict()['members'])
+        self.assertNotEqual(get_record_hash(first), get_record_hash(second))
+
+    @allure.story('equal')
+    def test_equal(self):
+        result = diff(self.load(), self.load())
+        self.assertFalse(result)
+        self.assertEqual(result.equal, 96)
+        self.assertEqual(result.strings, [])
+        self.assertEqual(result.to_text(), '')
+
+    @allure.story('strings')
+    def test_changed_string(self):
+        translated = self.load()
+        translated.load_i18n("5,2=>'Hello'\n6,3=>'World'".encode('utf-8'))
+        result = diff(self.load(), translated)
+        with allure.step('check records'):
+            self.assertEqual([(x['status'], x['old'], x['new'])
+                              for x in result.records],
+                             [(CHANGED, 5, 5), (CHANGED, 6, 6)])
+            self.assertEqual(result.equal, 94)
+        with allure.step('check strings'):
+            entry = result.strings[0]
+            self.assertEqual(entry['status'], CHANGED)
+            self.assertEqual(entry['old'], (5, 2))
+            self.assertEqual(entry['new'], (5, 2))
+            self.assertEqual(entry['new_value'], b'Hello')
+            self.assertIn("+ 6,3=>'World'", result.to_text().split('\n'))
+        with allure.step('check json'):
+            data = json.loads(result.to_json())
+            self.assertEqual(data['totals']['strings'][CHANGED], 2)
+            self.assertEqual(data['strings'][1]['new_value'], 'World')
+
+    @allure.story('records')
+    def test_added_removed(self):
+        old, new = build(10), build(12)
+        with allure.step('check added records'):
+            result = diff(old, new)
+            totals = result.get_totals()
+            self.assertEqual(totals['records'][REMOVED], 0)
+            self.assertEqual(totals['records'][CHANGED], 0)
+            self.assertGreater(totals['records'][ADDED], 0)
+            self.assertTrue(all(x['old'] is None for x in result.records))
+            self.assertEqual(result.equal, old.data.count)
+            self.assertTrue(all(x['status'] == ADDED
+                                for x in result.strings))
+        with allure.step('check removed records'):
+            result = diff(new, old)
+            self.assertEqual(result.get_totals()['records'][REMOVED],
+                             totals['records'][ADDED])
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_encoders
+    :synopsis: Unit tests for streaming encoders
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import json
+import allure
+from udlg.builder import BinaryFormatterFileBuilder, UDLGBuilder
+from udlg.encoders import (
+    JSONStreamEncoder, CompactJSONStreamEncoder, NDJSONStreamEncoder,
+    encode_scalar
+)
+from unittest import TestCase
+
+
+def decode_strings(document):
+    if isinstance(document, bytes):
+        return document.decode('utf-8')
+    elif isinstance(document, dict):
+        return {key: decode_strings(value) for key, value in document.items()}
+    elif isinstance(document, list):
+        return [decode_strings(value) for value in document]
+    return document
+
+
+@allure.feature('Encoders')
+class JSONStreamEncoderTest(TestCase):
+    def setUp(self):
+        self.lucas = open('tests/documents/Lucas1.udlg', 'rb')
+        self.class_instance_file = open('tests/documents/simpleclass.dat',
+                                        'rb')
+
+    def tearDown(self):
+        self.lucas.close()
+        self.class_instance_file.close()
+
+    @allure.story('json')
+    def test_encode_same_as_to_dict(self):
+        instance = UDLGBuilder.build(self.lucas)
+        expected = json.dumps(decode_strings(instance.to_dict()))
+        with allure.step('encode built document'):
+            output = io.StringIO()
+            JSONStreamEncoder(output).encode(instance)
+            self.assertEqual(output.getvalue(), expected)
+        with allure.step('encode stream'):
+            self.lucas.seek(0)
+            output = io.StringIO()
+            JSONStreamEncoder(output).encode_stream(self.lucas)
+            self.assertEqual(output.getvalue(), expected)
+
+    @allure.story('json')
+    def test_chunk_size(self):
+        outputs = []
+        for chunk_size in (1, 13, 4096, 1 << 20):
+            self.lucas.seek(0)
+            output = io.StringIO()
+            JSONStreamEncoder(output, chunk_size=chunk_size).encode_stream(
+                self.lucas
+            )
+            outputs.append(output.getvalue())
+        self.assertEqual(len(set(outputs)), 1)
+
+    @allure.story('json')
+    def test_binary_formatter_stream(self):
+        instance = BinaryFormatterFileBuilder.build(self.class_instance_file)
+        self.class_instance_file.seek(0)
+        output = io.StringIO()
+        JSONStreamEncoder(output).encode_stream(self.class_instance_file,
+                                                udlg=False)
+        self.assertEqual(
+            json.loads(output.getvalue()),
+            decode_strings(instance.to_dict())
+        )
+
+    @allure.story('json')
+    def test_encode_scalar(self):
+        for value in (True, False, None, 0, -42, 1.5, float('nan'),
+                      'Юникод', b'bytes'):
+            self.assertEqual(encode_scalar(value),
+                             json.dumps(decode_strings(value)))
+        self.assertEqual(encode_scalar(b'\xff'), '"\\udcff"')
+
+
+@allure.feature('Encoders')
+class CompactJSONStreamEncoderTest(TestCase):
+    def setUp(self):
+        self.lucas = open('tests/documents/Lucas1.udlg', 'rb')
+
+    def tearDown(self):
+        self.lucas.close()
+
+    def encode(self, encoder_class):
+        self.lucas.seek(0)
+        output = io.StringIO()
+        encoder_class(output).encode_stream(self.lucas)
+        return output.getvalue()
+
+    @allure.story('compact')
+    def test_compact(self):
+        document = json.loads(self.encode(CompactJSONStreamEncoder))
+        full = json.loads(self.encode(JSONStreamEncoder))
+        record_list = document['data']['records']
+        with allure.step('check layout'):
+            self.assertEqual(document['format'], 'compact')
+            self.assertEqual(document['data']['count'], 96)
+            self.assertEqual(len(record_list), 96)
+            self.assertEqual(document['data']['header'],
+                             full['data']['header'])
+        with allure.step('check schema'):
+            record_type, schema, values = record_list[3]
+            self.assertEqual(record_type, 5)
+            self.assertEqual(schema, {
+                'object_id': 48, 'name': 'A4', 'library_id': 2,
+                'members': [['A4:N', 1, None], ['A4:P', 2, None]]
+            })
+            self.assertEqual(values, [[6, 56, 'player'], [10]])
+        with allure.step('check instance row'):
+            self.assertEqual(record_list[4],
+                             [1, 49, 48, [[6, 57, 'lucas'], [10]]])
+            self.assertEqual(record_list[-1], [11])
+        with allure.step('check size'):
+            self.assertLess(len(self.encode(CompactJSONStreamEncoder)) * 3,
+                            len(self.encode(JSONStreamEncoder)))
+
+    @allure.story('ndjson')
+    def test_ndjson(self):
+        lines = self.encode(NDJSONStreamEncoder).splitlines()
+        compact = json.loads(self.encode(CompactJSONStreamEncoder))
+        self.assertEqual(len(lines), 97)
+        header = json.loads(lines[0])
+        self.assertEqual(header['format'], 'ndjson')
+        self.assertEqual(header['data']['header'],
+                         compact['data']['header'])
+        self.assertEqual([json.loads(line) for line in lines[1:]],
+                         compact['data']['records'])
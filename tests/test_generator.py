@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_generator
+    :synopsis: Unit tests for synthetic documents writer and generator
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import allure
+from udlg import enums
+from udlg.builder import BinaryFormatterFileBuilder, UDLGBuilder
+from udlg.generator import DocumentGenerator, generate
+from udlg.structure import records
+from udlg.writer import NRBFWriter
+from unittest import TestCase
+
+
+@allure.feature('Generator')
+class GeneratorTest(TestCase):
+    @allure.story('writer')
+    def test_writer(self):
+        stream = io.BytesIO()
+        writer = NRBFWriter(stream)
+        writer.serialization_header()
+        writer.binary_library(2, 'Library')
+        writer.class_with_members_and_types(
+            1, 'Entry', [
+                ('Entry:Text', enums.BinaryTypeEnum.String, None),
+                ('Entry:Id', enums.BinaryTypeEnum.Primitive,
+                 enums.PrimitiveTypeEnum.Int16),
+                ('Entry:Values', enums.BinaryTypeEnum.PrimitiveArray,
+                 enums.PrimitiveTypeEnum.Byte),
+            ], 2
+        )
+        writer.binary_object_string(2, 'Юникод')
+        writer.primitive(enums.PrimitiveTypeEnum.Int16, -7)
+        writer.member_reference(3)
+        writer.array_single_primitive(3, enums.PrimitiveTypeEnum.Byte,
+                                      [1, 2, 3])
+        writer.message_end()
+        self.assertEqual(writer.size, len(stream.getvalue()))
+
+        instance = BinaryFormatterFileBuilder.build(
+            io.BytesIO(stream.getvalue())
+        )
+        with allure.step('check records'):
+            self.assertEqual(instance.count, 4)
+            entry = instance.records[1].entry
+            self.assertEqual(entry.members[0], 'Юникод'.encode('utf-8'))
+            self.assertEqual(entry.members[1], -7)
+            self.assertIsInstance(entry.members[2], records.MemberReference)
+            self.assertEqual(instance.records[2].entry.members, [1, 2, 3])
+            self.assertEqual(bytes(instance.to_bin()), stream.getvalue())
+
+    @allure.story('generator')
+    def test_generate(self):
+        stream = io.BytesIO()
+        stats = generate(stream, instances=50, schemas=3, strings=3,
+                         reference=0.5, seed=7)
+        data = stream.getvalue()
+        self.assertEqual(stats['bytes'], len(data))
+        self.assertEqual(stats['classes'], 3)
+        self.assertEqual(stats['instances'], 50)
+        self.assertEqual(stats['strings'], 150)
+        self.assertGreater(stats['references'], 0)
+
+        instance = UDLGBuilder.build(io.BytesIO(data))
+        with allure.step('check round trip'):
+            self.assertEqual(instance.data.count, stats['records'])
+            self.assertEqual(bytes(instance.to_bin()), data)
+        with allure.step('check records'):
+            record_types = [x.record_type for x in instance.data.records]
+            self.assertEqual(
+                record_types.count(enums.RecordTypeEnum.ClassWithId), 47
+            )
+            self.assertEqual(
+                record_types.count(
+                    enums.RecordTypeEnum.ClassWithMembersAndTypes
+                ), 3
+            )
+            self.assertEqual(record_types[-1],
+                             enums.RecordTypeEnum.MessageEnd)
+
+    @allure.story('generator')
+    def test_generate_size(self):
+        stream = io.BytesIO()
+        stats = generate(stream, size=64 * 1024, udlg=False)
+        self.assertGreaterEqual(len(stream.getvalue()), 64 * 1024)
+        instance = BinaryFormatterFileBuilder.build(
+            io.BytesIO(stream.getvalue())
+        )
+        self.assertEqual(instance.count, stats['records'])
+
+    @allure.story('generator')
+    def test_seed(self):
+        documents = []
+        for seed in (1, 1, 2):
+            stream = io.BytesIO()
+            DocumentGenerator(instances=20, seed=seed).generate(stream)
+            documents.append(stream.getvalue())
+        self.assertEqual(documents[0], documents[1])
+        self.assertNotEqual(documents[0], documents[2])
+
+    @allure.story('generator')
+    def test_unicode(self):
+        stream = io.BytesIO()
+        generate(stream, instances=10, unicode=1.0, reference=0)
+        instance = UDLGBuilder.build(io.BytesIO(stream.getvalue()))
+        value = instance.data.records[1].members[0].value.value
+        text = value.decode('utf-8')
+        self.assertGreater(len(value), len(text))
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_hashes
+    :synopsis: Unit tests for records and documents Merkle hashes
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import os
+import shutil
+import tempfile
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.hashes import (
+    DocumentHashes, digest, build_tree, hash_file, load_hashes,
+    compare_directories
+)
+from udlg.stats import ParseStats
+from unittest import TestCase
+
+
+@allure.feature('Hashes')
+class DocumentHashesTest(TestCase):
+    def setUp(self):
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            self.lucas = stream.read()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, content, **kwargs):
+        hashes = DocumentHashes(**kwargs)
+        document = UDLGBuilder.build(io.BytesIO(content), hashes=hashes)
+        return document, hashes
+
+    def translate(self, block):
+        document = UDLGBuilder.build(io.BytesIO(self.lucas))
+        document.load_i18n(block)
+        return bytes(document.to_bin())
+
+    @allure.story('tree')
+    def test_tree(self):
+        leaves = [digest(b'%i' % x) for x in range(5)]
+        levels = build_tree(leaves)
+        self.assertEqual([len(x) for x in levels], [5, 3, 2, 1])
+        self.assertEqual(levels[1][0], digest(leaves[0] + leaves[1]))
+        self.assertEqual(levels[1][2], leaves[4])
+        self.assertEqual(build_tree([]), [[]])
+
+    @allure.story('build')
+    def test_build(self):
+        document, hashes = self.build(self.lucas)
+        self.assertIs(document.hashes, hashes)
+        with allure.step('check record hashes cover raw bytes'):
+            self.assertEqual(len(hashes.records), document.data.count)
+            for idx, record in enumerate(document.data.records):
+                self.assertEqual(hashes.records[idx],
+                                 digest(bytes(record.to_bin())))
+        with allure.step('check hashes are stable'):
+            self.assertEqual(self.build(self.lucas)[1].document,
+                             hashes.document)
+        with allure.step('check instrumented build'):
+            hashes_stats = DocumentHashes()
+            UDLGBuilder.build(io.BytesIO(self.lucas), stats=ParseStats(),
+                              hashes=hashes_stats)
+            self.assertEqual(hashes_stats.records, hashes.records)
+
+    @allure.story('changes')
+    def test_changed(self):
+        _, hashes = self.build(self.lucas)
+        _, translated = self.build(
+            self.translate(b"5,2=>'Hello'\n6,3=>'World'")
+        )
+        self.assertNotEqual(hashes.document, translated.document)
+        self.assertEqual(translated.get_changed(hashes), [5, 6])
+        self.assertEqual(hashes.get_changed(hashes), [])
+
+    @allure.story('changes')
+    def test_ignore_ids(self):
+        _, hashes = self.build(self.lucas, ignore_ids=True)
+        _, raw = self.build(self.lucas)
+        self.assertNotEqual(hashes.records, raw.records)
+        self.assertEqual(self.build(self.lucas, ignore_ids=True)[1].document,
+                         hashes.document)
+
+    @allure.story('sidecar')
+    def test_sidecar(self):
+        old_dir = os.path.join(self.directory, 'old')
+        new_dir = os.path.join(self.directory, 'new')
+        os.makedirs(old_dir)
+        os.makedirs(new_dir)
+        for directory, content in ((old_dir, self.lucas),
+                                   (new_dir, self.translate(b"5,2=>'Hi'"))):
+            for name in ('Lucas1.udlg', 'Lucas2.udlg'):
+                open(os.path.join(directory, name), 'wb').write(
+                    content if name == 'Lucas1.udlg' else self.lucas
+                )
+        open(os.path.join(new_dir, 'Lucas3.udlg'), 'wb').write(self.lucas)
+        for directory in (old_dir, new_dir):
+            for name in ('Lucas1.udlg', 'Lucas2.udlg'):
+                hash_file(os.path.join(directory, name))
+
+        with allure.step('check sidecar'):
+            path = os.path.join(old_dir, 'Lucas1.udlg')
+            hashes = load_hashes(path)
+            self.assertEqual(hashes.document,
+                             hash_file(path, store=False).document)
+            self.assertIsNone(load_hashes(os.path.join(new_dir,
+                                                       'Lucas3.udlg')))
+        with allure.step('check directories comparison'):
+            result = compare_directories(old_dir, new_dir)
+            self.assertEqual(result['added'], ['Lucas3.udlg'])
+            self.assertEqual(result['removed'], [])
+            self.assertEqual(result['changed'], {'Lucas1.udlg': [5]})
+            self.assertEqual(result['unchanged'], 1)
+
+    @allure.story('sidecar')
+    def test_sidecar_broken(self):
+        _, hashes = self.build(self.lucas)
+        document = hashes.to_dict()
+        self.assertEqual(DocumentHashes.from_dict(document).records,
+                         hashes.records)
+        document['records'][0] = document['records'][1]
+        with self.assertRaises(ValueError):
+            DocumentHashes.from_dict(document)
+        with self.assertRaises(ValueError):
+            DocumentHashes.from_dict(dict(document, version=0))
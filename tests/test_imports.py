@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_imports
+    :synopsis: Import time budget and lazy import tests
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import allure
+from benchmarks.imports import (
+    IMPORT_BUDGETS, check_budgets, parse_importtime, trace_import
+)
+from unittest import TestCase
+
+#: module: modules it should not import, they're loaded on demand
+DEFERRED = (
+    ('udlg', ('udlg.builder', 'udlg.structure', 'ctypes')),
+    ('udlg.builder', ('concurrent.futures', 'logging', 're', 'gzip', 'lzma',
+                      'bz2', 'importlib')),
+    ('udlg.storage', ('zipfile', 'tarfile', 'tempfile', 'shutil', 'mmap',
+                      'hashlib')),
+    ('udlg.cli', ('udlg.builder', 'concurrent.futures', 'sqlite3')),
+    ('udlg.manifest', ('hashlib', )),
+    ('udlg.hashes', ('hashlib', 'udlg.builder', 'udlg.structure')),
+    ('udlg.columns', ('udlg.builder', 'mmap')),
+)
+
+
+@allure.feature('Imports')
+class ImportTest(TestCase):
+    @allure.story('importtime')
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   _ctypes\n'
+            'import time:       700 |        820 | ctypes\n'
+        )
+        self.assertEqual(parse_importtime(output), [
+            ('_ctypes', 0.00012, 0.00012), ('ctypes', 0.0007, 0.00082)
+        ])
+
+    @allure.story('lazy')
+    def test_deferred_imports(self):
+        #: interpreter startup (site, .pth files) could import some of them
+        startup = set(name for name, _, _ in trace_import('sys'))
+        for module, deferred in DEFERRED:
+            with allure.step('check %s imports' % module):
+                imported = [name for name, _, _ in trace_import(module)]
+                self.assertIn(module, imported)
+                self.assertEqual([
+                    name for name in deferred
+                    if name in imported and name not in startup
+                ], [])
+
+    @allure.story('lazy')
+    def test_lazy_attributes(self):
+        import udlg
+        from udlg.builder import BinaryFormatterFileBuilder
+        self.assertIs(udlg.BinaryFormatterFileBuilder,
+                      BinaryFormatterFileBuilder)
+        self.assertRaises(AttributeError, getattr, udlg, 'missing')
+
+    @allure.story('budget')
+    def test_budgets(self):
+        self.assertEqual(check_budgets(IMPORT_BUDGETS, repeat=3), [])
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_index
+    :synopsis: Unit tests for documents strings full text index
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import os
+import shutil
+import tempfile
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.index import StringIndex, iter_document_strings
+from udlg.manifest import Manifest
+from udlg.report import RunReport, CACHE_HIT, CACHE_MISS
+from udlg.storage import create_storage, open_storage
+from unittest import TestCase, mock
+
+
+@allure.feature('Index')
+class StringIndexTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.dialogs = os.path.join(self.directory, 'Dialogs')
+        os.makedirs(os.path.join(self.dialogs, 'npc'))
+        shutil.copy('tests/documents/Lucas1.udlg',
+                    os.path.join(self.dialogs, 'npc', 'Lucas1.udlg'))
+        shutil.copy('tests/documents/cc_dogInMotion.udlg', self.dialogs)
+        self.index = StringIndex(os.path.join(self.directory, 'index.db'))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.directory)
+
+    @allure.story('strings')
+    def test_document_strings(self):
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            document = UDLGBuilder.build(stream)
+        strings = list(iter_document_strings(document))
+        self.assertIn((5, 2, b'::A short man rises from behind his desk '
+                             b'(a6166da1-2d55-4af3-9ced-ab4c6a05fa8a)'),
+                      strings)
+
+    @allure.story('search')
+    def test_search(self):
+        self.assertEqual(self.index.update(self.dialogs)['added'], 2)
+        lucas = os.path.join(self.dialogs, 'npc', 'Lucas1.udlg')
+        with allure.step('check phrase search'):
+            result = self.index.search('GRENADE case')
+            self.assertEqual([x[:3] for x in result], [(lucas, 5, 7)])
+        with allure.step('check words search'):
+            result = self.index.search('grenade AND thud', words=True)
+            self.assertEqual([x[:3] for x in result], [(lucas, 5, 7)])
+        with allure.step('check short and special phrases'):
+            self.assertTrue(self.index.search('::'))
+            self.assertEqual(self.index.search('"%_'), [])
+        with allure.step('check limit'):
+            self.assertEqual(len(self.index.search('English', limit=2)), 2)
+
+    @allure.story('update')
+    def test_update(self):
+        report = RunReport('index')
+        self.index.update(self.dialogs, report=report)
+        totals = self.index.get_totals()
+        self.assertEqual(totals['files'], 2)
+        with allure.step('check unchanged files are skipped'):
+            report = RunReport('index')
+            result = self.index.update(self.dialogs, report=report)
+            self.assertEqual(result['skipped'], 2)
+            self.assertEqual([x['cache'] for x in report.files],
+                             [CACHE_HIT, CACHE_HIT])
+            self.assertEqual(self.index.get_totals(), totals)
+        with allure.step('check changed files are re-indexed'):
+            lucas = os.path.join(self.dialogs, 'npc', 'Lucas1.udlg')
+            with open(lucas, 'rb') as stream:
+                document = UDLGBuilder.build(stream)
+            document.load_i18n(b"5,7=>'Changed line'")
+            with open(lucas, 'wb') as stream:
+                stream.write(document.to_bin())
+            report = RunReport('index')
+            result = self.index.update(self.dialogs, report=report)
+            self.assertEqual(result['added'], 1)
+            self.assertIn(CACHE_MISS, [x['cache'] for x in report.files])
+            self.assertEqual(self.index.search('grenade case'), [])
+            self.assertEqual(self.index.search('changed line')[0][:3],
+                             (lucas, 5, 7))
+            self.assertEqual(self.index.search('changed', words=True)[0][:3],
+                             (lucas, 5, 7))
+            self.assertEqual(self.index.get_totals(), totals)
+        with allure.step('check removed files are dropped'):
+            os.remove(lucas)
+            self.assertEqual(self.index.update(self.dialogs)['removed'], 1)
+            self.assertEqual(self.index.search('changed line'), [])
+            self.assertEqual(self.index.get_totals()['files'], 1)
+
+    @allure.story('storage')
+    def test_archives(self):
+        for extension in ('.bundle', '.zip'):
+            path = os.path.join(self.directory, 'Dialogs' + extension)
+            with allure.step('check %s documents are indexed' % extension):
+                with open_storage(self.dialogs) as source, \
+                        create_storage(path) as output:
+                    for name in source.get_names():
+                        with source.open(name) as stream, \
+                                output.create(name) as stored:
+                            stored.write(stream.read())
+                self.assertEqual(self.index.update(path)['added'], 2)
+                lucas = os.path.normpath(path + '/npc/Lucas1.udlg')
+                self.assertIn((lucas, 5, 7), [
+                    x[:3] for x in self.index.search('GRENADE case')
+                ])
+                with open_storage(path) as storage:
+                    report = RunReport('index')
+                    result = self.index.update(storage, report=report)
+                self.assertEqual(result['skipped'], 2)
+                self.assertEqual([x['cache'] for x in report.files],
+                                 [CACHE_HIT, CACHE_HIT])
+
+    @allure.story('manifest')
+    def test_manifest(self):
+        manifest = Manifest()
+        self.assertEqual(
+            self.index.update(self.dialogs, manifest=manifest)['added'], 2
+        )
+        with allure.step('check unchanged files are not hashed'):
+            with mock.patch('udlg.index.get_file_digest') as digest, \
+                    mock.patch('udlg.manifest.get_file_digest') as hashed:
+                result = self.index.update(self.dialogs, manifest=manifest)
+            self.assertEqual(result['skipped'], 2)
+            self.assertFalse(digest.called or hashed.called)
+        with allure.step('check changed files are re-indexed'):
+            lucas = os.path.join(self.dialogs, 'npc', 'Lucas1.udlg')
+            with open(lucas, 'ab') as stream:
+                stream.write(b'\0')
+            result = self.index.update(self.dialogs, manifest=manifest)
+            self.assertEqual((result['added'], result['skipped']), (1, 1))
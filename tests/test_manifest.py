@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_manifest
+    :synopsis: Unit tests for corpus manifest
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import os
+import shutil
+import tempfile
+import allure
+from contextlib import redirect_stdout
+from unittest import TestCase, mock
+from udlg.cli import Runner, main
+from udlg.manifest import Manifest, get_file_digest
+from udlg.storage import DirectoryWriter
+
+DOCUMENTS = {
+    'Dialogs/Lucas1.udlg': 'tests/documents/Lucas1.udlg',
+    'Dialogs/cc/cc_dogInMotion.udlg': 'tests/documents/cc_dogInMotion.udlg',
+}
+
+
+@allure.feature('Manifest')
+class ManifestTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.root = os.path.join(self.directory, 'Data')
+        with DirectoryWriter(self.root) as writer:
+            for name, path in DOCUMENTS.items():
+                with writer.create(name) as output, open(path, 'rb') as src:
+                    output.write(src.read())
+            with writer.create('Dialogs/readme.txt') as output:
+                output.write(b'readme')
+        self.path = os.path.join(self.directory, 'manifest.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_path(self, name):
+        return os.path.join(self.root, *name.split('/'))
+
+    @allure.story('refresh')
+    def test_refresh(self):
+        manifest = Manifest(self.path)
+        changes = manifest.refresh(self.root, extensions=('.udlg', ))
+        self.assertEqual(changes, {'added': sorted(DOCUMENTS), 'changed': [],
+                                   'removed': []})
+        self.assertEqual(
+            manifest.get_digest(self.root, 'Dialogs/Lucas1.udlg'),
+            get_file_digest('tests/documents/Lucas1.udlg')
+        )
+        manifest.save()
+
+        with allure.step('check unchanged files are not hashed'):
+            manifest = Manifest(self.path)
+            with mock.patch('udlg.manifest.get_file_digest') as digest:
+                changes = manifest.refresh(self.root, extensions=('.udlg', ))
+            self.assertFalse(digest.called)
+            self.assertEqual(changes, {'added': [], 'changed': [],
+                                       'removed': []})
+        with allure.step('check touched file is hashed, but not reported'):
+            path = self.get_path('Dialogs/Lucas1.udlg')
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            changes = manifest.refresh(self.root, extensions=('.udlg', ))
+            self.assertEqual(changes['changed'], [])
+            self.assertEqual(
+                manifest.get_entries(self.root)['Dialogs/Lucas1.udlg'][1],
+                stat.st_mtime_ns + 10 ** 9
+            )
+        with allure.step('check changed and removed files are reported'):
+            with open(path, 'ab') as stream:
+                stream.write(b'\0')
+            os.remove(self.get_path('Dialogs/cc/cc_dogInMotion.udlg'))
+            changes = manifest.refresh(self.root, extensions=('.udlg', ))
+            self.assertEqual(changes, {
+                'added': [], 'changed': ['Dialogs/Lucas1.udlg'],
+                'removed': ['Dialogs/cc/cc_dogInMotion.udlg']
+            })
+
+    @allure.story('marks')
+    def test_marks(self):
+        manifest = Manifest(self.path)
+        manifest.refresh(self.root, extensions=('.udlg', ))
+        name = 'Dialogs/Lucas1.udlg'
+        self.assertFalse(manifest.is_marked('dump', self.root, name))
+        manifest.mark('dump', self.root, name)
+        manifest.save()
+        with allure.step('check marks are stored per key'):
+            manifest = Manifest(self.path)
+            manifest.refresh(self.root, extensions=('.udlg', ))
+            self.assertTrue(manifest.is_marked('dump', self.root, name))
+            self.assertFalse(manifest.is_marked('apply', self.root, name))
+        with allure.step('check changed file is not marked'):
+            with open(self.get_path(name), 'ab') as stream:
+                stream.write(b'\0')
+            manifest.refresh(self.root, extensions=('.udlg', ))
+            self.assertFalse(manifest.is_marked('dump', self.root, name))
+        with allure.step('check removed file marks are dropped'):
+            manifest.mark('dump', self.root, name)
+            os.remove(self.get_path(name))
+            manifest.refresh(self.root, extensions=('.udlg', ))
+            self.assertEqual(manifest.marks['dump'],
+                             {os.path.abspath(self.root): {}})
+
+    @allure.story('order')
+    def test_largest_first(self):
+        manifest = Manifest()
+        manifest.refresh(self.root)
+        names = manifest.get_names(self.root, largest_first=True)
+        sizes = [manifest.get_size(self.root, name) for name in names]
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+        self.assertEqual(manifest.get_names(self.root), sorted(names))
+
+    @allure.story('command line')
+    def test_command_line(self):
+        arguments = ['check', 'dump', '-d', self.root, '-m', self.path,
+                     '-c', os.path.join(self.directory, 'cache.json'),
+                     '-D', os.path.join(self.directory, 'dump')]
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main(arguments), 0)
+            with allure.step('check unchanged documents are not read'):
+                with mock.patch.object(Runner, 'read') as read:
+                    self.assertEqual(main(arguments), 0)
+                self.assertFalse(read.called)
+            with allure.step('check changed document is processed'):
+                with open(self.get_path('Dialogs/Lucas1.udlg'),
+                          'ab') as stream:
+                    stream.write(b'\0')
+                with mock.patch.object(Runner, 'read',
+                                       side_effect=Runner.read,
+                                       autospec=True) as read:
+                    self.assertEqual(main(arguments), 0)
+                self.assertEqual(read.call_count, 1)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_memory
+    :synopsis: Unit tests for memory footprint accounting
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import allure
+from udlg.builder import BinaryFormatterFileBuilder, UDLGBuilder
+from udlg.memory import MemoryReport, account, measure
+from unittest import TestCase
+
+
+@allure.feature('Memory')
+class MemoryReportTest(TestCase):
+    def setUp(self):
+        self.lucas = open('tests/documents/Lucas1.udlg', 'rb').read()
+
+    @allure.story('account')
+    def test_account(self):
+        document = UDLGBuilder.build(io.BytesIO(self.lucas))
+        data = account(document)
+        with allure.step('check record types'):
+            records = data['records']
+            self.assertEqual(
+                sum(x['count'] for x in records.values()),
+                document.data.count
+            )
+            self.assertEqual(records['MessageEnd']['count'], 1)
+            self.assertGreater(records['ClassWithMembersAndTypes']['bytes'],
+                               records['MessageEnd']['bytes'])
+            self.assertGreater(records['document']['bytes'], 0)
+        with allure.step('check strings and caches'):
+            self.assertGreater(data['strings']['count'], 0)
+            self.assertGreaterEqual(data['strings']['bytes'],
+                                    len(self.lucas) // 2)
+            self.assertIn('_context', data['caches'])
+        self.assertEqual(
+            data['total'],
+            sum(x['bytes'] for x in records.values()) +
+            data['strings']['bytes'] + sum(data['caches'].values())
+        )
+
+    @allure.story('account')
+    def test_account_binary_formatter(self):
+        stream = io.BytesIO(self.lucas)
+        stream.seek(24)
+        document = BinaryFormatterFileBuilder.build(stream)
+        data = account(document)
+        self.assertEqual(
+            sum(x['count'] for x in data['records'].values()), 96
+        )
+
+    @allure.story('measure')
+    def test_measure(self):
+        document, stats = measure(io.BytesIO(self.lucas))
+        self.assertEqual(document.data.count, 96)
+        self.assertGreater(stats['retained'], 0)
+        self.assertGreaterEqual(stats['peak'], stats['retained'])
+        self.assertTrue(stats['top'])
+
+    @allure.story('report')
+    def test_report(self):
+        report = MemoryReport()
+        report.add_path('tests/documents')
+        data = report.to_dict()
+        names = [x['name'] for x in data['documents']]
+        self.assertIn('tests/documents/Lucas1.udlg', names)
+        totals = data['totals']
+        self.assertEqual(totals['documents'], len(names))
+        self.assertEqual(totals['total'],
+                         sum(x['total'] for x in data['documents']))
+        self.assertEqual(totals['peak'],
+                         max(x['peak'] for x in data['documents']))
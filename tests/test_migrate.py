@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_migrate
+    :synopsis: Unit tests for i18n migration between document versions
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.generator import generate
+from udlg.migrate import migrate, iter_strings
+from udlg.utils.i18n import get_i18n_items
+from udlg.writer import NRBFWriter
+from unittest import TestCase
+
+
+def build(instances):
+    stream = io.BytesIO()
+    generate(stream, udlg=True, instances=instances, reference=0)
+    stream.seek(0)
+    return UDLGBuilder.build(stream)
+
+
+@allure.feature('Migrate')
+class MigrationTest(TestCase):
+    def setUp(self):
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            self.lucas = stream.read()
+        self.old = UDLGBuilder.build(io.BytesIO(self.lucas))
+        self.items = get_i18n_items(self.old.unpack_i18n())
+        self.translation = b'\n'.join(
+            ("%i,%i=>'T:%s'" % (idx, jdx, value)).encode('utf-8')
+            for idx, record in sorted(self.items.items())
+            for jdx, value in sorted(record.items())
+        )
+
+    def insert_string(self, value):
+        """
+        new version: top level string record inserted right after the
+        first record, every next record is shifted
+        """
+        stream = io.BytesIO()
+        NRBFWriter(stream).binary_object_string(100000, value)
+        document = UDLGBuilder.build(io.BytesIO(self.lucas))
+        record_list = document.data.records
+        content = b''.join([
+            bytes(document.header.to_bin()),
+            bytes(document.data.header.to_bin()),
+            bytes(record_list[0].to_bin()), stream.getvalue()
+        ] + [bytes(x.to_bin()) for x in record_list[1:]])
+        return UDLGBuilder.build(io.BytesIO(content))
+
+    @allure.story('strings')
+    def test_iter_strings(self):
+        strings = list(iter_strings(self.old))
+        self.assertEqual(len(strings),
+                         sum(len(x) for x in self.items.values()))
+        entry = strings[0]
+        self.assertEqual(entry.coordinates, (1, 0))
+        self.assertEqual(entry.owner, (b'DM', b'DM:DN'))
+        self.assertEqual(entry.value, b'Merchant1')
+
+    @allure.story('migrate')
+    def test_same_version(self):
+        migration = migrate(self.old, self.old, self.translation)
+        totals = migration.get_totals()
+        self.assertEqual(totals['matched'], len(migration.entries))
+        self.assertEqual(totals['orphaned'], 0)
+        self.assertEqual(migration.to_i18n(), self.translation)
+
+    @allure.story('migrate')
+    def test_shifted(self):
+        new = self.insert_string('Inserted')
+        new.load_i18n(b"6,2=>'Changed source'")
+        migration = migrate(self.old, new, self.translation)
+        with allure.step('check totals'):
+            totals = migration.get_totals()
+            self.assertEqual(totals['changed'], 1)
+            self.assertEqual(totals['new'], 0)
+            self.assertEqual(totals['orphaned'], 0)
+        with allure.step('check remapped i18n'):
+            items = get_i18n_items(migration.to_i18n())
+            self.assertEqual(items[2][0], 'T:Merchant1')
+            self.assertNotIn(1, items)
+            old_items = get_i18n_items(self.translation)
+            self.assertEqual(items[6][7], old_items[5][7])
+            self.assertEqual(items[6][2], old_items[5][2])
+        with allure.step('check report'):
+            report = migration.to_dict()
+            self.assertEqual(report['changed'][0]['new'], (6, 2))
+            self.assertEqual(report['changed'][0]['old'], (5, 2))
+            self.assertEqual(report['changed'][0]['source'],
+                             'Changed source')
+        with allure.step('check migrated translation applies'):
+            self.assertGreater(new.load_i18n(migration.to_i18n()), 0)
+            self.assertEqual(
+                new.data.records[6].members[7].value.value,
+                old_items[5][7].encode('utf-8')
+            )
+
+    @allure.story('migrate')
+    def test_new_orphaned(self):
+        short, long = build(10), build(12)
+        translation = b'\n'.join(
+            ("%i,%i=>'T:%s'" % (idx, jdx, value)).encode('utf-8')
+            for idx, record in sorted(
+                get_i18n_items(long.unpack_i18n()).items()
+            )
+            for jdx, value in sorted(record.items())
+        )
+        with allure.step('check orphaned strings'):
+            migration = migrate(long, short, translation)
+            totals = migration.get_totals()
+            self.assertEqual(totals['new'], 0)
+            self.assertGreater(totals['orphaned'], 0)
+            self.assertEqual(totals['matched'], len(migration.entries))
+        with allure.step('check new strings'):
+            migration = migrate(short, long, short.unpack_i18n())
+            totals = migration.get_totals()
+            self.assertGreater(totals['new'], 0)
+            self.assertEqual(totals['orphaned'], 0)
+            report = migration.to_dict()
+            self.assertEqual(len(report['new']), totals['new'])
+            self.assertEqual(
+                len(get_i18n_items(migration.to_i18n(untranslated=False))),
+                len(get_i18n_items(short.unpack_i18n()))
+            )
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_report
+    :synopsis: Unit tests for batch tools run reports
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import os
+import json
+import shutil
+import tempfile
+import allure
+from udlg.report import (
+    RunReport, Progress, create_report, scan_files, CACHE_HIT, CACHE_MISS,
+    STATUS_SKIPPED, STATUS_FAILED
+)
+from unittest import TestCase
+
+
+class Timer(object):
+    def __init__(self, step=1.0):
+        self.value = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.value += self.step
+        return self.value
+
+
+@allure.feature('Report')
+class RunReportTest(TestCase):
+    @allure.story('report')
+    def test_report(self):
+        report = RunReport('tool', slowest=2, timer=Timer())
+        for idx, path in enumerate(('a.udlg', 'b.udlg', 'c.udlg')):
+            with report.file(path) as entry:
+                entry['bytes_in'] = 1024 * 1024
+                entry['records'] = 10
+                entry['strings_changed'] = idx
+                entry['cache'] = CACHE_MISS
+        with report.file('d.udlg') as entry:
+            entry['bytes_in'] = 1024 * 1024
+            entry['status'] = STATUS_SKIPPED
+            entry['cache'] = CACHE_HIT
+        with self.assertRaises(ValueError):
+            with report.file('e.udlg'):
+                raise ValueError("broken")
+
+        data = report.to_dict()
+        with allure.step('check totals'):
+            totals = data['totals']
+            self.assertEqual(totals['files'], 5)
+            self.assertEqual(totals['ok'], 3)
+            self.assertEqual(totals['skipped'], 1)
+            self.assertEqual(totals['failed'], 1)
+            self.assertEqual(totals['records'], 30)
+            self.assertEqual(totals['strings_changed'], 3)
+            self.assertEqual(totals['cache_hits'], 1)
+            self.assertEqual(totals['cache_misses'], 3)
+            #: skipped files are not counted in throughput
+            self.assertEqual(totals['bytes_in'], 3 * 1024 * 1024)
+            self.assertEqual(totals['time'], 4.0)
+            self.assertEqual(totals['mb_per_second'], 0.75)
+        with allure.step('check files'):
+            self.assertEqual(data['files'][-1]['status'], STATUS_FAILED)
+            self.assertEqual(data['files'][-1]['error'],
+                             'ValueError: broken')
+            self.assertEqual(len(data['slowest']), 2)
+        json.dumps(data)
+
+    @allure.story('progress')
+    def test_progress(self):
+        stream = io.StringIO()
+        progress = Progress(2, 2048, stream=stream, timer=Timer())
+        progress.update('a.udlg', 1024)
+        self.assertIn('[1/2]  50.0%', stream.getvalue())
+        self.assertIn('ETA 00:00:01', stream.getvalue())
+        progress.update('b.udlg', 1024)
+        self.assertIn('[2/2] 100.0%', stream.getvalue())
+        self.assertIn('ETA 00:00:00', stream.getvalue())
+
+    @allure.story('files')
+    def test_scan_files(self):
+        directory = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(directory, 'b'))
+            for name in ('b/2.udlg', 'a.udlg', 'c.txt'):
+                with open(os.path.join(directory, name), 'wb') as output:
+                    output.write(b'data')
+            paths = scan_files(directory, extensions=('.udlg', ))
+            self.assertEqual(
+                [os.path.relpath(x, directory) for x in paths],
+                ['a.udlg', os.path.join('b', '2.udlg')]
+            )
+            report = create_report('tool', paths, progress=True,
+                                   stream=io.StringIO())
+            self.assertEqual(report.progress.files, 2)
+            self.assertEqual(report.progress.size, 8)
+        finally:
+            shutil.rmtree(directory)
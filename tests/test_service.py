@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_service
+    :synopsis: Unit tests for dialog service and its document cache
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import allure
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from udlg.service import DialogService, DocumentCache, create_server
+from udlg.storage import DirectoryStorage, DirectoryWriter, open_storage
+from unittest import TestCase
+
+DOCUMENTS = {
+    'Dialogs/Lucas1.udlg': 'tests/documents/Lucas1.udlg',
+    'Dialogs/cc/cc_dogInMotion.udlg': 'tests/documents/cc_dogInMotion.udlg',
+}
+
+
+class ServiceTestMixin(object):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.root = os.path.join(self.directory, 'Data')
+        with DirectoryWriter(self.root) as writer:
+            for name, path in DOCUMENTS.items():
+                with writer.create(name) as output, open(path, 'rb') as src:
+                    output.write(src.read())
+        self.storage = DirectoryStorage(self.root)
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.directory)
+
+
+@allure.feature('Service')
+class DocumentCacheTest(ServiceTestMixin, TestCase):
+    @allure.story('cache')
+    def test_lru(self):
+        cache = DocumentCache(self.storage)
+        lucas = cache.get('Dialogs/Lucas1.udlg')
+        self.assertIs(cache.get('Dialogs/Lucas1.udlg'), lucas)
+        self.assertRaises(KeyError, cache.get, 'Dialogs/missing.udlg')
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertGreater(stats['size'], 0)
+
+        with allure.step('check least recently used document is evicted'):
+            cache.budget = cache.size
+            cache.get('Dialogs/cc/cc_dogInMotion.udlg')
+            self.assertNotIn('Dialogs/Lucas1.udlg', cache)
+            self.assertIn('Dialogs/cc/cc_dogInMotion.udlg', cache)
+            self.assertEqual(cache.get_stats()['evictions'], 1)
+        with allure.step('check document over budget stays alone'):
+            cache.budget = 1
+            cache.get('Dialogs/Lucas1.udlg')
+            self.assertEqual(list(cache.documents), ['Dialogs/Lucas1.udlg'])
+
+
+@allure.feature('Service')
+class DialogServiceTest(ServiceTestMixin, TestCase):
+    @allure.story('translations')
+    def test_translations_survive_eviction(self):
+        service = DialogService(self.storage, budget=1,
+                                export_root=self.directory)
+        name = 'Dialogs/Lucas1.udlg'
+        self.assertEqual(service.set_strings(name, [
+            {'record': 1, 'member': 0, 'value': u'Торговец'}
+        ]), 1)
+        binary = service.get_binary(name)
+        service.get_strings('Dialogs/cc/cc_dogInMotion.udlg')
+        self.assertNotIn(name, service.cache)
+        self.assertEqual(service.get_binary(name), binary)
+        strings = service.get_strings(name)
+        self.assertEqual(strings[0], {'record': 1, 'member': 0,
+                                      'value': u'Торговец',
+                                      'source': 'Merchant1'})
+        self.assertIn(u"1,0=>'Торговец'".encode('utf-8'),
+                      service.get_i18n(name))
+
+        with allure.step('check export'):
+            output = os.path.join(self.directory, 'translated')
+            self.assertEqual(service.export('translated'), [name])
+            with open_storage(output) as storage:
+                self.assertEqual(storage.get_names(), [name])
+                with storage.open(name) as stream:
+                    self.assertEqual(stream.read(), binary)
+
+        with allure.step('check export is kept under export root'):
+            for output in ('..', '../outside', '/tmp/outside', '.'):
+                self.assertRaises(ValueError, service.export, output)
+            self.assertFalse(os.path.exists(
+                os.path.join(os.path.dirname(self.directory), 'outside')
+            ))
+            self.assertRaises(ValueError, DialogService(self.storage).export,
+                              'translated')
+
+        with allure.step('check reset'):
+            self.assertEqual(service.reset(name), 1)
+            with open(DOCUMENTS[name], 'rb') as stream:
+                self.assertEqual(service.get_binary(name), stream.read())
+
+    @allure.story('cache')
+    def test_translations_are_accounted(self):
+        service = DialogService(self.storage)
+        name = 'Dialogs/Lucas1.udlg'
+        service.get_strings(name)
+        size = service.cache.size
+        service.set_strings(name, [
+            {'record': 1, 'member': 0, 'value': 'Merchant' * 10000}
+        ])
+        self.assertGreater(service.cache.size, size + 80000)
+        self.assertEqual(service.cache.size,
+                         service.cache.documents[name][1])
+
+        with allure.step('check budget is kept once strings are changed'):
+            service.get_strings('Dialogs/cc/cc_dogInMotion.udlg')
+            service.cache.budget = service.cache.size - 1
+            service.set_strings('Dialogs/cc/cc_dogInMotion.udlg', [
+                {'record': 1, 'member': 0, 'value': 'Dog'}
+            ])
+            self.assertNotIn(name, service.cache)
+        with allure.step('check reset is accounted'):
+            service.cache.budget = 10 ** 9
+            service.set_strings(name, [
+                {'record': 1, 'member': 0, 'value': 'Merchant' * 10000}
+            ])
+            size = service.cache.size
+            service.reset(name)
+            self.assertLess(service.cache.size, size - 80000)
+
+    @allure.story('translations')
+    def test_malformed(self):
+        service = DialogService(self.storage)
+        name = 'Dialogs/Lucas1.udlg'
+        self.assertRaises(ValueError, service.set_strings, name, [{}])
+        self.assertRaises(TypeError, service.set_strings, name, [
+            {'record': 2, 'member': 1, 'value': 'x'}
+        ])
+        self.assertEqual(service.load_i18n(name, b"1,0=>'Lucas'"), 1)
+
+
+@allure.feature('Service')
+class ServerTest(ServiceTestMixin, TestCase):
+    def setUp(self):
+        super(ServerTest, self).setUp()
+        self.server = create_server(DialogService(self.storage), port=0)
+        self.url = 'http://%s:%i' % self.server.server_address[:2]
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        super(ServerTest, self).tearDown()
+
+    def request(self, path, data=None, method=None,
+                content_type='application/json'):
+        headers = {'Content-Type': content_type} if data is not None else {}
+        request = Request(self.url + path, data=data, method=method,
+                          headers=headers)
+        with urlopen(request) as response:
+            body = response.read()
+            if response.headers['Content-Type'] == 'application/json':
+                return json.loads(body.decode('utf-8'))
+            return body
+
+    @allure.story('http')
+    def test_endpoints(self):
+        name = '/Dialogs/Lucas1.udlg'
+        self.assertEqual(self.request('/documents')['documents'],
+                         sorted(DOCUMENTS))
+        self.assertEqual(
+            self.request('/strings' + name)['strings'][0]['value'],
+            'Merchant1'
+        )
+        data = json.dumps([{'record': 1, 'member': 0, 'value': 'Lucas'}])
+        self.assertEqual(
+            self.request('/strings' + name, data=data.encode('utf-8')),
+            {'changed': 1}
+        )
+        data = json.dumps({'i18n': "1,0=>'Lucas'"})
+        self.assertEqual(self.request('/i18n' + name, method='PUT',
+                                      data=data.encode('utf-8')),
+                         {'changed': 0})
+        self.assertIn(b"1,0=>'Lucas'", self.request('/i18n' + name))
+        self.assertIn(b'Lucas', self.request('/binary' + name))
+        self.assertEqual(self.request('/strings' + name, method='DELETE'),
+                         {'restored': 1})
+        self.assertEqual(self.request('/stats')['translated'], 0)
+
+        with allure.step('check errors'):
+            for path, status in (('/strings/Dialogs/missing.udlg', 404),
+                                 ('/unknown', 404)):
+                with self.assertRaises(HTTPError) as context:
+                    self.request(path)
+                self.assertEqual(context.exception.code, status)
+            for path, method, body in (('/strings', 'POST', b'{'),
+                                       ('/i18n', 'PUT', b'{'),
+                                       ('/i18n', 'PUT', b'[]'),
+                                       ('/i18n', 'PUT', b'{"i18n": 1}')):
+                with self.assertRaises(HTTPError) as context:
+                    self.request(path + name, data=body, method=method)
+                self.assertEqual(context.exception.code, 400)
+            with self.assertRaises(HTTPError) as context:
+                self.request('/export', data=b'{"output": "translated"}')
+            self.assertEqual(context.exception.code, 400)
+
+        with allure.step('check non json content type is rejected'):
+            for content_type in ('text/plain',
+                                 'application/x-www-form-urlencoded'):
+                with self.assertRaises(HTTPError) as context:
+                    self.request('/strings' + name, content_type=content_type,
+                                 data=data.encode('utf-8'))
+                self.assertEqual(context.exception.code, 415)
+            self.assertEqual(self.request('/stats')['translated'], 0)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_stats
+    :synopsis: Unit tests for parse instrumentation
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import json
+import allure
+from udlg.builder import BinaryFormatterFileBuilder, UDLGBuilder
+from udlg.context import ParserContext
+from udlg.stats import ParseStats
+from udlg.structure import common, records, structure
+from unittest import TestCase, mock
+
+
+@allure.feature('Stats')
+class ParseStatsTest(TestCase):
+    def setUp(self):
+        self.lucas = open('tests/documents/Lucas1.udlg', 'rb').read()
+
+    @allure.story('collect')
+    def test_collect(self):
+        stats = ParseStats()
+        instance = UDLGBuilder.build(io.BytesIO(self.lucas), stats=stats)
+        self.assertEqual(instance.data.count, 96)
+        data = stats.to_dict()
+        with allure.step('check totals'):
+            self.assertEqual(data['documents'], 1)
+            self.assertEqual(data['bytes'], len(self.lucas))
+            self.assertGreaterEqual(data['bytes_read'], data['bytes'])
+            self.assertGreater(data['reads'], 0)
+        with allure.step('check record types'):
+            entries = data['records']
+            self.assertEqual(sum(x['count'] for x in entries.values()), 96)
+            self.assertEqual(entries['MessageEnd'],
+                             dict(entries['MessageEnd'], count=1, bytes=1))
+            #: everything but udlg and serialization headers
+            self.assertEqual(sum(x['bytes'] for x in entries.values()),
+                             len(self.lucas) - 24 - 17)
+            self.assertLessEqual(sum(x['time'] for x in entries.values()),
+                                 data['time'])
+        with allure.step('check sections'):
+            sections = data['sections']
+            self.assertEqual(sections['read_7bit_encoded_int']['calls'],
+                             sections['string_decoding']['calls'])
+            #: nested class instances are counted too
+            self.assertGreaterEqual(
+                sections['class_with_id_members']['calls'],
+                entries['ClassWithId']['count']
+            )
+        json.loads(stats.to_json())
+
+    @allure.story('collect')
+    def test_accumulate(self):
+        stats = ParseStats()
+        UDLGBuilder.build(io.BytesIO(self.lucas), stats=stats)
+        stream = io.BytesIO(self.lucas)
+        stream.seek(24)
+        BinaryFormatterFileBuilder.build(stream, stats=stats)
+        data = stats.to_dict()
+        self.assertEqual(data['documents'], 2)
+        self.assertEqual(data['bytes'], len(self.lucas) * 2 - 24)
+
+        with allure.step('check merged collectors'):
+            merged = ParseStats()
+            for idx in range(2):
+                merged.merge(ParseStats().merge(stats))
+            self.assertEqual(merged.documents, 4)
+            self.assertEqual(merged.records['MessageEnd']['count'], 4)
+            self.assertEqual(
+                merged.sections['string_decoding']['calls'],
+                stats.sections['string_decoding']['calls'] * 2
+            )
+
+    @allure.story('disabled')
+    def test_parser_is_not_patched(self):
+        originals = (
+            structure.Record._initiate, common.LengthPrefixedString._initiate,
+            common.read_7bit_encoded_int_from_stream
+        )
+        with mock.patch('udlg.builder.ParserContext',
+                        wraps=ParserContext) as context:
+            UDLGBuilder.build(io.BytesIO(self.lucas), stats=ParseStats())
+        self.assertEqual(originals, (
+            structure.Record._initiate, common.LengthPrefixedString._initiate,
+            common.read_7bit_encoded_int_from_stream
+        ))
+        self.assertNotIn('_initiate_members', vars(records.ClassWithId))
+        self.assertIsInstance(context.call_args[1]['stats'], ParseStats)
+
+        with allure.step('check builds without collector report nothing'):
+            with mock.patch.object(ParseStats, 'add_record') as add_record, \
+                    mock.patch.object(ParseStats, 'add_section') as section:
+                UDLGBuilder.build(io.BytesIO(self.lucas))
+            self.assertFalse(add_record.called or section.called)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_storage
+    :synopsis: Unit tests for directory and archive storages
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import os
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.storage import (
+    DirectoryStorage, ZipStorage, TarStorage, BundleStorage, DirectoryWriter,
+    ZipWriter, TarWriter, BundleWriter, open_storage, create_storage
+)
+from unittest import TestCase
+
+DOCUMENTS = {
+    'Dialogs/Lucas1.udlg': 'tests/documents/Lucas1.udlg',
+    'Dialogs/cc/cc_dogInMotion.udlg': 'tests/documents/cc_dogInMotion.udlg',
+}
+
+
+@allure.feature('Storage')
+class StorageTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.content = {}
+        for name, path in DOCUMENTS.items():
+            with open(path, 'rb') as stream:
+                self.content[name] = stream.read()
+        self.root = os.path.join(self.directory, 'Data')
+        with DirectoryWriter(self.root) as writer:
+            self.write(writer)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, writer):
+        for name, content in sorted(self.content.items()):
+            with writer.create(name) as output:
+                output.write(content)
+            self.assertEqual(writer.get_size(name), len(content))
+
+    def check(self, storage):
+        self.assertEqual(storage.get_names(), sorted(self.content))
+        self.assertEqual(storage.get_names(('.txt', )), [])
+        for name, content in self.content.items():
+            self.assertTrue(storage.exists(name))
+            self.assertEqual(storage.get_size(name), len(content))
+            with storage.open(name) as stream:
+                document = UDLGBuilder.build(stream)
+            self.assertEqual(bytes(document.to_bin()), content)
+        self.assertFalse(storage.exists('Dialogs/missing.udlg'))
+
+    @allure.story('directory')
+    def test_directory(self):
+        with open_storage(self.root) as storage:
+            self.assertIsInstance(storage, DirectoryStorage)
+            self.check(storage)
+            self.assertEqual(
+                storage.get_path('Dialogs/Lucas1.udlg'),
+                self.root + '/Dialogs/Lucas1.udlg'
+            )
+
+    @allure.story('archive')
+    def test_zip(self):
+        path = os.path.join(self.directory, 'dialogs.zip')
+        with create_storage(path) as writer:
+            self.assertIsInstance(writer, ZipWriter)
+            self.write(writer)
+        self.assertEqual(sorted(zipfile.ZipFile(path).namelist()),
+                         sorted(self.content))
+        with open_storage(path) as storage:
+            self.assertIsInstance(storage, ZipStorage)
+            self.check(storage)
+
+    @allure.story('archive')
+    def test_tar(self):
+        for extension in ('.tar', '.tar.gz', '.tar.xz'):
+            with allure.step('check %s archive' % extension):
+                path = os.path.join(self.directory, 'dialogs' + extension)
+                with create_storage(path) as writer:
+                    self.assertIsInstance(writer, TarWriter)
+                    self.write(writer)
+                self.assertTrue(tarfile.is_tarfile(path))
+                with open_storage(path) as storage:
+                    self.assertIsInstance(storage, TarStorage)
+                    self.check(storage)
+
+    @allure.story('bundle')
+    def test_bundle(self):
+        path = os.path.join(self.directory, 'dialogs.bundle')
+        with create_storage(path) as writer:
+            self.assertIsInstance(writer, BundleWriter)
+            self.write(writer)
+        with open_storage(path) as storage:
+            self.assertIsInstance(storage, BundleStorage)
+            self.check(storage)
+            for name in storage.get_names():
+                self.assertTrue(storage.verify(name))
+        with allure.step('check damaged payload is detected'):
+            with open(path, 'r+b') as stream:
+                stream.seek(-1, os.SEEK_END)
+                stream.write(b'\xff')
+            with open_storage(path) as storage:
+                self.assertEqual(
+                    [storage.verify(name) for name in storage.get_names()],
+                    [True, False]
+                )
+        with allure.step('check bundle with no documents'):
+            path = os.path.join(self.directory, 'empty.bundle')
+            BundleWriter(path).close()
+            with open_storage(path) as storage:
+                self.assertEqual(storage.get_names(), [])
+
+    @allure.story('archive')
+    def test_unsupported(self):
+        path = os.path.join(self.directory, 'Data', 'Dialogs', 'Lucas1.udlg')
+        self.assertRaises(ValueError, open_storage, path)
+        self.assertIsInstance(create_storage(self.directory),
+                              DirectoryWriter)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_streams
+    :synopsis: Unit tests for forward only streams
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import os
+import gzip
+import threading
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.encoders import JSONStreamEncoder
+from udlg.hashes import DocumentHashes
+from udlg.stats import ParseStats
+from udlg.streams import PeekableStream, make_peekable
+from unittest import TestCase
+
+
+class ForwardStream(object):
+    """
+    Stream without offsets, like pipes and sockets are, reads are short
+    """
+    def __init__(self, content, size=7):
+        self.stream = io.BytesIO(content)
+        self.size = size
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return self.stream.read()
+        return self.stream.read(min(size, self.size))
+
+    def seek(self, offset, whence=0):
+        raise io.UnsupportedOperation('seek')
+
+    def tell(self):
+        raise io.UnsupportedOperation('tell')
+
+
+@allure.feature('Streams')
+class PeekableStreamTest(TestCase):
+    def setUp(self):
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            self.lucas = stream.read()
+
+    @allure.story('peek')
+    def test_peek(self):
+        stream = PeekableStream(ForwardStream(b'0123456789'), chunk_size=4)
+        self.assertEqual(stream.peek(1), b'0')
+        self.assertEqual(stream.read(3), b'012')
+        with allure.step('check short relative seeks'):
+            self.assertEqual(stream.seek(-2, 1), 1)
+            self.assertEqual(stream.read(2), b'12')
+        self.assertEqual(stream.peek(5), b'34567')
+        self.assertEqual(stream.tell(), 3)
+        with allure.step('check seeks outside of buffer'):
+            self.assertEqual(stream.seek(7), 7)
+            self.assertRaises(io.UnsupportedOperation, stream.seek, 0)
+        self.assertEqual(stream.read(), b'789')
+        self.assertEqual(stream.read(1), b'')
+        self.assertEqual(stream.peek(1), b'')
+        self.assertEqual(stream.tell(), 10)
+
+    @allure.story('peek')
+    def test_make_peekable(self):
+        stream = make_peekable(io.BytesIO(b'data'))
+        self.assertIs(make_peekable(stream), stream)
+        self.assertEqual(stream.tell(), 0)
+
+    @allure.story('build')
+    def test_build(self):
+        expected = UDLGBuilder.build(io.BytesIO(self.lucas)).to_bin()
+        with allure.step('check document is built without seeks'):
+            document = UDLGBuilder.build(ForwardStream(self.lucas))
+            self.assertEqual(document.to_bin(), expected)
+        with allure.step('check decompression stream'):
+            stream = gzip.GzipFile(fileobj=io.BytesIO(
+                gzip.compress(self.lucas)
+            ))
+            self.assertEqual(UDLGBuilder.build(stream).to_bin(), expected)
+
+    @allure.story('build')
+    def test_build_pipe(self):
+        read_fd, write_fd = os.pipe()
+
+        def write():
+            with os.fdopen(write_fd, 'wb') as output:
+                output.write(self.lucas)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        with os.fdopen(read_fd, 'rb') as stream:
+            document = UDLGBuilder.build(stream)
+        writer.join()
+        self.assertEqual(bytes(document.to_bin()), self.lucas)
+
+    @allure.story('build')
+    def test_build_instrumented(self):
+        stats, hashes = ParseStats(), DocumentHashes()
+        UDLGBuilder.build(ForwardStream(self.lucas), stats=stats)
+        UDLGBuilder.build(ForwardStream(self.lucas), hashes=hashes)
+        self.assertEqual(stats.size, len(self.lucas))
+        self.assertEqual(stats.read_size, len(self.lucas))
+        expected = DocumentHashes()
+        UDLGBuilder.build(io.BytesIO(self.lucas), hashes=expected)
+        self.assertEqual(hashes.records, expected.records)
+        self.assertEqual(hashes.document, expected.document)
+
+    @allure.story('encode')
+    def test_encode_stream(self):
+        output, expected = io.StringIO(), io.StringIO()
+        JSONStreamEncoder(output).encode_stream(ForwardStream(self.lucas))
+        JSONStreamEncoder(expected).encode_stream(io.BytesIO(self.lucas))
+        self.assertEqual(output.getvalue(), expected.getvalue())
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_threading
+    :synopsis: Stress tests for concurrent builds and serialization
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import sys
+import time
+import threading
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.cli import READ_AHEAD
+from udlg.generator import generate
+from udlg.stats import ParseStats
+from unittest import TestCase
+
+THREADS = 16
+ROUNDS = 2
+#: switch threads often, so they interleave inside parser
+SWITCH_INTERVAL = 1e-5
+
+
+def get_corpus():
+    corpus = {}
+    for name in ('Lucas1.udlg', 'cc_dogInMotion.udlg'):
+        with open('tests/documents/%s' % name, 'rb') as stream:
+            corpus[name] = stream.read()
+    for size in (4096, 16384):
+        stream = io.BytesIO()
+        generate(stream, size=size)
+        corpus['generated_%i.udlg' % size] = stream.getvalue()
+    return corpus
+
+
+@allure.feature('Threading')
+class ThreadingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = get_corpus()
+        cls.expected = {}
+        for name, content in cls.corpus.items():
+            document = UDLGBuilder.build(io.BytesIO(content))
+            cls.expected[name] = (bytes(document.to_bin()),
+                                  document.unpack_i18n())
+
+    def setUp(self):
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(SWITCH_INTERVAL)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+
+    def run_threads(self, target, amount=THREADS):
+        barrier = threading.Barrier(amount)
+        errors = []
+
+        def run(idx):
+            barrier.wait()
+            try:
+                target(idx)
+            except Exception as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=run, args=(idx, ))
+                   for idx in range(amount)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def open(self, name):
+        return io.BytesIO(self.corpus[name])
+
+    @allure.story('build')
+    def test_build_many(self):
+        names = sorted(self.corpus) * ROUNDS
+        results = list(UDLGBuilder.build_many(names, self.open,
+                                              workers=THREADS))
+        self.assertEqual([name for name, _, _ in results], names)
+        for name, document, error in results:
+            self.assertIsNone(error)
+            self.assertEqual(bytes(document.to_bin()), self.expected[name][0])
+
+        with allure.step('check failed builds are reported'):
+            results = list(UDLGBuilder.build_many(
+                ['Lucas1.udlg', 'missing.udlg'], self.open, workers=2
+            ))
+            self.assertIsNotNone(results[0][1])
+            self.assertIsNone(results[1][1])
+            self.assertIsInstance(results[1][2], KeyError)
+
+        with allure.step('check only few documents are built ahead'):
+            opened = []
+
+            def opener(name):
+                opened.append(name)
+                return self.open(name)
+
+            results = UDLGBuilder.build_many(names, opener, workers=2)
+            next(results)
+            #: let workers pick up anything already submitted
+            time.sleep(0.2)
+            self.assertLessEqual(len(opened), 2 * READ_AHEAD)
+            results.close()
+
+    @allure.story('build')
+    def test_concurrent_build(self):
+        names = sorted(self.corpus)
+
+        def target(idx):
+            for jdx in range(ROUNDS):
+                name = names[(idx + jdx) % len(names)]
+                document = UDLGBuilder.build(self.open(name))
+                self.assertEqual(
+                    (bytes(document.to_bin()), document.unpack_i18n()),
+                    self.expected[name]
+                )
+
+        self.run_threads(target)
+
+    @allure.story('serialize')
+    def test_shared_document(self):
+        name = 'Lucas1.udlg'
+        document = UDLGBuilder.build(self.open(name))
+
+        def target(idx):
+            for _ in range(ROUNDS):
+                self.assertEqual(bytes(document.to_bin()),
+                                 self.expected[name][0])
+                self.assertEqual(document.unpack_i18n(),
+                                 self.expected[name][1])
+
+        self.run_threads(target)
+
+    @allure.story('stats')
+    def test_instrumented_build(self):
+        collectors = [ParseStats() for idx in range(THREADS)]
+        name = 'Lucas1.udlg'
+
+        def target(idx):
+            if idx % 4:
+                document = UDLGBuilder.build(self.open(name))
+            else:
+                document = UDLGBuilder.build(self.open(name),
+                                             stats=collectors[idx])
+            self.assertEqual(bytes(document.to_bin()),
+                             self.expected[name][0])
+
+        self.run_threads(target)
+        stats = ParseStats()
+        for collector in collectors:
+            stats.merge(collector)
+        self.assertEqual(stats.documents, THREADS // 4)
+        self.assertEqual(
+            stats.to_dict()['records']['MessageEnd']['count'], THREADS // 4
+        )
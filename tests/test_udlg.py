@@ -82,13 +82,31 @@ class UDLGFileTest(TestCase):
                 entry_2, '::Another:: set string (=. И Юникод'.encode('utf-8')
             )
 
+    @allure.story('string representation')
+    def test_string_representation(self):
+        instance = UDLGBuilder.build(self.lucas)
+        entry = instance.data.records[5].members[2]
+        text = entry.value.value.decode('utf-8')
+        with allure.step('check length prefixed string'):
+            self.assertEqual(str(entry.value), text)
+            self.assertEqual(repr(entry.value), "'%s'" % text)
+        with allure.step('check binary object string'):
+            self.assertEqual(str(entry), "'%s'" % text)
+            self.assertEqual(repr(entry), "'%s'" % text)
+        with allure.step('check empty string'):
+            entry.set('')
+            self.assertEqual((str(entry.value), repr(entry)), ('', "''"))
+
     @allure.story('i18n')
     def test_load_i18n(self):
         instance = UDLGBuilder.build(self.lucas)
         with allure.step('write i18n'):
             block = self.lucas_i18n.read().encode(sys.getfilesystemencoding())
-            instance.load_i18n(block)
+            changed = instance.load_i18n(block)
             with allure.step('check'):
+                self.assertGreater(changed, 0)
+                #: nothing to change once more
+                self.assertEqual(instance.load_i18n(block), 0)
                 self.assertEqual(
                     instance.data.records[30].members[3],
                     u"::I:: gotta go actually. "
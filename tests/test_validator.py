@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_validator
+    :synopsis: Unit tests for structural validator
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import allure
+from udlg import enums
+from udlg.builder import BinaryFormatterFileBuilder, UDLGBuilder
+from udlg.generator import generate
+from udlg.validator import ValidationError, validate, validate_file
+from udlg.writer import NRBFWriter
+from unittest import TestCase
+
+BinaryType = enums.BinaryTypeEnum
+PrimitiveType = enums.PrimitiveTypeEnum
+
+
+def write(*records, **kwargs):
+    """
+    :rtype: bytes
+    :return: udlg document with library, class record and given records
+    """
+    stream = io.BytesIO()
+    writer = NRBFWriter(stream)
+    writer.udlg_header()
+    writer.serialization_header()
+    writer.binary_library(2, 'Library')
+    writer.class_with_members_and_types(1, 'Class', [
+        ('Name', BinaryType.String, None),
+        ('Id', BinaryType.Primitive, PrimitiveType.Int32)
+    ], kwargs.get('library_id', 2))
+    writer.binary_object_string(3, 'name')
+    writer.primitive(PrimitiveType.Int32, 1)
+    for record in records:
+        record(writer)
+    writer.message_end()
+    return stream.getvalue()
+
+
+@allure.feature('Validator')
+class ValidatorTest(TestCase):
+    def assertInvalid(self, data, message, **kwargs):
+        with self.assertRaises(ValidationError) as context:
+            validate(data, **kwargs)
+        self.assertIn(message, context.exception.message)
+        return context.exception
+
+    @allure.story('valid')
+    def test_valid(self):
+        with allure.step('check game documents'):
+            result = validate_file('tests/documents/Lucas1.udlg')
+            self.assertEqual(result['records'], 96)
+            result = validate_file('tests/documents/cc_dogInMotion.udlg')
+            self.assertEqual(result['records'], 7)
+        with allure.step('check generated documents'):
+            stream = io.BytesIO()
+            stats = generate(stream, udlg=False, instances=200, reference=0.5)
+            result = validate(stream.getvalue(), udlg=False)
+            self.assertEqual(result['records'], stats['records'])
+            self.assertEqual(result['references'], stats['references'])
+        with allure.step('check written document'):
+            self.assertEqual(validate(write(
+                lambda x: (x.class_with_id(4, 1), x.member_reference(3),
+                           x.primitive(PrimitiveType.Int32, 2))
+            ))['records'], 4)
+
+    @allure.story('valid')
+    def test_documents(self):
+        directory = 'tests/documents'
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(('.dat', '.udlg')):
+                continue
+            udlg = name.endswith('.udlg')
+            builder = UDLGBuilder if udlg else BinaryFormatterFileBuilder
+            with open(os.path.join(directory, name), 'rb') as stream:
+                data = stream.read()
+            try:
+                document = builder.build(io.BytesIO(data))
+            except Exception:
+                #: validator accepts only grammar builders accept
+                continue
+            with allure.step('check %s' % name):
+                result = validate(data, udlg=udlg)
+                self.assertEqual(result['records'], len(document.records))
+
+    @allure.story('invalid')
+    def test_truncated(self):
+        data = open('tests/documents/Lucas1.udlg', 'rb').read()
+        error = self.assertInvalid(data[:5000], 'Unexpected end of data')
+        self.assertEqual(error.offset, 5000)
+        self.assertTrue(error.path.startswith(
+            "records[15] ClassWithMembersAndTypes 'Q' > members[6]"
+        ))
+        self.assertInvalid(data[:30], 'Unexpected end of data')
+        self.assertInvalid(data + b'\x00', '1 trailing bytes')
+
+    @allure.story('invalid')
+    def test_header(self):
+        data = bytearray(write())
+        data[24] = 1
+        self.assertInvalid(bytes(data), 'Serialization header expected')
+        data = bytearray(write())
+        data[24 + 9] = 2
+        self.assertInvalid(bytes(data), 'Unsupported format version')
+
+    @allure.story('invalid')
+    def test_record_type(self):
+        error = self.assertInvalid(write(lambda x: x.write(b'\x63')),
+                                   'Invalid record type 99')
+        self.assertEqual(error.path, 'records[2]')
+        self.assertInvalid(
+            write(lambda x: x.write(b'\x10')),
+            'Unsupported record type ArraySingleObject'
+        )
+
+    @allure.story('invalid')
+    def test_references(self):
+        error = self.assertInvalid(
+            write(lambda x: (x.class_with_id(4, 7), x.object_null(),
+                             x.primitive(PrimitiveType.Int32, 2))),
+            'Unknown class metadata id 7'
+        )
+        self.assertEqual(error.path, 'records[2] ClassWithId')
+        error = self.assertInvalid(
+            write(lambda x: (x.class_with_id(4, 1), x.member_reference(40),
+                             x.primitive(PrimitiveType.Int32, 2))),
+            'Unresolved member reference to object 40'
+        )
+        self.assertEqual(
+            error.path,
+            "records[2] ClassWithId 'Class' > members[0] 'Name' "
+            "MemberReference"
+        )
+        self.assertInvalid(write(library_id=5), 'Unknown library id 5')
+
+    @allure.story('invalid')
+    def test_varint(self):
+        self.assertInvalid(
+            write(lambda x: x.write(b'\x06\x05\x00\x00\x00\xff\xff\xff\xff'
+                                    b'\x7f')),
+            '7 bit encoded int is out of bounds'
+        )
+        self.assertInvalid(
+            write(lambda x: x.write(b'\x06\x05\x00\x00\x00\xff\x01')),
+            'Unexpected end of data'
+        )
+
+
+@allure.feature('Health check')
+class CheckHealthTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.dialogs = os.path.join(self.directory, 'Dialogs')
+        os.makedirs(self.dialogs)
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            data = stream.read()
+        with open(os.path.join(self.dialogs, 'Lucas1.udlg'), 'wb') as output:
+            output.write(data)
+        with open(os.path.join(self.dialogs, 'broken.udlg'), 'wb') as output:
+            output.write(data[:len(data) // 2])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_health(self, *arguments):
+        return subprocess.run(
+            [sys.executable, 'tools/check_health.py', '-d', self.dialogs,
+             '-o', os.path.join(self.directory, 'health.json')] +
+            list(arguments), stdout=subprocess.DEVNULL
+        ).returncode
+
+    @allure.story('cache')
+    def test_failed_are_not_cached(self):
+        manifest = os.path.join(self.directory, 'manifest.json')
+        for arguments in (('-c', ), ('-m', manifest)):
+            with allure.step('check %s keeps failing' % arguments[0]):
+                self.assertEqual(self.check_health(*arguments), 1)
+                self.assertEqual(self.check_health(*arguments), 1)
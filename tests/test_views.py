@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_views
+    :synopsis: Unit tests for lazy member views
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.structure import records
+from udlg.structure.views import SequenceView
+from unittest import TestCase
+
+
+@allure.feature('Views')
+class SequenceViewTest(TestCase):
+    @allure.story('sequence')
+    def test_sequence(self):
+        calls = []
+
+        def getter(idx):
+            calls.append(idx)
+            return idx * 10
+
+        view = SequenceView(5, getter)
+        self.assertEqual(calls, [])
+        with allure.step('check access'):
+            self.assertEqual(len(view), 5)
+            self.assertEqual(view[1], 10)
+            self.assertEqual(view[-1], 40)
+            self.assertEqual(view[1:4:2], [10, 30])
+            self.assertEqual(list(view), [0, 10, 20, 30, 40])
+            self.assertIn(20, view)
+            self.assertEqual(view.index(30), 3)
+            with self.assertRaises(IndexError):
+                view[5]
+            with self.assertRaises(IndexError):
+                view[-6]
+        with allure.step('check comparison'):
+            self.assertEqual(view, [0, 10, 20, 30, 40])
+            self.assertEqual(view, (0, 10, 20, 30, 40))
+            self.assertNotEqual(view, [0, 10])
+            self.assertEqual(view, SequenceView(5, lambda x: x * 10))
+        with allure.step('check nothing is cached'):
+            calls[:] = []
+            view[2]
+            view[2]
+            self.assertEqual(calls, [2, 2])
+
+
+@allure.feature('Views')
+class MemberViewsTest(TestCase):
+    def setUp(self):
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            self.instance = UDLGBuilder.build(stream)
+
+    @allure.story('members')
+    def test_members(self):
+        entry = self.instance.data.records[5].entry
+        members = entry.members
+        self.assertIsInstance(members, SequenceView)
+        self.assertFalse(hasattr(entry, '_members'))
+        self.assertIsInstance(members[2], records.BinaryObjectString)
+        self.assertEqual([x.__class__ for x in members[:]],
+                         [x.__class__ for x in members])
+
+    @allure.story('members')
+    def test_cache(self):
+        entry = self.instance.data.records[5].entry
+        members = entry.get_member_list(cache=True)
+        self.assertIsInstance(members, list)
+        self.assertIs(entry.members, members)
+        self.assertEqual(
+            [x.__class__ for x in members],
+            [x.__class__ for x in self.instance.data.records[5].members]
+        )
+
+    @allure.story('members')
+    def test_members_names(self):
+        class_info = self.instance.data.records[5].entry.class_info
+        names = class_info.members_names
+        self.assertIsInstance(names, SequenceView)
+        self.assertEqual(len(names), class_info.members_count)
+        self.assertEqual(
+            [x.value for x in names],
+            [x.value for x in class_info.get_members_names(cache=True)]
+        )
+
+    @allure.story('records')
+    def test_records(self):
+        record_list = self.instance.data.records
+        self.assertIsInstance(record_list, SequenceView)
+        self.assertEqual(len(record_list), 96)
+        self.assertIsInstance(record_list[-1].entry, records.MessageEnd)
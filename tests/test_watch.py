@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: tests.test_watch
+    :synopsis: Unit tests for directory watchers and i18n re-application
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import allure
+from udlg.builder import UDLGBuilder
+from udlg.watch import (
+    InotifyWatcher, PollingWatcher, create_watcher, load_inotify
+)
+from unittest import TestCase
+
+
+@allure.feature('Watch')
+class WatcherTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write('Dialogs/Lucas1.udlg.txt', b"1,0=>'Lucas'")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, *name.split('/'))
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as output:
+            output.write(content)
+
+    def check(self, watcher):
+        self.assertEqual(watcher.wait(0.05), set())
+        with allure.step('check file change is reported'):
+            self.write('Dialogs/Lucas1.udlg.txt', b"1,0=>'Lucas, again'")
+            self.assertEqual(watcher.wait(1), {'Dialogs/Lucas1.udlg.txt'})
+        with allure.step('check files in new directory are reported'):
+            self.write('Dialogs/cc/cc_dogInMotion.udlg.txt', b"1,0=>'Dog'")
+            self.write('Dialogs/cc/notes.md', b'skipped')
+            changes = next(watcher.changes(delay=0.1))
+            self.assertEqual(changes, ['Dialogs/cc/cc_dogInMotion.udlg.txt'])
+        with allure.step('check removal is reported'):
+            os.remove(os.path.join(self.directory, 'Dialogs', 'cc',
+                                   'cc_dogInMotion.udlg.txt'))
+            self.assertEqual(watcher.wait(1),
+                             {'Dialogs/cc/cc_dogInMotion.udlg.txt'})
+        with allure.step('check bursts of writes are reported once'):
+            for idx in range(3):
+                self.write('Dialogs/Lucas1.udlg.txt', b"1,0=>'%i'" % idx)
+            self.assertEqual(next(watcher.changes(delay=0.1)),
+                             ['Dialogs/Lucas1.udlg.txt'])
+            self.assertEqual(watcher.wait(0.05), set())
+
+    @allure.story('polling')
+    def test_polling(self):
+        with PollingWatcher(self.directory, extensions=('.txt', ),
+                            interval=0.01) as watcher:
+            self.check(watcher)
+
+    @allure.story('inotify')
+    @unittest.skipIf(load_inotify() is None, 'inotify is not available')
+    def test_inotify(self):
+        with create_watcher(self.directory, extensions=('.txt', )) as watcher:
+            self.assertIsInstance(watcher, InotifyWatcher)
+            self.check(watcher)
+        self.assertIsInstance(
+            create_watcher(self.directory, polling=True), PollingWatcher
+        )
+
+
+@allure.feature('Watch')
+class ResetI18NTest(TestCase):
+    @allure.story('i18n')
+    def test_reset_i18n(self):
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            content = stream.read()
+        document = UDLGBuilder.build(io.BytesIO(content))
+        self.assertEqual(document.reset_i18n(), 0)
+        self.assertEqual(document.load_i18n(b"1,0=>'Lucas'"), 1)
+        self.assertEqual(document.load_i18n(b"1,0=>'Lucas, again'"), 1)
+        self.assertEqual(document.reset_i18n(), 1)
+        self.assertEqual(bytes(document.to_bin()), content)
+
+    @allure.story('memory')
+    def test_reapply_keeps_cache_bounded(self):
+        with open('tests/documents/Lucas1.udlg', 'rb') as stream:
+            document = UDLGBuilder.build(stream)
+        block = document.unpack_i18n()
+        translated = block.replace(b"=>'", b"=>'~")
+        changed = document.load_i18n(translated)
+        for idx in range(50):
+            document.reset_i18n()
+            self.assertEqual(document.load_i18n(translated), changed)
+        #: one kept alive string per changed member
+        self.assertEqual(len(document._cache), changed)
+        document.reset_i18n()
+        self.assertEqual(document.unpack_i18n(), block)
@@ -3,6 +3,7 @@ from hashlib import md5
 import json
 import sys
 import os
+import time
 import argparse
 from contextlib import closing
 
@@ -10,70 +11,282 @@ ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 
 sys.path.insert(0, ROOT_DIR)
 from udlg.builder import UDLGBuilder
+from udlg.compression import (
+    EXTENSIONS, compressed, get_extension, open_compressed, strip_extension
+)
+from udlg.manifest import open_manifest
+from udlg.report import (
+    CACHE_HIT, CACHE_MISS, STATUS_SKIPPED, create_report
+)
+from udlg.storage import (
+    BUNDLE_EXTENSION, ZIP_EXTENSION, DirectoryStorage, create_storage,
+    get_tar_mode, open_storage
+)
+from udlg.streams import STDIO, open_input
+from udlg.watch import DEBOUNCE_DELAY, POLL_INTERVAL, create_watcher
 
 import logging
 logger = logging.getLogger(__file__)
 
 
-def apply(entry, cache, opts):
-    with closing(open(entry.path, 'rb')) as stream:
-        store_path = os.path.join(
-            opts.output_dir, entry.path.split(opts.dialogs_dir)[-1][1:]
-        ).replace('\\', '/')
-        i18n_path = os.path.join(
-            opts.i18n_dir, entry.path.split(opts.dialogs_dir)[-1][1:]
-        ).replace('\\', '/')+'.txt'
-        store_entry_path, store_entry = store_path.rsplit('/', 1)
-        if not os.path.exists(store_entry_path):
-            os.makedirs(store_entry_path)
+def get_mark_key(opts):
+    return 'apply_i18n:%s:%s' % (os.path.abspath(opts.output_dir),
+                                 opts.compress or '')
+
+
+def get_inputs(source, i18n, name, i18n_name):
+    """
+    :rtype: list[tuple[str, str]]
+    :return: directory and name of document and i18n file, manifest keeps
+        directory storages only
+    """
+    return [(storage.path, x) for storage, x in ((source, name),
+                                                 (i18n, i18n_name))
+            if isinstance(storage, DirectoryStorage)]
+
+
+def apply(source, i18n, output, name, cache, manifest, report, opts):
+    path = source.get_path(name)
+    with report.file(path) as entry:
+        entry['bytes_in'] = source.get_size(name)
+        store_name = strip_extension(name) + get_extension(opts.compress)
+        i18n_name = strip_extension(name) + '.txt'
+        i18n_path = i18n.get_path(i18n_name)
+        inputs = get_inputs(source, i18n, name, i18n_name)
+        if manifest is not None and all(
+                manifest.is_marked(get_mark_key(opts), *x) for x in inputs):
+            entry['cache'] = CACHE_HIT
+            entry['status'] = STATUS_SKIPPED
+            if not opts.progress:
+                print("Skipping `%s`, already processed" % path)
+            return
 
         try:
-            i18n_block = open(i18n_path, 'rb').read()
-        except OSError:
+            with closing(i18n.open(i18n_name)) as i18n_stream:
+                i18n_block = i18n_stream.read()
+        except (OSError, KeyError):
             logger.error("Can not access i18n file: %s, skipping",
                          i18n_path)
+            entry['status'] = STATUS_SKIPPED
             return
         i18n_cache_digest = md5(i18n_block).hexdigest()
-        if cache.get(i18n_path, '') != i18n_cache_digest:
-            print("Processing: %s" % entry.path)
-            u = UDLGBuilder.build(stream)
-            u.load_i18n(i18n_block)
-            open(store_path, 'wb').write(u.to_bin())
+        if manifest is not None or (
+                cache.get(i18n_path, '') != i18n_cache_digest):
+            entry['cache'] = CACHE_MISS
+            if not opts.progress:
+                print("Processing: %s" % path)
+            with closing(source.open(name)) as stream:
+                u = UDLGBuilder.build(stream)
+            entry['records'] = u.data.count
+            entry['strings_changed'] = u.load_i18n(i18n_block)
+            entry['bytes_out'] = store(output, store_name, u, opts)
+            if manifest is not None:
+                for directory, x in inputs:
+                    manifest.mark(get_mark_key(opts), directory, x)
         else:
-            print("Skipping `%s`, already processed" % entry.path)
+            entry['cache'] = CACHE_HIT
+            entry['status'] = STATUS_SKIPPED
+            if not opts.progress:
+                print("Skipping `%s`, already processed" % path)
         cache[i18n_path] = i18n_cache_digest
 
 
-def process(opts, i18n_cache, path=None):
-    path = path or opts.dialogs_dir
+def store(output, name, document, opts):
+    with output.create(name) as raw, \
+            compressed(raw, opts.compress, opts.level) as stored:
+        stored.write(document.to_bin())
+    return output.get_size(name)
+
+
+def warm(source, names):
+    #: i18n name: (document name, parsed document)
+    documents = {}
+    for name in names:
+        with closing(source.open(name)) as stream:
+            documents[strip_extension(name) + '.txt'] = (
+                name, UDLGBuilder.build(stream)
+            )
+    return documents
+
+
+def reapply(i18n, output, i18n_name, name, document, cache, opts):
+    i18n_path = i18n.get_path(i18n_name)
+    started = time.time()
+    try:
+        with closing(i18n.open(i18n_name)) as i18n_stream:
+            i18n_block = i18n_stream.read()
+    except OSError:
+        logger.error("Can not access i18n file: %s, skipping", i18n_path)
+        return
+    i18n_cache_digest = md5(i18n_block).hexdigest()
+    if cache.get(i18n_path, '') == i18n_cache_digest:
+        return
+    #: translation is applied to source strings, not to previous one
+    document.reset_i18n()
+    try:
+        changed = document.load_i18n(i18n_block)
+    except Exception as err:
+        logger.error("Can not apply i18n file: %s, %s: %s", i18n_path,
+                     err.__class__.__name__, err)
+        return
+    store_name = strip_extension(name) + get_extension(opts.compress)
+    store(output, store_name, document, opts)
+    cache[i18n_path] = i18n_cache_digest
+    print("Applied: %s, %i strings changed (%.1f ms)" % (
+        i18n_path, changed, (time.time() - started) * 1000
+    ))
+
+
+def watch(opts, i18n_cache, i18n_cache_path):
+    #: watcher is started before documents are parsed, so translations
+    #: saved meanwhile are not missed
+    with create_watcher(opts.i18n_dir, extensions=('.txt', ),
+                        interval=opts.interval,
+                        polling=opts.polling) as watcher, \
+            open_storage(opts.dialogs_dir) as source, \
+            DirectoryStorage(opts.i18n_dir) as i18n, \
+            create_storage(opts.output_dir) as output:
+        started = time.time()
+        documents = warm(source, source.get_names())
+        print("Loaded %i dialogs in %.2f s, watching %s with %s" % (
+            len(documents), time.time() - started, opts.i18n_dir,
+            watcher.__class__.__name__
+        ))
+        watched = watcher.changes(opts.debounce)
+        changes = sorted(name for name in documents if i18n.exists(name))
+        try:
+            while True:
+                for i18n_name in changes:
+                    if i18n_name in documents:
+                        name, document = documents[i18n_name]
+                        reapply(i18n, output, i18n_name, name, document,
+                                i18n_cache, opts)
+                open(i18n_cache_path, 'w').write(json.dumps(i18n_cache))
+                changes = next(watched)
+        except KeyboardInterrupt:
+            pass
 
-    for entry in os.scandir(path):
-        if entry.is_dir():
-            process(opts, i18n_cache, path=entry.path)
+
+def is_archive(path):
+    return bool(path.endswith((ZIP_EXTENSION, BUNDLE_EXTENSION)) or
+                get_tar_mode(path))
+
+
+def apply_stream(opts):
+    with open(opts.i18n_dir, 'rb') as source:
+        i18n_block = source.read()
+    with open_input(opts.source) as stream:
+        u = UDLGBuilder.build(stream)
+    u.load_i18n(i18n_block)
+    with open_compressed(opts.output_dir or STDIO, opts.compress,
+                         opts.level) as output:
+        output.write(u.to_bin())
+
+
+def process(opts, i18n_cache):
+    with open_storage(opts.dialogs_dir) as source, \
+            open_storage(opts.i18n_dir) as i18n, \
+            create_storage(opts.output_dir) as output:
+        manifest = open_manifest(opts.manifest, i18n, ('.txt', ))
+        if manifest is not None and isinstance(source, DirectoryStorage):
+            manifest.refresh(source.path)
+            names = manifest.get_names(source.path, largest_first=True)
         else:
-            apply(entry, i18n_cache, opts)
+            names = source.get_names()
+        report = create_report('apply_i18n', names, progress=opts.progress,
+                               get_size=source.get_size)
+        try:
+            for name in names:
+                apply(source, i18n, output, name, i18n_cache, manifest,
+                      report, opts)
+        finally:
+            report.finish()
+            if manifest is not None:
+                manifest.save()
+            if opts.report:
+                report.write(opts.report)
+
+
+def get_cache_path(i18n_dir):
+    if os.path.isdir(i18n_dir):
+        return os.path.join(i18n_dir, 'cache.json')
+    #: i18n archive, cache is stored next to it
+    return i18n_dir + '.cache.json'
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('-d', '--dialogs', dest='dialogs_dir',
-                        required=True, metavar='Dialogs',
-                        help='Underrail Data/Dialogs directory')
+    sources = parser.add_mutually_exclusive_group(required=True)
+    sources.add_argument('-d', '--dialogs', dest='dialogs_dir',
+                         metavar='Dialogs',
+                         help='Underrail Data/Dialogs directory, zip or '
+                              'tar archive')
+    sources.add_argument('-s', '--source', dest='source', metavar='file.udlg',
+                         help='single document to apply to, - for stdin')
     parser.add_argument('-o', '--output', dest='output_dir',
-                        metavar='dir', help='output directory', default='.',
-                        required=False)
+                        metavar='dir', default=None, required=False,
+                        help='output directory or archive (. by default), '
+                             'output file with -s (- for stdout, by '
+                             'default)')
     parser.add_argument('-T', '--i18n-dir', dest='i18n_dir',
-                        metavar='dir', help='i18n directory',
-                        required=True)
+                        metavar='dir', required=True,
+                        help='i18n directory or archive, i18n file with -s')
     parser.add_argument('-S', '--skip-processed', dest='skip_processed',
                         help='do not process files already had been processed',
                         action='store_true', required=False, default=False)
+    parser.add_argument('-z', '--compress', dest='compress', default=None,
+                        choices=sorted(EXTENSIONS),
+                        help='compress output, extension is appended to '
+                             'output file names')
+    parser.add_argument('-l', '--level', dest='level', type=int,
+                        default=None, help='compression level')
+    parser.add_argument('-m', '--manifest', dest='manifest', default=None,
+                        metavar='manifest.json',
+                        help='corpus manifest, documents unchanged along '
+                             'with their i18n files since they were applied '
+                             'are skipped without reading, i18n should be '
+                             'directory')
+    parser.add_argument('-R', '--report', dest='report', default=None,
+                        metavar='report.json', help='store json run report',
+                        required=False)
+    parser.add_argument('-P', '--progress', dest='progress',
+                        help='show progress line instead of file messages',
+                        action='store_true', required=False, default=False)
+    parser.add_argument('-W', '--watch', dest='watch', action='store_true',
+                        default=False,
+                        help='keep dialogs parsed in memory and re-apply '
+                             'i18n files once they change, i18n and output '
+                             'should be directories, -R, -P and -m are '
+                             'ignored')
+    parser.add_argument('--polling', dest='polling', action='store_true',
+                        default=False,
+                        help='poll i18n directory even if inotify is '
+                             'available')
+    parser.add_argument('--interval', dest='interval', type=float,
+                        default=POLL_INTERVAL, metavar='seconds',
+                        help='polling interval')
+    parser.add_argument('--debounce', dest='debounce', type=float,
+                        default=DEBOUNCE_DELAY, metavar='seconds',
+                        help='wait for i18n changes to settle before '
+                             're-applying them')
     arguments = parser.parse_args()
+    if arguments.source:
+        apply_stream(arguments)
+        sys.exit(0)
+    arguments.output_dir = arguments.output_dir or '.'
+    if arguments.watch and not os.path.isdir(arguments.i18n_dir):
+        parser.error('--watch requires i18n directory')
+    if arguments.watch and is_archive(arguments.output_dir):
+        parser.error('--watch requires output directory')
 
-    i18n_cache_path = os.path.join(arguments.i18n_dir, 'cache.json')
+    i18n_cache_path = get_cache_path(arguments.i18n_dir)
     if os.path.exists(i18n_cache_path):
         i18n_cache = json.loads(open(i18n_cache_path, 'r').read())
     else:
         i18n_cache = {}
+    if arguments.watch:
+        logging.basicConfig(level=logging.INFO)
+        watch(arguments, i18n_cache, i18n_cache_path)
+        sys.exit(0)
     process(arguments, i18n_cache)
     open(i18n_cache_path, 'w').write(json.dumps(i18n_cache))
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3.5
 from hashlib import md5
+import io
 import json
 import sys
 import os
@@ -9,68 +10,171 @@ from contextlib import closing
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 
 sys.path.insert(0, ROOT_DIR)
-from udlg.builder import UDLGBuilder
+from udlg.compression import (
+    EXTENSIONS, compressed, get_extension, open_compressed, strip_extension
+)
+from udlg.decoders import JSONStreamApplier
+from udlg.manifest import open_manifest
+from udlg.report import (
+    CACHE_HIT, CACHE_MISS, STATUS_SKIPPED, create_report
+)
+from udlg.storage import DirectoryStorage, create_storage, open_storage
+from udlg.streams import STDIO, open_input
 
 import logging
 logger = logging.getLogger(__file__)
 
 
-def apply(entry, cache, opts):
-    with closing(open(entry.path, 'rb')) as stream:
-        store_path = os.path.join(
-            opts.output_dir, entry.path.split(opts.dialogs_dir)[-1][1:]
-        ).replace('\\', '/')
-        i18n_path = os.path.join(
-            opts.i18n_dir, entry.path.split(opts.dialogs_dir)[-1][1:]
-        ).replace('\\', '/')+'.json'
-        store_entry_path, store_entry = store_path.rsplit('/', 1)
-        if not os.path.exists(store_entry_path):
-            os.makedirs(store_entry_path)
+def get_mark_key(opts):
+    return 'apply_json:%s:%s' % (os.path.abspath(opts.output_dir),
+                                 opts.compress or '')
+
+
+def get_inputs(source, i18n, name, i18n_name):
+    """
+    :rtype: list[tuple[str, str]]
+    :return: directory and name of document and i18n file, manifest keeps
+        directory storages only
+    """
+    return [(storage.path, x) for storage, x in ((source, name),
+                                                 (i18n, i18n_name))
+            if isinstance(storage, DirectoryStorage)]
+
+
+def apply(source, i18n, output, name, cache, manifest, report, opts):
+    path = source.get_path(name)
+    with report.file(path) as entry:
+        entry['bytes_in'] = source.get_size(name)
+        store_name = strip_extension(name) + get_extension(opts.compress)
+        i18n_name = strip_extension(name) + '.json'
+        i18n_path = i18n.get_path(i18n_name)
+        inputs = get_inputs(source, i18n, name, i18n_name)
+        if manifest is not None and all(
+                manifest.is_marked(get_mark_key(opts), *x) for x in inputs):
+            entry['cache'] = CACHE_HIT
+            entry['status'] = STATUS_SKIPPED
+            if not opts.progress:
+                print("Skipping `%s`, already processed" % path)
+            return
 
         try:
-            i18n_block = open(i18n_path, 'rb').read()
-        except OSError:
+            with closing(i18n.open(i18n_name)) as i18n_stream:
+                i18n_block = i18n_stream.read()
+        except (OSError, KeyError):
             logger.error("Can not access i18n file: %s, skipping",
                          i18n_path)
+            entry['status'] = STATUS_SKIPPED
             return
         i18n_cache_digest = md5(i18n_block).hexdigest()
-        if cache.get(i18n_path, '') != i18n_cache_digest:
-            print("Processing: %s" % entry.path)
-            u = UDLGBuilder.build(stream)
-            u.load_i18n(i18n_block)
-            open(store_path, 'wb').write(u.to_bin())
+        if manifest is not None or (
+                cache.get(i18n_path, '') != i18n_cache_digest):
+            entry['cache'] = CACHE_MISS
+            if not opts.progress:
+                print("Processing: %s" % path)
+            applier = JSONStreamApplier()
+            with closing(source.open(name)) as stream, \
+                    output.create(store_name) as raw, \
+                    compressed(raw, opts.compress, opts.level) as stored:
+                entry['strings_changed'] = applier.apply(
+                    stream, io.StringIO(i18n_block.decode('utf-8')), stored
+                )
+            entry['records'] = applier.records
+            entry['bytes_out'] = output.get_size(store_name)
+            if manifest is not None:
+                for directory, x in inputs:
+                    manifest.mark(get_mark_key(opts), directory, x)
         else:
-            print("Skipping `%s`, already processed" % entry.path)
+            entry['cache'] = CACHE_HIT
+            entry['status'] = STATUS_SKIPPED
+            if not opts.progress:
+                print("Skipping `%s`, already processed" % path)
         cache[i18n_path] = i18n_cache_digest
 
 
-def process(opts, i18n_cache, path=None):
-    path = path or opts.dialogs_dir
+def apply_stream(opts):
+    with open(opts.i18n_dir, 'r', encoding='utf-8') as source, \
+            open_input(opts.source) as stream, \
+            open_compressed(opts.output_dir or STDIO, opts.compress,
+                            opts.level) as output:
+        JSONStreamApplier().apply(stream, source, output)
+
 
-    for entry in os.scandir(path):
-        if entry.is_dir():
-            process(opts, i18n_cache, path=entry.path)
+def process(opts, i18n_cache):
+    with open_storage(opts.dialogs_dir) as source, \
+            open_storage(opts.i18n_dir) as i18n, \
+            create_storage(opts.output_dir) as output:
+        manifest = open_manifest(opts.manifest, i18n, ('.json', ))
+        if manifest is not None and isinstance(source, DirectoryStorage):
+            manifest.refresh(source.path)
+            names = manifest.get_names(source.path, largest_first=True)
         else:
-            apply(entry, i18n_cache, opts)
+            names = source.get_names()
+        report = create_report('apply_json', names, progress=opts.progress,
+                               get_size=source.get_size)
+        try:
+            for name in names:
+                apply(source, i18n, output, name, i18n_cache, manifest,
+                      report, opts)
+        finally:
+            report.finish()
+            if manifest is not None:
+                manifest.save()
+            if opts.report:
+                report.write(opts.report)
+
+
+def get_cache_path(i18n_dir):
+    if os.path.isdir(i18n_dir):
+        return os.path.join(i18n_dir, 'cache.json')
+    #: i18n archive, cache is stored next to it
+    return i18n_dir + '.cache.json'
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('-d', '--dialogs', dest='dialogs_dir',
-                        required=True, metavar='Dialogs',
-                        help='Underrail Data/Dialogs directory')
+    sources = parser.add_mutually_exclusive_group(required=True)
+    sources.add_argument('-d', '--dialogs', dest='dialogs_dir',
+                         metavar='Dialogs',
+                         help='Underrail Data/Dialogs directory, zip or '
+                              'tar archive')
+    sources.add_argument('-s', '--source', dest='source', metavar='file.udlg',
+                         help='single document to apply to, - for stdin')
     parser.add_argument('-o', '--output', dest='output_dir',
-                        metavar='dir', help='output directory', default='.',
-                        required=False)
+                        metavar='dir', default=None, required=False,
+                        help='output directory or archive (. by default), '
+                             'output file with -s (- for stdout, by '
+                             'default)')
     parser.add_argument('-T', '--i18n-dir', dest='i18n_dir',
-                        metavar='dir', help='i18n directory',
-                        required=True)
+                        metavar='dir', required=True,
+                        help='i18n directory or archive, i18n file with -s')
     parser.add_argument('-S', '--skip-processed', dest='skip_processed',
                         help='do not process files already had been processed',
                         action='store_true', required=False, default=False)
+    parser.add_argument('-z', '--compress', dest='compress', default=None,
+                        choices=sorted(EXTENSIONS),
+                        help='compress output, extension is appended to '
+                             'output file names')
+    parser.add_argument('-l', '--level', dest='level', type=int,
+                        default=None, help='compression level')
+    parser.add_argument('-m', '--manifest', dest='manifest', default=None,
+                        metavar='manifest.json',
+                        help='corpus manifest, documents unchanged along '
+                             'with their i18n files since they were applied '
+                             'are skipped without reading, i18n should be '
+                             'directory')
+    parser.add_argument('-R', '--report', dest='report', default=None,
+                        metavar='report.json', help='store json run report',
+                        required=False)
+    parser.add_argument('-P', '--progress', dest='progress',
+                        help='show progress line instead of file messages',
+                        action='store_true', required=False, default=False)
     arguments = parser.parse_args()
+    if arguments.source:
+        apply_stream(arguments)
+        sys.exit(0)
+    arguments.output_dir = arguments.output_dir or '.'
 
-    i18n_cache_path = os.path.join(arguments.i18n_dir, 'cache.json')
+    i18n_cache_path = get_cache_path(arguments.i18n_dir)
     if os.path.exists(i18n_cache_path):
         i18n_cache = json.loads(open(i18n_cache_path, 'r').read())
     else:
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+#: will work on python 3.5+ only
+
+import sys
+import os
+import argparse
+from contextlib import closing
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+sys.path.insert(0, ROOT_DIR)
+from udlg.report import STATUS_FAILED, create_report
+from udlg.storage import BundleStorage, BundleWriter, open_storage
+
+import logging
+logger = logging.getLogger(__file__)
+
+
+def pack(opts):
+    #: output is bundle whatever its extension is
+    with open_storage(opts.source) as source, \
+            BundleWriter(opts.output) as bundle:
+        names = source.get_names(opts.extensions)
+        report = create_report('bundle', names, progress=opts.progress,
+                               get_size=source.get_size)
+        for name in names:
+            path = source.get_path(name)
+            with closing(source.open(name)) as stream, \
+                    report.file(path) as entry, \
+                    bundle.create(name) as output:
+                content = stream.read()
+                output.write(content)
+                entry['bytes_in'] = entry['bytes_out'] = len(content)
+                logger.info('packed: %s' % path)
+    return report
+
+
+def verify(opts):
+    with BundleStorage(opts.output) as bundle:
+        names = bundle.get_names()
+        report = create_report('bundle', names, progress=opts.progress,
+                               get_size=bundle.get_size)
+        for name in names:
+            with report.file(bundle.get_path(name)) as entry:
+                entry['bytes_in'] = bundle.get_size(name)
+                if not bundle.verify(name):
+                    entry['status'] = STATUS_FAILED
+                    entry['error'] = 'digest mismatch'
+                    if not opts.progress:
+                        print('%s: digest mismatch' % name)
+    return report
+
+
+def show(opts):
+    with BundleStorage(opts.output) as bundle:
+        for name in bundle.get_names():
+            print('%10i %s %s' % (bundle.get_size(name),
+                                  bundle.get_digest(name).hex(), name))
+
+
+def process(opts):
+    if opts.list:
+        show(opts)
+        return 0
+    report = verify(opts) if opts.verify else pack(opts)
+    report.finish()
+    if opts.report:
+        report.write(opts.report)
+    return report.get_totals()[STATUS_FAILED]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='pack Data/Dialogs tree into single file bundle'
+    )
+    parser.add_argument('-s', '--source', dest='source', required=False,
+                        metavar='directory',
+                        help='directory, zip or tar archive to pack')
+    parser.add_argument('-o', '--output', dest='output', required=True,
+                        metavar='dialogs.bundle', help='bundle file')
+    parser.add_argument('-e', '--extensions', dest='extensions', nargs='+',
+                        default=['.udlg'], metavar='.udlg',
+                        help='extensions of files to pack')
+    parser.add_argument('-l', '--list', dest='list', action='store_true',
+                        help='list bundle documents with their sizes and '
+                             'digests')
+    parser.add_argument('-V', '--verify', dest='verify', action='store_true',
+                        help='verify bundle documents digests')
+    parser.add_argument('-R', '--report', dest='report', default=None,
+                        metavar='report.json', help='store json run report',
+                        required=False)
+    parser.add_argument('-P', '--progress', dest='progress',
+                        help='show progress line',
+                        action='store_true', required=False, default=False)
+    parser.add_argument('-v', '--verbose', dest='verbose',
+                        action='store_true',
+                        help='verbose output')
+    arguments = parser.parse_args()
+    if arguments.verbose:
+        logging.basicConfig(level=logging.INFO)
+    if not (arguments.source or arguments.list or arguments.verify):
+        parser.error('source is required for packing')
+    arguments.extensions = tuple(arguments.extensions)
+    sys.exit(1 if process(arguments) else 0)
@@ -1,17 +1,24 @@
 #!/usr/bin/env python3.4
 import os
 import sys
-sys.path.insert(0, os.path.dirname('.'))
-
 import argparse
-from contextlib import closing
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+sys.path.insert(0, ROOT_DIR)
 from udlg.builder import UDLGBuilder
+from udlg.stats import ParseStats
+from udlg.streams import open_input
 from udlg.structure.records import MessageEnd
 
 
 def process(source, opts):
-    with closing(open(source, 'rb')) as udlg_file:
-        return UDLGBuilder.build(stream=udlg_file)
+    stats = ParseStats() if opts.stats else None
+    with open_input(source) as udlg_file:
+        document = UDLGBuilder.build(stream=udlg_file, stats=stats)
+    if stats is not None:
+        open(opts.stats, 'w').write(stats.to_json(indent=2))
+    return document
 
 
 def main(opts):
@@ -23,7 +30,11 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('-s', '--source', dest='source',
                         metavar='file.udlg',
-                        help='source file to inspect', required=True)
+                        help='source file to inspect, - for stdin',
+                        required=True)
+    parser.add_argument('--stats', dest='stats', metavar='stats.json',
+                        help='store per record type parse statistics',
+                        required=False, default=None)
     arguments = parser.parse_args()
     udlg_file = main(arguments)
     record_list = udlg_file.data.records
@@ -13,6 +13,14 @@ ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 sys.path.insert(0, ROOT_DIR)
 from udlg import enums
 from udlg.builder import UDLGBuilder
+from udlg.compression import get_extensions
+from udlg.manifest import open_manifest
+from udlg.report import (
+    CACHE_HIT, STATUS_FAILED, STATUS_SKIPPED, create_report
+)
+from udlg.stats import ParseStats
+from udlg.storage import open_storage
+from udlg.validator import ValidationError, validate_stream
 
 import logging
 logger = logging.getLogger(__file__)
@@ -22,48 +30,100 @@ PROCESSING_MESSAGE_FAIL = 'file processing: %s - FAIL'
 PROCESSING_MESSAGE_FOUND_IN_CACHE = 'file processing: %s - FOUND IN CACHE'
 
 
-def inspect(entry, health, opts):
-    with closing(open(entry.path, 'rb')) as stream:
-        if opts.use_health_cache and entry.path in health:
+def get_mark_key(opts):
+    return 'check_health:%s' % ('full' if opts.full else 'validate')
+
+
+def is_cached(storage, name, path, health, manifest, opts):
+    #: failed documents are checked again, so gate keeps failing on them
+    if health.get(path) is not True:
+        return False
+    if manifest is not None:
+        #: documents changed since they were checked are checked again
+        return manifest.is_marked(get_mark_key(opts), storage.path, name)
+    return opts.use_health_cache
+
+
+def inspect(storage, name, health, manifest, report, opts):
+    path = storage.get_path(name)
+    with report.file(path) as entry:
+        entry['bytes_in'] = storage.get_size(name)
+        if is_cached(storage, name, path, health, manifest, opts):
             #: skip for caching
-            logger.info(PROCESSING_MESSAGE_FOUND_IN_CACHE % entry.path)
+            logger.info(PROCESSING_MESSAGE_FOUND_IN_CACHE % path)
+            entry['cache'] = CACHE_HIT
+            entry['status'] = STATUS_SKIPPED
             return
 
         try:
-            doc = UDLGBuilder.build(stream)
-            assert (
-                doc.records[-1].record_type == enums.RecordTypeEnum.MessageEnd
-            )
-            logger.info(PROCESSING_MESSAGE_OK % entry.path)
-            health[entry.path] = True
+            with closing(storage.open(name)) as stream:
+                if opts.full:
+                    doc = UDLGBuilder.build(stream, stats=opts.parse_stats)
+                    assert (doc.records[-1].record_type ==
+                            enums.RecordTypeEnum.MessageEnd)
+                    entry['records'] = doc.data.count
+                else:
+                    entry['records'] = validate_stream(stream)['records']
+            logger.info(PROCESSING_MESSAGE_OK % path)
+            health[path] = True
+            if manifest is not None:
+                manifest.mark(get_mark_key(opts), storage.path, name)
+        except ValidationError as err:
+            logger.info(PROCESSING_MESSAGE_FAIL % path)
+            entry['status'] = STATUS_FAILED
+            entry.update(err.to_dict())
+            health[path] = False
+            if not opts.progress:
+                print("%s: %s" % (path, err))
         except Exception as err:
-            logger.info(PROCESSING_MESSAGE_FAIL % entry.path)
-            health[entry.path] = False
+            logger.info(PROCESSING_MESSAGE_FAIL % path)
+            entry['status'] = STATUS_FAILED
+            entry['error'] = '%s: %s' % (err.__class__.__name__, err)
+            health[path] = False
+            if not opts.progress:
+                print("%s: %s" % (path, entry['error']))
 
 
-def process(opts, path=None):
-    path = path or opts.directory
-    if opts.use_health_cache and os.path.exists(opts.output):
+def get_names(storage, opts):
+    names = storage.get_names(get_extensions(('.udlg', )))
+    if opts.recursive:
+        return names
+    return [name for name in names if '/' not in name]
+
+
+def process(opts):
+    if ((opts.use_health_cache or opts.manifest) and
+            os.path.exists(opts.output)):
         health = json.loads(open(opts.output, 'r').read())
     else:
         health = defaultdict(list)
-    recursive = opts.recursive
-
-    for entry in os.scandir(path):
-        if recursive and entry.is_dir():
-            process(opts, path=entry.path)
-        else:
-            if not entry.name.endswith('.udlg'):
-                continue
-            inspect(entry, health, opts)
+
+    with open_storage(opts.directory) as storage:
+        manifest = open_manifest(opts.manifest, storage,
+                                 get_extensions(('.udlg', )))
+        names = get_names(storage, opts)
+        report = create_report('check_health', names,
+                               progress=opts.progress,
+                               get_size=storage.get_size)
+        for name in names:
+            inspect(storage, name, health, manifest, report, opts)
+        if manifest is not None:
+            manifest.save()
+    report.finish()
+    if opts.report:
+        report.write(opts.report)
     open(opts.output, 'w').write(json.dumps(health))
+    if opts.parse_stats is not None:
+        open(opts.stats, 'w').write(opts.parse_stats.to_json(indent=2))
+    return report.get_totals()[STATUS_FAILED]
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('-d', '--dir', dest='directory',
                         required=True, metavar='directory',
-                        help='directory where find udlg files')
+                        help='directory, archive or bundle where find '
+                             'udlg files')
     parser.add_argument('-o', '--output', dest='output',
                         metavar='dir', help='output file with health data',
                         default='health.json',
@@ -75,10 +135,32 @@ if __name__ == '__main__':
                         action='store_true',
                         help='uses health cache (same file as output) to '
                              'prevent data from processing twice')
+    parser.add_argument('-m', '--manifest', dest='manifest', default=None,
+                        metavar='manifest.json',
+                        help='corpus manifest, documents unchanged since '
+                             'they were checked are taken from health cache '
+                             'without reading')
+    parser.add_argument('-F', '--full', dest='full', action='store_true',
+                        default=False,
+                        help='build documents instead of structural '
+                             'validation only')
+    parser.add_argument('--stats', dest='stats', metavar='stats.json',
+                        help='store per record type parse statistics, '
+                             'implies --full',
+                        required=False, default=None)
+    parser.add_argument('-R', '--report', dest='report', default=None,
+                        metavar='report.json', help='store json run report',
+                        required=False)
+    parser.add_argument('-P', '--progress', dest='progress',
+                        help='show progress line',
+                        action='store_true', required=False, default=False)
     parser.add_argument('-v', '--verbose', dest='verbose',
                         action='store_true',
                         help='verbose output')
     arguments = parser.parse_args()
     if arguments.verbose:
         logging.basicConfig(level=logging.INFO)
-    process(arguments)
+    arguments.parse_stats = ParseStats() if arguments.stats else None
+    arguments.full = arguments.full or arguments.stats is not None
+    #: non zero exit code on failed files, so it could be used as a gate
+    sys.exit(1 if process(arguments) else 0)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+import sys
+import os
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+sys.path.insert(0, ROOT_DIR)
+from udlg.builder import UDLGBuilder
+from udlg.diff import diff
+from udlg.streams import STDIO, open_input
+
+
+def load(path):
+    with open_input(path) as stream:
+        return UDLGBuilder.build(stream)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='structural diff between two udlg documents'
+    )
+    parser.add_argument('old', metavar='old.udlg',
+                        help='old document, - for stdin')
+    parser.add_argument('new', metavar='new.udlg',
+                        help='new document, - for stdin')
+    parser.add_argument('-f', '--format', dest='format', default='text',
+                        choices=('text', 'json'), help='output format')
+    parser.add_argument('-o', '--output', dest='output', default=None,
+                        metavar='diff.txt',
+                        help='store diff into file, - for stdout')
+    arguments = parser.parse_args()
+    result = diff(load(arguments.old), load(arguments.new))
+    if arguments.format == 'json':
+        content = result.to_json(indent=2, ensure_ascii=False)
+    else:
+        content = result.to_text()
+    if arguments.output and arguments.output != STDIO:
+        with open(arguments.output, 'w', encoding='utf-8') as output:
+            output.write(content)
+    elif content:
+        print(content)
+    #: same as diff utility, 1 stands for documents that differ
+    sys.exit(1 if result else 0)
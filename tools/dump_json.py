@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-import json
 import sys
 import os
 import argparse
@@ -8,47 +7,125 @@ from contextlib import closing
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 
 sys.path.insert(0, ROOT_DIR)
-from udlg.builder import UDLGBuilder
-
-
-def unpack(entry, opts):
-    with closing(open(entry.path, 'rb')) as stream:
-        store_path = os.path.join(
-            opts.output_dir, entry.path.split(opts.dialogs_dir)[-1][1:]
-        )
-        store_path = store_path.replace('\\', '/')
-        i18n_path, file_name = store_path.rsplit('/', 1)
-        if not os.path.exists(i18n_path):
-            os.makedirs(i18n_path)
-        file_name = file_name+'.json'
-        store_path = os.path.join(i18n_path, file_name)
-        if not(opts.skip_processed and os.path.exists(store_path)):
-            print("Processing: %s" % entry.path)
-            u = UDLGBuilder.build(stream)
-            open(store_path, 'w').write(json.dumps(u.to_dict()))
+from udlg.compression import (
+    EXTENSIONS, compressed, get_extension, open_compressed, strip_extension
+)
+from udlg.encoders import ENCODERS
+from udlg.manifest import open_manifest
+from udlg.report import STATUS_SKIPPED, create_report
+from udlg.storage import create_storage, open_storage
+from udlg.streams import STDIO, open_input
+
+
+def is_processed(source, output, name, store_name, manifest, opts):
+    if not output.exists(store_name):
+        return False
+    if manifest is not None:
+        return manifest.is_marked(get_mark_key(opts), source.path, name)
+    return opts.skip_processed
+
+
+def get_mark_key(opts):
+    return 'dump_json:%s:%s:%s' % (
+        os.path.abspath(opts.output_dir or '.'), opts.format,
+        opts.compress or ''
+    )
+
+
+def unpack(source, output, name, manifest, report, opts):
+    path = source.get_path(name)
+    with report.file(path) as entry:
+        entry['bytes_in'] = source.get_size(name)
+        store_name = strip_extension(name) + (
+            '.ndjson' if opts.format == 'ndjson' else '.json'
+        ) + get_extension(opts.compress)
+        if not is_processed(source, output, name, store_name, manifest,
+                            opts):
+            if not opts.progress:
+                print("Processing: %s" % path)
+            with closing(source.open(name)) as stream, \
+                    output.create(store_name) as raw, \
+                    compressed(raw, opts.compress, opts.level,
+                               binary=False) as stored:
+                entry['records'] = ENCODERS[opts.format](
+                    stored
+                ).encode_stream(stream)
+            entry['bytes_out'] = output.get_size(store_name)
+            if manifest is not None:
+                manifest.mark(get_mark_key(opts), source.path, name)
         else:
-            print("Skipping: %s" % entry.path)
+            entry['status'] = STATUS_SKIPPED
+            if not opts.progress:
+                print("Skipping: %s" % path)
 
 
-def process(opts, path=None):
-    path = path or opts.dialogs_dir
-    for entry in os.scandir(path):
-        if entry.is_dir():
-            process(opts, path=entry.path)
+def unpack_stream(opts):
+    output_path = opts.output_dir or STDIO
+    with open_input(opts.source) as stream, \
+            open_compressed(output_path, opts.compress, opts.level,
+                            binary=False) as output:
+        ENCODERS[opts.format](output).encode_stream(stream)
+
+
+def process(opts):
+    if opts.source:
+        return unpack_stream(opts)
+    with open_storage(opts.dialogs_dir) as source, \
+            create_storage(opts.output_dir or '.') as output:
+        manifest = open_manifest(opts.manifest, source)
+        if manifest is not None:
+            names = manifest.get_names(source.path, largest_first=True)
         else:
-            unpack(entry, opts)
+            names = source.get_names()
+        report = create_report('dump_json', names, progress=opts.progress,
+                               get_size=source.get_size)
+        try:
+            for name in names:
+                unpack(source, output, name, manifest, report, opts)
+        finally:
+            report.finish()
+            if manifest is not None:
+                manifest.save()
+            if opts.report:
+                report.write(opts.report)
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('-d', '--dialogs', dest='dialogs_dir',
-                        required=True, metavar='Dialogs',
-                        help='Underrail Data/Dialogs directory')
+    sources = parser.add_mutually_exclusive_group(required=True)
+    sources.add_argument('-d', '--dialogs', dest='dialogs_dir',
+                         metavar='Dialogs',
+                         help='Underrail Data/Dialogs directory, zip or '
+                              'tar archive')
+    sources.add_argument('-s', '--source', dest='source', metavar='file.udlg',
+                         help='single document to dump, - for stdin')
     parser.add_argument('-o', '--output', dest='output_dir',
-                        metavar='dir', help='output directory', default='.',
-                        required=False)
+                        metavar='dir', default=None, required=False,
+                        help='output directory or archive (. by default), '
+                             'output file with -s (- for stdout, by '
+                             'default)')
     parser.add_argument('-S', '--skip-processed', dest='skip_processed',
                         help='do not process files already had been processed',
                         action='store_true', required=False, default=False)
+    parser.add_argument('-f', '--format', dest='format',
+                        choices=sorted(ENCODERS), default='json',
+                        help='json (full), compact (schema once, instances '
+                             'as rows) or ndjson (compact, record per line)')
+    parser.add_argument('-z', '--compress', dest='compress', default=None,
+                        choices=sorted(EXTENSIONS),
+                        help='compress output, extension is appended to '
+                             'output file names')
+    parser.add_argument('-l', '--level', dest='level', type=int,
+                        default=None, help='compression level')
+    parser.add_argument('-m', '--manifest', dest='manifest', default=None,
+                        metavar='manifest.json',
+                        help='corpus manifest, documents unchanged since '
+                             'they were dumped are skipped without reading')
+    parser.add_argument('-R', '--report', dest='report', default=None,
+                        metavar='report.json', help='store json run report',
+                        required=False)
+    parser.add_argument('-P', '--progress', dest='progress',
+                        help='show progress line instead of file messages',
+                        action='store_true', required=False, default=False)
     arguments = parser.parse_args()
     process(arguments)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import sys
+import os
+import argparse
+from contextlib import closing
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+sys.path.insert(0, ROOT_DIR)
+from udlg.columns import FORMATS, FORMAT_BIN, StringTableWriter
+from udlg.compression import get_extensions
+from udlg.report import STATUS_FAILED, create_report
+from udlg.storage import open_storage
+
+
+def export(source, writer, name, report, opts):
+    path = source.get_path(name)
+    with closing(source.open(name)) as stream, report.file(path) as entry:
+        entry['bytes_in'] = source.get_size(name)
+        size = writer.size
+        try:
+            entry['strings'] = writer.add_stream(name, stream)
+        except Exception as err:
+            entry['status'] = STATUS_FAILED
+            entry['error'] = '%s: %s' % (err.__class__.__name__, err)
+            if not opts.progress:
+                print("%s: %s" % (path, entry['error']))
+            return
+        entry['bytes_out'] = writer.size - size
+        if not opts.progress:
+            print("Exported: %s, %i strings" % (path, entry['strings']))
+
+
+def process(opts):
+    with open_storage(opts.dialogs_dir) as source, \
+            StringTableWriter(opts.output_dir, format=opts.format) as writer:
+        names = source.get_names(get_extensions(('.udlg', )))
+        report = create_report('export_strings', names,
+                               progress=opts.progress,
+                               get_size=source.get_size)
+        try:
+            for name in names:
+                export(source, writer, name, report, opts)
+        finally:
+            report.finish()
+            if opts.report:
+                report.write(opts.report)
+    return report.get_totals()[STATUS_FAILED]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='export strings of every document into columnar string '
+                    'table: UTF-8 blob with offset, length, file, record, '
+                    'member and class columns'
+    )
+    parser.add_argument('-d', '--dialogs', dest='dialogs_dir',
+                        required=True, metavar='Dialogs',
+                        help='Underrail Data/Dialogs directory, archive or '
+                             'bundle')
+    parser.add_argument('-o', '--output', dest='output_dir', required=True,
+                        metavar='dir', help='string table directory')
+    parser.add_argument('-f', '--format', dest='format', choices=FORMATS,
+                        default=FORMAT_BIN,
+                        help='columns format: bin (raw arrays) or npy '
+                             '(NumPy arrays, NumPy is not required)')
+    parser.add_argument('-R', '--report', dest='report', default=None,
+                        metavar='report.json', help='store json run report',
+                        required=False)
+    parser.add_argument('-P', '--progress', dest='progress',
+                        help='show progress line instead of file messages',
+                        action='store_true', required=False, default=False)
+    arguments = parser.parse_args()
+    #: non zero exit code on failed files, so it could be used as a gate
+    sys.exit(1 if process(arguments) else 0)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+import sys
+import os
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+sys.path.insert(0, ROOT_DIR)
+from udlg.generator import generate_corpus
+
+UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def get_size(value):
+    value = value.strip().upper().rstrip('B')
+    if value and value[-1] in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1]])
+    return int(value)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='generate synthetic udlg documents'
+    )
+    parser.add_argument('-o', '--output', dest='output_dir', default='.',
+                        metavar='dir', help='output directory')
+    parser.add_argument('-s', '--size', dest='sizes', nargs='+',
+                        type=get_size, default=[get_size('1M')],
+                        metavar='size', help='document sizes: 512K, 1M, 1G')
+    parser.add_argument('--schemas', dest='schemas', type=int, default=4,
+                        help='amount of classes')
+    parser.add_argument('--strings', dest='strings', type=int, default=2,
+                        help='amount of string members per class')
+    parser.add_argument('--string-length', dest='string_length', type=int,
+                        default=32, help='average string length')
+    parser.add_argument('--unicode', dest='unicode', type=float,
+                        default=0.5, help='share of multi-byte characters')
+    parser.add_argument('--array-size', dest='array_size', type=int,
+                        default=8, help='average primitive array size')
+    parser.add_argument('--references', dest='reference', type=float,
+                        default=0.1, help='member references share')
+    parser.add_argument('--seed', dest='seed', type=int, default=0,
+                        help='random seed')
+    parser.add_argument('--no-udlg', dest='udlg', action='store_false',
+                        default=True,
+                        help='write plain .NET Binary Format documents')
+    arguments = parser.parse_args()
+    for path in generate_corpus(
+            arguments.output_dir, arguments.sizes, udlg=arguments.udlg,
+            schemas=arguments.schemas, strings=arguments.strings,
+            string_length=arguments.string_length,
+            unicode=arguments.unicode, array_size=arguments.array_size,
+            reference=arguments.reference, seed=arguments.seed):
+        print("Generated: %s" % path)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+import sys
+import os
+import json
+import argparse
+from contextlib import ExitStack, closing
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+sys.path.insert(0, ROOT_DIR)
+from udlg.hashes import compare_directories, hash_file, hash_stream
+from udlg.report import create_report
+from udlg.storage import DirectoryStorage, open_storage
+
+
+def get_documents(sources, stack):
+    """
+    :param list[str] sources: documents, directories, archives or bundles
+    :param contextlib.ExitStack stack: opened storages are closed with it
+    :rtype: list[tuple[udlg.storage.Storage | None, str]]
+    :return: storage and document name, storage is None for documents
+        given as files
+    """
+    documents = []
+    for source in sources:
+        try:
+            storage = stack.enter_context(open_storage(source))
+        except ValueError:
+            documents.append((None, source))
+            continue
+        documents.extend(
+            (storage, name) for name in storage.get_names(('.udlg', ))
+        )
+    return documents
+
+
+def get_size(document):
+    storage, name = document
+    return os.path.getsize(name) if storage is None else storage.get_size(name)
+
+
+def hash_document(document, report, opts):
+    storage, name = document
+    path = name if storage is None else storage.get_path(name)
+    with report.file(path) as entry:
+        entry['bytes_in'] = get_size(document)
+        if storage is None or isinstance(storage, DirectoryStorage):
+            hashes = hash_file(path, ignore_ids=opts.ignore_ids)
+        else:
+            #: sidecar files could not be stored into archives, hashes
+            #: of archive documents are printed only
+            with closing(storage.open(name)) as stream:
+                hashes = hash_stream(stream, ignore_ids=opts.ignore_ids)
+        entry['records'] = len(hashes.records)
+        if not opts.progress:
+            print("%s %s" % (hashes.document.hex(), path))
+
+
+def store(opts):
+    with ExitStack() as stack:
+        documents = get_documents(opts.sources, stack)
+        report = create_report('hashes', documents, progress=opts.progress,
+                               get_size=get_size)
+        try:
+            for document in documents:
+                hash_document(document, report, opts)
+        finally:
+            report.finish()
+            if opts.report:
+                report.write(opts.report)
+
+
+def compare(opts):
+    old_dir, new_dir = opts.compare
+    result = compare_directories(old_dir, new_dir)
+    if opts.format == 'json':
+        print(json.dumps(result, indent=2))
+    else:
+        for name in result['added']:
+            print("added %s" % name)
+        for name in result['removed']:
+            print("removed %s" % name)
+        for name in result['unhashed']:
+            print("unhashed %s" % name)
+        for name, indices in sorted(result['changed'].items()):
+            print("changed %s records: %s" % (
+                name, ','.join('%i' % x for x in indices)
+            ))
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='store udlg documents hashes in sidecar files or '
+                    'compare two directories by sidecar files'
+    )
+    parser.add_argument('-s', '--source', dest='sources', nargs='+',
+                        metavar='path', default=[],
+                        help='udlg files, directories, archives or '
+                             'bundles to hash, sidecar files are stored for '
+                             'files and directory documents')
+    parser.add_argument('-I', '--ignore-ids', dest='ignore_ids',
+                        action='store_true', default=False,
+                        help='leave object ids out of record hashes')
+    parser.add_argument('-c', '--compare', dest='compare', nargs=2,
+                        metavar=('old', 'new'), default=None,
+                        help='compare directories with hashed documents')
+    parser.add_argument('-f', '--format', dest='format', default='text',
+                        choices=('text', 'json'), help='compare output format')
+    parser.add_argument('-R', '--report', dest='report', default=None,
+                        metavar='report.json', help='store json run report',
+                        required=False)
+    parser.add_argument('-P', '--progress', dest='progress',
+                        help='show progress line instead of file messages',
+                        action='store_true', required=False, default=False)
+    arguments = parser.parse_args()
+    if not arguments.sources and not arguments.compare:
+        parser.error('either --source or --compare is required')
+    if arguments.sources:
+        store(arguments)
+    if arguments.compare:
+        result = compare(arguments)
+        sys.exit(1 if (result['added'] or result['removed'] or
+                       result['changed']) else 0)
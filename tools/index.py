@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+import sys
+import os
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+sys.path.insert(0, ROOT_DIR)
+from udlg.index import StringIndex
+from udlg.manifest import Manifest
+from udlg.report import create_report
+from udlg.storage import open_storage
+
+
+def update(index, opts):
+    manifest = Manifest(opts.manifest) if opts.manifest else None
+    for path in opts.update:
+        with open_storage(path) as storage:
+            names = storage.get_names(('.udlg', ))
+            report = create_report('index', names, progress=opts.progress,
+                                   get_size=storage.get_size)
+            try:
+                result = index.update(storage, report=report,
+                                      manifest=manifest)
+            finally:
+                report.finish()
+                if opts.report:
+                    report.write(opts.report)
+        print("%s: added %i, skipped %i, removed %i" % (
+            path, result['added'], result['skipped'], result['removed']
+        ))
+    if manifest is not None:
+        manifest.save()
+
+
+def search(index, opts):
+    for path, record_idx, member_idx, value in index.search(
+            opts.query, words=opts.words, limit=opts.limit):
+        coordinates = ('%i' % record_idx if member_idx is None
+                       else '%i,%i' % (record_idx, member_idx))
+        value = value.replace('\r', '\\r').replace('\n', '\\n')
+        if opts.width and len(value) > opts.width:
+            value = value[:opts.width] + '...'
+        print("%s:%s=>'%s'" % (path, coordinates, value))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='full text index over udlg documents strings'
+    )
+    parser.add_argument('-i', '--index', dest='index', required=True,
+                        metavar='strings.db', help='index database path')
+    parser.add_argument('-u', '--update', dest='update', nargs='+',
+                        default=[], metavar='Dialogs',
+                        help='index new and changed documents of '
+                             'directories, archives or bundles')
+    parser.add_argument('-q', '--query', dest='query', default=None,
+                        metavar='phrase', help='phrase to find')
+    parser.add_argument('-w', '--words', dest='words', action='store_true',
+                        default=False,
+                        help='treat query as FTS5 words query')
+    parser.add_argument('-l', '--limit', dest='limit', type=int,
+                        default=None, help='limit amount of results')
+    parser.add_argument('-W', '--width', dest='width', type=int, default=120,
+                        help='cut string values longer than given width, '
+                             '0 to print them as is')
+    parser.add_argument('-m', '--manifest', dest='manifest', default=None,
+                        metavar='manifest.json',
+                        help='corpus manifest, unchanged directory '
+                             'documents are not even hashed on update')
+    parser.add_argument('-R', '--report', dest='report', default=None,
+                        metavar='report.json', help='store json run report',
+                        required=False)
+    parser.add_argument('-P', '--progress', dest='progress',
+                        help='show progress line while indexing',
+                        action='store_true', required=False, default=False)
+    arguments = parser.parse_args()
+    with StringIndex(arguments.index) as index:
+        if arguments.update:
+            update(index, arguments)
+        if arguments.query is not None:
+            search(index, arguments)
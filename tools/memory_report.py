@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+import sys
+import os
+import json
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+sys.path.insert(0, ROOT_DIR)
+from udlg.memory import MemoryReport
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return '%.1f %s' % (size, unit)
+        size /= 1024.0
+    return '%.1f GB' % size
+
+
+def summary(totals):
+    print("Documents: %i" % totals['documents'])
+    print("Retained: %s, peak during build: %s" % (
+        format_size(totals['retained']), format_size(totals['peak'])
+    ))
+    for name, entry in sorted(totals['records'].items(),
+                              key=lambda x: -x[1]['bytes']):
+        print("  %-32s %8i %12s" % (name, entry['count'],
+                                    format_size(entry['bytes'])))
+    print("  %-32s %8i %12s" % ('strings', totals['strings']['count'],
+                                format_size(totals['strings']['bytes'])))
+    for name, size in sorted(totals['caches'].items()):
+        print("  %-32s %8s %12s" % ('cache ' + name, '', format_size(size)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='memory footprint of parsed udlg documents'
+    )
+    parser.add_argument('-s', '--source', dest='sources', nargs='+',
+                        required=True, metavar='path',
+                        help='udlg files or directories')
+    parser.add_argument('-o', '--output', dest='output', default=None,
+                        metavar='report.json', help='store json report')
+    arguments = parser.parse_args()
+    report = MemoryReport()
+    for path in arguments.sources:
+        report.add_path(path)
+    document = report.to_dict()
+    if arguments.output:
+        open(arguments.output, 'w').write(json.dumps(document, indent=2))
+    summary(document['totals'])
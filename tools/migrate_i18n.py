@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import sys
+import os
+import json
+import argparse
+from contextlib import closing
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+sys.path.insert(0, ROOT_DIR)
+from udlg.builder import UDLGBuilder
+from udlg.migrate import migrate
+from udlg.report import STATUS_SKIPPED, create_report
+from udlg.storage import DirectoryStorage, create_storage, open_storage
+
+import logging
+logger = logging.getLogger(__file__)
+
+
+def load(storage, name):
+    with closing(storage.open(name)) as stream:
+        return UDLGBuilder.build(stream)
+
+
+def read(storage, name):
+    with closing(storage.open(name)) as stream:
+        return stream.read()
+
+
+def open_source(path):
+    """
+    :param str path: document, directory, archive or bundle path
+    :rtype: tuple[udlg.storage.Storage, str | None]
+    :return: storage and document name, single document is served from
+        its directory, name is None for storages
+    """
+    try:
+        return open_storage(path), None
+    except ValueError:
+        directory, name = os.path.split(path)
+        return DirectoryStorage(directory or '.'), name
+
+
+def migrate_document(old, new, i18n, output, names, report, opts):
+    """
+    :param tuple[str] names: old document, new document, old i18n and new
+        i18n names in their storages
+    :rtype: dict | None
+    :return: migration, None if document was skipped
+    """
+    old_name, new_name, i18n_name, output_name = names
+    path = new.get_path(new_name)
+    with report.file(path) as entry:
+        entry['bytes_in'] = new.get_size(new_name)
+        if not (old.exists(old_name) and i18n.exists(i18n_name)):
+            logger.warning("No old version or translation for %s, "
+                           "skipping", path)
+            entry['status'] = STATUS_SKIPPED
+            return None
+        if not opts.progress:
+            print("Processing: %s" % path)
+        migration = migrate(load(old, old_name), load(new, new_name),
+                            read(i18n, i18n_name))
+        block = migration.to_i18n()
+        with output.create(output_name) as stream:
+            stream.write(block)
+        entry['bytes_out'] = len(block)
+        entry['records'] = len(migration.entries)
+        totals = migration.get_totals()
+        entry['strings_changed'] = len(migration.entries) - totals['matched']
+        return migration.to_dict()
+
+
+def process(opts):
+    new, new_name = open_source(opts.new)
+    if new_name is None:
+        old, i18n = open_storage(opts.old), open_storage(opts.i18n)
+        output = create_storage(opts.output)
+        jobs = [(x, x, x + '.txt', x + '.txt')
+                for x in new.get_names(('.udlg', ))]
+    else:
+        (old, old_name), (i18n, i18n_name) = (open_source(opts.old),
+                                              open_source(opts.i18n))
+        directory, output_name = os.path.split(opts.output)
+        output = create_storage(directory or '.')
+        jobs = [(old_name, new_name, i18n_name, output_name)]
+    report = create_report('migrate_i18n', [x[1] for x in jobs],
+                           progress=opts.progress, get_size=new.get_size)
+    migrations = {}
+    try:
+        for names in jobs:
+            migration = migrate_document(old, new, i18n, output, names,
+                                         report, opts)
+            if migration is not None:
+                migrations[new.get_path(names[1])] = migration
+    finally:
+        report.finish()
+        for storage in (output, new, old, i18n):
+            storage.close()
+        if opts.report:
+            report.write(opts.report)
+    if opts.migration_report:
+        with open(opts.migration_report, 'w') as output:
+            output.write(json.dumps(migrations, indent=2,
+                                    ensure_ascii=False))
+    return migrations
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='migrate i18n files to the new version of documents'
+    )
+    parser.add_argument('-a', '--old', dest='old', required=True,
+                        metavar='old', help='old original udlg file or '
+                                            'Dialogs directory, archive or '
+                                            'bundle')
+    parser.add_argument('-b', '--new', dest='new', required=True,
+                        metavar='new', help='new original udlg file or '
+                                            'Dialogs directory, archive or '
+                                            'bundle')
+    parser.add_argument('-T', '--i18n', dest='i18n', required=True,
+                        metavar='i18n', help='old translation i18n file or '
+                                             'directory, archive or bundle')
+    parser.add_argument('-o', '--output', dest='output', required=True,
+                        metavar='output', help='new i18n file or directory '
+                                               'or archive')
+    parser.add_argument('-M', '--migration-report', dest='migration_report',
+                        default=None, metavar='migration.json',
+                        help='store changed, moved, new and orphaned '
+                             'strings report')
+    parser.add_argument('-R', '--report', dest='report', default=None,
+                        metavar='report.json', help='store json run report',
+                        required=False)
+    parser.add_argument('-P', '--progress', dest='progress',
+                        help='show progress line instead of file messages',
+                        action='store_true', required=False, default=False)
+    arguments = parser.parse_args()
+    for path, migration in sorted(process(arguments).items()):
+        totals = migration['totals']
+        print("%s: %s" % (path, ', '.join(
+            '%s %i' % (x, totals[x]) for x in sorted(totals)
+        )))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+#: will work on python 3.5+ only
+
+import sys
+import os
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+sys.path.insert(0, ROOT_DIR)
+from udlg.service import DEFAULT_BUDGET, DialogService, create_server
+from udlg.storage import open_storage
+
+import logging
+logger = logging.getLogger(__file__)
+
+
+def process(opts):
+    with open_storage(opts.dialogs_dir) as storage:
+        service = DialogService(storage, budget=opts.budget * 1024 * 1024,
+                                export_root=opts.export_root)
+        server = create_server(service, host=opts.host, port=opts.port,
+                               socket_path=opts.socket)
+        print('Serving %i dialogs of %s on %s' % (
+            len(storage.get_names()), opts.dialogs_dir,
+            opts.socket or 'http://%s:%i' % server.server_address[:2]
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='serve dialogs strings and translations over http'
+    )
+    parser.add_argument('-d', '--dialogs', dest='dialogs_dir', required=True,
+                        metavar='Dialogs',
+                        help='Underrail Data/Dialogs directory, archive or '
+                             'bundle')
+    parser.add_argument('-H', '--host', dest='host', default='127.0.0.1',
+                        help='host to listen on')
+    parser.add_argument('-p', '--port', dest='port', type=int, default=8042,
+                        help='port to listen on')
+    parser.add_argument('-u', '--unix-socket', dest='socket', default=None,
+                        metavar='udlg.sock',
+                        help='listen on unix socket instead of host and port')
+    parser.add_argument('-M', '--memory', dest='budget', type=int,
+                        default=DEFAULT_BUDGET // (1024 * 1024),
+                        metavar='MB', help='document cache memory budget')
+    parser.add_argument('-e', '--export-root', dest='export_root',
+                        default=None, metavar='Translated',
+                        help='directory translated dialogs are exported '
+                             'under, export is disabled if not set')
+    parser.add_argument('-v', '--verbose', dest='verbose',
+                        action='store_true',
+                        help='verbose output')
+    arguments = parser.parse_args()
+    if arguments.verbose:
+        logging.basicConfig(level=logging.INFO)
+    process(arguments)
@@ -1,4 +1,24 @@
-from .builder import BinaryFormatterFileBuilder
+import sys
 
 __all__ = ['BinaryFormatterFileBuilder', ]
 __VERSION__ = (0, 0, 1, "alpha")
+
+#: public name: module it's imported from on first access, so ``import udlg``
+#: (``setup.py`` reading version for example) does not load the parser
+LAZY_ATTRIBUTES = {
+    'BinaryFormatterFileBuilder': 'udlg.builder',
+}
+
+
+def __getattr__(name):
+    if name in LAZY_ATTRIBUTES:
+        module = __import__(LAZY_ATTRIBUTES[name], fromlist=[name])
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module 'udlg' has no attribute '%s'" % name)
+
+
+if sys.version_info < (3, 7):
+    #: no module level ``__getattr__`` support
+    from .builder import BinaryFormatterFileBuilder  # noqa
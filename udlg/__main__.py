@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.__main__
+    :synopsis: ``python -m udlg``, same as ``udlg`` console script
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -7,54 +7,185 @@
 .. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
 """
 import io
+from contextlib import closing
+
 from . import structure
+from .context import ParserContext
 from .enums import RecordTypeEnum
 from .structure import Record, UDLGFile
+from .compression import decompress_stream
+
+#: records other records could refer to with ``ClassWithId``
+CLASS_RECORD_TYPES = (
+    RecordTypeEnum.SystemClassWithMembers,
+    RecordTypeEnum.ClassWithMembers,
+    RecordTypeEnum.SystemClassWithMembersAndTypes,
+    RecordTypeEnum.ClassWithMembersAndTypes
+)
+
+
+class ClassMetadataMap(dict):
+    """
+    Object id map that keeps class metadata records only, so records are
+    not pinned in memory while iterating over them
+    """
+    def __setitem__(self, object_id, value):
+        record_type, void_ptr = value
+        if record_type in CLASS_RECORD_TYPES:
+            super(ClassMetadataMap, self).__setitem__(object_id, value)
+
+    def update(self, other):
+        for object_id, value in other.items():
+            self[object_id] = value
 
 
 class BinaryFormatterFileBuilder(object):
     @classmethod
-    def build(cls, stream):
+    def check_stream(cls, stream):
         """
-        build .net binary data structure record from serialized stream
+        check stream could be used for building
 
         :param stream: stream object
+        :rtype: None
+        :return: None
+        :raises EnvironmentError:
+            - if stream was opened not in binary mode
+        """
+        if isinstance(stream, io.TextIOBase):
+            stream.close()
+            raise EnvironmentError(
+                "You should open stream with `binary` (b) flag"
+            )
+
+    @classmethod
+    def iter_records(cls, stream, context=None):
+        """
+        iterate over records stored in stream, one record at a time
+
+        .. warning::
+
+            Stream offset should be set up right after Serialization Header
+
+        :param stream: stream object
+        :param udlg.context.ParserContext context: parse state shared
+            between records, new one would be created if nothing was given,
+            it's released once records are over
+        :rtype: collections.Iterable[udlg.structure.Record]
+        :return: records, the last one is always ``MessageEnd``
+        """
+        context = ParserContext() if context is None else context
+        try:
+            while True:
+                record = Record()
+                record._initiate(stream=stream, context=context)
+                yield record
+                if record.record_type == RecordTypeEnum.MessageEnd:
+                    break
+        finally:
+            context.release()
+
+    @classmethod
+    def build(cls, stream, stats=None, hashes=None):
+        """
+        build .net binary data structure record from serialized stream,
+        stream is read forward only, so pipes, sockets and decompression
+        streams could be used as well as files, gzip, xz and bzip2
+        compressed content is detected and decompressed on the fly
+
+        :param stream: readable binary stream object
+        :param udlg.stats.ParseStats stats: statistics collector, parsing
+            is not instrumented if nothing was given
+        :param udlg.hashes.DocumentHashes hashes: record hashes collector,
+            hashes are not computed if nothing was given
         :rtype: structure.
         :return:
         :raises EnvironmentError:
             - if stream was opened not in binary mode
         """
-        if isinstance(stream, io.BufferedReader):
-            if 'b' not in stream.mode:
-                stream.close()
-                raise EnvironmentError(
-                    "You should open stream with `binary` (b) flag"
-                )
+        cls.check_stream(stream)
+        stream = decompress_stream(stream)
+        if stats is None:
+            return cls.build_document(stream, hashes=hashes)
+        with stats.instrument(stream) as instrumented:
+            return cls.build_document(instrumented, stats=stats,
+                                      hashes=hashes)
+
+    @classmethod
+    def build_document(cls, stream, stats=None, hashes=None):
+        """
+        build document from decompressed stream, see ``build``
+
+        :param stream: readable binary stream object
+        :param udlg.stats.ParseStats stats: statistics collector set to
+            parse context
+        :param udlg.hashes.DocumentHashes hashes: record hashes collector
+        :rtype: structure.BinaryDataStructureFile
+        :return: document
+        """
         document = structure.BinaryDataStructureFile()
-        document.header._initiate(stream)
-        records = list()
-        append = records.append
-
-        #: id: info
-        object_id_map = {}
-        count = 0
-        while True:
-            record = Record()
-            record._object_id_map = object_id_map
-            record._initiate(stream=stream, object_id_map=object_id_map)
-            append(record)
-            count += 1
-            if record.record_type == RecordTypeEnum.MessageEnd:
-                break
+        context = ParserContext(stats=stats)
+        if hashes is None:
+            document.header._initiate(stream)
+            records = list(cls.iter_records(stream, context))
+        else:
+            stream = hashes.track(stream)
+            document.header._initiate(stream)
+            hashes.set_header(stream.consume())
+            records = []
+            for record in cls.iter_records(stream, context):
+                hashes.add(record, stream.consume())
+                records.append(record)
+            document.hashes = hashes
         document.records_ptr = (Record * len(records))(*records)
-        document.count = count
+        document.count = len(records)
         return document
 
+    @classmethod
+    def build_many(cls, names, opener, workers=None):
+        """
+        build documents in thread pool, builds share no state, see
+        ``udlg.context`` for thread safety notes
+
+        .. code-block:: python
+
+            with DirectoryStorage('Data/Dialogs') as storage:
+                names = storage.get_names()
+                for name, document, error in UDLGBuilder.build_many(
+                        names, storage.open, workers=8):
+                    ...
+
+        :param collections.Iterable[str] names: document names
+        :param callable opener: called with document name from worker
+            thread, returns binary stream, it's closed once document is
+            built; ``open``, ``DirectoryStorage.open`` and
+            ``BundleStorage.open`` are safe to call concurrently, tar
+            archive members are not
+        :param int workers: amount of threads, processors count if nothing
+            was given
+        :rtype: collections.Iterable[tuple]
+        :return: name, document and error in names order, document is None
+            if build has failed with error; only few documents per worker
+            are built ahead of the caller, see ``udlg.cli.READ_AHEAD``
+        """
+        #: thread pool machinery is imported on demand, it costs more than
+        #: the whole parser to import
+        from .cli import iter_results
+
+        def build(name):
+            with closing(opener(name)) as stream:
+                return cls.build(stream)
+
+        return iter_results(names, build, workers=workers)
+
 
 class UDLGBuilder(BinaryFormatterFileBuilder):
     @classmethod
-    def build(cls, stream):
+    def build_document(cls, stream, stats=None, hashes=None):
         document = UDLGFile()
         document._initiate(stream)
-        document.data = super(UDLGBuilder, cls).build(stream)
+        document.data = super(UDLGBuilder, cls).build_document(
+            stream, stats=stats, hashes=hashes
+        )
+        if hashes is not None:
+            document.hashes = hashes
         return document
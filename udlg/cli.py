@@ -0,0 +1,568 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.cli
+    :synopsis: ``udlg`` command line entry point
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+One command runs any set of corpus commands over documents storage, every
+document is read once, built once in worker thread and then passed through
+every command, so ``udlg check dump apply`` parses corpus once, not three
+times:
+
+.. code-block:: bash
+
+    udlg check dump apply -d Data/Dialogs -D i18n.dump -i i18n -o out
+
+Commands run in ``COMMANDS`` order whatever order they were given in, so
+``apply`` changing document strings is the last one. Documents are read
+and results are stored from main thread, so any storage and sqlite index
+could be used with worker pool.
+
+Run cache (``-c``) keeps key of every command finished for document: its
+content digest and command target (output, index, i18n file digest), next
+run skips commands with unchanged keys and does not parse documents all
+commands are up to date for. Stats are collected from parsed documents,
+so ``stats`` command is never skipped, every document is instrumented with
+its own collector in worker thread and collectors are merged from main
+thread, so instrumented builds run concurrently too. With manifest (``-m``)
+digests of unchanged documents and i18n files are taken from it, so they
+are not read at all, see ``udlg.manifest``.
+"""
+import os
+import io
+import sys
+import json
+import argparse
+from collections import deque
+from contextlib import closing
+
+from .hashes import digest
+from .manifest import DIGEST, SIZE
+
+COMMAND_CHECK = 'check'
+COMMAND_STATS = 'stats'
+COMMAND_INDEX = 'index'
+COMMAND_DUMP = 'dump'
+COMMAND_APPLY = 'apply'
+#: commands in order they run for each document
+COMMANDS = (COMMAND_CHECK, COMMAND_STATS, COMMAND_INDEX, COMMAND_DUMP,
+            COMMAND_APPLY)
+#: commands which are never skipped by run cache
+UNCACHED_COMMANDS = (COMMAND_STATS, )
+
+#: documents read ahead per worker, bounds memory held by pending jobs
+READ_AHEAD = 2
+
+
+def get_digest(data):
+    """
+    :param bytes data: document content
+    :rtype: str
+    :return: content digest, hex encoded, same as
+        ``udlg.manifest.get_file_digest`` one
+    """
+    return digest(data).hex()
+
+
+class RunCache(object):
+    """
+    Keys of commands finished for documents, stored as json
+    """
+    def __init__(self, path=None):
+        """
+        :param str path: cache file path, in memory cache if nothing was
+            given
+        """
+        self.path = path
+        #: document name: {command: key}
+        self.documents = {}
+        if path and os.path.exists(path):
+            with open(path, 'r') as stream:
+                self.documents = json.loads(stream.read())
+
+    def get_stale(self, name, keys):
+        """
+        :param str name: document name
+        :param dict keys: command: its actual key
+        :rtype: list[str]
+        :return: commands to run, in ``COMMANDS`` order
+        """
+        known = self.documents.get(name, {})
+        return [
+            command for command in COMMANDS if command in keys and (
+                command in UNCACHED_COMMANDS or
+                known.get(command) != keys[command]
+            )
+        ]
+
+    def set(self, name, command, key):
+        self.documents.setdefault(name, {})[command] = key
+
+    def save(self):
+        if self.path:
+            with open(self.path, 'w') as stream:
+                stream.write(json.dumps(self.documents, sort_keys=True))
+
+
+def run_commands(data, commands, i18n_block=None, stats=None):
+    """
+    build document and run commands over it, called from worker thread,
+    results are stored by caller
+
+    :param bytes data: document content, compressed one is fine
+    :param list[str] commands: commands to run, in ``COMMANDS`` order
+    :param bytes i18n_block: i18n file content for ``apply``
+    :param udlg.stats.ParseStats stats: parse statistics for ``stats``,
+        should not be shared with other workers
+    :rtype: dict
+    :return: ``records``, ``strings`` for ``index``, ``i18n`` for ``dump``,
+        ``strings_changed`` and ``binary`` for ``apply``
+    :raises ValueError:
+        - if ``check`` finds document incomplete
+    """
+    from .builder import UDLGBuilder
+    from .enums import RecordTypeEnum
+    from .index import get_rows
+
+    document = UDLGBuilder.build(
+        io.BytesIO(data), stats=stats if COMMAND_STATS in commands else None
+    )
+    result = {'records': document.data.count}
+    if COMMAND_CHECK in commands:
+        if document.records[-1].record_type != RecordTypeEnum.MessageEnd:
+            raise ValueError('Document has no MessageEnd record')
+    if COMMAND_INDEX in commands:
+        result['strings'] = get_rows(document)
+    if COMMAND_DUMP in commands:
+        result['i18n'] = document.unpack_i18n()
+    if COMMAND_APPLY in commands:
+        result['strings_changed'] = document.load_i18n(i18n_block)
+        result['binary'] = bytes(document.to_bin())
+    return result
+
+
+def iter_results(jobs, worker, workers=None):
+    """
+    run jobs in thread pool, reading ahead only few of them
+
+    :param collections.Iterable jobs: jobs, consumed from calling thread
+    :param callable worker: called with job from worker thread
+    :param int workers: amount of threads, processors count by default
+    :rtype: collections.Iterable[tuple]
+    :return: job, its result and error in jobs order, result is None if
+        worker has failed with error
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for job in jobs:
+            pending.append((job, executor.submit(worker, job)))
+            if len(pending) >= workers * READ_AHEAD:
+                yield get_result(*pending.popleft())
+        while pending:
+            yield get_result(*pending.popleft())
+
+
+def get_result(job, future):
+    try:
+        return job, future.result(), None
+    except Exception as err:
+        return job, None, err
+
+
+class Runner(object):
+    """
+    Runs commands over storage documents, see module documentation
+    """
+    def __init__(self, opts):
+        """
+        :param argparse.Namespace opts: parsed ``udlg`` arguments
+        """
+        from .stats import ParseStats
+
+        self.opts = opts
+        self.commands = [x for x in COMMANDS if x in opts.commands]
+        self.cache = RunCache(opts.cache)
+        self.stats = (ParseStats() if COMMAND_STATS in self.commands
+                      else None)
+        self.source = None
+        self.i18n = None
+        self.dump = None
+        self.output = None
+        self.index = None
+        self.manifest = None
+        #: manifest entries of documents and i18n files, None if there's
+        #: no manifest or storage is not a directory
+        self.source_entries = None
+        self.i18n_entries = None
+        #: command: its target part of run cache key
+        self.targets = {
+            COMMAND_CHECK: '',
+            COMMAND_STATS: '',
+            COMMAND_INDEX: os.path.abspath(opts.index or ''),
+            COMMAND_DUMP: '%s:%s' % (os.path.abspath(opts.dump_dir),
+                                     opts.compress or ''),
+            COMMAND_APPLY: '%s:%s' % (os.path.abspath(opts.output_dir or ''),
+                                      opts.compress or ''),
+        }
+
+    def open(self):
+        from .compression import get_extensions
+        from .index import StringIndex
+        from .manifest import Manifest
+        from .storage import DirectoryStorage, create_storage, open_storage
+
+        opts = self.opts
+        self.source = open_storage(opts.dialogs_dir)
+        if COMMAND_INDEX in self.commands:
+            self.index = StringIndex(opts.index)
+        if COMMAND_DUMP in self.commands:
+            self.dump = create_storage(opts.dump_dir)
+        if COMMAND_APPLY in self.commands:
+            self.i18n = open_storage(opts.i18n_dir)
+            self.output = create_storage(opts.output_dir)
+        if opts.manifest:
+            self.manifest = Manifest(opts.manifest)
+            if isinstance(self.source, DirectoryStorage):
+                self.manifest.refresh(self.source.path,
+                                      get_extensions(('.udlg', )))
+                self.source_entries = self.manifest.get_entries(
+                    self.source.path
+                )
+            if isinstance(self.i18n, DirectoryStorage):
+                self.manifest.refresh(self.i18n.path, ('.txt', ))
+                self.i18n_entries = self.manifest.get_entries(self.i18n.path)
+
+    def close(self):
+        for storage in (self.output, self.dump, self.i18n, self.source):
+            if storage is not None:
+                storage.close()
+        if self.index is not None:
+            self.index.close()
+        if self.manifest is not None:
+            self.manifest.save()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_names(self):
+        """
+        :rtype: list[str]
+        :return: document names, largest documents first, so they do not
+            finish worker pool run last
+        """
+        from .compression import get_extensions
+
+        if self.source_entries is not None:
+            return self.manifest.get_names(self.source.path,
+                                           largest_first=True)
+        names = self.source.get_names(get_extensions(('.udlg', )))
+        return sorted(names, key=lambda x: -self.source.get_size(x))
+
+    def get_size(self, name):
+        if self.source_entries is not None:
+            return self.source_entries[name][SIZE]
+        return self.source.get_size(name)
+
+    def read(self, name):
+        with closing(self.source.open(name)) as stream:
+            return stream.read()
+
+    def read_i18n(self, name):
+        from .compression import strip_extension
+
+        i18n_name = strip_extension(name) + '.txt'
+        try:
+            with closing(self.i18n.open(i18n_name)) as stream:
+                return stream.read()
+        except (OSError, KeyError):
+            return None
+
+    def get_i18n_digest(self, name):
+        """
+        :param str name: document name
+        :rtype: tuple[str | None, bytes | None]
+        :return: i18n file digest, None if there's no i18n file, and its
+            content if it had to be read
+        """
+        from .compression import strip_extension
+
+        if self.i18n_entries is None:
+            block = self.read_i18n(name)
+            return (None if block is None else get_digest(block)), block
+        entry = self.i18n_entries.get(strip_extension(name) + '.txt')
+        return (None if entry is None else entry[DIGEST]), None
+
+    def get_keys(self, name, digest, i18n_digest):
+        """
+        :param str name: document name
+        :param str digest: document digest
+        :param str i18n_digest: i18n file digest, None if there's none
+        :rtype: dict
+        :return: command: key of its inputs and target
+        """
+        keys = dict(
+            (command, '%s:%s' % (digest, self.targets[command]))
+            for command in self.commands
+        )
+        if COMMAND_APPLY in keys:
+            if i18n_digest is None:
+                #: nothing to apply
+                keys.pop(COMMAND_APPLY)
+            else:
+                keys[COMMAND_APPLY] += ':' + i18n_digest
+        return keys
+
+    def iter_jobs(self, names, report, skipped):
+        """
+        read documents and decide on commands to run, documents every
+        command is up to date for are reported as skipped right away, with
+        manifest they are not even read
+
+        :param list[str] names: document names
+        :param udlg.report.RunReport report: run report
+        :param list skipped: document names without any command to run
+        :rtype: collections.Iterable[dict]
+        :return: jobs
+        """
+        from .report import CACHE_HIT, STATUS_SKIPPED
+
+        for name in names:
+            data = None
+            if self.source_entries is not None:
+                digest = self.source_entries[name][DIGEST]
+            else:
+                data = self.read(name)
+                digest = get_digest(data)
+            i18n_digest, i18n_block = None, None
+            if COMMAND_APPLY in self.commands:
+                i18n_digest, i18n_block = self.get_i18n_digest(name)
+            keys = self.get_keys(name, digest, i18n_digest)
+            commands = self.cache.get_stale(name, keys)
+            if not commands:
+                with report.file(self.source.get_path(name)) as entry:
+                    entry['bytes_in'] = self.get_size(name)
+                    entry['cache'] = CACHE_HIT
+                    entry['status'] = STATUS_SKIPPED
+                skipped.append(name)
+                continue
+            if data is None:
+                data = self.read(name)
+            if COMMAND_APPLY in commands and i18n_block is None:
+                i18n_block = self.read_i18n(name)
+            yield {'name': name, 'data': data, 'digest': digest,
+                   'i18n': i18n_block, 'keys': keys, 'commands': commands}
+
+    def work(self, job):
+        from time import perf_counter
+        from .stats import ParseStats
+
+        started = perf_counter()
+        stats = ParseStats() if COMMAND_STATS in job['commands'] else None
+        result = run_commands(job['data'], job['commands'],
+                              i18n_block=job['i18n'], stats=stats)
+        result['stats'] = stats
+        result['time'] = perf_counter() - started
+        return result
+
+    def store(self, job, result, entry):
+        """
+        store command results of document
+
+        :param dict job: document job
+        :param dict result: ``run_commands`` result
+        :param dict entry: report entry
+        :rtype: None
+        :return: None
+        """
+        from .compression import compressed, get_extension, strip_extension
+        from .storage import DirectoryStorage
+
+        opts = self.opts
+        name = job['name']
+        commands = job['commands']
+        entry['records'] = result['records']
+        if result['stats'] is not None:
+            self.stats.merge(result['stats'])
+        if COMMAND_INDEX in commands:
+            path = self.source.get_path(name)
+            local = isinstance(self.source, DirectoryStorage)
+            self.index.add_rows(
+                path, result['strings'], job['digest'],
+                self.get_size(name), os.path.getmtime(path) if local else 0.0
+            )
+        stored = []
+        if COMMAND_DUMP in commands:
+            stored.append((self.dump, strip_extension(name) + '.txt',
+                           result['i18n']))
+        if COMMAND_APPLY in commands:
+            entry['strings_changed'] = result['strings_changed']
+            stored.append((self.output, strip_extension(name),
+                           result['binary']))
+        for storage, store_name, block in stored:
+            store_name += get_extension(opts.compress)
+            with storage.create(store_name) as raw, \
+                    compressed(raw, opts.compress, opts.level) as stream:
+                stream.write(block)
+            entry['bytes_out'] += storage.get_size(store_name)
+        for command in commands:
+            self.cache.set(name, command, job['keys'][command])
+
+    def run(self):
+        """
+        :rtype: udlg.report.RunReport
+        :return: run report
+        """
+        from .report import CACHE_MISS, STATUS_FAILED, create_report
+        from .storage import DirectoryStorage
+
+        opts = self.opts
+        names = self.get_names()
+        report = create_report('udlg', names, progress=opts.progress,
+                               get_size=self.get_size)
+        skipped = []
+        try:
+            jobs = self.iter_jobs(names, report, skipped)
+            for job, result, error in iter_results(jobs, self.work,
+                                                   workers=opts.jobs):
+                path = self.source.get_path(job['name'])
+                with report.file(path) as entry:
+                    entry['bytes_in'] = self.get_size(job['name'])
+                    entry['cache'] = CACHE_MISS
+                    if error is None:
+                        try:
+                            self.store(job, result, entry)
+                        except Exception as err:
+                            error = err
+                    if error is not None:
+                        entry['status'] = STATUS_FAILED
+                        entry['error'] = '%s: %s' % (
+                            error.__class__.__name__, error
+                        )
+                        if not opts.progress:
+                            print("%s: %s" % (path, entry['error']))
+                    elif not opts.progress:
+                        print("Processed: %s (%s)" % (
+                            path, ', '.join(job['commands'])
+                        ))
+                #: parse time spent in worker thread
+                entry['time'] += result['time'] if result else 0.0
+        finally:
+            report.finish()
+            self.cache.save()
+        if self.index is not None:
+            if isinstance(self.source, DirectoryStorage):
+                self.index.prune(self.source.path, [
+                    self.source.get_path(name) for name in names
+                ])
+            self.index.connection.commit()
+        if self.stats is not None:
+            with open(opts.stats, 'w') as stream:
+                stream.write(self.stats.to_json(indent=2))
+        if opts.report:
+            report.write(opts.report)
+        return report
+
+
+def create_parser():
+    """
+    :rtype: argparse.ArgumentParser
+    :return: ``udlg`` arguments parser
+    """
+    from .compression import EXTENSIONS
+
+    parser = argparse.ArgumentParser(
+        prog='udlg',
+        description='run commands over udlg documents, every document is '
+                    'parsed once for all of them; commands: check - make '
+                    'sure documents are complete, stats - per record type '
+                    'parse statistics, index - full text strings index, '
+                    'dump - i18n files, apply - apply i18n files'
+    )
+    parser.add_argument('commands', nargs='+', choices=COMMANDS,
+                        metavar='command',
+                        help='%s' % ', '.join(COMMANDS))
+    parser.add_argument('-d', '--dialogs', dest='dialogs_dir',
+                        required=True, metavar='Dialogs',
+                        help='Underrail Data/Dialogs directory, archive or '
+                             'bundle')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=None,
+                        help='worker threads, processors count by default')
+    parser.add_argument('-c', '--cache', dest='cache', default=None,
+                        metavar='cache.json',
+                        help='run cache, commands up to date for document '
+                             'are skipped')
+    parser.add_argument('-m', '--manifest', dest='manifest', default=None,
+                        metavar='manifest.json',
+                        help='corpus manifest, unchanged documents and i18n '
+                             'files are not read to find out they are '
+                             'unchanged')
+    parser.add_argument('-D', '--dump-dir', dest='dump_dir', default='.',
+                        metavar='dir',
+                        help='dump: i18n files output directory or archive '
+                             '(. by default)')
+    parser.add_argument('-i', '--i18n', dest='i18n_dir', default=None,
+                        metavar='i18n',
+                        help='apply: i18n files directory or archive')
+    parser.add_argument('-o', '--output', dest='output_dir', default=None,
+                        metavar='dir',
+                        help='apply: output directory or archive')
+    parser.add_argument('-z', '--compress', dest='compress', default=None,
+                        choices=sorted(EXTENSIONS),
+                        help='dump, apply: compress output, extension is '
+                             'appended to output file names')
+    parser.add_argument('-l', '--level', dest='level', type=int,
+                        default=None, help='compression level')
+    parser.add_argument('-x', '--index', dest='index', default='strings.db',
+                        metavar='strings.db',
+                        help='index: index database path')
+    parser.add_argument('-s', '--stats', dest='stats', default='stats.json',
+                        metavar='stats.json',
+                        help='stats: parse statistics output')
+    parser.add_argument('-R', '--report', dest='report', default=None,
+                        metavar='report.json', help='store json run report')
+    parser.add_argument('-P', '--progress', dest='progress',
+                        action='store_true', default=False,
+                        help='show progress line instead of file messages')
+    parser.add_argument('-v', '--verbose', dest='verbose',
+                        action='store_true', help='verbose output')
+    return parser
+
+
+def main(arguments=None):
+    """
+    ``udlg`` console script
+
+    :param list[str] arguments: command line arguments, ``sys.argv`` ones
+        if nothing was given
+    :rtype: int
+    :return: exit code, non zero if any document has failed
+    """
+    from .report import STATUS_FAILED
+
+    parser = create_parser()
+    #: commands could be given after options, intermixed parsing is
+    #: python 3.7+ only
+    parse = getattr(parser, 'parse_intermixed_args', parser.parse_args)
+    opts = parse(arguments)
+    if COMMAND_APPLY in opts.commands and not (opts.i18n_dir and
+                                               opts.output_dir):
+        parser.error('apply requires -i/--i18n and -o/--output')
+    if opts.verbose:
+        import logging
+        logging.basicConfig(level=logging.INFO)
+    with Runner(opts) as runner:
+        report = runner.run()
+    return 1 if report.get_totals()[STATUS_FAILED] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
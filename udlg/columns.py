@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.columns
+    :synopsis: Columnar string table of documents corpus
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Every string of every document is stored in one contiguous UTF-8 blob with
+parallel columns, ``i``-th item of each column describes ``i``-th string:
+
+- ``offset``, ``length`` - string position in ``strings`` blob, bytes
+- ``file_id`` - index in ``files.json`` list of document names
+- ``record_id``, ``member_id`` - the same coordinates ``unpack_i18n`` uses,
+  member id is ``-1`` for top level string records
+- ``class_id`` - index in ``classes.json`` list of owning record class names,
+  ``-1`` for top level string records
+
+Columns are little-endian arrays, stored either as raw binary files
+(``<column>.bin``) or as NumPy ``.npy`` files (``<column>.npy``), the latter
+are written without NumPy and could be loaded with
+``numpy.load(path, mmap_mode='r')``. Column types and string count are kept
+in ``table.json``. Strings are exported right from parsed records, document
+is not built, string values are not decoded.
+
+.. code-block:: python
+
+    with StringTableWriter('strings', format=FORMAT_NPY) as writer:
+        with open('Lucas1.udlg', 'rb') as stream:
+            writer.add_stream('Lucas1.udlg', stream)
+
+    with StringTable('strings') as table:
+        offsets = table.get_column('offset')
+        file_name, record_id, member_id, class_name, value = table[0]
+"""
+import os
+import sys
+import json
+from array import array
+
+FORMAT_BIN = 'bin'
+FORMAT_NPY = 'npy'
+FORMATS = (FORMAT_BIN, FORMAT_NPY)
+
+TABLE_FILE = 'table.json'
+FILES_FILE = 'files.json'
+CLASSES_FILE = 'classes.json'
+#: column with strings blob
+STRINGS = 'strings'
+
+#: column: (array typecode, NumPy dtype)
+COLUMNS = (
+    ('offset', ('Q', '<u8')),
+    ('length', ('I', '<u4')),
+    ('file_id', ('I', '<u4')),
+    ('record_id', ('I', '<u4')),
+    ('member_id', ('i', '<i4')),
+    ('class_id', ('i', '<i4')),
+)
+STRINGS_TYPE = ('B', '|u1')
+
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+#: header is written with fixed size, so blob header could be rewritten
+#: once its length is known, it's 64 bytes aligned as ``.npy`` expects
+NPY_HEADER_SIZE = 128
+NPY_HEADER = "{'descr': '%s', 'fortran_order': False, 'shape': (%i,), }"
+
+
+def get_npy_header(dtype, count):
+    """
+    :param str dtype: NumPy dtype
+    :param int count: amount of items
+    :rtype: bytes
+    :return: ``.npy`` version 1.0 header of one dimensional array
+    """
+    header = (NPY_HEADER % (dtype, count)).encode('latin1')
+    size = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2
+    header = header.ljust(size - 1) + b'\n'
+    return NPY_MAGIC + len(header).to_bytes(2, 'little') + header
+
+
+def parse_npy_header(data):
+    """
+    :param bytes data: ``.npy`` file beginning
+    :rtype: tuple[str, int, int]
+    :return: dtype, amount of items and data offset
+    :raises ValueError:
+        - if data is not ``.npy`` version 1.0 one dimensional array
+    """
+    from ast import literal_eval
+
+    if data[:len(NPY_MAGIC)] != NPY_MAGIC:
+        raise ValueError('Not a .npy version 1.0 file')
+    size = int.from_bytes(data[len(NPY_MAGIC):len(NPY_MAGIC) + 2], 'little')
+    offset = len(NPY_MAGIC) + 2
+    header = literal_eval(data[offset:offset + size].decode('latin1'))
+    if header['fortran_order'] or len(header['shape']) != 1:
+        raise ValueError('One dimensional array is expected')
+    return header['descr'], header['shape'][0], offset + size
+
+
+def to_little_endian(values):
+    """
+    :param array.array values: array
+    :rtype: array.array
+    :return: array with little-endian items
+    """
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class StringTableWriter(object):
+    """
+    Writes string table, strings blob is written as strings come, columns
+    are kept in compact arrays and written on close
+    """
+    def __init__(self, path, format=FORMAT_BIN):
+        """
+        :param str path: output directory
+        :param str format: columns format, ``bin`` or ``npy``
+        :raises ValueError:
+            - if format is unknown
+        """
+        if format not in FORMATS:
+            raise ValueError('Unknown format: %s' % format)
+        self.path = path
+        self.format = format
+        self.columns = dict(
+            (name, array(typecode)) for name, (typecode, _) in COLUMNS
+        )
+        self.files = []
+        #: class name: class id
+        self.classes = {}
+        self.size = 0
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.blob = open(self.get_path(STRINGS), 'wb')
+        if format == FORMAT_NPY:
+            self.blob.write(get_npy_header(STRINGS_TYPE[1], 0))
+
+    def get_path(self, column):
+        return os.path.join(self.path, '%s.%s' % (column, self.format))
+
+    def get_class_id(self, name):
+        """
+        :param bytes name: class name, None for no class
+        :rtype: int
+        :return: class id, -1 for no class
+        """
+        if name is None:
+            return -1
+        class_id = self.classes.get(name)
+        if class_id is None:
+            class_id = self.classes[name] = len(self.classes)
+        return class_id
+
+    def add(self, file_id, record_id, member_id, class_id, value):
+        """
+        :param int file_id: file id
+        :param int record_id: record index
+        :param int member_id: member index, -1 for top level string
+        :param int class_id: owning record class id, -1 for no class
+        :param bytes value: UTF-8 string value
+        :rtype: None
+        :return: None
+        """
+        columns = self.columns
+        columns['offset'].append(self.size)
+        columns['length'].append(len(value))
+        columns['file_id'].append(file_id)
+        columns['record_id'].append(record_id)
+        columns['member_id'].append(member_id)
+        columns['class_id'].append(class_id)
+        self.blob.write(value)
+        self.size += len(value)
+
+    def add_records(self, name, record_list):
+        """
+        add strings of document records
+
+        :param str name: document name
+        :param collections.Iterable[udlg.structure.Record] record_list:
+            records, they are not kept
+        :rtype: int
+        :return: amount of added strings
+        """
+        from .diff import get_class_name
+        from .structure import records
+
+        file_id = len(self.files)
+        self.files.append(name)
+        count, size = len(self.columns['offset']), self.size
+        classes = len(self.classes)
+        try:
+            for idx, record in enumerate(record_list):
+                entry = record.entry
+                if isinstance(entry, records.BinaryObjectString):
+                    self.add(file_id, idx, -1, -1, entry.value.value)
+                    continue
+                class_id = None
+                for jdx, member in enumerate(record.members):
+                    if not isinstance(member, records.BinaryObjectString):
+                        continue
+                    if class_id is None:
+                        class_id = self.get_class_id(get_class_name(entry))
+                    self.add(file_id, idx, jdx, class_id,
+                             member.value.value)
+        except Exception:
+            #: broken document leaves nothing behind
+            self.rollback(count, size, classes)
+            raise
+        return len(self.columns['offset']) - count
+
+    def rollback(self, count, size, classes):
+        """
+        drop the last document strings and classes
+
+        :param int count: amount of strings before document
+        :param int size: blob size before document
+        :param int classes: amount of classes before document
+        :rtype: None
+        :return: None
+        """
+        self.files.pop()
+        for name in [x for x, y in self.classes.items() if y >= classes]:
+            del self.classes[name]
+        for values in self.columns.values():
+            del values[count:]
+        self.blob.seek(size + (NPY_HEADER_SIZE
+                               if self.format == FORMAT_NPY else 0))
+        self.blob.truncate()
+        self.size = size
+
+    def add_stream(self, name, stream):
+        """
+        add strings of document read from stream, records are parsed one
+        at a time, document is not built
+
+        :param str name: document name
+        :param stream: binary stream, compressed one is fine
+        :rtype: int
+        :return: amount of added strings
+        """
+        from .builder import UDLGBuilder, ClassMetadataMap
+        from .compression import decompress_stream
+        from .context import ParserContext
+        from .structure import structure
+
+        UDLGBuilder.check_stream(stream)
+        stream = decompress_stream(stream)
+        structure.UDLGFile()._initiate(stream)
+        structure.SerializationHeader()._initiate(stream)
+        return self.add_records(name, UDLGBuilder.iter_records(
+            stream, context=ParserContext(ClassMetadataMap())
+        ))
+
+    def add_document(self, name, document):
+        """
+        add strings of already built document
+
+        :param str name: document name
+        :param udlg.structure.UDLGFile document: document
+        :rtype: int
+        :return: amount of added strings
+        """
+        return self.add_records(name, document.data.records)
+
+    def close(self):
+        if self.blob.closed:
+            return
+        if self.format == FORMAT_NPY:
+            self.blob.seek(0)
+            self.blob.write(get_npy_header(STRINGS_TYPE[1], self.size))
+        self.blob.close()
+        for name, (_, dtype) in COLUMNS:
+            with open(self.get_path(name), 'wb') as stream:
+                values = to_little_endian(self.columns[name])
+                if self.format == FORMAT_NPY:
+                    stream.write(get_npy_header(dtype, len(values)))
+                values.tofile(stream)
+        classes = sorted(self.classes, key=self.classes.get)
+        for file_name, names in ((FILES_FILE, self.files),
+                                 (CLASSES_FILE, [
+                                     x.decode('utf-8', 'replace')
+                                     for x in classes
+                                 ])):
+            with open(os.path.join(self.path, file_name), 'w') as stream:
+                stream.write(json.dumps(names))
+        with open(os.path.join(self.path, TABLE_FILE), 'w') as stream:
+            stream.write(json.dumps({
+                'format': self.format,
+                'count': len(self.columns['offset']),
+                'size': self.size,
+                'columns': dict(
+                    (name, dtype)
+                    for name, (_, dtype) in COLUMNS + ((STRINGS,
+                                                        STRINGS_TYPE), )
+                ),
+            }, indent=2, sort_keys=True))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class StringTable(object):
+    """
+    Memory mapped string table, columns are ``memoryview`` objects over
+    mapped files, nothing is read until it's accessed
+    """
+    def __init__(self, path):
+        """
+        :param str path: string table directory
+        """
+        self.path = path
+        with open(os.path.join(path, TABLE_FILE), 'r') as stream:
+            self.meta = json.loads(stream.read())
+        with open(os.path.join(path, FILES_FILE), 'r') as stream:
+            self.files = json.loads(stream.read())
+        with open(os.path.join(path, CLASSES_FILE), 'r') as stream:
+            self.classes = json.loads(stream.read())
+        self.format = self.meta['format']
+        self.count = self.meta['count']
+        self.maps = []
+        self.columns = {}
+
+    def get_path(self, column):
+        return os.path.join(self.path, '%s.%s' % (column, self.format))
+
+    def get_column(self, name):
+        """
+        :param str name: column name or ``strings`` for strings blob
+        :rtype: memoryview
+        :return: column items
+        """
+        if name in self.columns:
+            return self.columns[name]
+        typecode, _ = dict(COLUMNS + ((STRINGS, STRINGS_TYPE), ))[name]
+        view = memoryview(self.map(self.get_path(name)))
+        if self.format == FORMAT_NPY:
+            _, _, offset = parse_npy_header(bytes(view[:NPY_HEADER_SIZE]))
+            view = view[offset:]
+        if sys.byteorder != 'little' and typecode != STRINGS_TYPE[0]:
+            values = array(typecode, view.tobytes())
+            values.byteswap()
+            view = memoryview(values)
+        else:
+            view = view.cast(typecode)
+        self.columns[name] = view
+        return view
+
+    def map(self, path):
+        import mmap
+
+        with open(path, 'rb') as stream:
+            if not os.fstat(stream.fileno()).st_size:
+                #: empty files could not be mapped
+                return b''
+            mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        self.maps.append(mapped)
+        return mapped
+
+    def get_value(self, idx):
+        """
+        :param int idx: string index
+        :rtype: bytes
+        :return: UTF-8 string value
+        """
+        offset = self.get_column('offset')[idx]
+        length = self.get_column('length')[idx]
+        return self.get_column(STRINGS)[offset:offset + length].tobytes()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, idx):
+        """
+        :param int idx: string index
+        :rtype: tuple[str, int, int | None, str | None, str]
+        :return: document name, record index, member index, owning class
+            name and string value
+        """
+        member_id = self.get_column('member_id')[idx]
+        class_id = self.get_column('class_id')[idx]
+        return (
+            self.files[self.get_column('file_id')[idx]],
+            self.get_column('record_id')[idx],
+            None if member_id < 0 else member_id,
+            None if class_id < 0 else self.classes[class_id],
+            self.get_value(idx).decode('utf-8', 'replace')
+        )
+
+    def close(self):
+        for view in self.columns.values():
+            view.release()
+        self.columns = {}
+        for mapped in self.maps:
+            mapped.close()
+        self.maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
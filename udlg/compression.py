@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.compression
+    :synopsis: Transparent compressed input and output
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Compressed documents are detected by magic bytes peeked from the stream and
+decompressed while they are parsed, nothing is unpacked to disk. Only
+stdlib codecs are used: gzip, xz and bzip2.
+
+.. code-block:: python
+
+    with open('Lucas1.udlg.gz', 'rb') as stream:
+        document = UDLGBuilder.build(stream)
+    with open_compressed('Lucas1.udlg.xz', XZ, level=6) as output:
+        output.write(document.to_bin())
+"""
+import io
+from contextlib import contextmanager
+
+from .streams import make_peekable, open_output
+
+GZIP = 'gzip'
+XZ = 'xz'
+BZIP2 = 'bz2'
+
+#: compression: magic bytes, gzip magic is followed by deflate method
+MAGIC = (
+    (GZIP, b'\x1f\x8b\x08'),
+    (XZ, b'\xfd7zXZ\x00'),
+    (BZIP2, b'BZh'),
+)
+MAGIC_SIZE = max(len(magic) for _, magic in MAGIC)
+
+EXTENSIONS = {
+    GZIP: '.gz',
+    XZ: '.xz',
+    BZIP2: '.bz2',
+}
+
+#: compression: default level, xz level is its preset
+DEFAULT_LEVELS = {
+    GZIP: 6,
+    XZ: 6,
+    BZIP2: 9,
+}
+
+
+def detect(stream):
+    """
+    detect compression by magic bytes, stream is not consumed
+
+    :param stream: stream with ``peek``, ``udlg.streams.PeekableStream``
+        for example
+    :rtype: str | None
+    :return: compression, None for uncompressed stream
+    """
+    head = stream.peek(MAGIC_SIZE)[:MAGIC_SIZE]
+    for compression, magic in MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def decompress_stream(stream):
+    """
+    :param stream: readable binary stream object
+    :rtype: udlg.streams.PeekableStream
+    :return: forward only stream, decompressed on the fly if stream
+        content is compressed
+    """
+    stream = make_peekable(stream)
+    compression = detect(stream)
+    #: codecs are imported once compressed content is met
+    if compression == GZIP:
+        import gzip
+        return make_peekable(gzip.GzipFile(fileobj=stream, mode='rb'))
+    if compression == XZ:
+        import lzma
+        return make_peekable(lzma.LZMAFile(stream, mode='rb'))
+    if compression == BZIP2:
+        import bz2
+        return make_peekable(bz2.BZ2File(stream, mode='rb'))
+    return stream
+
+
+def compress_stream(output, compression, level=None):
+    """
+    :param output: writable binary stream object
+    :param str compression: compression, one of ``EXTENSIONS``
+    :param int level: compression level, codec default if nothing was given
+    :rtype: io.BufferedIOBase
+    :return: stream compressing data written into it, closing it does not
+        close output
+    :raises ValueError:
+        - if compression is unknown
+    """
+    if compression not in EXTENSIONS:
+        raise ValueError("Unknown compression: `%s`" % compression)
+    if level is None:
+        level = DEFAULT_LEVELS[compression]
+    if compression == GZIP:
+        import gzip
+        #: no file name and time in header, so output is reproducible
+        return gzip.GzipFile(filename='', fileobj=output, mode='wb',
+                             compresslevel=level, mtime=0)
+    if compression == XZ:
+        import lzma
+        return lzma.LZMAFile(output, mode='wb', preset=level)
+    import bz2
+    return bz2.BZ2File(output, mode='wb', compresslevel=level)
+
+
+def get_extension(compression):
+    """
+    :param str compression: compression, None for no compression
+    :rtype: str
+    :return: file extension, empty one for no compression
+    """
+    return EXTENSIONS[compression] if compression else ''
+
+
+def get_extensions(extensions):
+    """
+    :param tuple extensions: document extensions
+    :rtype: tuple
+    :return: document extensions with their compressed variants
+    """
+    return tuple(extensions) + tuple(
+        extension + suffix for extension in extensions
+        for suffix in sorted(EXTENSIONS.values())
+    )
+
+
+def strip_extension(path):
+    """
+    :param str path: file path
+    :rtype: str
+    :return: path without compression extension
+    """
+    for extension in EXTENSIONS.values():
+        if path.endswith(extension):
+            return path[:-len(extension)]
+    return path
+
+
+@contextmanager
+def compressed(output, compression=None, level=None, binary=True):
+    """
+    :param output: writable binary stream object, it stays open
+    :param str compression: compression, data is written as is if nothing
+        was given
+    :param int level: compression level
+    :param bool binary: binary mode, text is encoded with utf-8
+    :rtype: collections.Iterator
+    :return: stream
+    """
+    stream = output
+    if compression is not None:
+        stream = compress_stream(output, compression, level=level)
+    try:
+        if binary:
+            yield stream
+        else:
+            text = io.TextIOWrapper(stream, encoding='utf-8')
+            yield text
+            text.flush()
+            text.detach()
+    finally:
+        if stream is not output:
+            stream.close()
+
+
+@contextmanager
+def open_compressed(path, compression=None, level=None, binary=True):
+    """
+    open file for writing, ``-`` stands for stdout
+
+    :param str path: file path or ``-``
+    :param str compression: compression, data is written as is if nothing
+        was given
+    :param int level: compression level
+    :param bool binary: open in binary mode, text is encoded with utf-8
+    :rtype: collections.Iterator
+    :return: stream
+    """
+    if compression is None:
+        with open_output(path, binary=binary) as output:
+            yield output
+        return
+    with open_output(path) as output, compressed(
+            output, compression, level=level, binary=binary) as stream:
+        yield stream
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.context
+    :synopsis: Per parse state
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Everything parser keeps between records lives in ``ParserContext``, every
+build creates its own one and there's no module or class level parse state,
+so documents could be built from different threads at the same time.
+
+Thread safety:
+
+- builds are independent, any amount of threads could build documents
+  concurrently, instrumented ones too: ``udlg.stats.ParseStats`` collector
+  is set to context of build and parser reports to it, collector should
+  not be shared by concurrent builds though, merge per build collectors
+  with ``ParseStats.merge`` instead
+- built document could be read and serialized (``to_bin``, ``to_dict``,
+  ``unpack_i18n``) from several threads at once, lazily resolved
+  ``_entry``, ``_members`` and ``_value`` attributes are computed from
+  immutable ctypes data, so threads racing for them store equal values
+- document changes (``set_string``, ``load_i18n``, ``set_member``) should
+  not run concurrently with any other access to the same document
+"""
+from .enums import RecordTypeEnum
+
+#: records other records could refer to by object id, plain ints as it's
+#: checked for every record
+REFERABLE_RECORD_TYPES = frozenset(int(x) for x in (
+    RecordTypeEnum.SystemClassWithMembers,
+    RecordTypeEnum.ClassWithMembers,
+    RecordTypeEnum.SystemClassWithMembersAndTypes,
+    RecordTypeEnum.ClassWithMembersAndTypes,
+    RecordTypeEnum.BinaryObjectString,
+    RecordTypeEnum.BinaryArray,
+))
+
+
+class ParserContext(object):
+    """
+    Parse state of one document, records refer to it while they are parsed
+    """
+    def __init__(self, object_id_map=None, stats=None):
+        """
+        :param dict object_id_map: object id map, new one would be created
+            if nothing was given, ``udlg.builder.ClassMetadataMap`` keeps
+            class metadata records only
+        :param udlg.stats.ParseStats stats: statistics collector records
+            and parser sections are reported to, nothing is collected if
+            nothing was given
+        """
+        #: object id: (record type, void pointer to record)
+        self.object_id_map = {} if object_id_map is None else object_id_map
+        self.stats = stats
+
+    def register(self, entry):
+        """
+        register record other records could refer to
+
+        :param udlg.structure.base.BinaryRecordStructure entry: record
+        :rtype: None
+        :return: None
+        """
+        record_type = entry.record_type
+        if record_type not in REFERABLE_RECORD_TYPES:
+            return
+        if hasattr(entry, 'class_info'):
+            object_id = entry.class_info.object_id
+        else:
+            object_id = entry.object_id
+        self.object_id_map[object_id] = (record_type, entry.get_void_ptr())
+
+    def resolve(self, object_id):
+        """
+        :param int object_id: object id
+        :rtype: tuple[int, ctypes.c_void_p]
+        :return: record type and void pointer to record
+        :raises KeyError:
+            - if there's no such object registered
+        """
+        return self.object_id_map[object_id]
+
+    def release(self):
+        """
+        drop parse state once document is parsed, records keep referring
+        to context, so object id map and statistics collector are not
+        pinned in memory by them
+
+        :rtype: None
+        :return: None
+        """
+        self.object_id_map = {}
+        self.stats = None
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.decoders
+    :synopsis: Streaming decoders, json dump to binary apply engine
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import re
+import json
+from shutil import copyfileobj
+
+from .builder import BinaryFormatterFileBuilder, ClassMetadataMap
+from .context import ParserContext
+from .compression import decompress_stream
+from .hashes import HashingStream
+from .structure import structure, records
+
+WHITESPACE = ' \t\n\r'
+WHITESPACE_REG = re.compile('[%s]*' % WHITESPACE)
+
+
+def iter_json_array(fp, key='records', chunk_size=64 * 1024):
+    """
+    iterate over elements of json array stored under given key, elements
+    are decoded one by one so the whole document is never loaded at once
+
+    .. note::
+
+        Array elements should be json objects, first occurrence of ``key``
+        is used, that's always true for documents written by
+        :class:`udlg.encoders.JSONStreamEncoder`
+
+    :param fp: text file like object
+    :param str key: array key
+    :param int chunk_size: amount of characters to read at once
+    :rtype: collections.Iterable[dict]
+    :return: array elements
+    :raises ValueError:
+        - if key was not found or document is broken
+    """
+    decoder = json.JSONDecoder()
+    key_reg = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    buffer = ''
+    while True:
+        match = key_reg.search(buffer)
+        if match:
+            idx = match.end()
+            break
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            raise ValueError("Array `%s` not found" % key)
+        buffer += chunk
+
+    eof = False
+    expect_separator = False
+    read_size = chunk_size
+    while True:
+        #: elements are decoded in place, buffer is never re-sliced per
+        #: element
+        idx = WHITESPACE_REG.match(buffer, idx).end()
+        if idx < len(buffer):
+            if buffer[idx] == ']':
+                return
+            elif expect_separator:
+                if buffer[idx] != ',':
+                    raise ValueError("Broken `%s` array" % key)
+                idx += 1
+                expect_separator = False
+                continue
+            try:
+                element, idx_end = decoder.raw_decode(buffer, idx)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError("Broken `%s` array" % key)
+            else:
+                yield element
+                idx = idx_end
+                expect_separator = True
+                read_size = chunk_size
+                continue
+        if eof:
+            raise ValueError("Unexpected end of `%s` array" % key)
+        chunk = fp.read(read_size)
+        eof = not chunk
+        #: consumed part is dropped once per chunk read
+        buffer = buffer[idx:] + chunk
+        idx = 0
+        #: element does not fit in, read bigger chunks
+        read_size *= 2
+
+
+def encode_value(value):
+    """
+    convert json string value back to raw utf-8 bytes
+
+    :param str value: value
+    :rtype: bytes
+    :return: raw bytes
+    """
+    return value.encode('utf-8', 'surrogateescape')
+
+
+class JSONStreamApplier(object):
+    """
+    Applies json dump (see :class:`udlg.encoders.JSONStreamEncoder`) to
+    original binary document: changed strings and primitive members are
+    written into binary output, unchanged records are copied untouched.
+    """
+    def __init__(self):
+        self.records = 0
+        self.records_changed = 0
+        self.members_changed = 0
+        #: keeps assigned strings alive until record is written
+        self._cache = []
+
+    def apply(self, stream, fp, output, udlg=True):
+        """
+        apply json dump to binary stream
+
+        :param stream: original binary stream, file for example, compressed
+            one is decompressed
+        :param fp: text file like object with json dump
+        :param output: binary file like object to write result into
+        :param bool udlg: stream contains udlg header, True by default
+        :rtype: int
+        :return: amount of changed members
+        """
+        BinaryFormatterFileBuilder.check_stream(stream)
+        #: raw bytes of every record are collected while it is parsed, so
+        #: source is never read whole
+        stream = HashingStream(decompress_stream(stream))
+        if udlg:
+            structure.UDLGFile()._initiate(stream)
+        structure.SerializationHeader()._initiate(stream)
+        output.write(stream.consume())
+
+        records_iterator = BinaryFormatterFileBuilder.iter_records(
+            stream, context=ParserContext(ClassMetadataMap())
+        )
+        json_records = iter_json_array(fp, key='records')
+        for idx, record in enumerate(records_iterator):
+            data = stream.consume()
+            try:
+                document = next(json_records)
+            except StopIteration:
+                raise ValueError(
+                    "Record %i is missing in json document" % idx
+                )
+            if self.apply_record(idx, record, document):
+                self.records_changed += 1
+                output.write(record.to_bin())
+                self._cache = []
+            else:
+                output.write(data)
+            self.records += 1
+        if next(json_records, None) is not None:
+            raise ValueError(
+                "Json document has more records than binary one"
+            )
+        output.write(stream.consume())
+        #: trailing bytes, if any, are copied without being collected
+        copyfileobj(stream.stream, output)
+        return self.members_changed
+
+    def apply_record(self, idx, record, document):
+        """
+        apply record dictionary to record
+
+        :param int idx: record index
+        :param udlg.structure.Record record: record
+        :param dict document: record dictionary
+        :rtype: bool
+        :return: True if record was changed
+        """
+        if document.get('record_type') != record.record_type:
+            raise ValueError(
+                "Record %i type mismatch: %r, expected %i" % (
+                    idx, document.get('record_type'), record.record_type
+                )
+            )
+        entry = record.entry
+        entry_document = document['entry']
+        if isinstance(entry, records.BinaryObjectString):
+            return self.apply_string(entry, entry_document)
+        elif isinstance(entry, (records.ClassWithMembersMixin,
+                                records.SystemClassWithMembersAndTypes,
+                                records.ArraySinglePrimitive)):
+            return self.apply_members(idx, entry, entry_document['members'])
+        return False
+
+    def apply_string(self, entry, document):
+        """
+        apply binary object string dictionary
+
+        :param udlg.structure.records.BinaryObjectString entry: string
+        :param dict document: string dictionary
+        :rtype: bool
+        :return: True if string was changed
+        """
+        value = encode_value(document['value']['value'])
+        if entry.value.value == value:
+            return False
+        entry.set(value)
+        self._cache.append(entry.value)
+        self.members_changed += 1
+        return True
+
+    def apply_members(self, idx, entry, members):
+        """
+        apply members values
+
+        :param int idx: record index
+        :param entry: record entry with members
+        :param list members: member values and dictionaries
+        :rtype: bool
+        :return: True if any member was changed
+        """
+        member_list = entry.members
+        if len(member_list) != len(members):
+            raise ValueError(
+                "Record %i members count mismatch: %i, expected %i" % (
+                    idx, len(members), len(member_list)
+                )
+            )
+        changed = False
+        for jdx, (member, document) in enumerate(zip(member_list, members)):
+            if isinstance(member, records.BinaryObjectString):
+                changed = self.apply_string(member, document) or changed
+            elif isinstance(document, dict):
+                #: other records are structural, they are not editable
+                continue
+            else:
+                if isinstance(document, str):
+                    #: char primitive type
+                    document = encode_value(document)
+                if member != document:
+                    entry.set_member(jdx, document)
+                    self.members_changed += 1
+                    changed = True
+        return changed
+
+
+def apply_json(stream, fp, output, udlg=True):
+    """
+    apply json dump to binary stream and write result into output
+
+    :param stream: original binary stream, file for example
+    :param fp: text file like object with json dump
+    :param output: binary file like object to write result into
+    :param bool udlg: stream contains udlg header, True by default
+    :rtype: int
+    :return: amount of changed members
+    """
+    return JSONStreamApplier().apply(stream, fp, output, udlg=udlg)
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.diff
+    :synopsis: Structural diff between two parsed documents
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Records of both documents are hashed once, hashes ignore object ids so
+records shifted by inserted or removed ones still match. Records are aligned
+by hashes unique in both documents (longest increasing subsequence of their
+positions), records left between aligned ones are matched by hash first and
+by shape (record type and class name) after, so whole diff takes
+``O(n log n)`` for ``n`` records instead of pairwise deep comparison.
+
+Coordinates are the same ones ``unpack_i18n`` uses: record index and member
+index, member index is ``None`` for top level string records.
+"""
+import json
+from bisect import bisect_left
+from collections import defaultdict, deque
+
+from .hashes import digest
+from .structure import records
+
+#: record statuses
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+#: fields that differ between equal records of different documents
+IGNORED_FIELDS = ('object_id', 'id_ref', 'metadata_id', 'class_reference',
+                  'class_reference_type')
+
+
+def normalize(value):
+    """
+    drop object ids and class references from record dict
+
+    :param value: record ``to_dict`` result or its part
+    :return: normalized value
+    """
+    if isinstance(value, dict):
+        return tuple(
+            (key, normalize(item)) for key, item in sorted(value.items())
+            if key not in IGNORED_FIELDS
+        )
+    if isinstance(value, list):
+        return tuple(normalize(x) for x in value)
+    return value
+
+
+def get_record_hash(record):
+    """
+    :param udlg.structure.Record record: record
+    :rtype: bytes
+    :return: record content digest, object ids are not taken into account,
+        resolved class name is, so records of different classes with the
+        same member values do not match
+    """
+    return digest(repr((
+        get_class_name(record.entry), normalize(record.entry.to_dict())
+    )).encode('utf-8'))
+
+
+def get_class_name(entry):
+    """
+    :param entry: record entry
+    :rtype: bytes | None
+    :return: class name for class records, None for other ones
+    """
+    if isinstance(entry, records.ClassWithId):
+        entry = entry.class_reference
+    class_info = getattr(entry, 'class_info', None)
+    return class_info.name.value if class_info is not None else None
+
+
+def get_record_shape(record):
+    """
+    :param udlg.structure.Record record: record
+    :rtype: tuple
+    :return: record type and class name
+    """
+    return record.record_type, get_class_name(record.entry)
+
+
+def get_strings(record):
+    """
+    :param udlg.structure.Record record: record
+    :rtype: dict[int | None, bytes]
+    :return: string values by member index, ``None`` index stands for top
+        level string record
+    """
+    entry = record.entry
+    if isinstance(entry, records.BinaryObjectString):
+        return {None: entry.value.value}
+    return {
+        idx: member.value.value for idx, member in enumerate(record.members)
+        if isinstance(member, records.BinaryObjectString)
+    }
+
+
+def get_longest_increasing(pairs):
+    """
+    longest subsequence of pairs with increasing second item, pairs should
+    be sorted by first item
+
+    :param list[tuple[int, int]] pairs: pairs
+    :rtype: list[tuple[int, int]]
+    :return: subsequence
+    """
+    tails, tail_idx = [], []
+    previous = [None] * len(pairs)
+    for idx, (_, value) in enumerate(pairs):
+        position = bisect_left(tails, value)
+        if position:
+            previous[idx] = tail_idx[position - 1]
+        if position == len(tails):
+            tails.append(value)
+            tail_idx.append(idx)
+        else:
+            tails[position] = value
+            tail_idx[position] = idx
+    sequence = []
+    idx = tail_idx[-1] if tail_idx else None
+    while idx is not None:
+        sequence.append(pairs[idx])
+        idx = previous[idx]
+    sequence.reverse()
+    return sequence
+
+
+def match(old_keys, new_keys, old_range, new_range):
+    """
+    match positions with equal keys inside ranges in order of appearance
+
+    :param list old_keys: old document keys
+    :param list new_keys: new document keys
+    :param list[int] old_range: old document positions to match
+    :param list[int] new_range: new document positions to match
+    :rtype: tuple[list[tuple[int, int]], list[int], list[int]]
+    :return: matched pairs, unmatched old and new positions
+    """
+    positions = defaultdict(deque)
+    for idx in new_range:
+        positions[new_keys[idx]].append(idx)
+    pairs, unmatched = [], []
+    for idx in old_range:
+        queue = positions.get(old_keys[idx])
+        if queue:
+            pairs.append((idx, queue.popleft()))
+        else:
+            unmatched.append(idx)
+    matched = set(x for _, x in pairs)
+    return pairs, unmatched, [x for x in new_range if x not in matched]
+
+
+def align(old_hashes, new_hashes, old_shapes, new_shapes):
+    """
+    align records of two documents
+
+    :param list[bytes] old_hashes: old document record hashes
+    :param list[bytes] new_hashes: new document record hashes
+    :param list[tuple] old_shapes: old document record shapes
+    :param list[tuple] new_shapes: new document record shapes
+    :rtype: tuple[list, list, list[int], list[int]]
+    :return: equal pairs, changed pairs, removed and added positions
+    """
+    old_count, new_count = defaultdict(int), defaultdict(int)
+    for key in old_hashes:
+        old_count[key] += 1
+    new_index = {}
+    for idx, key in enumerate(new_hashes):
+        new_count[key] += 1
+        new_index[key] = idx
+    anchors = get_longest_increasing([
+        (idx, new_index[key]) for idx, key in enumerate(old_hashes)
+        if old_count[key] == 1 and new_count.get(key) == 1
+    ])
+
+    equal, changed, removed, added = list(anchors), [], [], []
+    bounds = anchors + [(len(old_hashes), len(new_hashes))]
+    old_start = new_start = 0
+    for old_end, new_end in bounds:
+        pairs, old_left, new_left = match(
+            old_hashes, new_hashes, range(old_start, old_end),
+            range(new_start, new_end)
+        )
+        equal.extend(pairs)
+        pairs, old_left, new_left = match(old_shapes, new_shapes,
+                                          old_left, new_left)
+        changed.extend(pairs)
+        removed.extend(old_left)
+        added.extend(new_left)
+        old_start, new_start = old_end + 1, new_end + 1
+    equal.sort()
+    changed.sort()
+    return equal, changed, removed, added
+
+
+class DocumentDiff(object):
+    """
+    Structural diff of two parsed documents: added, removed and changed
+    records and strings with their coordinates.
+
+    .. code-block:: python
+
+        diff = DocumentDiff(old_document, new_document)
+        for entry in diff.strings:
+            print(entry['status'], entry['old'], entry['new'])
+    """
+    def __init__(self, old, new):
+        """
+        :param old: old document, UDLGFile or BinaryDataStructureFile
+        :param new: new document, UDLGFile or BinaryDataStructureFile
+        """
+        self.old = old
+        self.new = new
+        #: list of record changes
+        self.records = []
+        #: list of string changes
+        self.strings = []
+        self.equal = 0
+        self._compare()
+
+    @staticmethod
+    def _get_record_list(document):
+        return list(document.records)
+
+    def _compare(self):
+        old_records = self._get_record_list(self.old)
+        new_records = self._get_record_list(self.new)
+        equal, changed, removed, added = align(
+            [get_record_hash(x) for x in old_records],
+            [get_record_hash(x) for x in new_records],
+            [get_record_shape(x) for x in old_records],
+            [get_record_shape(x) for x in new_records],
+        )
+        self.equal = len(equal)
+        entries = []
+        for old_idx, new_idx in changed:
+            entries.append((old_idx, new_idx, CHANGED))
+        for old_idx in removed:
+            entries.append((old_idx, None, REMOVED))
+        for new_idx in added:
+            entries.append((None, new_idx, ADDED))
+        entries.sort(key=lambda x: (x[0] if x[0] is not None else -1,
+                                    x[1] if x[1] is not None else -1))
+
+        for old_idx, new_idx, status in entries:
+            old_record = old_records[old_idx] if old_idx is not None else None
+            new_record = new_records[new_idx] if new_idx is not None else None
+            record = old_record if old_record is not None else new_record
+            self.records.append({
+                'status': status,
+                'old': old_idx,
+                'new': new_idx,
+                'type': record.entry.__class__.__name__,
+                'class_name': get_class_name(record.entry),
+            })
+            self._compare_strings(old_idx, old_record, new_idx, new_record)
+
+    def _compare_strings(self, old_idx, old_record, new_idx, new_record):
+        old_strings = get_strings(old_record) if old_record else {}
+        new_strings = get_strings(new_record) if new_record else {}
+        append = self.strings.append
+        for member_idx in sorted(set(old_strings) | set(new_strings),
+                                 key=lambda x: -1 if x is None else x):
+            old_value = old_strings.get(member_idx)
+            new_value = new_strings.get(member_idx)
+            if old_value == new_value:
+                continue
+            if old_value is None:
+                status = ADDED
+            elif new_value is None:
+                status = REMOVED
+            else:
+                status = CHANGED
+            append({
+                'status': status,
+                'old': (old_idx, member_idx) if old_value is not None
+                else None,
+                'new': (new_idx, member_idx) if new_value is not None
+                else None,
+                'old_value': old_value,
+                'new_value': new_value,
+            })
+
+    def __bool__(self):
+        return bool(self.records)
+
+    def get_totals(self):
+        totals = {'equal': self.equal}
+        for name, entries in (('records', self.records),
+                              ('strings', self.strings)):
+            totals[name] = dict(
+                (status, len([x for x in entries if x['status'] == status]))
+                for status in (ADDED, REMOVED, CHANGED)
+            )
+        return totals
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :return: diff, string values and class names are decoded from
+            utf-8
+        """
+        def decode(value):
+            if value is None:
+                return None
+            return value.decode('utf-8', 'replace')
+
+        return {
+            'totals': self.get_totals(),
+            'records': [
+                dict(entry, class_name=decode(entry['class_name']))
+                for entry in self.records
+            ],
+            'strings': [
+                dict(entry, old_value=decode(entry['old_value']),
+                     new_value=decode(entry['new_value']))
+                for entry in self.strings
+            ]
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_text(self):
+        """
+        human readable diff, one line per removed or added string value,
+        coordinates are given in ``unpack_i18n`` format
+
+        :rtype: str
+        :return: diff
+        """
+        def coordinates(value):
+            record_idx, member_idx = value
+            if member_idx is None:
+                return '%i' % record_idx
+            return '%i,%i' % (record_idx, member_idx)
+
+        lines = []
+        append = lines.append
+        document = self.to_dict()
+        for entry in document['records']:
+            append('%s record %s -> %s %s%s' % (
+                entry['status'],
+                '-' if entry['old'] is None else entry['old'],
+                '-' if entry['new'] is None else entry['new'],
+                entry['type'],
+                '' if entry['class_name'] is None
+                else ' ' + entry['class_name']
+            ))
+        for entry in document['strings']:
+            if entry['old'] is not None:
+                append("- %s=>'%s'" % (coordinates(entry['old']),
+                                       entry['old_value']))
+            if entry['new'] is not None:
+                append("+ %s=>'%s'" % (coordinates(entry['new']),
+                                       entry['new_value']))
+        return '\n'.join(lines)
+
+
+def diff(old, new):
+    """
+    compare two parsed documents
+
+    :param old: old document, UDLGFile or BinaryDataStructureFile
+    :param new: new document, UDLGFile or BinaryDataStructureFile
+    :rtype: DocumentDiff
+    :return: diff
+    """
+    return DocumentDiff(old, new)
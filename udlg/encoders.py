@@ -0,0 +1,563 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.encoders
+    :synopsis: Streaming encoders
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+from json.encoder import encode_basestring_ascii
+
+from .builder import BinaryFormatterFileBuilder, ClassMetadataMap
+from .context import ParserContext
+from .structure import structure
+from .structure.common import ClassTypeInfo, LengthPrefixedString
+from .compression import decompress_stream
+
+INFINITY = float('inf')
+
+
+def encode_bytes(value):
+    """
+    encode raw utf-8 bytes as json string token, broken sequences are kept
+    with surrogate escapes so they could be restored back
+
+    :param bytes value: raw utf-8 data
+    :rtype: str
+    :return: json string token
+    """
+    return encode_basestring_ascii(value.decode('utf-8', 'surrogateescape'))
+
+
+def encode_float(value):
+    """
+    encode float the same way :func:`json.dumps` does
+
+    :param float value: value
+    :rtype: str
+    :return: json number token
+    """
+    if value != value:
+        return 'NaN'
+    elif value == INFINITY:
+        return 'Infinity'
+    elif value == -INFINITY:
+        return '-Infinity'
+    return float.__repr__(value)
+
+
+def encode_scalar(value):
+    """
+    encode scalar value (primitive member) as json token
+
+    :param value: value to encode
+    :rtype: str
+    :return: json token
+    """
+    if value is None:
+        return 'null'
+    elif value is True:
+        return 'true'
+    elif value is False:
+        return 'false'
+    elif isinstance(value, int):
+        return int.__repr__(value)
+    elif isinstance(value, float):
+        return encode_float(value)
+    elif isinstance(value, bytes):
+        return encode_bytes(value)
+    elif isinstance(value, str):
+        return encode_basestring_ascii(value)
+    raise TypeError("Value `%r` is not serializable" % type(value))
+
+
+class JSONStreamEncoder(object):
+    """
+    Writes json tokens straight into output file, walking records one by
+    one, without building intermediate python dictionaries.
+
+    Output is equal to ``json.dumps(document.to_dict())`` with raw strings
+    decoded from utf-8, and doesn't depend on ``chunk_size``.
+    """
+    chunk_size = 64 * 1024
+    item_separator = ', '
+    key_separator = ': '
+
+    def __init__(self, fp, chunk_size=None):
+        """
+        :param fp: text file like object, opened for writing
+        :param int chunk_size: amount of characters to buffer before
+            writing them into ``fp``
+        """
+        self.fp = fp
+        self.chunk_size = chunk_size or self.chunk_size
+        self._buffer = []
+        self._buffered = 0
+        self._emitters = {}
+
+    def write(self, token):
+        self._buffer.append(token)
+        self._buffered += len(token)
+        if self._buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self.fp.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def emit(self, entry):
+        """
+        emit any supported entry: structure, record or primitive value
+
+        :param entry: entry to emit
+        :rtype: None
+        :return: None
+        """
+        entry_class = entry.__class__
+        emitter = self._emitters.get(entry_class)
+        if emitter is None:
+            emitter = getattr(self, 'emit_%s' % entry_class.__name__,
+                              self.emit_scalar)
+            self._emitters[entry_class] = emitter
+        emitter(entry)
+
+    def emit_list(self, entries):
+        write = self.write
+        emit = self.emit
+        separator = self.item_separator
+        write('[')
+        for idx, entry in enumerate(entries):
+            if idx:
+                write(separator)
+            emit(entry)
+        write(']')
+
+    def emit_fields(self, entry, fields):
+        """
+        emit json object using entry attributes
+
+        :param entry: structure instance
+        :param tuple fields: field names to emit
+        :rtype: None
+        :return: None
+        """
+        write = self.write
+        write('{')
+        for idx, field_name in enumerate(fields):
+            if idx:
+                write(', ')
+            write('"%s": ' % field_name)
+            self.emit(getattr(entry, field_name))
+        write('}')
+
+    def emit_scalar(self, value):
+        self.write(encode_scalar(value))
+
+    def emit_UDLGFile(self, entry):
+        self.emit_fields(entry, ('header', 'data'))
+
+    def emit_UDLGHeader(self, entry):
+        self.write('{"signature": ')
+        self.emit_list(entry.signature[:structure.SIGNATURE_SIZE])
+        self.write('}')
+
+    def emit_BinaryDataStructureFile(self, entry):
+        self.write('{"header": ')
+        self.emit(entry.header)
+        self.write(', "records": ')
+        self.emit_list(entry.records)
+        self.write(', "count": %i}' % entry.count)
+
+    def emit_SerializationHeader(self, entry):
+        self.write(
+            '{"record_type": %i, "root_id": %i, "header_id": %i, '
+            '"major_version": %i, "minor_version": %i}' % (
+                entry.record_type, entry.root_id, entry.header_id,
+                entry.major_version, entry.minor_version
+            )
+        )
+
+    def emit_Record(self, entry):
+        self.write('{"record_type": %i, "entry": ' % entry.record_type)
+        self.emit(entry.entry)
+        self.write('}')
+
+    def emit_LengthPrefixedString(self, entry):
+        self.write('{"size": %i, "value": %s}' % (
+            entry.size, encode_bytes(entry.value or b'')
+        ))
+
+    def emit_ClassInfo(self, entry):
+        self.write('{"object_id": %i, "name": ' % entry.object_id)
+        self.emit_LengthPrefixedString(entry.name)
+        self.write(', "members_count": %i, "members_names": ' %
+                   entry.members_count)
+        self.emit_list(entry.members_names)
+        self.write('}')
+
+    def emit_ClassTypeInfo(self, entry):
+        self.write('{"type_name": ')
+        self.emit_LengthPrefixedString(entry.type_name)
+        self.write(', "library_id": %i}' % entry.library_id)
+
+    def emit_AdditionalInfo(self, entry):
+        self.write('{"type": %i, "value": ' % entry.type)
+        self.emit(entry.value)
+        self.write('}')
+
+    def emit_MemberTypeInfo(self, entry):
+        count = entry.count
+        self.write('{"types": ')
+        self.emit_list(entry.types[:count])
+        self.write(', "additional_info": ')
+        self.emit_list(entry.additional_info[:count])
+        self.write('}')
+
+    def emit_ArrayInfo(self, entry):
+        self.write('{"object_id": %i, "length": %i}' % (
+            entry.object_id, entry.length
+        ))
+
+    def emit_MessageEnd(self, entry):
+        self.write('{"record_type": %i}' % entry.record_type)
+
+    emit_ObjectNull = emit_MessageEnd
+
+    def emit_ObjectNullMultiple(self, entry):
+        self.write('{"record_type": %i, "count": %i}' % (
+            entry.record_type, entry.count
+        ))
+
+    emit_ObjectNullMultiple256 = emit_ObjectNullMultiple
+
+    def emit_MemberReference(self, entry):
+        self.write('{"record_type": %i, "id_ref": %i}' % (
+            entry.record_type, entry.id_ref
+        ))
+
+    def emit_BinaryObjectString(self, entry):
+        self.write('{"record_type": %i, "object_id": %i, "value": ' % (
+            entry.record_type, entry.object_id
+        ))
+        self.emit_LengthPrefixedString(entry.value)
+        self.write('}')
+
+    def emit_BinaryLibrary(self, entry):
+        self.write('{"record_type": %i, "library_id": %i, '
+                   '"library_name": ' % (entry.record_type, entry.library_id))
+        self.emit_LengthPrefixedString(entry.library_name)
+        self.write('}')
+
+    def emit_ArraySingleString(self, entry):
+        self.write('{"record_type": %i, "array_info": ' % entry.record_type)
+        self.emit_ArrayInfo(entry.array_info)
+        self.write('}')
+
+    def emit_ArraySinglePrimitive(self, entry):
+        self.write('{"record_type": %i, "array_info": ' % entry.record_type)
+        self.emit_ArrayInfo(entry.array_info)
+        self.write(', "primitive_type": %i, "members": ' %
+                   entry.primitive_type)
+        self.emit_list(entry.get_ctype_member_elements())
+        self.write('}')
+
+    def emit_BinaryArray(self, entry):
+        #: rare enough to rely on its dictionary representation
+        self.emit_dict(entry.to_dict())
+
+    def emit_dict(self, document):
+        write = self.write
+        write('{')
+        for idx, (key, value) in enumerate(document.items()):
+            if idx:
+                write(self.item_separator)
+            write(encode_basestring_ascii(key) + self.key_separator)
+            self.emit(value)
+        write('}')
+
+    def emit_SystemClassWithMembersAndTypes(self, entry):
+        self.write('{"record_type": %i, "class_info": ' % entry.record_type)
+        self.emit_ClassInfo(entry.class_info)
+        self.write(', "member_type_info": ')
+        self.emit_MemberTypeInfo(entry.member_type_info)
+        self.write(', "members": ')
+        self.emit_list(entry.members)
+        self.write('}')
+
+    def emit_ClassWithMembersAndTypes(self, entry):
+        self.write('{"record_type": %i, "class_info": ' % entry.record_type)
+        self.emit_ClassInfo(entry.class_info)
+        self.write(', "member_type_info": ')
+        self.emit_MemberTypeInfo(entry.member_type_info)
+        self.write(', "library_id": %i, "members": ' % entry.library_id)
+        self.emit_list(entry.members)
+        self.write('}')
+
+    def emit_ClassWithId(self, entry):
+        self.write('{"record_type": %i, "object_id": %i, "metadata_id": %i, '
+                   '"members": ' % (entry.record_type, entry.object_id,
+                                    entry.metadata_id))
+        self.emit_list(entry.members)
+        self.write(', "class_reference_type": %i, "class_reference": ' %
+                   entry.class_reference_type)
+        self.emit(entry.class_reference)
+        self.write('}')
+
+    def encode(self, document):
+        """
+        encode already built document
+
+        :param udlg.structure.UDLGFile |
+            udlg.structure.BinaryDataStructureFile document: document
+        :rtype: int
+        :return: amount of records
+        """
+        udlg_header = None
+        if isinstance(document, structure.UDLGFile):
+            udlg_header = document.header
+            document = document.data
+        return self.encode_records(udlg_header, document.header,
+                                   document.records)
+
+    def encode_stream(self, stream, udlg=True):
+        """
+        encode document right from binary stream, records are parsed and
+        written one by one, so only class metadata stays in memory
+
+        :param stream: binary stream object, file for example
+        :param bool udlg: stream contains udlg header, True by default
+        :rtype: int
+        :return: amount of records
+        """
+        BinaryFormatterFileBuilder.check_stream(stream)
+        stream = decompress_stream(stream)
+        udlg_header = None
+        if udlg:
+            document = structure.UDLGFile()
+            document._initiate(stream)
+            udlg_header = document.header
+        header = structure.SerializationHeader()
+        header._initiate(stream)
+        records = BinaryFormatterFileBuilder.iter_records(
+            stream, context=ParserContext(ClassMetadataMap())
+        )
+        return self.encode_records(udlg_header, header, records)
+
+    def encode_records(self, udlg_header, header, record_list):
+        """
+        encode document from its parts
+
+        :param udlg.structure.structure.UDLGHeader udlg_header: udlg header,
+            None for plain .net binary format data
+        :param udlg.structure.structure.SerializationHeader header: header
+        :param collections.Iterable[udlg.structure.Record] record_list:
+            records
+        :rtype: int
+        :return: amount of records
+        """
+        self.begin_document(udlg_header, header)
+        count = 0
+        for record in record_list:
+            self.emit_document_record(count, record)
+            count += 1
+        self.end_document(udlg_header, count)
+        self.flush()
+        return count
+
+    def begin_document(self, udlg_header, header):
+        if udlg_header is not None:
+            self.write('{"header": ')
+            self.emit_UDLGHeader(udlg_header)
+            self.write(', "data": ')
+        self.write('{"header": ')
+        self.emit_SerializationHeader(header)
+        self.write(', "records": [')
+
+    def emit_document_record(self, idx, record):
+        if idx:
+            self.write(', ')
+        self.emit_Record(record)
+
+    def end_document(self, udlg_header, count):
+        self.write('], "count": %i}' % count)
+        if udlg_header is not None:
+            self.write('}')
+
+
+class CompactJSONStreamEncoder(JSONStreamEncoder):
+    """
+    Schema aware compact encoder. Class schema (object id, name, member
+    names and binary types) is written once, right in the record defining
+    it, while every record is written as a row:
+
+    - ``[1, object_id, metadata_id, [values]]`` for ``ClassWithId``,
+      ``metadata_id`` refers to class schema
+    - ``[5, schema, [values]]`` for ``ClassWithMembersAndTypes``
+    - ``[6, object_id, "value"]`` for ``BinaryObjectString``
+    - ``[record_type, ...]`` for the rest of the records
+
+    Member values are either scalars (primitive members) or rows of the
+    records they contain.
+    """
+    format = 'compact'
+    item_separator = ','
+    key_separator = ':'
+
+    def begin_document(self, udlg_header, header):
+        self.write('{"format":"%s",' % self.format)
+        if udlg_header is not None:
+            self.write('"header":')
+            self.emit_UDLGHeader(udlg_header)
+            self.write(',"data":{')
+        self.write('"header":')
+        self.emit_SerializationHeader(header)
+        self.write(',"records":[')
+
+    def end_document(self, udlg_header, count):
+        self.write('],"count":%i}' % count)
+        if udlg_header is not None:
+            self.write('}')
+
+    def emit_Record(self, entry):
+        self.emit(entry.entry)
+
+    def emit_string(self, entry):
+        self.write(encode_bytes(entry.value or b''))
+
+    def emit_schema(self, entry, library_id=None):
+        """
+        emit class schema
+
+        :param entry: class record entry
+        :param int library_id: library id, if any
+        :rtype: None
+        :return: None
+        """
+        class_info = entry.class_info
+        member_type_info = entry.member_type_info
+        write = self.write
+        write('{"object_id":%i,"name":' % class_info.object_id)
+        self.emit_string(class_info.name)
+        if library_id is not None:
+            write(',"library_id":%i' % library_id)
+        write(',"members":[')
+        types = member_type_info.types
+        additional_info = member_type_info.additional_info
+        for idx, name in enumerate(class_info.members_names):
+            if idx:
+                write(',')
+            write('[')
+            self.emit_string(name)
+            write(',%i,' % types[idx])
+            self.emit_additional_info(additional_info[idx])
+            write(']')
+        write(']}')
+
+    def emit_additional_info(self, entry):
+        value = entry.value
+        if isinstance(value, ClassTypeInfo):
+            self.write('[')
+            self.emit_string(value.type_name)
+            self.write(',%i]' % value.library_id)
+        elif isinstance(value, LengthPrefixedString):
+            self.emit_string(value)
+        else:
+            self.emit_scalar(value)
+
+    def emit_MessageEnd(self, entry):
+        self.write('[%i]' % entry.record_type)
+
+    emit_ObjectNull = emit_MessageEnd
+
+    def emit_ObjectNullMultiple(self, entry):
+        self.write('[%i,%i]' % (entry.record_type, entry.count))
+
+    emit_ObjectNullMultiple256 = emit_ObjectNullMultiple
+
+    def emit_MemberReference(self, entry):
+        self.write('[%i,%i]' % (entry.record_type, entry.id_ref))
+
+    def emit_BinaryObjectString(self, entry):
+        self.write('[%i,%i,' % (entry.record_type, entry.object_id))
+        self.emit_string(entry.value)
+        self.write(']')
+
+    def emit_BinaryLibrary(self, entry):
+        self.write('[%i,%i,' % (entry.record_type, entry.library_id))
+        self.emit_string(entry.library_name)
+        self.write(']')
+
+    def emit_ArraySingleString(self, entry):
+        self.write('[%i,%i,%i]' % (entry.record_type,
+                                   entry.array_info.object_id,
+                                   entry.array_info.length))
+
+    def emit_ArraySinglePrimitive(self, entry):
+        self.write('[%i,%i,%i,' % (entry.record_type,
+                                   entry.array_info.object_id,
+                                   entry.primitive_type))
+        self.emit_list(entry.get_ctype_member_elements())
+        self.write(']')
+
+    def emit_BinaryArray(self, entry):
+        self.write('[%i,' % entry.record_type)
+        self.emit_dict(entry.to_dict())
+        self.write(']')
+
+    def emit_SystemClassWithMembersAndTypes(self, entry):
+        self.write('[%i,' % entry.record_type)
+        self.emit_schema(entry)
+        self.write(',')
+        self.emit_list(entry.members)
+        self.write(']')
+
+    def emit_ClassWithMembersAndTypes(self, entry):
+        self.write('[%i,' % entry.record_type)
+        self.emit_schema(entry, library_id=entry.library_id)
+        self.write(',')
+        self.emit_list(entry.members)
+        self.write(']')
+
+    def emit_ClassWithId(self, entry):
+        self.write('[%i,%i,%i,' % (entry.record_type, entry.object_id,
+                                   entry.metadata_id))
+        self.emit_list(entry.members)
+        self.write(']')
+
+
+class NDJSONStreamEncoder(CompactJSONStreamEncoder):
+    """
+    Compact encoder writing one record per line, so dumps could be
+    processed with line oriented tools (diff, grep and so on). The first
+    line keeps document headers.
+    """
+    format = 'ndjson'
+
+    def begin_document(self, udlg_header, header):
+        self.write('{"format":"%s",' % self.format)
+        if udlg_header is not None:
+            self.write('"header":')
+            self.emit_UDLGHeader(udlg_header)
+            self.write(',"data":{')
+        self.write('"header":')
+        self.emit_SerializationHeader(header)
+        if udlg_header is not None:
+            self.write('}')
+        self.write('}\n')
+
+    def emit_document_record(self, idx, record):
+        self.emit_Record(record)
+        self.write('\n')
+
+    def end_document(self, udlg_header, count):
+        pass
+
+
+#: format name: encoder class
+ENCODERS = {
+    'json': JSONStreamEncoder,
+    CompactJSONStreamEncoder.format: CompactJSONStreamEncoder,
+    NDJSONStreamEncoder.format: NDJSONStreamEncoder
+}
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.generator
+    :synopsis: Synthetic .NET Binary Format/udlg documents generator
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import os
+import random
+
+from .enums import BinaryTypeEnum, PrimitiveTypeEnum
+from .writer import NRBFWriter
+
+#: text alphabet: ascii, two, three and four byte utf-8 characters
+ASCII_ALPHABET = 'abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ .,'
+UNICODE_ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщэюя ñüß€…日本語の文字 😀'
+
+#: size of random text pool strings are sliced from
+TEXT_POOL_SIZE = 64 * 1024
+
+LIBRARY_ID = 2
+LIBRARY_NAME = 'Underrail, Version=1.0.0.0, Culture=neutral'
+
+
+class DocumentGenerator(object):
+    """
+    Generates valid udlg/.NET Binary Format documents.
+
+    Document consists of a library record, ``schemas`` classes each one
+    defined with ``ClassWithMembersAndTypes`` record (its first instance)
+    followed by ``ClassWithId`` instances distributed between classes. Every
+    class has ``strings`` string members, ``Int32``, ``Boolean`` and
+    ``Double`` primitive members and ``Int32`` primitive array member.
+
+    String and array members are written inline, or with ``reference``
+    probability as ``MemberReference`` to ``BinaryObjectString`` or
+    ``ArraySinglePrimitive`` records written right after the instance.
+    """
+    def __init__(self, instances=1000, schemas=4, strings=2,
+                 string_length=32, unicode=0.5, array_size=8,
+                 reference=0.1, seed=0):
+        """
+        :param int instances: amount of class instances
+        :param int schemas: amount of classes
+        :param int strings: amount of string members per class
+        :param int string_length: average string length in characters,
+            lengths are distributed in half to one and a half of it
+        :param float unicode: share of multi-byte characters in strings
+        :param int array_size: average primitive array size
+        :param float reference: share of string and array members written
+            as member references
+        :param int seed: random seed, same seed gives same documents
+        """
+        self.instances = instances
+        self.schemas = max(1, min(schemas, instances or 1))
+        self.strings = strings
+        self.string_length = string_length
+        self.unicode = unicode
+        self.array_size = array_size
+        self.reference = reference
+        self.random = random.Random(seed)
+        self.text = self.get_text_pool()
+        #: statistics of the last generated document
+        self.stats = {}
+
+    def get_text_pool(self):
+        rand = self.random.random
+        choice = self.random.choice
+        return ''.join(
+            choice(UNICODE_ALPHABET) if rand() < self.unicode
+            else choice(ASCII_ALPHABET)
+            for _ in range(TEXT_POOL_SIZE)
+        )
+
+    def get_members(self, schema):
+        """
+        get class members definition
+
+        :param int schema: class index
+        :rtype: list[tuple]
+        :return: ``(name, binary_type, additional_info)`` tuples
+        """
+        prefix = 'Class%i' % schema
+        members = [
+            ('%s:Text%i' % (prefix, idx), BinaryTypeEnum.String, None)
+            for idx in range(self.strings)
+        ]
+        members.extend([
+            ('%s:Id' % prefix, BinaryTypeEnum.Primitive,
+             PrimitiveTypeEnum.Int32),
+            ('%s:Flag' % prefix, BinaryTypeEnum.Primitive,
+             PrimitiveTypeEnum.Boolean),
+            ('%s:Weight' % prefix, BinaryTypeEnum.Primitive,
+             PrimitiveTypeEnum.Double),
+            ('%s:Values' % prefix, BinaryTypeEnum.PrimitiveArray,
+             PrimitiveTypeEnum.Int32),
+        ])
+        return members
+
+    def get_string(self):
+        length = self.random.randint(self.string_length // 2,
+                                     self.string_length * 3 // 2)
+        start = self.random.randint(0, TEXT_POOL_SIZE - length)
+        return self.text[start:start + length]
+
+    def get_array(self):
+        size = self.random.randint(self.array_size // 2,
+                                   self.array_size * 3 // 2)
+        start = self.random.randint(-2 ** 16, 2 ** 16)
+        return list(range(start, start + size))
+
+    def generate(self, stream, udlg=True, size=None):
+        """
+        generate document
+
+        :param stream: binary stream opened for writing
+        :param bool udlg: write udlg header, True by default
+        :param int size: generate instances until document reaches given
+            size in bytes, ``instances`` is ignored
+        :rtype: dict
+        :return: document statistics
+        """
+        writer = NRBFWriter(stream)
+        stats = self.stats = {
+            'classes': 0, 'instances': 0, 'strings': 0, 'arrays': 0,
+            'references': 0, 'records': 0, 'bytes': 0
+        }
+        if udlg:
+            writer.udlg_header()
+        writer.serialization_header()
+        writer.binary_library(LIBRARY_ID, LIBRARY_NAME)
+        stats['records'] += 1
+
+        object_id = 1
+        class_ids = []
+        schemas = [self.get_members(x) for x in range(self.schemas)]
+        idx = 0
+        while (writer.size < size) if size else (idx < self.instances):
+            schema = idx % self.schemas
+            members = schemas[schema]
+            if schema < len(class_ids):
+                writer.class_with_id(object_id, class_ids[schema])
+            else:
+                class_ids.append(object_id)
+                writer.class_with_members_and_types(
+                    object_id, 'Underrail.Class%i' % schema, members,
+                    LIBRARY_ID
+                )
+                stats['classes'] += 1
+            stats['instances'] += 1
+            stats['records'] += 1
+            object_id = self.write_members(writer, members, object_id + 1,
+                                           idx)
+            idx += 1
+
+        writer.message_end()
+        stats['records'] += 1
+        stats['bytes'] = writer.size
+        return stats
+
+    def write_members(self, writer, members, object_id, idx):
+        """
+        write instance member values
+
+        :param udlg.writer.NRBFWriter writer: writer
+        :param list[tuple] members: class members definition
+        :param int object_id: next free object id
+        :param int idx: instance index
+        :rtype: int
+        :return: next free object id
+        """
+        stats = self.stats
+        rand = self.random.random
+        deferred = []
+        for name, binary_type, additional_info in members:
+            if binary_type == BinaryTypeEnum.Primitive:
+                if additional_info == PrimitiveTypeEnum.Int32:
+                    value = idx
+                elif additional_info == PrimitiveTypeEnum.Boolean:
+                    value = bool(idx % 2)
+                else:
+                    value = idx / 4.0
+                writer.primitive(additional_info, value)
+                continue
+
+            if binary_type == BinaryTypeEnum.String:
+                value = self.get_string()
+                write = writer.binary_object_string
+                stats['strings'] += 1
+            else:
+                value = self.get_array()
+                write = writer.array_single_primitive
+                stats['arrays'] += 1
+            if rand() < self.reference:
+                writer.member_reference(object_id)
+                stats['references'] += 1
+                deferred.append((write, object_id, additional_info, value))
+                #: only top level records are counted
+                stats['records'] += 1
+            elif binary_type == BinaryTypeEnum.String:
+                write(object_id, value)
+            else:
+                write(object_id, additional_info, value)
+            object_id += 1
+
+        #: referenced records are written at top level right after instance
+        for write, ref_id, additional_info, value in deferred:
+            if additional_info is None:
+                write(ref_id, value)
+            else:
+                write(ref_id, additional_info, value)
+        return object_id
+
+
+def generate(stream, udlg=True, size=None, **options):
+    """
+    generate udlg/.NET Binary Format document
+
+    :param stream: binary stream opened for writing
+    :param bool udlg: write udlg header, True by default
+    :param int size: generate document of (at least) given size in bytes
+    :param options: :class:`DocumentGenerator` options
+    :rtype: dict
+    :return: document statistics
+    """
+    return DocumentGenerator(**options).generate(stream, udlg=udlg,
+                                                 size=size)
+
+
+def generate_corpus(directory, sizes, udlg=True, **options):
+    """
+    generate documents of given sizes into directory
+
+    :param str directory: directory path
+    :param list[int] sizes: document sizes in bytes
+    :param bool udlg: write udlg header, True by default
+    :param options: :class:`DocumentGenerator` options
+    :rtype: list[str]
+    :return: generated document paths
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    extension = 'udlg' if udlg else 'dat'
+    paths = []
+    for size in sizes:
+        path = os.path.join(directory, 'generated_%i.%s' % (size, extension))
+        with open(path, 'wb') as stream:
+            generate(stream, udlg=udlg, size=size, **options)
+        paths.append(path)
+    return paths
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.hashes
+    :synopsis: Merkle hashes of records and documents
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Record hashes are computed while document is parsed from raw bytes every
+record was read from, they are rolled up into Merkle tree which root with
+serialization header hash gives document hash. Hashes are stored in json
+sidecar file next to document, so documents of two game builds could be
+compared without parsing them again:
+
+.. code-block:: python
+
+    hashes = DocumentHashes()
+    document = UDLGBuilder.build(stream, hashes=hashes)
+    hashes.save(get_sidecar_path(path))
+"""
+import os
+import json
+
+from .report import scan_files
+
+#: digest size of every content digest: records, documents, bundle
+#: payloads, manifest and run cache entries
+DIGEST_SIZE = 16
+SIDECAR_EXTENSION = '.hash'
+SIDECAR_VERSION = 1
+
+
+def digest(data):
+    """
+    :param bytes data: data
+    :rtype: bytes
+    :return: data digest, ``hex`` gives hex encoded one
+    """
+    #: hashlib is imported on demand, so storage and manifest importing
+    #: this module do not pay for it
+    from hashlib import blake2b
+    return blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def get_sidecar_path(path):
+    """
+    :param str path: document path
+    :rtype: str
+    :return: hashes sidecar file path
+    """
+    return path + SIDECAR_EXTENSION
+
+
+def build_tree(leaves):
+    """
+    build Merkle tree, the last node of odd level is promoted to the next
+    level as is
+
+    :param list[bytes] leaves: leaf hashes
+    :rtype: list[list[bytes]]
+    :return: tree levels from leaves to root
+    """
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [digest(level[idx] + level[idx + 1])
+                   for idx in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+class HashingStream(object):
+    """
+    Stream proxy collecting bytes consumed from stream, bytes read again
+    after seeking back (record type peeks for example) are collected once
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = stream.tell()
+        self.end = self.position
+        self.buffer = bytearray()
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        start = self.position
+        self.position += len(data)
+        if self.position > self.end:
+            self.buffer.extend(data[max(self.end - start, 0):])
+            self.end = self.position
+        return data
+
+    def seek(self, offset, whence=0):
+        result = self.stream.seek(offset, whence)
+        self.position = self.stream.tell()
+        return result
+
+    def consume(self):
+        """
+        :rtype: bytes
+        :return: bytes consumed since previous call
+        """
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class DocumentHashes(object):
+    """
+    Record hashes and Merkle tree of a document, pass it to builder to get
+    hashes computed in the same pass document is parsed in.
+
+    Record hash covers raw record bytes, so object ids are part of it.
+    With ``ignore_ids`` record hash is computed from parsed record content
+    with object ids and class references left out, records shifted by
+    inserted or removed ones keep their hashes then.
+    """
+    def __init__(self, ignore_ids=False):
+        """
+        :param bool ignore_ids: leave object ids out of record hashes
+        """
+        self.ignore_ids = ignore_ids
+        self.header = None
+        self.records = []
+        self._tree = None
+
+    def track(self, stream):
+        """
+        :param stream: stream object document would be built from
+        :rtype: HashingStream
+        :return: stream proxy to build document from
+        """
+        return HashingStream(stream)
+
+    def set_header(self, data):
+        """
+        :param bytes data: raw serialization header bytes
+        :rtype: None
+        :return: None
+        """
+        self.header = digest(data)
+        self.records = []
+        self._tree = None
+
+    def add(self, record, data):
+        """
+        add record hash
+
+        :param udlg.structure.Record record: record
+        :param bytes data: raw record bytes
+        :rtype: None
+        :return: None
+        """
+        if self.ignore_ids:
+            from .diff import get_record_hash
+            self.records.append(get_record_hash(record))
+        else:
+            self.records.append(digest(data))
+        self._tree = None
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = build_tree(self.records)
+        return self._tree
+
+    @property
+    def root(self):
+        """
+        :rtype: bytes
+        :return: Merkle tree root over record hashes
+        """
+        level = self.tree[-1]
+        return level[0] if level else digest(b'')
+
+    @property
+    def document(self):
+        """
+        :rtype: bytes
+        :return: document hash, header and records are covered
+        """
+        return digest((self.header or b'') + self.root)
+
+    def get_changed(self, other):
+        """
+        get indices of records which differ from records of other document.
+        Documents with the same amount of records are compared descending
+        Merkle trees, so only subtrees that differ are visited, otherwise
+        records which hashes are absent in other document are reported.
+
+        :param DocumentHashes other: other document hashes
+        :rtype: list[int]
+        :return: record indices
+        """
+        if self.root == other.root:
+            return []
+        if len(self.records) != len(other.records):
+            known = set(other.records)
+            return [idx for idx, value in enumerate(self.records)
+                    if value not in known]
+        own_tree, other_tree = self.tree, other.tree
+        nodes = [0]
+        for level in range(len(own_tree) - 1, 0, -1):
+            children = []
+            for idx in nodes:
+                for child in (idx * 2, idx * 2 + 1):
+                    if child >= len(own_tree[level - 1]):
+                        continue
+                    if (own_tree[level - 1][child] !=
+                            other_tree[level - 1][child]):
+                        children.append(child)
+            nodes = children
+        return nodes
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :return: hashes, digests are hex encoded
+        """
+        return {
+            'version': SIDECAR_VERSION,
+            'ignore_ids': self.ignore_ids,
+            'document': self.document.hex(),
+            'header': self.header.hex() if self.header else None,
+            'records': [x.hex() for x in self.records]
+        }
+
+    @classmethod
+    def from_dict(cls, document):
+        """
+        :param dict document: hashes stored with ``to_dict``
+        :rtype: DocumentHashes
+        :return: hashes
+        :raises ValueError:
+            - if hashes were stored by another sidecar version or document
+              hash does not match record hashes
+        """
+        if document.get('version') != SIDECAR_VERSION:
+            raise ValueError(
+                "Unsupported hashes version: `%r`" % document.get('version')
+            )
+        hashes = cls(ignore_ids=document['ignore_ids'])
+        if document['header'] is not None:
+            hashes.header = bytes.fromhex(document['header'])
+        hashes.records = [bytes.fromhex(x) for x in document['records']]
+        if hashes.document.hex() != document['document']:
+            raise ValueError("Document hash does not match record hashes")
+        return hashes
+
+    def save(self, path):
+        """
+        store hashes into sidecar file
+
+        :param str path: sidecar file path
+        :rtype: None
+        :return: None
+        """
+        with open(path, 'w') as output:
+            output.write(json.dumps(self.to_dict()))
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param str path: sidecar file path
+        :rtype: DocumentHashes
+        :return: hashes
+        """
+        with open(path) as source:
+            return cls.from_dict(json.loads(source.read()))
+
+
+def hash_stream(stream, builder=None, ignore_ids=False):
+    """
+    parse document and compute its hashes
+
+    :param stream: readable binary stream, storage document one for example
+    :param builder: document builder, UDLGBuilder by default
+    :param bool ignore_ids: leave object ids out of record hashes
+    :rtype: DocumentHashes
+    :return: hashes
+    """
+    if builder is None:
+        from .builder import UDLGBuilder
+        builder = UDLGBuilder
+    hashes = DocumentHashes(ignore_ids=ignore_ids)
+    builder.build(stream, hashes=hashes)
+    return hashes
+
+
+def hash_file(path, builder=None, ignore_ids=False, store=True):
+    """
+    parse document and compute its hashes
+
+    :param str path: document path
+    :param builder: document builder, UDLGBuilder by default
+    :param bool ignore_ids: leave object ids out of record hashes
+    :param bool store: store hashes into sidecar file
+    :rtype: DocumentHashes
+    :return: hashes
+    """
+    with open(path, 'rb') as stream:
+        hashes = hash_stream(stream, builder=builder, ignore_ids=ignore_ids)
+    if store:
+        hashes.save(get_sidecar_path(path))
+    return hashes
+
+
+def load_hashes(path):
+    """
+    load document hashes from its sidecar file
+
+    :param str path: document path
+    :rtype: DocumentHashes | None
+    :return: hashes, None if there is no sidecar file
+    """
+    sidecar_path = get_sidecar_path(path)
+    if not os.path.exists(sidecar_path):
+        return None
+    return DocumentHashes.load(sidecar_path)
+
+
+def compare_directories(old_dir, new_dir, extensions=('.udlg', )):
+    """
+    compare documents of two directories by their sidecar files only,
+    documents are matched by their paths relative to directories
+
+    :param str old_dir: old documents directory
+    :param str new_dir: new documents directory
+    :param tuple extensions: document extensions
+    :rtype: dict
+    :return: ``added``, ``removed`` and ``unhashed`` (no sidecar file or
+        sidecars were computed with different ``ignore_ids``) paths,
+        ``changed`` document paths with changed record indices, and amount of
+        ``unchanged`` documents
+    """
+    def collect(directory):
+        return dict(
+            (os.path.relpath(path, directory), path)
+            for path in scan_files(directory, extensions)
+        )
+
+    old_paths, new_paths = collect(old_dir), collect(new_dir)
+    result = {
+        'added': sorted(set(new_paths) - set(old_paths)),
+        'removed': sorted(set(old_paths) - set(new_paths)),
+        'unhashed': [],
+        'changed': {},
+        'unchanged': 0
+    }
+    for name in sorted(set(old_paths) & set(new_paths)):
+        old = load_hashes(old_paths[name])
+        new = load_hashes(new_paths[name])
+        if (old is None or new is None or
+                old.ignore_ids != new.ignore_ids):
+            result['unhashed'].append(name)
+        elif old.document != new.document:
+            result['changed'][name] = new.get_changed(old)
+        else:
+            result['unchanged'] += 1
+    return result
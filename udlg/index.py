@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.index
+    :synopsis: Full text index over documents strings
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Every ``BinaryObjectString`` of every document is stored in sqlite database
+with its file, record and member coordinates, strings are indexed with FTS5
+twice: by words (``unicode61`` tokenizer) and by character trigrams, so
+both word queries and arbitrary phrase (substring) queries are answered
+without rescanning documents. Files are re-indexed only if their content
+digest has changed. Documents are taken from any storage ``open_storage``
+supports, archive and bundle documents are stored by their storage paths.
+With corpus manifest digests of directory documents are taken from it, so
+unchanged documents are not even hashed, see ``udlg.manifest``.
+
+.. code-block:: python
+
+    index = StringIndex('strings.db')
+    index.update('Data/Dialogs')
+    for path, record_idx, member_idx, value in index.search('grenade'):
+        ...
+"""
+import io
+import os
+import sqlite3
+from contextlib import closing
+
+from .builder import UDLGBuilder
+from .diff import get_strings
+from .hashes import digest as get_digest
+from .manifest import DIGEST, get_file_digest
+from .report import CACHE_HIT, CACHE_MISS, STATUS_SKIPPED
+from .storage import DirectoryStorage, open_storage
+
+#: trigram tokenizer could not match shorter phrases
+TRIGRAM_SIZE = 3
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS files ("
+    " id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL,"
+    " digest TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS strings ("
+    " id INTEGER PRIMARY KEY, file_id INTEGER NOT NULL,"
+    " record INTEGER NOT NULL, member INTEGER, value TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS strings_file ON strings (file_id)",
+)
+FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS strings_words USING fts5("
+    " value, content='strings', content_rowid='id')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS strings_trigrams USING fts5("
+    " value, content='strings', content_rowid='id', tokenize='trigram')",
+)
+FTS_TABLES = ('strings_words', 'strings_trigrams')
+
+
+def iter_document_strings(document):
+    """
+    iterate over every string of document: top level string records and
+    record members
+
+    :param udlg.structure.UDLGFile document: document
+    :rtype: collections.Iterable[tuple[int, int | None, bytes]]
+    :return: record index, member index (None for top level strings) and
+        string value
+    """
+    for idx, record in enumerate(document.data.records):
+        strings = get_strings(record)
+        for jdx in sorted(strings, key=lambda x: -1 if x is None else x):
+            yield idx, jdx, strings[jdx]
+
+
+def get_rows(document):
+    """
+    :param udlg.structure.UDLGFile document: document
+    :rtype: list[tuple[int, int | None, str]]
+    :return: record index, member index and decoded value of every string
+    """
+    return [
+        (record_idx, member_idx, value.decode('utf-8', 'replace'))
+        for record_idx, member_idx, value in iter_document_strings(document)
+    ]
+
+
+def quote(phrase):
+    """
+    :param str phrase: phrase
+    :rtype: str
+    :return: phrase as FTS5 string literal
+    """
+    return '"%s"' % phrase.replace('"', '""')
+
+
+class StringIndex(object):
+    """
+    On disk full text index of documents strings
+    """
+    def __init__(self, path, builder=UDLGBuilder):
+        """
+        :param str path: database path, ``:memory:`` for in memory index
+        :param builder: document builder
+        """
+        self.path = path
+        self.builder = builder
+        self.connection = sqlite3.connect(path)
+        self.fts = True
+        self._create()
+
+    def _create(self):
+        cursor = self.connection.cursor()
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        try:
+            for statement in FTS_SCHEMA:
+                cursor.execute(statement)
+        except sqlite3.OperationalError:
+            #: sqlite built without FTS5 or trigram tokenizer (< 3.34),
+            #: search falls back to table scan
+            self.fts = False
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _remove(self, file_id):
+        cursor = self.connection.cursor()
+        if self.fts:
+            rows = cursor.execute(
+                "SELECT id, value FROM strings WHERE file_id = ?", (file_id, )
+            ).fetchall()
+            for table in FTS_TABLES:
+                cursor.executemany(
+                    "INSERT INTO %s (%s, rowid, value) "
+                    "VALUES ('delete', ?, ?)" % (table, table), rows
+                )
+        cursor.execute("DELETE FROM strings WHERE file_id = ?", (file_id, ))
+        cursor.execute("DELETE FROM files WHERE id = ?", (file_id, ))
+
+    def add(self, path, digest=None):
+        """
+        (re)index document strings
+
+        :param str path: document path
+        :param str digest: document digest, computed if nothing was given
+        :rtype: int
+        :return: amount of indexed strings
+        """
+        path = os.path.normpath(path)
+        digest = digest or get_file_digest(path)
+        with open(path, 'rb') as stream:
+            document = self.builder.build(stream)
+        return self.add_rows(path, get_rows(document), digest,
+                             os.path.getsize(path), os.path.getmtime(path))
+
+    def add_rows(self, path, rows, digest, size, mtime):
+        """
+        (re)index strings of already built document
+
+        :param str path: document path
+        :param list[tuple] rows: document strings, see ``get_rows``
+        :param str digest: document digest, see ``get_file_digest``
+        :param int size: document size in bytes
+        :param float mtime: document modification time
+        :rtype: int
+        :return: amount of indexed strings
+        """
+        cursor = self.connection.cursor()
+        row = cursor.execute("SELECT id FROM files WHERE path = ?",
+                             (path, )).fetchone()
+        if row is not None:
+            self._remove(row[0])
+        cursor.execute(
+            "INSERT INTO files (path, digest, size, mtime) "
+            "VALUES (?, ?, ?, ?)", (path, digest, size, mtime)
+        )
+        file_id = cursor.lastrowid
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM strings")
+        start, = cursor.fetchone()
+        cursor.executemany(
+            "INSERT INTO strings (id, file_id, record, member, value) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(start + idx + 1, file_id) + x for idx, x in enumerate(rows)]
+        )
+        if self.fts:
+            for table in FTS_TABLES:
+                cursor.executemany(
+                    "INSERT INTO %s (rowid, value) VALUES (?, ?)" % table,
+                    [(start + idx + 1, x[2]) for idx, x in enumerate(rows)]
+                )
+        return len(rows)
+
+    def get_digest(self, path):
+        """
+        :param str path: document path
+        :rtype: str | None
+        :return: digest of indexed document, None if it is not indexed
+        """
+        row = self.connection.execute(
+            "SELECT digest FROM files WHERE path = ?",
+            (os.path.normpath(path), )
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def is_actual(self, path):
+        """
+        :param str path: document path
+        :rtype: tuple[bool, str | None]
+        :return: whether document is indexed and unchanged, and its digest
+            if it had to be computed (file stats have changed)
+        """
+        row = self.connection.execute(
+            "SELECT digest, size, mtime FROM files WHERE path = ?",
+            (os.path.normpath(path), )
+        ).fetchone()
+        if row is None:
+            return False, None
+        digest, size, mtime = row
+        if (size, mtime) == (os.path.getsize(path), os.path.getmtime(path)):
+            return True, None
+        actual = get_file_digest(path)
+        return actual == digest, actual
+
+    def update(self, storage, report=None, extensions=('.udlg', ),
+               manifest=None):
+        """
+        index new and changed documents of storage, drop removed ones
+
+        :param storage: documents storage or its path: directory, archive
+            or bundle, see ``udlg.storage.open_storage``
+        :param udlg.report.RunReport report: run report, optional
+        :param tuple extensions: document extensions
+        :param udlg.manifest.Manifest manifest: corpus manifest, digests of
+            directory documents are taken from it instead of file stats,
+            optional
+        :rtype: dict
+        :return: amount of ``added``, ``skipped`` and ``removed`` documents
+        """
+        if isinstance(storage, str):
+            with open_storage(storage) as opened:
+                return self.update(opened, report=report,
+                                   extensions=extensions, manifest=manifest)
+        entries = None
+        if manifest is not None and isinstance(storage, DirectoryStorage):
+            manifest.refresh(storage.path, extensions)
+            entries = manifest.get_entries(storage.path)
+        names = storage.get_names(extensions)
+        paths = [os.path.normpath(storage.get_path(x)) for x in names]
+        result = {'added': 0, 'skipped': 0, 'removed': 0}
+        for name, path in zip(names, paths):
+            if report is None:
+                self._update_document(storage, name, path, {}, result,
+                                      entries)
+                continue
+            with report.file(path) as entry:
+                self._update_document(storage, name, path, entry, result,
+                                      entries)
+        result['removed'] = self.prune(storage.path, paths)
+        self.connection.commit()
+        return result
+
+    def prune(self, directory, paths):
+        """
+        drop documents of directory which are not among given ones
+
+        :param str directory: documents directory
+        :param collections.Iterable[str] paths: paths of existing documents
+        :rtype: int
+        :return: amount of removed documents
+        """
+        prefix = os.path.join(os.path.normpath(directory), '')
+        known = set(os.path.normpath(x) for x in paths)
+        removed = 0
+        for file_id, path in self.connection.execute(
+                "SELECT id, path FROM files").fetchall():
+            if path.startswith(prefix) and path not in known:
+                self._remove(file_id)
+                removed += 1
+        return removed
+
+    def _update_document(self, storage, name, path, entry, result,
+                         entries=None):
+        entry['bytes_in'] = storage.get_size(name)
+        if entries is not None:
+            #: manifest digest, unchanged document is not even hashed
+            data, digest = None, entries[name][DIGEST]
+            actual = self.get_digest(path) == digest
+        elif isinstance(storage, DirectoryStorage):
+            #: files are checked by their stats first
+            actual, digest = self.is_actual(path)
+            if actual and digest is not None:
+                #: content is the same, only file stats have changed
+                self.connection.execute(
+                    "UPDATE files SET size = ?, mtime = ? WHERE path = ?",
+                    (os.path.getsize(path), os.path.getmtime(path), path)
+                )
+            data = None
+        else:
+            data, digest = self.get_content(storage, name)
+            actual = self.get_digest(path) == digest
+        if actual:
+            entry.update({'cache': CACHE_HIT, 'status': STATUS_SKIPPED})
+            result['skipped'] += 1
+            return
+        entry['cache'] = CACHE_MISS
+        if isinstance(storage, DirectoryStorage):
+            self.add(path, digest)
+        else:
+            if data is None:
+                with closing(storage.open(name)) as stream:
+                    data = stream.read()
+            document = self.builder.build(io.BytesIO(data))
+            self.add_rows(path, get_rows(document), digest,
+                          storage.get_size(name), 0.0)
+        result['added'] += 1
+
+    @staticmethod
+    def get_content(storage, name):
+        """
+        :param udlg.storage.Storage storage: documents storage
+        :param str name: document name
+        :rtype: tuple[bytes | None, str]
+        :return: document content and its digest, hex encoded, content is
+            not read if storage keeps digests (bundles)
+        """
+        if hasattr(storage, 'get_digest'):
+            return None, storage.get_digest(name).hex()
+        with closing(storage.open(name)) as stream:
+            data = stream.read()
+        return data, get_digest(data).hex()
+
+    def search(self, phrase, words=False, limit=None):
+        """
+        search strings
+
+        :param str phrase: phrase to find, case insensitive, with ``words``
+            it is FTS5 query matched against words
+        :param bool words: match words instead of substring
+        :param int limit: limit amount of results
+        :rtype: list[tuple[str, int, int | None, str]]
+        :return: file path, record index, member index and string value
+        """
+        query = (
+            "SELECT files.path, strings.record, strings.member, strings.value "
+            "FROM strings JOIN files ON files.id = strings.file_id "
+        )
+        if words and self.fts:
+            query += ("WHERE strings.id IN (SELECT rowid FROM strings_words "
+                      "WHERE strings_words MATCH ?) ")
+            arguments = [phrase]
+        elif (self.fts and len(phrase) >= TRIGRAM_SIZE and
+                not phrase.isspace()):
+            query += ("WHERE strings.id IN (SELECT rowid FROM "
+                      "strings_trigrams WHERE strings_trigrams MATCH ?) ")
+            arguments = [quote(phrase)]
+        else:
+            query += "WHERE strings.value LIKE ? ESCAPE '\\' "
+            arguments = ['%%%s%%' % phrase.replace('\\', '\\\\').replace(
+                '%', '\\%').replace('_', '\\_')]
+        query += "ORDER BY files.path, strings.record, strings.member"
+        if limit:
+            query += " LIMIT %i" % limit
+        return self.connection.execute(query, arguments).fetchall()
+
+    def get_totals(self):
+        files, = self.connection.execute(
+            "SELECT COUNT(*) FROM files").fetchone()
+        strings, = self.connection.execute(
+            "SELECT COUNT(*) FROM strings").fetchone()
+        return {'files': files, 'strings': strings}
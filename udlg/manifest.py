@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.manifest
+    :synopsis: Corpus manifest: size, modification time and digest of files
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Manifest keeps size, modification time (ns) and content digest of every
+file of directory trees. Refresh walks directory once and re-hashes only
+files which size or modification time has changed, so digests of unchanged
+corpus cost one ``stat`` per file instead of reading it. Names are relative
+and ``/`` separated like storage ones. Tools mark files they have processed
+with their actual digest, so unchanged files are skipped on the next run.
+
+.. code-block:: python
+
+    manifest = Manifest('manifest.json')
+    changes = manifest.refresh('Data/Dialogs', extensions=('.udlg', ))
+    for name in manifest.get_names('Data/Dialogs', largest_first=True):
+        if not manifest.is_marked('dump_i18n', 'Data/Dialogs', name):
+            process(name)
+            manifest.mark('dump_i18n', 'Data/Dialogs', name)
+    manifest.save()
+"""
+import os
+import json
+
+from .hashes import DIGEST_SIZE
+
+CHUNK_SIZE = 1024 * 1024
+MANIFEST_VERSION = 1
+
+#: entry fields, entries are stored as lists to keep manifest compact
+SIZE, MTIME_NS, DIGEST = range(3)
+
+
+def get_file_digest(path):
+    """
+    :param str path: file path
+    :rtype: str
+    :return: file content digest, hex encoded
+    """
+    from hashlib import blake2b
+
+    digest = blake2b(digest_size=DIGEST_SIZE)
+    with open(path, 'rb') as stream:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_tree(path, extensions=None):
+    """
+    :param str path: directory path
+    :param tuple extensions: extensions of files to collect, every file is
+        collected if nothing was given
+    :rtype: dict
+    :return: name: (size, modification time in ns) of every file
+    """
+    state = {}
+    directories = [('', path)]
+    while directories:
+        prefix, directory = directories.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    directories.append((prefix + entry.name + '/',
+                                        entry.path))
+                elif not extensions or entry.name.endswith(extensions):
+                    stat = entry.stat()
+                    state[prefix + entry.name] = (stat.st_size,
+                                                  stat.st_mtime_ns)
+    return state
+
+
+def open_manifest(path, storage, extensions=None):
+    """
+    :param str path: manifest file path, None for no manifest
+    :param udlg.storage.Storage storage: documents storage
+    :param tuple extensions: extensions of files to keep
+    :rtype: Manifest | None
+    :return: manifest with storage directory refreshed, None if there's no
+        manifest path or storage is not a directory, archives and bundles
+        are read whole anyway
+    """
+    from .storage import DirectoryStorage
+
+    if not path or not isinstance(storage, DirectoryStorage):
+        return None
+    manifest = Manifest(path)
+    manifest.refresh(storage.path, extensions)
+    return manifest
+
+
+class Manifest(object):
+    """
+    Size, modification time and digest of files of directory trees, stored
+    as json
+    """
+    def __init__(self, path=None):
+        """
+        :param str path: manifest file path, in memory manifest if nothing
+            was given
+        """
+        self.path = path
+        #: directory absolute path: {name: [size, mtime_ns, digest]}
+        self.roots = {}
+        #: mark key: {directory absolute path: {name: digest}}
+        self.marks = {}
+        if path and os.path.exists(path):
+            with open(path, 'r') as stream:
+                data = json.loads(stream.read())
+            if data.get('version') == MANIFEST_VERSION:
+                self.roots = data['roots']
+                self.marks = data.get('marks', {})
+
+    def get_entries(self, directory):
+        """
+        :param str directory: directory path
+        :rtype: dict
+        :return: name: [size, modification time in ns, digest]
+        :raises KeyError:
+            - if directory was never refreshed
+        """
+        return self.roots[os.path.abspath(directory)]
+
+    def refresh(self, directory, extensions=None):
+        """
+        bring directory entries up to date, files are re-hashed only if
+        their size or modification time has changed
+
+        :param str directory: directory path
+        :param tuple extensions: extensions of files to keep
+        :rtype: dict
+        :return: sorted ``added``, ``changed`` and ``removed`` names, files
+            touched without content changes are not reported
+        """
+        root = os.path.abspath(directory)
+        known = self.roots.get(root, {})
+        entries = {}
+        changes = {'added': [], 'changed': [], 'removed': []}
+        for name, (size, mtime_ns) in scan_tree(root, extensions).items():
+            entry = known.get(name)
+            if entry is not None and (entry[SIZE], entry[MTIME_NS]) == (
+                    size, mtime_ns):
+                entries[name] = entry
+                continue
+            digest = get_file_digest(os.path.join(root, *name.split('/')))
+            entries[name] = [size, mtime_ns, digest]
+            if entry is None:
+                changes['added'].append(name)
+            elif entry[DIGEST] != digest:
+                changes['changed'].append(name)
+        changes['removed'] = [name for name in known if name not in entries]
+        self.roots[root] = entries
+        for marks in self.marks.values():
+            for name in changes['removed']:
+                marks.get(root, {}).pop(name, None)
+        for names in changes.values():
+            names.sort()
+        return changes
+
+    def get_names(self, directory, largest_first=False):
+        """
+        :param str directory: directory path
+        :param bool largest_first: order by size, largest files first, so
+            they do not finish worker pool run last
+        :rtype: list[str]
+        :return: file names, sorted ones by default
+        """
+        entries = self.get_entries(directory)
+        if largest_first:
+            return sorted(entries, key=lambda x: (-entries[x][SIZE], x))
+        return sorted(entries)
+
+    def get_size(self, directory, name):
+        return self.get_entries(directory)[name][SIZE]
+
+    def get_digest(self, directory, name):
+        """
+        :param str directory: directory path
+        :param str name: file name
+        :rtype: str
+        :return: file content digest, hex encoded, see ``get_file_digest``
+        :raises KeyError:
+            - if there's no such file in manifest
+        """
+        return self.get_entries(directory)[name][DIGEST]
+
+    def is_marked(self, key, directory, name):
+        """
+        :param str key: mark key, tool name and its target for example
+        :param str directory: directory path
+        :param str name: file name
+        :rtype: bool
+        :return: True if file was marked with key since its content has
+            changed last time
+        """
+        root = os.path.abspath(directory)
+        marks = self.marks.get(key, {}).get(root, {})
+        entry = self.roots.get(root, {}).get(name)
+        return entry is not None and marks.get(name) == entry[DIGEST]
+
+    def mark(self, key, directory, name):
+        """
+        mark file as processed with its actual digest
+
+        :param str key: mark key, tool name and its target for example
+        :param str directory: directory path
+        :param str name: file name
+        :rtype: None
+        :return: None
+        :raises KeyError:
+            - if there's no such file in manifest
+        """
+        root = os.path.abspath(directory)
+        digest = self.get_digest(root, name)
+        self.marks.setdefault(key, {}).setdefault(root, {})[name] = digest
+
+    def save(self):
+        if self.path:
+            with open(self.path, 'w') as stream:
+                stream.write(json.dumps({'version': MANIFEST_VERSION,
+                                         'roots': self.roots,
+                                         'marks': self.marks}))
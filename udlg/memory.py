@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.memory
+    :synopsis: Memory footprint accounting of parsed documents
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import os
+import sys
+import ctypes
+import tracemalloc
+
+from . import enums
+from .builder import UDLGBuilder
+from .structure.base import BinaryRecordStructure
+
+#: ctypes keeps small buffers inside object itself
+CTYPES_INLINE_BUFFER_SIZE = 16
+
+#: amount of top allocation sites stored in report
+TOP_ALLOCATIONS = 10
+
+CData = ctypes.c_int.__mro__[-2]
+
+
+def get_object_size(obj):
+    """
+    get object size, ctypes buffers owned by object are included
+
+    :param obj: object
+    :rtype: int
+    :return: size in bytes
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, CData) and obj._b_needsfree_:
+        buffer_size = ctypes.sizeof(obj)
+        if buffer_size > CTYPES_INLINE_BUFFER_SIZE:
+            size += buffer_size
+    return size
+
+
+class MemoryAccount(object):
+    """
+    Walks parsed document objects and attributes their sizes to record
+    types, strings and python caches.
+
+    ctypes keeps everything document consists of in ``_objects`` of its
+    root, so every object is reachable from it. Objects reachable from top
+    level record entry are attributed to its record type (nested member
+    records included), the rest (headers, record arrays, ctypes keep alive
+    bookkeeping) to ``document``. Raw string data is counted as
+    ``strings``, objects reachable through python attributes only
+    (``_members``, ``_entry``, ``_context`` and others) are counted
+    as caches by attribute name.
+    """
+    def __init__(self):
+        self.records = {}
+        self.strings = {'count': 0, 'bytes': 0}
+        self.caches = {}
+        self._seen = set()
+        self._cache_roots = []
+
+    def account(self, document):
+        """
+        account document objects
+
+        :param document: parsed document
+        :rtype: MemoryAccount
+        :return: self
+        """
+        entries = {}
+        for obj in self.iter_objects(document):
+            if isinstance(obj, BinaryRecordStructure):
+                entries[ctypes.addressof(obj)] = obj
+
+        for record in document.records:
+            name = enums.RecordTypeEnum(record.record_type).name
+            entry = self.records.get(name)
+            if entry is None:
+                entry = self.records[name] = {'count': 0, 'bytes': 0}
+            entry['count'] += 1
+            obj = entries.get(record.entry_ptr)
+            if obj is not None:
+                self.walk(obj, name, self.add_record)
+        self.walk(document, 'document', self.add_record)
+        #: caches are walked last, so shared objects belong to records
+        while self._cache_roots:
+            name, value = self._cache_roots.pop()
+            self.walk(value, name, self.add_cache)
+        return self
+
+    def add_record(self, owner, size):
+        entry = self.records.get(owner)
+        if entry is None:
+            entry = self.records[owner] = {'count': 0, 'bytes': 0}
+        entry['bytes'] += size
+
+    def add_cache(self, owner, size):
+        self.caches[owner] = self.caches.get(owner, 0) + size
+
+    @staticmethod
+    def get_references(obj):
+        if isinstance(obj, dict):
+            return list(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            return obj
+        elif isinstance(obj, CData):
+            return [x for x in (obj._objects, obj._b_base_) if x is not None]
+        return ()
+
+    def iter_objects(self, root):
+        """
+        iterate over objects ctypes keeps alive
+
+        :param root: root object
+        :rtype: collections.Iterable
+        :return: objects
+        """
+        seen = set()
+        stack = [root]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            yield obj
+            stack.extend(self.get_references(obj))
+
+    def walk(self, root, owner, add):
+        """
+        walk object graph, objects are counted once
+
+        :param root: root object
+        :param str owner: owner name objects are attributed to
+        :param callable add: called with ``(owner, size)``
+        :rtype: None
+        :return: None
+        """
+        seen = self._seen
+        stack = [root]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            if isinstance(obj, bytes):
+                self.strings['count'] += 1
+                self.strings['bytes'] += sys.getsizeof(obj)
+                continue
+            add(owner, get_object_size(obj))
+            stack.extend(self.get_references(obj))
+            for name, value in getattr(obj, '__dict__', {}).items():
+                self._cache_roots.append((name, value))
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :return: accounted sizes
+        """
+        total = (sum(x['bytes'] for x in self.records.values()) +
+                 self.strings['bytes'] + sum(self.caches.values()))
+        return {
+            'records': self.records,
+            'strings': self.strings,
+            'caches': self.caches,
+            'total': total
+        }
+
+
+def account(document):
+    """
+    account parsed document memory
+
+    :param document: parsed document
+    :rtype: dict
+    :return: sizes attributed to record types, strings and caches
+    """
+    return MemoryAccount().account(document).to_dict()
+
+
+def measure(stream, builder=UDLGBuilder):
+    """
+    build document from stream measuring memory with tracemalloc
+
+    :param stream: stream object
+    :param builder: document builder
+    :rtype: tuple
+    :return: document and memory statistics: allocated memory retained
+        by document, peak memory during build and top allocation sites
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        current = tracemalloc.get_traced_memory()[0]
+        document = builder.build(stream)
+        retained, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    top = [
+        {'location': '%s:%i' % (x.traceback[0].filename,
+                                x.traceback[0].lineno),
+         'bytes': x.size_diff, 'count': x.count_diff}
+        for x in after.compare_to(before, 'lineno')[:TOP_ALLOCATIONS]
+    ]
+    return document, {
+        'retained': retained - current,
+        'peak': peak - current,
+        'top': top
+    }
+
+
+class MemoryReport(object):
+    """
+    Memory report of documents: tracemalloc statistics and accounting of
+    each document, and totals
+    """
+    def __init__(self, builder=UDLGBuilder):
+        self.builder = builder
+        self.documents = []
+
+    def add(self, stream, name=None):
+        """
+        build document and add its memory statistics to report
+
+        :param stream: stream object
+        :param str name: document name, stream name by default
+        :rtype: dict
+        :return: document memory statistics
+        """
+        document, stats = measure(stream, builder=self.builder)
+        stats.update(account(document))
+        stats['name'] = name or getattr(stream, 'name', None)
+        self.documents.append(stats)
+        return stats
+
+    def add_path(self, path):
+        """
+        add file or every udlg file in directory tree
+
+        :param str path: file or directory path
+        :rtype: None
+        :return: None
+        """
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith('.udlg'):
+                        self.add_path(os.path.join(root, name))
+            return
+        with open(path, 'rb') as stream:
+            self.add(stream, name=path)
+
+    def get_totals(self):
+        totals = {'documents': len(self.documents), 'retained': 0,
+                  'peak': 0, 'total': 0, 'records': {},
+                  'strings': {'count': 0, 'bytes': 0}, 'caches': {}}
+        for stats in self.documents:
+            totals['retained'] += stats['retained']
+            totals['peak'] = max(totals['peak'], stats['peak'])
+            totals['total'] += stats['total']
+            for name, entry in stats['records'].items():
+                total = totals['records'].setdefault(
+                    name, {'count': 0, 'bytes': 0}
+                )
+                total['count'] += entry['count']
+                total['bytes'] += entry['bytes']
+            totals['strings']['count'] += stats['strings']['count']
+            totals['strings']['bytes'] += stats['strings']['bytes']
+            for name, size in stats['caches'].items():
+                totals['caches'][name] = totals['caches'].get(name, 0) + size
+        return totals
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :return: report
+        """
+        return {'documents': self.documents, 'totals': self.get_totals()}
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.migrate
+    :synopsis: Migration of i18n files between document versions
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+i18n files address strings with ``record_idx,member_idx`` coordinates, so
+records inserted or removed by game patch shift translations to wrong
+strings. Migration indexes strings of the old original document and joins
+strings of the new one against them, every index is a dict so migration
+takes linear time:
+
+1. source content hash with owning class and member name,
+2. stable identity: object id with owning class and member name, source
+   string has changed, so translation should be reviewed,
+3. source content hash only, string has moved to another class or member.
+
+New strings nothing was joined with and translated strings of the old
+document nothing was joined to are reported.
+"""
+from collections import deque
+
+from .hashes import digest
+from .structure import records
+from .utils.i18n import get_i18n_items
+
+#: join statuses
+MATCHED = 'matched'
+CHANGED = 'changed'
+MOVED = 'moved'
+NEW = 'new'
+ORPHANED = 'orphaned'
+
+
+class SourceString(object):
+    """
+    String of the original document with its coordinates and owner
+    """
+    __slots__ = ('record_idx', 'member_idx', 'object_id', 'class_name',
+                 'member_name', 'value', 'digest')
+
+    def __init__(self, record_idx, member_idx, object_id, class_name,
+                 member_name, value):
+        self.record_idx = record_idx
+        self.member_idx = member_idx
+        self.object_id = object_id
+        self.class_name = class_name
+        self.member_name = member_name
+        self.value = value
+        self.digest = digest(value)
+
+    @property
+    def coordinates(self):
+        return self.record_idx, self.member_idx
+
+    @property
+    def owner(self):
+        return self.class_name, self.member_name
+
+    def __repr__(self):
+        return '<SourceString %i,%i>' % self.coordinates
+
+
+def get_members_names(entry):
+    """
+    :param entry: record entry
+    :rtype: tuple[bytes | None, collections.Sequence]
+    :return: class name and members names, ``None`` and empty tuple for
+        records without class info
+    """
+    if isinstance(entry, records.ClassWithId):
+        entry = entry.class_reference
+    class_info = getattr(entry, 'class_info', None)
+    if class_info is None:
+        return None, ()
+    return class_info.name.value, class_info.members_names
+
+
+def iter_strings(document):
+    """
+    iterate over member strings of document, the same ones
+    ``UDLGFile.unpack_i18n`` dumps
+
+    :param udlg.structure.UDLGFile document: document
+    :rtype: collections.Iterable[SourceString]
+    :return: strings
+    """
+    for idx, record in enumerate(document.data.records):
+        class_name, names = None, None
+        for jdx, member in enumerate(record.members):
+            if not isinstance(member, records.BinaryObjectString):
+                continue
+            if names is None:
+                class_name, names = get_members_names(record.entry)
+            member_name = names[jdx].value if jdx < len(names) else None
+            yield SourceString(idx, jdx, member.object_id, class_name,
+                               member_name, member.value.value)
+
+
+def take(index, key):
+    """
+    take the first item stored by key, the last one stays in index, so
+    duplicated strings are joined in order they appear and extra ones
+    reuse the last translation
+
+    :param dict index: index
+    :param key: key
+    :return: item, None if nothing was stored by key
+    """
+    queue = index.get(key)
+    if not queue:
+        return None
+    return queue.popleft() if len(queue) > 1 else queue[0]
+
+
+class Migration(object):
+    """
+    Migrate translation made for old document version to the new one
+
+    .. code-block:: python
+
+        migration = Migration(old_document, new_document, i18n_block)
+        open('new.txt', 'wb').write(migration.to_i18n())
+        print(migration.get_totals())
+    """
+    def __init__(self, old, new, block):
+        """
+        :param udlg.structure.UDLGFile old: original old document
+        :param udlg.structure.UDLGFile new: original new document
+        :param bytes block: i18n block of old document translation
+        """
+        #: new string coordinates: (status, old string, new string,
+        #: translation)
+        self.entries = []
+        #: translated old strings nothing was joined to
+        self.orphaned = []
+        self._migrate(list(iter_strings(old)), list(iter_strings(new)),
+                      get_i18n_items(block))
+
+    def _migrate(self, old_strings, new_strings, translations):
+        by_content, by_identity, by_digest = {}, {}, {}
+        translated = []
+        for entry in old_strings:
+            translation = translations.get(entry.record_idx, {}).get(
+                entry.member_idx
+            )
+            if translation is None:
+                continue
+            translated.append((entry, translation))
+            item = (entry, translation)
+            for index, key in (
+                    (by_content, (entry.digest, ) + entry.owner),
+                    (by_identity, (entry.object_id, ) + entry.owner),
+                    (by_digest, entry.digest)):
+                index.setdefault(key, deque()).append(item)
+
+        used = set()
+        append = self.entries.append
+        for entry in new_strings:
+            for status, index, key in (
+                    (MATCHED, by_content, (entry.digest, ) + entry.owner),
+                    (CHANGED, by_identity, (entry.object_id, ) + entry.owner),
+                    (MOVED, by_digest, entry.digest)):
+                item = take(index, key)
+                if item is None:
+                    continue
+                source, translation = item
+                if status == CHANGED and source.digest == entry.digest:
+                    status = MATCHED
+                append((status, source, entry, translation))
+                used.add(source.coordinates)
+                break
+            else:
+                append((NEW, None, entry, None))
+        self.orphaned = [
+            (entry, translation) for entry, translation in translated
+            if entry.coordinates not in used
+        ]
+
+    def to_i18n(self, untranslated=True):
+        """
+        :param bool untranslated: dump new strings with their source value
+        :rtype: bytes
+        :return: i18n block for new document
+        """
+        lines = []
+        append = lines.append
+        for status, source, entry, translation in self.entries:
+            if translation is None:
+                if not untranslated:
+                    continue
+                value = entry.value
+            else:
+                value = translation.encode('utf-8')
+            append(b"%i,%i=>'%s'" % (entry.record_idx, entry.member_idx,
+                                     value))
+        return b"\n".join(lines)
+
+    def get_totals(self):
+        totals = dict((status, 0) for status in (MATCHED, CHANGED, MOVED,
+                                                 NEW))
+        for status, _, _, _ in self.entries:
+            totals[status] += 1
+        totals[ORPHANED] = len(self.orphaned)
+        return totals
+
+    def to_dict(self):
+        """
+        report of strings which need attention: changed, moved, new and
+        orphaned ones, values are decoded from utf-8
+
+        :rtype: dict
+        :return: report
+        """
+        def decode(value):
+            return value.decode('utf-8', 'replace')
+
+        document = {'totals': self.get_totals(), CHANGED: [], MOVED: [],
+                    NEW: [], ORPHANED: []}
+        for status, source, entry, translation in self.entries:
+            if status == MATCHED:
+                continue
+            item = {'new': entry.coordinates, 'source': decode(entry.value)}
+            if source is not None:
+                item.update({
+                    'old': source.coordinates,
+                    'old_source': decode(source.value),
+                    'translation': translation
+                })
+            document[status].append(item)
+        document[ORPHANED] = [
+            {'old': entry.coordinates, 'source': decode(entry.value),
+             'translation': translation}
+            for entry, translation in self.orphaned
+        ]
+        return document
+
+
+def migrate(old, new, block):
+    """
+    migrate translation made for old document version to the new one
+
+    :param udlg.structure.UDLGFile old: original old document
+    :param udlg.structure.UDLGFile new: original new document
+    :param bytes block: i18n block of old document translation
+    :rtype: Migration
+    :return: migration, use ``to_i18n`` to get new i18n block
+    """
+    return Migration(old, new, block)
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.report
+    :synopsis: Batch tools run reports and progress
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import os
+import sys
+import json
+import time
+from contextlib import contextmanager
+
+MEGABYTE = 1024 * 1024.0
+
+#: file statuses
+STATUS_OK = 'ok'
+STATUS_SKIPPED = 'skipped'
+STATUS_FAILED = 'failed'
+
+#: cache states
+CACHE_HIT = 'hit'
+CACHE_MISS = 'miss'
+
+
+def scan_files(path, extensions=None):
+    """
+    collect files in directory tree, sorted
+
+    :param str path: directory path
+    :param tuple extensions: file extensions to collect, all files if
+        nothing was given
+    :rtype: list[str]
+    :return: file paths
+    """
+    paths = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if extensions and not name.endswith(extensions):
+                continue
+            paths.append(os.path.join(root, name))
+    return paths
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return '%02i:%02i:%02i' % (seconds // 3600, seconds // 60 % 60,
+                               seconds % 60)
+
+
+class Progress(object):
+    """
+    Live progress line with throughput and ETA, ETA is estimated from bytes
+    processed so far
+    """
+    def __init__(self, files, size, stream=None, timer=time.perf_counter):
+        """
+        :param int files: amount of files to process
+        :param int size: total size of files to process in bytes
+        :param stream: text stream to write into, stderr by default
+        :param callable timer: timer function
+        """
+        self.files = files
+        self.size = size
+        self.stream = stream or sys.stderr
+        self.timer = timer
+        self.start = timer()
+        self.processed = 0
+        self.processed_size = 0
+
+    def update(self, path, size):
+        """
+        update progress line after file was processed
+
+        :param str path: file path
+        :param int size: file size in bytes
+        :rtype: None
+        :return: None
+        """
+        self.processed += 1
+        self.processed_size += size
+        elapsed = self.timer() - self.start
+        speed = self.processed_size / elapsed if elapsed else 0.0
+        left = max(self.size - self.processed_size, 0)
+        eta = format_duration(left / speed) if speed else '--:--:--'
+        percent = (100.0 * self.processed_size / self.size
+                   if self.size else 100.0)
+        self.stream.write('\r[%i/%i] %5.1f%% %.2f MB/s ETA %s %s\033[K' % (
+            self.processed, self.files, percent, speed / MEGABYTE, eta, path
+        ))
+        self.stream.flush()
+
+    def finish(self):
+        self.stream.write('\n')
+        self.stream.flush()
+
+
+class RunReport(object):
+    """
+    Machine readable batch run report: per file wall time, bytes in and
+    out, records parsed, strings changed and cache state, totals and the
+    slowest files.
+
+    .. code-block:: python
+
+        report = RunReport('dump_i18n')
+        with report.file(path) as entry:
+            entry['bytes_in'] = ...
+        report.write('report.json')
+    """
+    def __init__(self, tool, progress=None, slowest=10,
+                 timer=time.perf_counter):
+        """
+        :param str tool: tool name
+        :param Progress progress: progress line, optional
+        :param int slowest: amount of slowest files to report
+        :param callable timer: timer function
+        """
+        self.tool = tool
+        self.progress = progress
+        self.slowest = slowest
+        self.timer = timer
+        self.started = time.time()
+        self.files = []
+
+    @contextmanager
+    def file(self, path):
+        """
+        measure file processing, processing code should fill yielded entry
+        in: ``bytes_in``, ``bytes_out``, ``records``, ``strings_changed``,
+        ``cache`` and ``status``. Failed status is set on exception, the
+        exception is re-raised.
+
+        :param str path: file path
+        :rtype: collections.Iterator[dict]
+        :return: file entry
+        """
+        entry = {
+            'path': path, 'status': STATUS_OK, 'time': 0.0, 'bytes_in': 0,
+            'bytes_out': 0, 'records': 0, 'strings_changed': 0,
+            'cache': None
+        }
+        start = self.timer()
+        try:
+            yield entry
+        except Exception as err:
+            entry['status'] = STATUS_FAILED
+            entry['error'] = '%s: %s' % (err.__class__.__name__, err)
+            raise
+        finally:
+            entry['time'] = self.timer() - start
+            self.files.append(entry)
+            if self.progress is not None:
+                self.progress.update(path, entry['bytes_in'])
+
+    def get_totals(self):
+        files = self.files
+        processed = [x for x in files if x['status'] != STATUS_SKIPPED]
+        elapsed = sum(x['time'] for x in processed)
+        bytes_in = sum(x['bytes_in'] for x in processed)
+        totals = {
+            'files': len(files),
+            'time': elapsed,
+            'wall_time': time.time() - self.started,
+            'bytes_in': bytes_in,
+            'bytes_out': sum(x['bytes_out'] for x in files),
+            'records': sum(x['records'] for x in files),
+            'strings_changed': sum(x['strings_changed'] for x in files),
+            'cache_hits': len([x for x in files if x['cache'] == CACHE_HIT]),
+            'cache_misses': len([
+                x for x in files if x['cache'] == CACHE_MISS
+            ]),
+            'mb_per_second': bytes_in / MEGABYTE / elapsed if elapsed else 0.0
+        }
+        for status in (STATUS_OK, STATUS_SKIPPED, STATUS_FAILED):
+            totals[status] = len([x for x in files if x['status'] == status])
+        return totals
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :return: report
+        """
+        return {
+            'tool': self.tool,
+            'started': self.started,
+            'files': self.files,
+            'totals': self.get_totals(),
+            'slowest': [
+                {'path': x['path'], 'time': x['time'],
+                 'bytes_in': x['bytes_in']}
+                for x in sorted(self.files, key=lambda x: -x['time'])
+                [:self.slowest]
+            ]
+        }
+
+    def finish(self):
+        if self.progress is not None:
+            self.progress.finish()
+
+    def write(self, path):
+        """
+        write report as json
+
+        :param str path: report file path
+        :rtype: None
+        :return: None
+        """
+        with open(path, 'w') as output:
+            output.write(json.dumps(self.to_dict(), indent=2))
+
+
+def create_report(tool, paths, progress=False, stream=None,
+                  get_size=os.path.getsize):
+    """
+    create run report for files
+
+    :param str tool: tool name
+    :param list[str] paths: file paths to process
+    :param bool progress: show live progress line
+    :param stream: text stream for progress line, stderr by default
+    :param callable get_size: file size getter, ``Storage.get_size`` for
+        storage document names
+    :rtype: RunReport
+    :return: run report
+    """
+    return RunReport(tool, progress=Progress(
+        len(paths), sum(get_size(x) for x in paths), stream=stream
+    ) if progress else None)
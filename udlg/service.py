@@ -0,0 +1,492 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.service
+    :synopsis: Long running dialog service with LRU document cache
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Service keeps parsed documents in LRU cache bounded by memory budget and
+serves them over HTTP on localhost or unix socket, so translation editors
+do not parse dialog on every request. Translations set through service are
+kept apart from cached documents and applied again once evicted document is
+loaded back, so eviction loses nothing.
+
+Endpoints, ``<name>`` is storage document name, ``Dialogs/Lucas1.udlg`` for
+example:
+
+- ``GET /documents`` - document names
+- ``GET /strings/<name>`` - document strings with their source values
+- ``POST /strings/<name>`` - set translations, json list of
+  ``{"record": 1, "member": 0, "value": "..."}``
+- ``DELETE /strings/<name>`` - drop document translations
+- ``GET /i18n/<name>`` - i18n file of document
+- ``PUT /i18n/<name>`` - load i18n file, ``{"i18n": "..."}``
+- ``GET /binary/<name>`` - translated document binary
+- ``POST /export`` - write translated documents under export root,
+  ``{"output": "dir"}``
+- ``GET /stats`` - cache statistics
+
+``POST`` and ``PUT`` requests should have ``application/json`` content type,
+other ones are rejected, so pages opened in browser can not change
+translations with plain form submits.
+"""
+import os
+import json
+import socket
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import unquote
+
+from .builder import UDLGBuilder
+from .memory import account
+from .storage import create_storage
+from .structure import records
+from .utils.i18n import get_i18n_items
+
+import logging
+logger = logging.getLogger(__name__)
+
+#: default cache memory budget, bytes
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+
+class DocumentCache(object):
+    """
+    LRU cache of parsed documents, document size is its accounted memory
+    footprint, least recently used documents are evicted once sizes sum
+    exceeds budget. Document bigger than budget stays alone in cache.
+    """
+    def __init__(self, storage, budget=DEFAULT_BUDGET, builder=UDLGBuilder,
+                 prepare=None):
+        """
+        :param udlg.storage.Storage storage: documents storage
+        :param int budget: memory budget in bytes
+        :param builder: document builder
+        :param callable prepare: called with name and document once
+            document is loaded
+        """
+        self.storage = storage
+        self.budget = budget
+        self.builder = builder
+        self.prepare = prepare
+        #: name: (document, size)
+        self.documents = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, name):
+        """
+        :param str name: document name
+        :rtype: udlg.structure.UDLGFile
+        :return: parsed document
+        :raises KeyError:
+            - if storage has no such document
+        """
+        if name in self.documents:
+            self.documents.move_to_end(name)
+            self.hits += 1
+            return self.documents[name][0]
+        document = self.load(name)
+        self.misses += 1
+        size = account(document)['total']
+        self.documents[name] = (document, size)
+        self.size += size
+        self.evict()
+        return document
+
+    def update(self, name):
+        """
+        account cached document again once its strings were changed and
+        evict least recently used documents if budget is exceeded
+
+        :param str name: document name
+        :rtype: None
+        :return: None
+        """
+        document, size = self.documents[name]
+        updated = account(document)['total']
+        self.documents[name] = (document, updated)
+        self.size += updated - size
+        self.evict()
+
+    def load(self, name):
+        if not self.storage.exists(name):
+            raise KeyError(name)
+        with closing(self.storage.open(name)) as stream:
+            document = self.builder.build(stream)
+        if self.prepare is not None:
+            self.prepare(name, document)
+        return document
+
+    def evict(self):
+        while self.size > self.budget and len(self.documents) > 1:
+            name, (_, size) = self.documents.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            logger.info('evicted: %s, %i bytes', name, size)
+
+    def __contains__(self, name):
+        return name in self.documents
+
+    def get_stats(self):
+        """
+        :rtype: dict
+        :return: cache statistics
+        """
+        return {
+            'documents': len(self.documents),
+            'size': self.size,
+            'budget': self.budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+def get_strings(document):
+    """
+    :param udlg.structure.UDLGFile document: document
+    :rtype: list[tuple[int, int, bytes]]
+    :return: record index, member index and value of member strings, the
+        ones i18n file consists of
+    """
+    strings = []
+    for idx, record in enumerate(document.data.records):
+        for jdx, member in enumerate(record.members):
+            if isinstance(member, records.BinaryObjectString):
+                strings.append((idx, jdx, member.value.value))
+    return strings
+
+
+class DialogService(object):
+    """
+    Document operations behind service endpoints, calls are serialized
+    with lock as parsed documents are not safe to share between threads
+    """
+    def __init__(self, storage, budget=DEFAULT_BUDGET, builder=UDLGBuilder,
+                 export_root=None):
+        """
+        :param udlg.storage.Storage storage: documents storage
+        :param int budget: cache memory budget in bytes
+        :param builder: document builder
+        :param str export_root: directory translated documents are exported
+            under, export is disabled if nothing was given
+        """
+        self.storage = storage
+        self.export_root = export_root
+        self.cache = DocumentCache(storage, budget=budget, builder=builder,
+                                   prepare=self.apply_translations)
+        #: name: {(record id, member id): value}
+        self.translations = {}
+        self.lock = threading.RLock()
+
+    def apply_translations(self, name, document):
+        for (record_id, member_id), value in sorted(
+                self.translations.get(name, {}).items()):
+            document.set_string(record_id, member_id, value)
+
+    def get_names(self):
+        """
+        :rtype: list[str]
+        :return: document names
+        """
+        return self.storage.get_names()
+
+    def get_strings(self, name):
+        """
+        :param str name: document name
+        :rtype: list[dict]
+        :return: strings with their source values
+        """
+        with self.lock:
+            document = self.cache.get(name)
+            return [
+                {'record': idx, 'member': jdx,
+                 'value': value.decode('utf-8'),
+                 'source': document.get_source_string(
+                     idx, jdx, default=value
+                 ).decode('utf-8')}
+                for idx, jdx, value in get_strings(document)
+            ]
+
+    def set_strings(self, name, strings):
+        """
+        :param str name: document name
+        :param list[dict] strings: record, member and value of strings
+        :rtype: int
+        :return: amount of changed strings
+        :raises ValueError:
+            - if string is malformed
+        :raises TypeError:
+            - if member is not a string
+        :raises IndexError:
+            - if there's no such record or member
+        """
+        try:
+            items = [
+                ((int(x['record']), int(x['member'])),
+                 x['value'].encode('utf-8'))
+                for x in strings
+            ]
+        except (KeyError, TypeError, AttributeError) as err:
+            raise ValueError('Malformed string: %s' % err)
+        with self.lock:
+            document = self.cache.get(name)
+            changed = 0
+            translations = self.translations.setdefault(name, {})
+            for (record_id, member_id), value in items:
+                changed += document.set_string(record_id, member_id, value)
+                translations[record_id, member_id] = value
+            if changed:
+                self.cache.update(name)
+            return changed
+
+    def get_i18n(self, name):
+        """
+        :param str name: document name
+        :rtype: bytes
+        :return: i18n file content
+        """
+        with self.lock:
+            return self.cache.get(name).unpack_i18n()
+
+    def load_i18n(self, name, block):
+        """
+        :param str name: document name
+        :param bytes block: i18n file content
+        :rtype: int
+        :return: amount of changed strings
+        """
+        return self.set_strings(name, [
+            {'record': record_id, 'member': member_id, 'value': value}
+            for record_id, record in get_i18n_items(block).items()
+            for member_id, value in record.items()
+        ])
+
+    def reset(self, name):
+        """
+        :param str name: document name
+        :rtype: int
+        :return: amount of restored strings
+        """
+        with self.lock:
+            self.translations.pop(name, None)
+            restored = self.cache.get(name).reset_i18n()
+            if restored:
+                self.cache.update(name)
+            return restored
+
+    def get_binary(self, name):
+        """
+        :param str name: document name
+        :rtype: bytes
+        :return: translated document
+        """
+        with self.lock:
+            return bytes(self.cache.get(name).to_bin())
+
+    def get_export_path(self, output):
+        """
+        :param str output: output directory or archive path, relative to
+            export root
+        :rtype: str
+        :return: output path resolved under export root
+        :raises ValueError:
+            - if export is disabled
+            - if output is outside of export root
+        """
+        if self.export_root is None:
+            raise ValueError('Export is disabled')
+        root = os.path.realpath(self.export_root)
+        path = os.path.realpath(os.path.join(root, output))
+        if path == root or os.path.commonpath([root, path]) != root:
+            raise ValueError('Output is outside of export root: %s' % output)
+        return path
+
+    def export(self, output):
+        """
+        write translated documents
+
+        :param str output: output directory or archive path, relative to
+            export root
+        :rtype: list[str]
+        :return: written document names
+        :raises ValueError:
+            - if export is disabled
+            - if output is outside of export root
+        """
+        path = self.get_export_path(output)
+        with self.lock:
+            names = sorted(self.translations)
+            with create_storage(path) as writer:
+                for name in names:
+                    with writer.create(name) as stream:
+                        stream.write(self.cache.get(name).to_bin())
+            return names
+
+    def get_stats(self):
+        """
+        :rtype: dict
+        :return: cache statistics with amount of translated documents
+        """
+        with self.lock:
+            stats = self.cache.get_stats()
+            stats['translated'] = len(self.translations)
+            return stats
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    #: set by ``create_server``
+    service = None
+
+    def address_string(self):
+        #: unix socket clients have no address
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return 'unix'
+
+    def log_message(self, format, *args):
+        logger.info('%s %s' % (self.address_string(), format % args))
+
+    def send(self, status, body, content_type='application/json'):
+        if content_type == 'application/json':
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def get_content_type(self):
+        content_type = self.headers.get('Content-Type') or ''
+        return content_type.split(';', 1)[0].strip().lower()
+
+    def read_json(self):
+        try:
+            return json.loads(self.read_body().decode('utf-8'))
+        except (ValueError, UnicodeDecodeError) as err:
+            raise ValueError('Malformed json: %s' % err)
+
+    def route(self, method):
+        path = unquote(self.path.split('?', 1)[0])
+        endpoint, _, name = path.lstrip('/').partition('/')
+        handler = getattr(self, '%s_%s' % (method, endpoint), None)
+        if handler is None:
+            return self.send(404, {'error': 'Unknown endpoint: %s' % path})
+        if method in ('post', 'put') and (
+                self.get_content_type() != 'application/json'):
+            return self.send(415, {'error': 'application/json content type '
+                                            'is expected'})
+        try:
+            handler(name)
+        except KeyError as err:
+            self.send(404, {'error': 'Unknown document: %s' % err})
+        except (ValueError, TypeError, IndexError) as err:
+            self.send(400, {'error': '%s: %s' % (err.__class__.__name__,
+                                                 err)})
+        except Exception as err:
+            logger.exception('request failed: %s %s', method, path)
+            self.send(500, {'error': '%s: %s' % (err.__class__.__name__,
+                                                 err)})
+
+    def do_GET(self):
+        self.route('get')
+
+    def do_POST(self):
+        self.route('post')
+
+    def do_PUT(self):
+        self.route('put')
+
+    def do_DELETE(self):
+        self.route('delete')
+
+    def get_documents(self, _):
+        self.send(200, {'documents': self.service.get_names()})
+
+    def get_strings(self, name):
+        self.send(200, {'name': name,
+                        'strings': self.service.get_strings(name)})
+
+    def post_strings(self, name):
+        strings = self.read_json()
+        if not isinstance(strings, list):
+            raise ValueError('List of strings is expected')
+        self.send(200, {'changed': self.service.set_strings(name, strings)})
+
+    def delete_strings(self, name):
+        self.send(200, {'restored': self.service.reset(name)})
+
+    def get_i18n(self, name):
+        self.send(200, self.service.get_i18n(name),
+                  content_type='text/plain; charset=utf-8')
+
+    def put_i18n(self, name):
+        data = self.read_json()
+        block = data.get('i18n') if isinstance(data, dict) else None
+        if not isinstance(block, str):
+            raise ValueError('i18n is required')
+        self.send(200, {'changed': self.service.load_i18n(
+            name, block.encode('utf-8')
+        )})
+
+    def get_binary(self, name):
+        self.send(200, self.service.get_binary(name),
+                  content_type='application/octet-stream')
+
+    def post_export(self, _):
+        data = self.read_json()
+        output = data.get('output') if isinstance(data, dict) else None
+        if not output or not isinstance(output, str):
+            raise ValueError('Output is required')
+        self.send(200, {'documents': self.service.export(output)})
+
+    def get_stats(self, _):
+        self.send(200, self.service.get_stats())
+
+
+class ServiceServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class UnixServiceServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        UnixStreamServer.server_bind(self)
+        #: HTTPServer attributes used by request handler
+        self.server_name = socket.gethostname()
+        self.server_port = 0
+
+    def server_close(self):
+        UnixStreamServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def create_server(service, host='127.0.0.1', port=8042, socket_path=None):
+    """
+    :param DialogService service: service
+    :param str host: host to listen on
+    :param int port: port to listen on, 0 for any free one
+    :param str socket_path: unix socket path, host and port are ignored
+        if it's given
+    :rtype: socketserver.BaseServer
+    :return: server, run it with ``serve_forever``
+    """
+    handler = type('BoundServiceRequestHandler', (ServiceRequestHandler, ),
+                   {'service': service})
+    if socket_path:
+        return UnixServiceServer(socket_path, handler)
+    return ServiceServer((host, port), handler)
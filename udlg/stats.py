@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.stats
+    :synopsis: Parse instrumentation: per record type statistics
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+import json
+import time
+from contextlib import contextmanager
+
+from . import enums
+
+
+class InstrumentedStream(object):
+    """
+    Stream proxy counting ``read`` calls and bytes read, record type peeks
+    are served by ``udlg.streams.PeekableStream`` and are not counted
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.reads = 0
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.reads += 1
+        self.size += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class ParseStats(object):
+    """
+    Parse statistics collector, pass it to builder to collect statistics:
+
+    .. code-block:: python
+
+        stats = ParseStats()
+        UDLGBuilder.build(stream, stats=stats)
+        print(stats.to_json(indent=2))
+
+    For every top level record type count, bytes consumed, time spent and
+    amount of ``stream.read`` calls are collected. Parser sections (7 bit
+    encoded int reads, string decoding and ``ClassWithId`` member loops)
+    are timed separately, their time is inclusive: string decoding time
+    includes string length reading for example.
+
+    Collector is set to ``udlg.context.ParserContext`` of build and parser
+    reports records and sections to it, builds without collector only check
+    it's not set. Collector accumulates statistics over all builds it was
+    passed to, it's not thread safe, so concurrent builds should use their
+    own collectors merged with ``merge`` afterwards.
+    """
+    #: parser sections timed
+    SECTIONS = ('read_7bit_encoded_int', 'string_decoding',
+                'class_with_id_members')
+
+    def __init__(self, timer=time.perf_counter):
+        """
+        :param callable timer: timer function
+        """
+        self.timer = timer
+        self.documents = 0
+        #: bytes consumed
+        self.size = 0
+        #: bytes read, including re-read ones
+        self.read_size = 0
+        self.reads = 0
+        self.time = 0.0
+        #: record type name: record type statistics
+        self.records = {}
+        #: section name: section statistics
+        self.sections = dict(
+            (name, {'calls': 0, 'time': 0.0}) for name in self.SECTIONS
+        )
+
+    @contextmanager
+    def instrument(self, stream):
+        """
+        collect document totals while building document from stream
+
+        :param stream: stream object
+        :rtype: collections.Iterator[InstrumentedStream]
+        :return: stream proxy to build document from
+        """
+        instrumented = InstrumentedStream(stream)
+        offset = stream.tell()
+        start = self.timer()
+        try:
+            yield instrumented
+        finally:
+            self.time += self.timer() - start
+            self.documents += 1
+            self.size += stream.tell() - offset
+            self.read_size += instrumented.size
+            self.reads += instrumented.reads
+
+    def start_record(self, stream):
+        """
+        :param stream: stream record is read from
+        :rtype: tuple
+        :return: mark to pass to ``add_record`` once record is read
+        """
+        return stream.tell(), getattr(stream, 'reads', 0), self.timer()
+
+    def add_record(self, record_type, stream, mark):
+        """
+        :param int record_type: record type
+        :param stream: stream record was read from
+        :param tuple mark: ``start_record`` result
+        :rtype: None
+        :return: None
+        """
+        elapsed = self.timer() - mark[2]
+        name = enums.RecordTypeEnum(record_type).name
+        entry = self.records.get(name)
+        if entry is None:
+            entry = self.records[name] = {
+                'count': 0, 'bytes': 0, 'time': 0.0, 'reads': 0
+            }
+        entry['count'] += 1
+        entry['bytes'] += stream.tell() - mark[0]
+        entry['reads'] += getattr(stream, 'reads', 0) - mark[1]
+        entry['time'] += elapsed
+
+    def add_section(self, name, start):
+        """
+        :param str name: section name, one of ``SECTIONS``
+        :param float start: ``timer`` value section was started at
+        :rtype: None
+        :return: None
+        """
+        section = self.sections[name]
+        section['calls'] += 1
+        section['time'] += self.timer() - start
+
+    def merge(self, other):
+        """
+        add statistics collected by other collector
+
+        :param ParseStats other: collector
+        :rtype: ParseStats
+        :return: self
+        """
+        self.documents += other.documents
+        self.size += other.size
+        self.read_size += other.read_size
+        self.reads += other.reads
+        self.time += other.time
+        for name, values in other.records.items():
+            entry = self.records.setdefault(name, dict.fromkeys(values, 0))
+            for key, value in values.items():
+                entry[key] += value
+        for name, values in other.sections.items():
+            section = self.sections.setdefault(name, dict.fromkeys(values, 0))
+            for key, value in values.items():
+                section[key] += value
+        return self
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :return: statistics
+        """
+        return {
+            'documents': self.documents,
+            'bytes': self.size,
+            'bytes_read': self.read_size,
+            'reads': self.reads,
+            'time': self.time,
+            'records': {
+                name: dict(entry, **{
+                    'time_share': entry['time'] / self.time
+                    if self.time else 0.0
+                })
+                for name, entry in self.records.items()
+            },
+            'sections': {
+                name: dict(section) for name, section in
+                self.sections.items()
+            }
+        }
+
+    def to_json(self, **kwargs):
+        """
+        :param kwargs: :func:`json.dumps` options
+        :rtype: str
+        :return: json encoded statistics
+        """
+        return json.dumps(self.to_dict(), **kwargs)
@@ -0,0 +1,495 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.storage
+    :synopsis: Documents storages: directories, zip and tar archives
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Batch tools enumerate and open documents through storage, so
+``Data/Dialogs`` tree could be processed right inside zip or tar archive
+or bundle without extracting it. Archive is opened once per storage, every
+worker should open its own storage. Document names are relative to storage
+root and use ``/`` separators.
+
+.. code-block:: python
+
+    with open_storage('Dialogs.zip') as source, \\
+            create_storage('i18n.tar.xz') as output:
+        for name in source.get_names(('.udlg', )):
+            with source.open(name) as stream:
+                document = UDLGBuilder.build(stream)
+            with output.create(name + '.txt') as stream:
+                stream.write(document.unpack_i18n())
+"""
+import io
+import os
+import time
+import struct
+from contextlib import contextmanager
+
+from .hashes import DIGEST_SIZE, digest
+
+#: archive modules are imported on demand, tools working with directories
+#: do not pay for them on every start
+
+#: tar archive extensions: write mode
+TAR_MODES = (
+    ('.tar', 'w'),
+    ('.tar.gz', 'w:gz'),
+    ('.tgz', 'w:gz'),
+    ('.tar.xz', 'w:xz'),
+    ('.tar.bz2', 'w:bz2'),
+)
+ZIP_EXTENSION = '.zip'
+
+#: bundle layout: header, index entries, document payloads. Header is
+#: magic, version, amount of documents and index size, index entry is
+#: name size, utf-8 encoded name, payload offset from bundle start,
+#: payload size and payload digest
+BUNDLE_EXTENSION = '.bundle'
+BUNDLE_MAGIC = b'UDLGBNDL'
+BUNDLE_VERSION = 1
+BUNDLE_HEADER = struct.Struct('<8sHHIQ')
+BUNDLE_ENTRY = struct.Struct('<QQ%is' % DIGEST_SIZE)
+BUNDLE_NAME_SIZE = struct.Struct('<H')
+
+
+class Storage(object):
+    """
+    Readable documents storage
+    """
+    def __init__(self, path):
+        """
+        :param str path: storage path
+        """
+        self.path = path
+
+    def get_names(self, extensions=None):
+        """
+        :param tuple extensions: document extensions, all documents if
+            nothing was given
+        :rtype: list[str]
+        :return: sorted document names
+        """
+        return sorted(
+            name for name in self._get_names()
+            if not extensions or name.endswith(extensions)
+        )
+
+    def _get_names(self):
+        raise NotImplementedError("Should be implemented in subclass")
+
+    def open(self, name):
+        """
+        :param str name: document name
+        :return: readable binary stream
+        """
+        raise NotImplementedError("Should be implemented in subclass")
+
+    def get_size(self, name):
+        """
+        :param str name: document name
+        :rtype: int
+        :return: document size, uncompressed one for archive members
+        """
+        raise NotImplementedError("Should be implemented in subclass")
+
+    def exists(self, name):
+        return name in self._get_names()
+
+    def get_path(self, name):
+        """
+        :param str name: document name
+        :rtype: str
+        :return: document path for messages and reports
+        """
+        return '/'.join((self.path.rstrip('/\\'), name))
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class DirectoryStorage(Storage):
+    def _get_names(self):
+        for root, dirs, files in os.walk(self.path):
+            relative = os.path.relpath(root, self.path)
+            for name in files:
+                if relative == os.curdir:
+                    yield name
+                else:
+                    yield '/'.join(relative.split(os.sep) + [name])
+
+    def _get_file_path(self, name):
+        return os.path.join(self.path, *name.split('/'))
+
+    def open(self, name):
+        return open(self._get_file_path(name), 'rb')
+
+    def get_size(self, name):
+        return os.path.getsize(self._get_file_path(name))
+
+    def exists(self, name):
+        return os.path.isfile(self._get_file_path(name))
+
+
+class ZipStorage(Storage):
+    def __init__(self, path):
+        import zipfile
+        super(ZipStorage, self).__init__(path)
+        self.archive = zipfile.ZipFile(path)
+        self.members = dict(
+            (info.filename, info) for info in self.archive.infolist()
+            if not info.is_dir()
+        )
+
+    def _get_names(self):
+        return self.members
+
+    def open(self, name):
+        return self.archive.open(self.members[name])
+
+    def get_size(self, name):
+        return self.members[name].file_size
+
+    def close(self):
+        self.archive.close()
+
+
+class TarStorage(Storage):
+    def __init__(self, path):
+        import tarfile
+        super(TarStorage, self).__init__(path)
+        self.archive = tarfile.open(path, 'r:*')
+        self.members = dict(
+            (member.name, member) for member in self.archive.getmembers()
+            if member.isfile()
+        )
+
+    def _get_names(self):
+        return self.members
+
+    def open(self, name):
+        return self.archive.extractfile(self.members[name])
+
+    def get_size(self, name):
+        return self.members[name].size
+
+    def close(self):
+        self.archive.close()
+
+
+class BundleStorage(Storage):
+    """
+    Single file corpus: index is read once, document payloads are served
+    from one read only memory map
+    """
+    def __init__(self, path):
+        """
+        :param str path: bundle path
+        :raises ValueError:
+            - if file is not a bundle or its version is not supported
+        """
+        import mmap
+        super(BundleStorage, self).__init__(path)
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError("`%s` is empty" % path)
+        #: name: (offset, size, digest)
+        self.members = {}
+        try:
+            self._read_index()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def _read_index(self):
+        magic, version, _, count, index_size = BUNDLE_HEADER.unpack_from(
+            self.map, 0
+        )
+        if magic != BUNDLE_MAGIC:
+            raise ValueError("`%s` is not a bundle" % self.path)
+        if version != BUNDLE_VERSION:
+            raise ValueError("Unsupported bundle version: `%i`" % version)
+        offset = BUNDLE_HEADER.size
+        for _ in range(count):
+            name_size, = BUNDLE_NAME_SIZE.unpack_from(self.map, offset)
+            offset += BUNDLE_NAME_SIZE.size
+            name = self.map[offset:offset + name_size].decode('utf-8')
+            offset += name_size
+            self.members[name] = BUNDLE_ENTRY.unpack_from(self.map, offset)
+            offset += BUNDLE_ENTRY.size
+        if offset != BUNDLE_HEADER.size + index_size:
+            raise ValueError("Bundle index size does not match its entries")
+
+    def _get_names(self):
+        return self.members
+
+    def read(self, name):
+        """
+        :param str name: document name
+        :rtype: bytes
+        :return: document content
+        """
+        offset, size, _ = self.members[name]
+        return self.map[offset:offset + size]
+
+    def open(self, name):
+        return io.BytesIO(self.read(name))
+
+    def get_size(self, name):
+        return self.members[name][1]
+
+    def get_digest(self, name):
+        """
+        :param str name: document name
+        :rtype: bytes
+        :return: document content digest stored in index
+        """
+        return self.members[name][2]
+
+    def verify(self, name):
+        """
+        :param str name: document name
+        :rtype: bool
+        :return: document content matches its digest
+        """
+        return digest(self.read(name)) == self.get_digest(name)
+
+    def close(self):
+        if not self.map.closed:
+            self.map.close()
+        self.file.close()
+
+
+class StorageWriter(object):
+    """
+    Writable documents storage
+    """
+    def __init__(self, path):
+        """
+        :param str path: storage path
+        """
+        self.path = path
+        #: document name: size
+        self.sizes = {}
+
+    @contextmanager
+    def create(self, name):
+        """
+        create document
+
+        :param str name: document name
+        :rtype: collections.Iterator
+        :return: writable binary stream
+        """
+        raise NotImplementedError("Should be implemented in subclass")
+
+    def exists(self, name):
+        return name in self.sizes
+
+    def get_size(self, name):
+        """
+        :param str name: created document name
+        :rtype: int
+        :return: document size
+        """
+        return self.sizes[name]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class DirectoryWriter(StorageWriter):
+    def _get_file_path(self, name):
+        return os.path.join(self.path, *name.split('/'))
+
+    @contextmanager
+    def create(self, name):
+        path = self._get_file_path(name)
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, 'wb') as output:
+            yield output
+        self.sizes[name] = os.path.getsize(path)
+
+    def exists(self, name):
+        return os.path.exists(self._get_file_path(name))
+
+    def get_size(self, name):
+        return os.path.getsize(self._get_file_path(name))
+
+
+class ZipWriter(StorageWriter):
+    def __init__(self, path, compression=None):
+        """
+        :param str path: archive path
+        :param int compression: zip compression method, deflate if nothing
+            was given
+        """
+        import zipfile
+        super(ZipWriter, self).__init__(path)
+        if compression is None:
+            compression = zipfile.ZIP_DEFLATED
+        self.compression = compression
+        self.archive = zipfile.ZipFile(path, 'w', compression=compression)
+
+    @contextmanager
+    def create(self, name):
+        import zipfile
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = self.compression
+        with self.archive.open(info, 'w') as output:
+            yield output
+        self.sizes[name] = self.archive.getinfo(name).file_size
+
+    def close(self):
+        self.archive.close()
+
+
+class TarWriter(StorageWriter):
+    def __init__(self, path, mode='w'):
+        """
+        :param str path: archive path
+        :param str mode: tar write mode, ``w:gz`` for example
+        """
+        import tarfile
+        super(TarWriter, self).__init__(path)
+        self.archive = tarfile.open(path, mode)
+
+    @contextmanager
+    def create(self, name):
+        #: tar member header holds size, so content is collected first
+        import tarfile
+        output = io.BytesIO()
+        yield output
+        info = tarfile.TarInfo(name)
+        info.size = output.tell()
+        info.mtime = int(time.time())
+        output.seek(0)
+        self.archive.addfile(info, output)
+        self.sizes[name] = info.size
+
+    def close(self):
+        self.archive.close()
+
+
+class BundleWriter(StorageWriter):
+    """
+    Bundle writer, payloads are spooled into temporary file until bundle
+    is closed, index is written before them
+    """
+    def __init__(self, path):
+        """
+        :param str path: bundle path
+        """
+        import tempfile
+        super(BundleWriter, self).__init__(path)
+        self.payloads = tempfile.TemporaryFile()
+        #: (name, payload offset, size, digest)
+        self.entries = []
+
+    @contextmanager
+    def create(self, name):
+        output = io.BytesIO()
+        yield output
+        content = output.getvalue()
+        self.entries.append((name, self.payloads.tell(), len(content),
+                             digest(content)))
+        self.payloads.write(content)
+        self.sizes[name] = len(content)
+
+    def close(self):
+        import shutil
+        names = [name.encode('utf-8') for name, _, _, _ in self.entries]
+        index_size = sum(
+            BUNDLE_NAME_SIZE.size + len(name) + BUNDLE_ENTRY.size
+            for name in names
+        )
+        start = BUNDLE_HEADER.size + index_size
+        with open(self.path, 'wb') as output:
+            output.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, 0,
+                                            len(names), index_size))
+            for name, (_, offset, size, value) in zip(names, self.entries):
+                output.write(BUNDLE_NAME_SIZE.pack(len(name)) + name)
+                output.write(BUNDLE_ENTRY.pack(start + offset, size, value))
+            self.payloads.seek(0)
+            shutil.copyfileobj(self.payloads, output)
+        self.payloads.close()
+
+
+def is_bundle(path):
+    """
+    :param str path: file path
+    :rtype: bool
+    :return: file is a bundle
+    """
+    with open(path, 'rb') as stream:
+        return stream.read(len(BUNDLE_MAGIC)) == BUNDLE_MAGIC
+
+
+def get_tar_mode(path):
+    """
+    :param str path: archive path
+    :rtype: str | None
+    :return: tar write mode, None if path is not tar archive one
+    """
+    for extension, mode in TAR_MODES:
+        if path.endswith(extension):
+            return mode
+    return None
+
+
+def open_storage(path):
+    """
+    :param str path: directory, zip or tar archive or bundle path
+    :rtype: Storage
+    :return: storage
+    :raises ValueError:
+        - if path is neither directory nor supported archive
+    """
+    if os.path.isdir(path):
+        return DirectoryStorage(path)
+    if os.path.isfile(path) and is_bundle(path):
+        return BundleStorage(path)
+    import tarfile
+    import zipfile
+    if zipfile.is_zipfile(path):
+        return ZipStorage(path)
+    if os.path.isfile(path) and tarfile.is_tarfile(path):
+        return TarStorage(path)
+    raise ValueError("`%s` is neither directory nor archive" % path)
+
+
+def create_storage(path):
+    """
+    :param str path: directory or archive path, archive type is chosen by
+        extension: ``.bundle``, ``.zip``, ``.tar``, ``.tar.gz``, ...
+    :rtype: StorageWriter
+    :return: writable storage
+    """
+    if path.endswith(BUNDLE_EXTENSION):
+        return BundleWriter(path)
+    if path.endswith(ZIP_EXTENSION):
+        return ZipWriter(path)
+    mode = get_tar_mode(path)
+    if mode is not None:
+        return TarWriter(path, mode)
+    return DirectoryWriter(path)
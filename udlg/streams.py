@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.streams
+    :synopsis: Forward only stream layer
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Parser needs one byte look ahead (record type peeks) and stream offsets
+(statistics, hashes), pipes, sockets, stdin and decompression streams give
+neither. ``PeekableStream`` reads underlying stream forward in chunks and
+serves peeks, offsets and short relative seeks from its own buffer, so
+underlying stream is never seeked:
+
+.. code-block:: python
+
+    with open_input('-') as stream:
+        document = UDLGBuilder.build(stream)
+"""
+import io
+import sys
+from contextlib import contextmanager
+
+#: path standing for stdin or stdout
+STDIO = '-'
+CHUNK_SIZE = 64 * 1024
+
+
+class PeekableStream(object):
+    """
+    Buffered forward only stream proxy with ``peek`` and ``tell`` support
+    """
+    #: proxies of this stream (statistics, hashes) delegate it as well
+    peekable = True
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        """
+        :param stream: readable binary stream object
+        :param int chunk_size: amount of bytes read from stream at once
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._buffer = b''
+        self._offset = 0
+        try:
+            self._position = stream.tell()
+        except (AttributeError, OSError):
+            #: pipes and sockets have no offsets
+            self._position = 0
+
+    def _fill(self, size):
+        """
+        make at least ``size`` bytes available in buffer unless stream
+        ends before, consumed bytes are dropped from buffer
+
+        :param int size: amount of bytes
+        :rtype: None
+        :return: None
+        """
+        parts = [self._buffer[self._offset:]]
+        available = len(parts[0])
+        while available < size:
+            chunk = self.stream.read(max(self.chunk_size, size - available))
+            if not chunk:
+                break
+            parts.append(chunk)
+            available += len(chunk)
+        self._buffer = b''.join(parts)
+        self._offset = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._buffer[self._offset:] + self.stream.read()
+            self._buffer, self._offset = b'', 0
+            self._position += len(data)
+            return data
+        end = self._offset + size
+        if end > len(self._buffer):
+            self._fill(size)
+            end = size
+        data = self._buffer[self._offset:end]
+        self._offset += len(data)
+        self._position += len(data)
+        return data
+
+    def peek(self, size=1):
+        """
+        :param int size: amount of bytes
+        :rtype: bytes
+        :return: next bytes without consuming them, shorter than ``size``
+            only at the end of stream
+        """
+        if self._offset + size > len(self._buffer):
+            self._fill(size)
+        return self._buffer[self._offset:self._offset + size]
+
+    def tell(self):
+        """
+        :rtype: int
+        :return: amount of consumed bytes, starting with underlying stream
+            offset if it had one
+        """
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """
+        move inside buffered bytes, consumed bytes of the current chunk could
+        be read again, underlying stream is never seeked
+
+        :param int offset: offset
+        :param int whence: ``io.SEEK_SET`` or ``io.SEEK_CUR``
+        :rtype: int
+        :return: new position
+        :raises io.UnsupportedOperation:
+            - if position is out of buffered bytes
+        """
+        if whence == io.SEEK_SET:
+            offset -= self._position
+        elif whence != io.SEEK_CUR:
+            raise io.UnsupportedOperation("Could not seek from stream end")
+        if offset > 0:
+            self.read(offset)
+        elif offset < 0:
+            if self._offset + offset < 0:
+                raise io.UnsupportedOperation(
+                    "Could not seek %i bytes back, only %i are buffered" % (
+                        -offset, self._offset
+                    )
+                )
+            self._offset += offset
+            self._position += offset
+        return self._position
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def make_peekable(stream, chunk_size=CHUNK_SIZE):
+    """
+    :param stream: readable binary stream object
+    :param int chunk_size: amount of bytes read from stream at once
+    :rtype: PeekableStream
+    :return: forward only stream proxy, stream itself if it is one already
+        or proxies one
+    """
+    if getattr(stream, 'peekable', False):
+        return stream
+    return PeekableStream(stream, chunk_size=chunk_size)
+
+
+@contextmanager
+def open_input(path):
+    """
+    open file for binary reading, ``-`` stands for stdin which stays open
+
+    :param str path: file path or ``-``
+    :rtype: collections.Iterator
+    :return: binary stream
+    """
+    if path == STDIO:
+        yield sys.stdin.buffer
+        return
+    with open(path, 'rb') as stream:
+        yield stream
+
+
+@contextmanager
+def open_output(path, binary=True):
+    """
+    open file for writing, ``-`` stands for stdout which stays open
+
+    :param str path: file path or ``-``
+    :param bool binary: open in binary mode
+    :rtype: collections.Iterator
+    :return: stream
+    """
+    if path == STDIO:
+        stream = sys.stdout.buffer if binary else sys.stdout
+        try:
+            yield stream
+        finally:
+            stream.flush()
+        return
+    with open(path, 'wb' if binary else 'w') as stream:
+        yield stream
@@ -9,6 +9,7 @@
 from struct import unpack, pack, calcsize
 from ctypes import Structure, cast, pointer, c_void_p, _SimpleCData, _Pointer
 from .constants import PrimitiveTypeConversionSet
+from .views import SequenceView
 
 
 class SimpleSerializerMixin(object):
@@ -19,12 +20,12 @@ class SimpleSerializerMixin(object):
         document = {}
         for field_name, field_type in self._fields_:
             entry = getattr(self, field_name.replace('_ptr', ''))
-            if isinstance(entry, list):
+            if isinstance(entry, (list, SequenceView)):
                 value = [
-                    x.to_dict() if hasattr(x, 'to_dict') else str(x) for x in entry
+                    x.to_dict() if hasattr(x, 'to_dict') else x for x in entry
                 ]
             else:
-                value = entry.to_dict() if hasattr(entry, 'to_dict') else str(entry)
+                value = entry.to_dict() if hasattr(entry, 'to_dict') else entry
             document.update({
                 field_name.replace('_ptr', ''): value
             })
@@ -57,7 +58,7 @@ class SimpleSerializerMixin(object):
             entry = getattr(self, field_name.replace('_ptr', ''))
             if hasattr(entry, 'to_bin'):
                 extend(entry.to_bin())
-            elif isinstance(entry, list):
+            elif isinstance(entry, (list, SequenceView)):
                 for idx, item in enumerate(entry):
                     if hasattr(item, 'to_bin'):
                         extend(item.to_bin())
@@ -91,7 +92,7 @@ class BinaryRecordStructure(SimpleSerializerMixin, Structure):
     def get_void_ptr(self):
         return cast(pointer(self), c_void_p)
 
-    def _initiate(self, stream):
+    def _initiate(self, stream, context=None):
         """
         initiate instance fields (construct) from stream
 
@@ -101,14 +102,18 @@ class BinaryRecordStructure(SimpleSerializerMixin, Structure):
             as Serialization Header
 
         :param stream: stream object, file stream for example
+        :param udlg.context.ParserContext context: parse state, records
+            use their own one
         :rtype: None
         :return: None
         """
+        if context is None:
+            context = getattr(self, '_context', None)
         for field_name, field_type in self._fields_:
             if issubclass(field_type, self.__class__) or hasattr(field_type,
                                                                  '_initiate'):
                 instance = field_type()
-                instance._initiate(stream)
+                instance._initiate(stream, context=context)
                 setattr(self, field_name, instance)
             elif issubclass(field_type, _SimpleCData):
                 field_format = field_type._type_
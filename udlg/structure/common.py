@@ -22,6 +22,7 @@ from .constants import (
     UINT32_SIZE, BYTE_SIZE, INT32_SIZE
 )
 from . import modules
+from .views import SequenceView
 from .. utils import read_7bit_encoded_int_from_stream, write_7bit_int
 from .. import enums
 
@@ -29,14 +30,14 @@ from .. import enums
 class LengthPrefixedString(BinaryRecordStructure):
     _fields_ = [
         ('size', ctypes.c_uint32),
-        ('value', ctypes.c_wchar_p)
+        ('value', ctypes.c_char_p)
     ]
 
     def to_bin(self):
         document = bytearray()
         size_string = write_7bit_int(self.size)
         document.extend(pack('%is' % len(size_string), size_string))
-        document.extend(pack('%is' % self.size, self.value.encode('utf-8')))
+        document.extend(pack('%is' % self.size, self.value))
         return document
 
     def set(self, value):
@@ -48,14 +49,11 @@ class LengthPrefixedString(BinaryRecordStructure):
             self.size = len(value)
 
     def __repr__(self):
-        if self.value:
-            return "'%s'" % self.value
-        return repr(self)
+        return "'%s'" % self
 
     def __str__(self):
-        if self.value:
-            return self.value
-        return '<LengthPrefixedString at 0x%16x>' % id(self)
+        #: NULL pointer for empty string
+        return self.value.decode('utf-8') if self.value else ''
 
     def __eq__(self, other):
         return self.value == other
@@ -78,7 +76,7 @@ class LengthPrefixedString(BinaryRecordStructure):
     def __ne__(self, other):
         return self.value != other
 
-    def _initiate(self, stream):
+    def _initiate(self, stream, context=None):
         """
         initiate instance fields (construct) from stream
 
@@ -88,12 +86,20 @@ class LengthPrefixedString(BinaryRecordStructure):
             as Serialization Header
 
         :param stream: stream object, file stream for example
+        :param udlg.context.ParserContext context: parse state
         :rtype: None
         :return: None
         """
+        stats = None if context is None else context.stats
+        if stats is not None:
+            start = stats.timer()
         size = read_7bit_encoded_int_from_stream(stream=stream)
+        if stats is not None:
+            stats.add_section('read_7bit_encoded_int', start)
         self.size = size
-        self.value = ctypes.c_wchar_p(stream.read(size).decode('utf-8'))
+        self.value = ctypes.c_char_p(stream.read(size))
+        if stats is not None:
+            stats.add_section('string_decoding', start)
 
 
 class PrimitiveValue(ctypes.Structure):
@@ -154,21 +160,33 @@ class ClassInfo(BinaryRecordStructure):
     def members_names(self):
         return self.get_members_names()
 
-    def get_members_names(self):
-        if not hasattr(self, '_members_names'):
-            self._members_names = self.members_names_ptr[:self.members_count]
-        return self._members_names
+    def get_members_names(self, cache=False):
+        """
+        get members names view, names are resolved on access
+
+        :param bool cache: cache names as python list
+        :rtype: udlg.structure.views.SequenceView | list
+        :return: members names
+        """
+        if cache or hasattr(self, '_members_names'):
+            if not hasattr(self, '_members_names'):
+                self._members_names = self.members_names_ptr[
+                    :self.members_count
+                ]
+            return self._members_names
+        names = self.members_names_ptr
+        return SequenceView(self.members_count, names.__getitem__)
 
-    def _initiate(self, stream):
+    def _initiate(self, stream, context=None):
         self.object_id, = unpack('i', stream.read(INT32_SIZE))
         self.name = LengthPrefixedString()
-        self.name._initiate(stream)
+        self.name._initiate(stream, context)
         self.members_count, = unpack('I', stream.read(UINT32_SIZE))
         member_names = []
         append = member_names.append
         for i in range(self.members_count):
             member = LengthPrefixedString()
-            member._initiate(stream)
+            member._initiate(stream, context)
             append(member)
         names = (LengthPrefixedString * len(member_names))(*member_names)
         self.members_names_ptr = names
@@ -297,13 +315,14 @@ class MemberTypeInfo(BinaryRecordStructure):
             ]
         }
 
-    def _initiate(self, stream, amount=0):
+    def _initiate(self, stream, amount=0, context=None):
         """
         initiate member type info information
 
         :param stream: stream like object, file stream for example
         :param amount: amount of members should read from stream (this
             amount could be taken from ClassInfo instance)
+        :param udlg.context.ParserContext context: parse state
         :rtype: None
         :return: None
         """
@@ -332,13 +351,13 @@ class MemberTypeInfo(BinaryRecordStructure):
                     type=enums.AdditionalInfoTypeEnum.ClassTypeInfo
                 )
                 entry = ClassTypeInfo()
-                entry._initiate(stream)
+                entry._initiate(stream, context)
             elif bin_type == enums.BinaryTypeEnum.SystemClass:
                 additional_info = AdditionalInfo(
                     type=enums.AdditionalInfoTypeEnum.LengthPrefixedString
                 )
                 entry = LengthPrefixedString()
-                entry._initiate(stream)
+                entry._initiate(stream, context)
             else:
                 additional_info = AdditionalInfo(
                     type=enums.AdditionalInfoTypeEnum.Null
@@ -375,28 +394,49 @@ class MemberEntry(ctypes.Structure):
             #: conversion process
             binary_type = self.binary_type
             record_type = self.record_type
-            if binary_type in (enums.BinaryTypeEnum.PrimitiveArray,
-                               enums.BinaryTypeEnum.Primitive):
-                member_type = PrimitiveTypeCTypesConversionSet[
-                    self.primitive_type
-                ]
-                self._member = cast(
-                    self.member_ptr, POINTER(member_type * 1)
-                ).contents[0]
-            elif record_type:
+            #: primitive array members are stored as records
+            if record_type:
                 record_class = getattr(
-                    modules.RECORDS_MODULE,
+                    modules.get_records_module(),
                     enums.RecordTypeEnum(record_type).name
                 )
                 self._member = cast(
                     self.member_ptr, POINTER(record_class)
                 ).contents
+            elif binary_type in (enums.BinaryTypeEnum.PrimitiveArray,
+                                 enums.BinaryTypeEnum.Primitive):
+                member_type = PrimitiveTypeCTypesConversionSet[
+                    self.primitive_type
+                ]
+                self._member = cast(
+                    self.member_ptr, POINTER(member_type * 1)
+                ).contents[0]
             else:
                 raise NotImplementedError(
                     "Not implemented yet or wrong type"
                 )
         return self._member
 
+    def set(self, value):
+        """
+        set primitive member value
+
+        :param value: value to store
+        :rtype: None
+        :return: None
+        :raises TypeError:
+            - if member is record, not primitive value
+        """
+        if self.record_type:
+            raise TypeError(
+                "Member is `%s` record, only primitive values could be set" %
+                enums.RecordTypeEnum(self.record_type).name
+            )
+        member_type = PrimitiveTypeCTypesConversionSet[self.primitive_type]
+        cast(self.member_ptr, POINTER(member_type * 1)).contents[0] = value
+        if hasattr(self, '_member'):
+            self._member = value
+
 
 #: not used
 class Members(ctypes.Structure):
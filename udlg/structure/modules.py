@@ -7,7 +7,14 @@
 .. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
 """
 
-import importlib
-from .constants import RECORDS_MODULE_PATH
 
-RECORDS_MODULE = importlib.import_module(RECORDS_MODULE_PATH)
+def get_records_module():
+    """
+    records module refers to common structures, so it's resolved on first
+    use instead of import time
+
+    :rtype: module
+    :return: ``udlg.structure.records`` module
+    """
+    from . import records
+    return records
@@ -48,6 +48,7 @@ from .utils import (
     read_record_type,
     read_primitive_type_from_stream,
     make_primitive_type_elements_array_pointer)
+from .views import SequenceView
 from .. import enums
 
 
@@ -76,7 +77,7 @@ class BinaryObjectString(BinaryRecordStructure):
         self.value.set(value)
 
     def __str__(self):
-        return "'%s'" % (self.value.value or '')
+        return "'%s'" % self.value
 
     def __repr__(self):
         return str(self.__str__())
@@ -121,10 +122,11 @@ class SystemClassWithMembersAndTypes(BinaryRecordStructure):
     def _initiate(self, stream):
         self.record_type, = unpack('b', stream.read(BYTE_SIZE))
         self.class_info = ClassInfo()
-        self.class_info._initiate(stream)
+        self.class_info._initiate(stream, self._context)
         members_count = self.class_info.members_count
         self.member_type_info = MemberTypeInfo()
-        self.member_type_info._initiate(stream, amount=members_count)
+        self.member_type_info._initiate(stream, amount=members_count,
+                                        context=self._context)
         self._initiate_members_data(stream)
 
     def _initiate_members_data(self, stream):
@@ -190,19 +192,34 @@ class SystemClassWithMembersAndTypes(BinaryRecordStructure):
         )
         return member_entry
 
-    def get_member_list(self):
+    def get_member_list(self, cache=False):
         """
-        extracts members data and convert it into python list one
+        get members view, members are resolved on access
 
-        :rtype: list
+        :param bool cache: resolve all members and cache them as python list
+        :rtype: udlg.structure.views.SequenceView | list
         :return: member list
         """
-        if not hasattr(self, '_members'):
-            self._members = []
-            append = self._members.append
-            for i in range(self.class_info.members_count):
-                append(self.members_ptr[i].member)
-        return self._members
+        if cache or hasattr(self, '_members'):
+            if not hasattr(self, '_members'):
+                self._members = list(self.get_member_list())
+            return self._members
+        member_entries = self.members_ptr
+        return SequenceView(self.class_info.members_count,
+                            lambda idx: member_entries[idx].member)
+
+    def set_member(self, idx, value):
+        """
+        set primitive member value
+
+        :param int idx: member index
+        :param value: value to store
+        :rtype: None
+        :return: None
+        """
+        self.members_ptr[idx].set(value)
+        if hasattr(self, '_members'):
+            self._members[idx] = value
 
     @property
     def member_list(self):
@@ -259,17 +276,50 @@ class ArraySinglePrimitive(BinaryRecordStructure):
             ).contents
         return self._ctype_elements
 
-    def get_member_list(self):
+    def get_member_list(self, cache=False):
         """
-        get member list in python format
+        get members view, elements are converted on access
 
-        :rtype: list
+        :param bool cache: convert all elements and cache them as python list
+        :rtype: udlg.structure.views.SequenceView | list
         :return: member list
         """
-        if not hasattr(self, '_members'):
-            elements = self.get_ctype_member_elements()
-            self._members = elements[:]
-        return self._members
+        elements = self.get_ctype_member_elements()
+        if cache or hasattr(self, '_members'):
+            if not hasattr(self, '_members'):
+                self._members = elements[:]
+            return self._members
+        return SequenceView(len(elements), elements.__getitem__)
+
+    def set_member(self, idx, value):
+        """
+        set member value
+
+        :param int idx: member index
+        :param value: value to store
+        :rtype: None
+        :return: None
+        """
+        self.get_ctype_member_elements()[idx] = value
+        if hasattr(self, '_members'):
+            self._members[idx] = value
+
+    @property
+    def members(self):
+        return self.get_member_list()
+
+    def to_bin(self):
+        document = bytearray()
+        extend = document.extend
+        extend(pack('b', self.record_type))
+        extend(self.array_info.to_bin())
+        extend(pack('b', self.primitive_type))
+        length = self.array_info.length
+        extend(pack(
+            '%i%s' % (length, PrimitiveTypeConversionSet[self.primitive_type]),
+            *self.get_ctype_member_elements()[:length]
+        ))
+        return document
 
 
 class ArraySingleObject(BinaryRecordStructure):
@@ -291,29 +341,43 @@ class BinaryLibrary(BinaryRecordStructure):
 
 
 class ClassWithMembersMixin(object):
-    def get_member_list(self, class_info=None):
+    def get_member_list(self, class_info=None, cache=False):
         """
-        get member python list
+        get members view, members are resolved on access
 
         :param udlg.structure.common.ClassInfo class_info: class info object
-        :rtype: list
+        :param bool cache: resolve all members and cache them as python list
+        :rtype: udlg.structure.views.SequenceView | list
         :return: member list
         """
+        if cache or hasattr(self, '_members'):
+            if not hasattr(self, '_members'):
+                self._members = list(
+                    self.get_member_list(class_info=class_info)
+                )
+            return self._members
         class_info = class_info or getattr(self, 'class_info', None)
-        if not hasattr(self, '_members'):
-            self._members = []
-            append = self._members.append
-            member_entries = cast(
-                self.members_ptr, POINTER(MemberEntry)
-            )
-            for i in range(class_info.members_count):
-                append(member_entries[i].member)
-        return self._members
+        member_entries = cast(self.members_ptr, POINTER(MemberEntry))
+        return SequenceView(class_info.members_count,
+                            lambda idx: member_entries[idx].member)
 
     @property
     def member_list(self):
         return self.get_member_list()
 
+    def set_member(self, idx, value):
+        """
+        set primitive member value
+
+        :param int idx: member index
+        :param value: value to store
+        :rtype: None
+        :return: None
+        """
+        self.members_ptr[idx].set(value)
+        if hasattr(self, '_members'):
+            self._members[idx] = value
+
     def _initiate_members(self, stream, class_reference=None):
         """
         initiate members
@@ -357,12 +421,9 @@ class ClassWithMembersMixin(object):
                     enums.RecordTypeEnum(record_type).name
                 ]
                 member_record = member_record_class()
-                self._update_object_id_map(member_record)
-                #: store reference link to reference map
-                if isinstance(member_record, MemberReference):
-                    self._update_object_id_map(member_record)
-                member_record._object_id_map = self._object_id_map
+                member_record._context = self._context
                 member_record._initiate(stream)
+                self._context.register(member_record)
                 member_entry = MemberEntry(
                     binary_type=binary_type, primitive_type=0,
                     record_type=record_type,
@@ -372,28 +433,6 @@ class ClassWithMembersMixin(object):
         members_array = (MemberEntry * members_count)(*members)
         self.members_ptr = members_array
 
-    def _update_object_id_map(self, entry):
-        """
-        update object id map with new reference entry
-
-        :param int id_ref: id reference
-        :param udlg.structure.records.MemberReference entry:
-            record member reference entry
-        :rtype: None
-        :return: None
-        """
-        if isinstance(entry, (ClassWithMembersAndTypes,
-                              ClassWithMembers,
-                              SystemClassWithMembersAndTypes,
-                              SystemClassWithMembers)):
-            object_id = entry.class_info.object_id
-        elif isinstance(entry, (BinaryObjectString, BinaryArray)):
-            object_id = entry.object_id
-        else:
-            return
-        self._object_id_map[object_id] = (entry.record_type,
-                                          entry.get_void_ptr())
-
     @property
     def members(self):
         return self.get_member_list()
@@ -412,15 +451,16 @@ class ClassWithMembersAndTypes(ClassWithMembersMixin,
     def _initiate(self, stream):
         self.record_type, = unpack('b', stream.read(BYTE_SIZE))
         self.class_info = ClassInfo()
-        self.class_info._initiate(stream)
+        self.class_info._initiate(stream, self._context)
         self.member_type_info = MemberTypeInfo()
         self.member_type_info._initiate(
-            stream, amount=self.class_info.members_count
+            stream, amount=self.class_info.members_count,
+            context=self._context
         )
         self.library_id, = unpack('I', stream.read(UINT32_SIZE))
 
-        #: update references
-        self._update_object_id_map(entry=self)
+        #: nested members could refer to class with ``ClassWithId``
+        self._context.register(self)
         self._initiate_members(stream)
 
 
@@ -496,16 +536,34 @@ class BinaryArray(BinaryRecordStructure):
             additional_type_info.value_ptr = value_ptr
         elif self.type == enums.BinaryTypeEnum.SystemClass:
             value = LengthPrefixedString()
-            value._initiate(stream)
+            value._initiate(stream, self._context)
             additional_type_info.value_ptr = value.get_void_ptr()
         elif self.type == enums.BinaryTypeEnum.Class:
             value = ClassTypeInfo()
-            value._initiate(stream)
+            value._initiate(stream, self._context)
             additional_type_info.value_ptr = value.get_void_ptr()
         else:
             raise TypeError("Wrong binary array type: %i" % self.type)
         self.additional_type_info = additional_type_info
 
+    def to_dict(self):
+        additional_type_info = self.additional_type_info.value
+        if hasattr(additional_type_info, 'to_dict'):
+            additional_type_info = additional_type_info.to_dict()
+        lower_bounds = []
+        if self.binary_type in enums.BinaryArrayTypeEnum.get_lower_bounds():
+            lower_bounds = self.lower_bounds[:self.rank]
+        return {
+            'record_type': self.record_type,
+            'object_id': self.object_id,
+            'binary_type': self.binary_type,
+            'rank': self.rank,
+            'lengths': self.lengths[:self.rank],
+            'lower_bounds': lower_bounds,
+            'type': self.type,
+            'additional_type_info': additional_type_info
+        }
+
     def to_bin(self):
         #: todo: my god that's ugly the all method
         contents = bytearray()
@@ -582,24 +640,31 @@ class ClassWithId(ClassWithMembersMixin,
     def class_reference(self):
         return self.get_class_reference()
 
-    def get_member_list(self, class_info=None):
-        if class_info is None:
+    def get_member_list(self, class_info=None, cache=False):
+        if class_info is None and not hasattr(self, '_members'):
             class_reference = self.get_class_reference()
             class_info = class_reference.class_info
-        return super(ClassWithId, self).get_member_list(class_info=class_info)
+        return super(ClassWithId, self).get_member_list(
+            class_info=class_info, cache=cache
+        )
 
     def _initiate(self, stream):
         self.record_type, = unpack('b', stream.read(BYTE_SIZE))
         object_id, metadata_id = unpack('2i', stream.read(INT32_SIZE * 2))
         self.object_id, self.metadata_id = object_id, metadata_id
-        class_record_type, class_ptr = self._object_id_map[self.metadata_id]
+        class_record_type, class_ptr = self._context.resolve(self.metadata_id)
         class_entry = globals()[
             enums.RecordTypeEnum(class_record_type).name
         ]
         class_reference = cast(class_ptr, POINTER(class_entry)).contents
+        stats = self._context.stats
+        if stats is not None:
+            start = stats.timer()
         self._initiate_members(
             stream, class_reference=class_reference
         )
+        if stats is not None:
+            stats.add_section('class_with_id_members', start)
         self.class_reference_type = class_record_type
         self.class_reference_ptr = class_reference.get_void_ptr()
 
@@ -19,13 +19,11 @@ from .constants import (
 )
 from .base import SimpleSerializerMixin
 from . import records, mixins
+from .views import SequenceView
 from . utils import read_record_type
 from .. import enums
 from .. utils.i18n import get_i18n_items
 
-import logging
-logger = logging.getLogger('udlg')
-
 SAFE_SIZES = [
     c_uint64, c_byte, c_uint32
 ]
@@ -111,7 +109,7 @@ class Record(SimpleSerializerMixin, ctypes.Structure):
         :rtype: ctypes.Structure
         :return: one of valid .net binary data structure instances
         """
-        if not hasattr(self, '_entry'):
+        if getattr(self, '_entry', None) is None:
             record_type = self.record_type
             RecordType = enums.RecordTypeEnum
             class_name = RecordType(record_type).name
@@ -120,7 +118,7 @@ class Record(SimpleSerializerMixin, ctypes.Structure):
             self._entry = cast(self.entry_ptr, pointer_type).contents
         return self._entry
 
-    def _initiate(self, stream, object_id_map):
+    def _initiate(self, stream, context):
         """
         initiate instance fields (construct) from stream
 
@@ -130,44 +128,30 @@ class Record(SimpleSerializerMixin, ctypes.Structure):
             as Serialization Header
 
         :param stream: stream object, file stream for example
+        :param udlg.context.ParserContext context: parse state
         :rtype: None
         :return: None
         """
+        stats = context.stats
+        if stats is not None:
+            mark = stats.start_record(stream)
         self.record_type = read_record_type(stream)
         record_class_name = enums.RecordTypeEnum(self.record_type).name
-        record_entry_class = getattr(records, record_class_name)
+        record_entry_class = getattr(records, record_class_name, None)
+        if record_entry_class is None:
+            raise NotImplementedError(
+                "Record type %s is not supported" % record_class_name
+            )
         record_entry = record_entry_class()
-        record_entry._object_id_map = object_id_map
+        record_entry._context = context
         record_entry._initiate(stream)
-
-        #: todo make it fixed
-        self._update_object_id_map(record_entry, object_id_map)
+        context.register(record_entry)
 
         entry_void_ptr = record_entry.get_void_ptr()
         self.entry_ptr = entry_void_ptr
-
-    def _update_object_id_map(self, entry, object_id_map):
-        """
-
-        :param entry:
-        :return:
-        """
-        #: todo something that should be reassemble
-        if isinstance(entry, (records.ClassWithMembersAndTypes,
-                              records.SystemClassWithMembersAndTypes)):
-            object_id_map.update({
-                entry.class_info.object_id: (
-                    entry.record_type,
-                    entry.get_void_ptr()
-                )
-            })
-        elif isinstance(entry, (records.BinaryArray,
-                                records.BinaryObjectString)):
-            object_id_map.update({
-                entry.object_id: (entry.record_type, entry.get_void_ptr())
-            })
-        else:
-            pass
+        self._entry = record_entry
+        if stats is not None:
+            stats.add_record(self.record_type, stream, mark)
 
 
 class UDLGHeader(SimpleSerializerMixin, ctypes.Structure):
@@ -181,6 +165,11 @@ class UDLGHeader(SimpleSerializerMixin, ctypes.Structure):
         document.extend(data)
         return document
 
+    def to_dict(self):
+        return {
+            'signature': self.signature[:SIGNATURE_SIZE]
+        }
+
 
 class BinaryDataStructureFile(SimpleSerializerMixin, ctypes.Structure):
     _fields_ = [
@@ -197,7 +186,14 @@ class BinaryDataStructureFile(SimpleSerializerMixin, ctypes.Structure):
         return self.get_record_list()
 
     def get_record_list(self):
-        return self.records_ptr[:self.count]
+        """
+        get records view, records are resolved on access so indexing
+        costs the same for any document size
+
+        :rtype: udlg.structure.views.SequenceView
+        :return: records
+        """
+        return SequenceView(self.count, self.records_ptr.__getitem__)
 
 
 class UDLGFile(SimpleSerializerMixin, ctypes.Structure):
@@ -242,24 +238,86 @@ class UDLGFile(SimpleSerializerMixin, ctypes.Structure):
         load i18n file
 
         :param bytes block: block to process
-        :rtype: None
-        :return: None
+        :rtype: int
+        :return: amount of changed strings
         """
-        #: todo fix it
-        #: super dirty hack overwise set data would wipe/vanish/free
-        self._cache = []
-        cache_append = self._cache.append
-
+        changed = 0
         for record_id, record in get_i18n_items(block).items():
             for member_id, locale in record.items():
-                entry = self.data.records[record_id].members[member_id]
-                if not isinstance(entry, records.BinaryObjectString):
-                    logger.warning(
+                try:
+                    changed += self.set_string(record_id, member_id,
+                                               locale.encode('utf-8'))
+                except TypeError:
+                    #: logging is imported on demand, it costs as much as
+                    #: the whole parser to import
+                    import logging
+                    logging.getLogger('udlg').warning(
                         "Entry with id: (%i, %i) skipped, as original "
                         "file has no proper content type with it",
                         record_id, member_id
                     )
-                    continue
-                entry.set(locale)
-                #: prevent LengthPrefixedString from freeing
-                cache_append(entry.value)
+        return changed
+
+    def set_string(self, record_id, member_id, value):
+        """
+        set record member string, source value is kept for ``reset_i18n``
+
+        :param int record_id: record index
+        :param int member_id: member index
+        :param bytes value: utf-8 encoded string
+        :rtype: bool
+        :return: True if string was changed
+        :raises TypeError:
+            - if member is not a string
+        :raises IndexError:
+            - if there's no such record or member
+        """
+        #: todo fix it
+        #: super dirty hack overwise set data would wipe/vanish/free,
+        #: strings set by previous loads should stay alive too, one per
+        #: (record id, member id) as new value replaces the previous one
+        if not hasattr(self, '_cache'):
+            self._cache = {}
+            #: (record id, member id): source value, for ``reset_i18n``
+            self._originals = {}
+        entry = self.data.records[record_id].members[member_id]
+        if not isinstance(entry, records.BinaryObjectString):
+            raise TypeError("Entry with id: (%i, %i) is not a string" % (
+                record_id, member_id
+            ))
+        if entry.value.value == value:
+            return False
+        self._originals.setdefault((record_id, member_id), entry.value.value)
+        entry.set(value)
+        #: prevent LengthPrefixedString from freeing
+        self._cache[record_id, member_id] = entry.value
+        return True
+
+    def get_source_string(self, record_id, member_id, default=None):
+        """
+        :param int record_id: record index
+        :param int member_id: member index
+        :param bytes default: value returned for unchanged string
+        :rtype: bytes
+        :return: string value before ``set_string`` calls
+        """
+        return getattr(self, '_originals', {}).get((record_id, member_id),
+                                                   default)
+
+    def reset_i18n(self):
+        """
+        restore strings changed by ``load_i18n`` calls to their source
+        values, so document could be translated again from scratch
+
+        :rtype: int
+        :return: amount of restored strings
+        """
+        if not hasattr(self, '_cache'):
+            return 0
+        for (record_id, member_id), value in self._originals.items():
+            entry = self.data.records[record_id].members[member_id]
+            entry.set(value)
+            self._cache[record_id, member_id] = entry.value
+        restored = len(self._originals)
+        self._originals.clear()
+        return restored
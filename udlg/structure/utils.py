@@ -19,14 +19,21 @@ def read_record_type(stream, seek_back=True):
     reads record type
 
     :param stream: stream object, file for example
-    :param bool seek_back: seek backwards after read block, True by default
-        if False no any seek operation
+    :param bool seek_back: leave record type byte unconsumed, True by
+        default, streams with ``peek`` (``udlg.streams.PeekableStream``)
+        are peeked, other ones are seeked backwards after read
     :rtype: udlg.structure.constants.RecordTypeEnum
     :return: record type
     """
+    if not seek_back:
+        record_type, = unpack('b', stream.read(BYTE_SIZE))
+        return record_type
+    peek = getattr(stream, 'peek', None)
+    if peek is not None:
+        record_type, = unpack('b', peek(BYTE_SIZE)[:BYTE_SIZE])
+        return record_type
     record_type, = unpack('b', stream.read(BYTE_SIZE))
-    if seek_back:
-        stream.seek(-1, 1)
+    stream.seek(-1, 1)
     return record_type
 
 
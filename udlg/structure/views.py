@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.structure.views
+    :synopsis: Lazy sequence views over ctypes arrays
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+from collections.abc import Sequence
+
+
+class SequenceView(Sequence):
+    """
+    Read only sequence view, items are resolved with getter only when they
+    are indexed or iterated over, nothing is cached.
+
+    Slicing returns python list of resolved items, views are compared with
+    lists, tuples and other views by items.
+    """
+    __slots__ = ('_length', '_getter')
+
+    def __init__(self, length, getter):
+        """
+        :param int length: amount of items
+        :param callable getter: called with item index, returns item
+        """
+        self._length = length
+        self._getter = getter
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            getter = self._getter
+            return [getter(i) for i in range(*idx.indices(self._length))]
+        if idx < 0:
+            idx += self._length
+        if not 0 <= idx < self._length:
+            raise IndexError("Index out of range")
+        return self._getter(idx)
+
+    def __iter__(self):
+        getter = self._getter
+        for idx in range(self._length):
+            yield getter(idx)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, tuple, SequenceView)):
+            return NotImplemented
+        return len(self) == len(other) and list(self) == list(other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
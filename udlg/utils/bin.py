@@ -10,7 +10,9 @@ from struct import unpack
 from collections import deque
 from functools import partial
 
-from ..structure.constants import BYTE_SIZE
+#: same as ``udlg.structure.constants.BYTE_SIZE``, structure package is not
+#: imported here as it imports this module itself
+BYTE_SIZE = 1
 
 
 def search(sequence, stream, stream_offset=0x0):
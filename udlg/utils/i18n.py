@@ -7,13 +7,24 @@
 .. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
 """
 from collections import defaultdict
-import re
 
-FLAGS = re.S | re.M | re.I | re.U
-I18N_REG = re.compile(
-    r"(?P<record_id>\d+),(?P<member_id>\d+)=>(?P<content>(?:''|'.+?'))$",
-    FLAGS
+I18N_PATTERN = (
+    r"(?P<record_id>\d+),(?P<member_id>\d+)=>(?P<content>(?:''|'.+?'))$"
 )
+#: compiled on first use, importing ``re`` costs more than parser itself
+_i18n_regex = None
+
+
+def get_i18n_regex():
+    """
+    :rtype: re.Pattern
+    :return: compiled i18n line pattern
+    """
+    global _i18n_regex
+    if _i18n_regex is None:
+        import re
+        _i18n_regex = re.compile(I18N_PATTERN, re.S | re.M | re.I | re.U)
+    return _i18n_regex
 
 
 def get_i18n_items(block):
@@ -25,7 +36,7 @@ def get_i18n_items(block):
     :return: i18n items
     """
     storage = defaultdict(dict)
-    items = re.findall(I18N_REG, block.decode('utf-8'))
+    items = get_i18n_regex().findall(block.decode('utf-8'))
     for (record_idx, member_idx, message) in items:
         storage[int(record_idx)][int(member_idx)] = (
             message[1:-1]
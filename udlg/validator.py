@@ -0,0 +1,536 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.validator
+    :synopsis: Structural validator walking record grammar without parsing
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Validator walks records with length arithmetic over raw bytes only, no
+structures are created, so documents are checked much faster than they are
+built. It accepts the same record grammar builders do and checks:
+
+- 7 bit encoded string lengths bounds and data left for every field,
+- record, binary and primitive types validity,
+- ``ClassWithId`` metadata and ``BinaryLibrary`` references,
+- ``MemberReference`` targets (forward references are resolved at the end),
+- ``ArraySingleString`` items amount and record types,
+- ``MessageEnd`` presence and absence of trailing bytes.
+
+The first problem found is raised as :class:`ValidationError` with its
+offset and path of records and members leading to it.
+"""
+from struct import unpack_from, calcsize
+
+from . import enums
+from .compression import decompress_stream
+from .structure.constants import PrimitiveTypeConversionSet
+from .structure.structure import SIGNATURE_SIZE
+
+RecordType = enums.RecordTypeEnum
+BinaryType = enums.BinaryTypeEnum
+
+HEADER_FORMAT = '<B4i'
+HEADER_SIZE = calcsize(HEADER_FORMAT)
+#: 7 bit encoded int takes 5 bytes at most, the last one keeps 3 bits
+VARINT_SIZE = 5
+VARINT_LAST_BYTE_MAX = 0x07
+
+#: primitive type: size, types without fixed size are not supported
+PRIMITIVE_SIZES = dict(
+    (primitive_type, calcsize('<' + value))
+    for primitive_type, value in PrimitiveTypeConversionSet.items()
+    if value is not None
+)
+RECORD_TYPES = frozenset(x.value for x in RecordType)
+BINARY_TYPES = frozenset(x.value for x in BinaryType)
+LOWER_BOUNDS_TYPES = frozenset(
+    enums.BinaryArrayTypeEnum.get_lower_bounds()
+)
+ARRAY_STRING_ITEM_TYPES = frozenset((
+    RecordType.BinaryObjectString, RecordType.MemberReference,
+    RecordType.ObjectNull, RecordType.ObjectNullMultiple256,
+    RecordType.ObjectNullMultiple
+))
+
+
+class ValidationError(ValueError):
+    """
+    Document structure problem
+    """
+    def __init__(self, message, offset, path):
+        """
+        :param str message: problem description
+        :param int offset: offset problem was found at
+        :param str path: records and members path to the problem
+        """
+        super(ValidationError, self).__init__(message)
+        self.message = message
+        self.offset = offset
+        self.path = path
+
+    def __str__(self):
+        return '%s at offset 0x%08x (%s)' % (
+            self.message, self.offset, self.path or 'document'
+        )
+
+    def to_dict(self):
+        return {'error': self.message, 'offset': self.offset,
+                'path': self.path}
+
+
+class ClassMetadata(object):
+    """
+    Class record member layout ``ClassWithId`` records refer to
+    """
+    __slots__ = ('name', 'names', 'types', 'primitive_types')
+
+    def __init__(self, name, names, types, primitive_types):
+        #: name and members names are kept as (start, end) spans
+        self.name = name
+        self.names = names
+        self.types = types
+        self.primitive_types = primitive_types
+
+
+class Validator(object):
+    """
+    Validate document given as bytes
+
+    .. code-block:: python
+
+        Validator(open('Lucas1.udlg', 'rb').read()).validate()
+    """
+    def __init__(self, data, udlg=True):
+        """
+        :param bytes data: document content
+        :param bool udlg: document starts with udlg signature
+        """
+        self.data = memoryview(data)
+        self.size = len(data)
+        self.udlg = udlg
+        #: path entries: [name, offset, member name span, record type name,
+        #: class name span], spans are decoded only when error is raised
+        self.path = []
+        self.objects = set()
+        self.libraries = set()
+        #: class object id: ClassMetadata
+        self.classes = {}
+        #: (id_ref, offset, path)
+        self.references = []
+        self.records = 0
+        self.handlers = {
+            RecordType.ClassWithId: self._class_with_id,
+            RecordType.SystemClassWithMembersAndTypes:
+                self._system_class_with_members_and_types,
+            RecordType.ClassWithMembersAndTypes:
+                self._class_with_members_and_types,
+            RecordType.BinaryObjectString: self._binary_object_string,
+            RecordType.BinaryArray: self._binary_array,
+            RecordType.MemberReference: self._member_reference,
+            RecordType.ObjectNull: self._object_null,
+            RecordType.BinaryLibrary: self._binary_library,
+            RecordType.ObjectNullMultiple256: self._object_null_multiple256,
+            RecordType.ObjectNullMultiple: self._object_null_multiple,
+            RecordType.ArraySinglePrimitive: self._array_single_primitive,
+            RecordType.ArraySingleString: self._array_single_string,
+        }
+
+    def error(self, message, offset):
+        """
+        :param str message: problem description
+        :param int offset: offset problem was found at
+        :rtype: ValidationError
+        :return: error with current path
+        """
+        return ValidationError(message, offset, self.format_path())
+
+    def format_path(self, path=None):
+        entries = []
+        for name, offset, member, record, class_name in (
+                self.path if path is None else path):
+            parts = [name]
+            if member is not None:
+                parts.append(self.decode(member))
+            if record is not None:
+                parts.append(record)
+            if class_name is not None:
+                parts.append(self.decode(class_name))
+            entries.append(' '.join(parts))
+        return ' > '.join(entries)
+
+    def decode(self, span):
+        start, end = span
+        return "'%s'" % bytes(self.data[start:end]).decode('utf-8', 'replace')
+
+    def need(self, offset, size):
+        if offset + size > self.size:
+            raise self.error(
+                'Unexpected end of data, %i bytes needed, %i left' % (
+                    size, max(self.size - offset, 0)
+                ), offset
+            )
+
+    def unpack(self, fmt, offset):
+        size = calcsize(fmt)
+        self.need(offset, size)
+        return unpack_from(fmt, self.data, offset), offset + size
+
+    def varint(self, offset):
+        """
+        :param int offset: offset
+        :rtype: tuple[int, int]
+        :return: value and offset after it
+        """
+        value = shift = 0
+        data = self.data
+        for idx in range(VARINT_SIZE):
+            self.need(offset + idx, 1)
+            byte = data[offset + idx]
+            if idx == VARINT_SIZE - 1 and byte > VARINT_LAST_BYTE_MAX:
+                raise self.error('7 bit encoded int is out of bounds',
+                                 offset)
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value, offset + idx + 1
+        raise self.error('7 bit encoded int is out of bounds', offset)
+
+    def string(self, offset):
+        """
+        :param int offset: offset
+        :rtype: tuple[tuple[int, int], int]
+        :return: string data span and offset after it
+        """
+        length, start = self.varint(offset)
+        self.need(start, length)
+        return (start, start + length), start + length
+
+    def validate(self):
+        """
+        :rtype: dict
+        :return: amount of ``records``, ``objects`` and ``references``
+            and document ``size``
+        :raises ValidationError:
+            - if document structure is broken
+        """
+        offset = 0
+        if self.udlg:
+            self.need(offset, SIGNATURE_SIZE)
+            offset += SIGNATURE_SIZE
+        (record_type, _, _, major, minor), end = self.unpack(
+            HEADER_FORMAT, offset
+        )
+        if record_type != RecordType.SerializedStreamHeader:
+            raise self.error(
+                'Serialization header expected, got record type %i' %
+                record_type, offset
+            )
+        if (major, minor) != (1, 0):
+            raise self.error('Unsupported format version %i.%i' % (
+                major, minor), offset)
+        offset = end
+        while True:
+            self.path = [['records[%i]' % self.records, offset, None, None,
+                          None]]
+            record_type = self.get_record_type(offset)
+            offset = self.record(offset)
+            self.records += 1
+            if record_type == RecordType.MessageEnd:
+                break
+        self.path = []
+        if offset != self.size:
+            raise self.error('%i trailing bytes after MessageEnd' % (
+                self.size - offset), offset)
+        for id_ref, reference_offset, path in self.references:
+            if id_ref not in self.objects:
+                raise ValidationError(
+                    'Unresolved member reference to object %i' % id_ref,
+                    reference_offset, self.format_path(path)
+                )
+        return {
+            'records': self.records,
+            'objects': len(self.objects),
+            'references': len(self.references),
+            'size': self.size
+        }
+
+    def get_record_type(self, offset):
+        self.need(offset, 1)
+        return self.data[offset]
+
+    def record(self, offset, member=False):
+        """
+        :param int offset: record offset
+        :param bool member: record is inline member of class record
+        :rtype: int
+        :return: offset after record
+        """
+        record_type = self.get_record_type(offset)
+        if record_type not in RECORD_TYPES:
+            raise self.error('Invalid record type %i' % record_type, offset)
+        name = RecordType(record_type).name
+        self.path[-1][3] = name
+        if record_type == RecordType.MessageEnd:
+            if member:
+                raise self.error('MessageEnd met inside members', offset)
+            return offset + 1
+        handler = self.handlers.get(record_type)
+        if handler is None:
+            raise self.error('Unsupported record type %s' % name, offset)
+        return handler(offset + 1)
+
+    def _binary_library(self, offset):
+        (library_id, ), offset = self.unpack('<I', offset)
+        _, offset = self.string(offset)
+        self.libraries.add(library_id)
+        return offset
+
+    def _binary_object_string(self, offset):
+        (object_id, ), offset = self.unpack('<i', offset)
+        self.objects.add(object_id)
+        _, offset = self.string(offset)
+        return offset
+
+    def _member_reference(self, offset):
+        (id_ref, ), end = self.unpack('<I', offset)
+        self.references.append(
+            (id_ref, offset - 1, [tuple(x) for x in self.path])
+        )
+        return end
+
+    def _object_null(self, offset):
+        return offset
+
+    def _object_null_multiple256(self, offset):
+        return self.unpack('<B', offset)[1]
+
+    def _object_null_multiple(self, offset):
+        return self.unpack('<i', offset)[1]
+
+    def primitive_size(self, primitive_type, offset):
+        size = PRIMITIVE_SIZES.get(primitive_type)
+        if size is None:
+            raise self.error('Unsupported primitive type %i' %
+                             primitive_type, offset)
+        return size
+
+    def _array_single_primitive(self, offset):
+        (object_id, length, primitive_type), end = self.unpack('<iiB',
+                                                               offset)
+        if length < 0:
+            raise self.error('Negative array length %i' % length, offset)
+        self.objects.add(object_id)
+        size = self.primitive_size(primitive_type, end - 1) * length
+        self.need(end, size)
+        return end + size
+
+    def _array_single_string(self, offset):
+        (object_id, length), offset = self.unpack('<ii', offset)
+        if length < 0:
+            raise self.error('Negative array length %i' % length, offset - 4)
+        self.objects.add(object_id)
+        idx = 0
+        while idx < length:
+            self.path.append(['items[%i]' % idx, offset, None, None, None])
+            record_type = self.get_record_type(offset)
+            if record_type not in ARRAY_STRING_ITEM_TYPES:
+                raise self.error('Invalid string array item record type %i' %
+                                 record_type, offset)
+            end = self.record(offset, member=True)
+            count = 1
+            if record_type == RecordType.ObjectNullMultiple256:
+                count = self.data[offset + 1]
+            elif record_type == RecordType.ObjectNullMultiple:
+                (count, ) = unpack_from('<i', self.data, offset + 1)
+            if count < 1:
+                raise self.error('Invalid null items count %i' % count,
+                                 offset + 1)
+            idx += count
+            if idx > length:
+                raise self.error('Array items exceed its length %i' % length,
+                                 offset)
+            #: items are separate records for builders
+            self.records += 1
+            offset = end
+            self.path.pop()
+        return offset
+
+    def _binary_array(self, offset):
+        (object_id, binary_array_type, rank), offset = self.unpack('<iBI',
+                                                                   offset)
+        self.objects.add(object_id)
+        bounds = 2 if binary_array_type in LOWER_BOUNDS_TYPES else 1
+        self.need(offset, rank * 4 * bounds)
+        offset += rank * 4 * bounds
+        (binary_type, ), offset = self.unpack('<B', offset)
+        if binary_type in (BinaryType.Primitive, BinaryType.PrimitiveArray):
+            (primitive_type, ), end = self.unpack('<B', offset)
+            self.primitive_size(primitive_type, offset)
+            return end
+        if binary_type == BinaryType.SystemClass:
+            return self.string(offset)[1]
+        if binary_type == BinaryType.Class:
+            _, offset = self.string(offset)
+            return self.unpack('<I', offset)[1]
+        raise self.error('Unsupported binary array item type %i' %
+                         binary_type, offset - 1)
+
+    def class_info(self, offset):
+        """
+        :param int offset: offset
+        :rtype: tuple[int, tuple, list, int]
+        :return: object id, name span, members names spans and offset after
+            class info
+        """
+        (object_id, ), offset = self.unpack('<i', offset)
+        name, offset = self.string(offset)
+        (count, ), offset = self.unpack('<I', offset)
+        names = []
+        for idx in range(count):
+            span, offset = self.string(offset)
+            names.append(span)
+        return object_id, name, names, offset
+
+    def member_type_info(self, offset, count):
+        """
+        :param int offset: offset
+        :param int count: amount of members
+        :rtype: tuple[bytes, list, int]
+        :return: binary types, primitive types (None for other ones) and
+            offset after member type info
+        """
+        self.need(offset, count)
+        types = bytes(self.data[offset:offset + count])
+        offset += count
+        primitive_types = []
+        for idx, binary_type in enumerate(types):
+            primitive_type = None
+            if binary_type not in BINARY_TYPES:
+                raise self.error('Invalid binary type %i' % binary_type,
+                                 offset)
+            if binary_type in (BinaryType.Primitive,
+                               BinaryType.PrimitiveArray):
+                (primitive_type, ), end = self.unpack('<B', offset)
+                if binary_type == BinaryType.Primitive:
+                    self.primitive_size(primitive_type, offset)
+                offset = end
+            elif binary_type == BinaryType.SystemClass:
+                _, offset = self.string(offset)
+            elif binary_type == BinaryType.Class:
+                _, offset = self.string(offset)
+                (library_id, ), end = self.unpack('<I', offset)
+                self.check_library(library_id, offset)
+                offset = end
+            primitive_types.append(primitive_type)
+        return types, primitive_types, offset
+
+    def check_library(self, library_id, offset):
+        if library_id not in self.libraries:
+            raise self.error('Unknown library id %i' % library_id, offset)
+
+    def class_record(self, offset, system=False):
+        object_id, name, names, offset = self.class_info(offset)
+        self.set_class_name(name)
+        types, primitive_types, offset = self.member_type_info(offset,
+                                                               len(names))
+        if not system:
+            (library_id, ), end = self.unpack('<I', offset)
+            self.check_library(library_id, offset)
+            offset = end
+        metadata = ClassMetadata(name, names, types, primitive_types)
+        self.classes[object_id] = metadata
+        self.objects.add(object_id)
+        return metadata, offset
+
+    def set_class_name(self, span):
+        self.path[-1][4] = span
+
+    def _class_with_members_and_types(self, offset):
+        metadata, offset = self.class_record(offset)
+        return self.members(metadata, offset)
+
+    def _system_class_with_members_and_types(self, offset):
+        metadata, offset = self.class_record(offset, system=True)
+        for idx, binary_type in enumerate(metadata.types):
+            if binary_type not in (BinaryType.Primitive,
+                                   BinaryType.PrimitiveArray):
+                raise self.error(
+                    'Unsupported system class member binary type %i' %
+                    binary_type, offset
+                )
+            size = self.primitive_size(metadata.primitive_types[idx], offset)
+            self.need(offset, size)
+            offset += size
+        return offset
+
+    def _class_with_id(self, offset):
+        (object_id, metadata_id), end = self.unpack('<ii', offset)
+        metadata = self.classes.get(metadata_id)
+        if metadata is None:
+            raise self.error('Unknown class metadata id %i' % metadata_id,
+                             offset + 4)
+        self.set_class_name(metadata.name)
+        self.objects.add(object_id)
+        return self.members(metadata, end)
+
+    def members(self, metadata, offset):
+        for idx, binary_type in enumerate(metadata.types):
+            self.path.append(['members[%i]' % idx, offset,
+                              metadata.names[idx], None, None])
+            if binary_type == BinaryType.Primitive:
+                size = self.primitive_size(metadata.primitive_types[idx],
+                                           offset)
+                self.need(offset, size)
+                offset += size
+            else:
+                offset = self.record(offset, member=True)
+            self.path.pop()
+        return offset
+
+
+def validate(data, udlg=True):
+    """
+    validate document
+
+    :param bytes data: document content
+    :param bool udlg: document starts with udlg signature
+    :rtype: dict
+    :return: amount of ``records``, ``objects`` and ``references`` and
+        document ``size``
+    :raises ValidationError:
+        - if document structure is broken
+    """
+    return Validator(data, udlg=udlg).validate()
+
+
+def validate_stream(stream, udlg=True):
+    """
+    validate document read from stream
+
+    :param stream: readable binary stream, compressed document is
+        decompressed
+    :param bool udlg: document starts with udlg signature
+    :rtype: dict
+    :return: amount of ``records``, ``objects`` and ``references`` and
+        document ``size``
+    :raises ValidationError:
+        - if document structure is broken
+    """
+    return validate(decompress_stream(stream).read(), udlg=udlg)
+
+
+def validate_file(path, udlg=True):
+    """
+    validate document file
+
+    :param str path: document path, compressed document is decompressed
+    :param bool udlg: document starts with udlg signature
+    :rtype: dict
+    :return: amount of ``records``, ``objects`` and ``references`` and
+        document ``size``
+    :raises ValidationError:
+        - if document structure is broken
+    """
+    with open(path, 'rb') as stream:
+        return validate_stream(stream, udlg=udlg)
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.watch
+    :synopsis: Directory change detection for watch mode
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+
+Watchers report names of files changed inside directory tree, names are
+relative and ``/`` separated like storage ones. Linux inotify is used through
+ctypes when it's available, other platforms fall back to polling file
+modification times and sizes.
+
+.. code-block:: python
+
+    with create_watcher('i18n', extensions=('.txt', )) as watcher:
+        for names in watcher.changes(delay=0.2):
+            print(names)
+"""
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+import logging
+logger = logging.getLogger(__name__)
+
+#: seconds between directory scans of polling watcher
+POLL_INTERVAL = 0.5
+#: seconds without new changes before batch of changes is reported
+DEBOUNCE_DELAY = 0.2
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+
+#: file content is complete on close or rename, modify events are skipped
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE)
+#: struct inotify_event without name: wd, mask, cookie, name size
+EVENT = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+
+
+def load_inotify():
+    """
+    :rtype: ctypes.CDLL | None
+    :return: libc with inotify functions, None if platform has no inotify
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                           use_errno=True)
+        libc.inotify_init1.argtypes = (ctypes.c_int, )
+        libc.inotify_add_watch.argtypes = (
+            ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32
+        )
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class Watcher(object):
+    def __init__(self, path, extensions=None):
+        """
+        :param str path: directory path
+        :param tuple extensions: extensions of files to report, every file
+            is reported if nothing was given
+        """
+        self.path = path
+        self.extensions = tuple(extensions) if extensions else None
+
+    def matches(self, name):
+        """
+        :param str name: file name
+        :rtype: bool
+        :return: file should be reported
+        """
+        return self.extensions is None or name.endswith(self.extensions)
+
+    def scan(self):
+        """
+        :rtype: dict
+        :return: name: (modification time, size) of every matched file
+        """
+        state = {}
+        for root, _, files in os.walk(self.path):
+            directory = os.path.relpath(root, self.path).replace(os.sep, '/')
+            for file_name in files:
+                name = (file_name if directory == '.'
+                        else directory + '/' + file_name)
+                if not self.matches(name):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, file_name))
+                except OSError:
+                    continue
+                state[name] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def wait(self, timeout=None):
+        """
+        wait for changes
+
+        :param float timeout: seconds to wait, forever if nothing was given
+        :rtype: set
+        :return: changed, created or removed file names, empty set on
+            timeout
+        """
+        raise NotImplementedError
+
+    def changes(self, delay=DEBOUNCE_DELAY):
+        """
+        debounced changes, batch is reported once no new changes come for
+        given delay, so file saved in few writes is reported once
+
+        :param float delay: quiet period in seconds
+        :rtype: collections.Iterator
+        :return: sorted lists of changed file names
+        """
+        while True:
+            names = self.wait()
+            if not names:
+                continue
+            while True:
+                more = self.wait(delay)
+                if not more:
+                    break
+                names |= more
+            yield sorted(names)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class PollingWatcher(Watcher):
+    def __init__(self, path, extensions=None, interval=POLL_INTERVAL):
+        """
+        :param str path: directory path
+        :param tuple extensions: extensions of files to report
+        :param float interval: seconds between directory scans
+        """
+        super(PollingWatcher, self).__init__(path, extensions=extensions)
+        self.interval = interval
+        self.state = self.scan()
+
+    def poll(self):
+        """
+        :rtype: set
+        :return: names of files changed since previous poll
+        """
+        state = self.scan()
+        names = set(
+            name for name in set(state) | set(self.state)
+            if state.get(name) != self.state.get(name)
+        )
+        self.state = state
+        return names
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            names = self.poll()
+            if names:
+                return names
+            interval = self.interval
+            if deadline is not None:
+                interval = min(interval, deadline - time.time())
+                if interval <= 0:
+                    return names
+            time.sleep(interval)
+
+
+class InotifyWatcher(Watcher):
+    def __init__(self, path, extensions=None):
+        """
+        :param str path: directory path
+        :param tuple extensions: extensions of files to report
+        :raises OSError:
+            - if inotify is not available or directory can not be watched
+        """
+        super(InotifyWatcher, self).__init__(path, extensions=extensions)
+        self.libc = load_inotify()
+        if self.libc is None:
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        #: watch descriptor: relative directory name, empty for root
+        self.watches = {}
+        try:
+            self.add_tree('')
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, directory):
+        path = os.path.join(self.path, *directory.split('/'))
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path),
+                                         WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        self.watches[wd] = directory
+
+    def add_tree(self, directory):
+        """
+        watch directory with its subdirectories
+
+        :param str directory: relative directory name
+        :rtype: set
+        :return: names of matched files already inside
+        """
+        names = set()
+        root = os.path.join(self.path, *directory.split('/'))
+        for path, _, files in os.walk(root):
+            relative = os.path.relpath(path, self.path).replace(os.sep, '/')
+            relative = '' if relative == '.' else relative
+            self.add_watch(relative)
+            names.update(
+                relative + '/' + name if relative else name
+                for name in files
+            )
+        return set(name for name in names if self.matches(name))
+
+    def read_events(self):
+        """
+        :rtype: set
+        :return: names of files changed by pending events
+        """
+        names = set()
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, size = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            file_name = data[offset:offset + size].rstrip(b'\0')
+            offset += size
+            if mask & IN_Q_OVERFLOW:
+                #: events are lost, everything is reported
+                logger.warning('inotify queue overflow in `%s`', self.path)
+                names.update(self.scan())
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            if wd not in self.watches:
+                continue
+            directory = self.watches[wd]
+            name = os.fsdecode(file_name)
+            name = directory + '/' + name if directory else name
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    #: files could be written before watch is added
+                    names.update(self.add_tree(name))
+                continue
+            if self.matches(name):
+                names.add(name)
+        return names
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0, deadline - time.time())
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return set()
+            names = self.read_events()
+            if names:
+                return names
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_watcher(path, extensions=None, interval=POLL_INTERVAL,
+                   polling=False):
+    """
+    :param str path: directory path
+    :param tuple extensions: extensions of files to report
+    :param float interval: seconds between scans for polling watcher
+    :param bool polling: use polling even if inotify is available
+    :rtype: Watcher
+    :return: inotify watcher, polling one if inotify is not available
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(path, extensions=extensions)
+        except OSError as err:
+            logger.info('inotify is not available (%s), polling `%s`',
+                        err, path)
+    return PollingWatcher(path, extensions=extensions, interval=interval)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: udlg.writer
+    :synopsis: Record level .NET Binary Format writer
+    :platform: Linux, Unix, Windows
+.. moduleauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+.. sectionauthor:: Nickolas Fox <tarvitz@blacklibary.ru>
+"""
+from struct import pack
+
+from . import enums
+from .structure.constants import PrimitiveTypeConversionSet
+from .utils import write_7bit_int
+
+#: udlg signature taken from game files
+UDLG_SIGNATURE = (
+    b'\xf9S\x8b\x83\x1f62C\xba\xae\r\x17\x86]\x08T=\xf1L1A\x00\x00\x00'
+)
+
+
+def length_prefixed_string(value):
+    """
+    encode length prefixed string
+
+    :param str | bytes value: value
+    :rtype: bytes
+    :return: 7 bit encoded length followed by utf-8 data
+    """
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return write_7bit_int(len(value)) + value
+
+
+class NRBFWriter(object):
+    """
+    Writes .NET Binary Format records into binary stream one by one.
+
+    Records carrying members (``ClassWithMembersAndTypes``, ``ClassWithId``)
+    are written as headers only, their member values should follow right
+    after, written with :meth:`primitive` for primitive members and record
+    methods for the rest of them.
+    """
+    def __init__(self, stream):
+        """
+        :param stream: binary stream opened for writing
+        """
+        self.stream = stream
+        #: amount of bytes written
+        self.size = 0
+
+    def write(self, data):
+        self.stream.write(data)
+        self.size += len(data)
+
+    def udlg_header(self, signature=UDLG_SIGNATURE):
+        self.write(signature)
+
+    def serialization_header(self, root_id=1, header_id=-1,
+                             major_version=1, minor_version=0):
+        self.write(pack('<B4i', enums.RecordTypeEnum.SerializedStreamHeader,
+                        root_id, header_id, major_version, minor_version))
+
+    def binary_library(self, library_id, name):
+        self.write(pack('<BI', enums.RecordTypeEnum.BinaryLibrary,
+                        library_id) + length_prefixed_string(name))
+
+    def class_with_members_and_types(self, object_id, name, members,
+                                     library_id):
+        """
+        write ``ClassWithMembersAndTypes`` record header, member values
+        should follow
+
+        :param int object_id: object id
+        :param str name: class name
+        :param list members: ``(name, binary_type, additional_info)``
+            tuples, additional info is primitive type for primitive and
+            primitive array members, ``(type_name, library_id)`` for class
+            members, type name for system class members and None otherwise
+        :param int library_id: library id
+        :rtype: None
+        :return: None
+        """
+        BinaryTypeEnum = enums.BinaryTypeEnum
+        document = bytearray(pack('<Bi', enums.RecordTypeEnum
+                                  .ClassWithMembersAndTypes, object_id))
+        extend = document.extend
+        extend(length_prefixed_string(name))
+        extend(pack('<I', len(members)))
+        for member_name, binary_type, additional_info in members:
+            extend(length_prefixed_string(member_name))
+        extend(pack('<%iB' % len(members), *[x[1] for x in members]))
+        for member_name, binary_type, additional_info in members:
+            if binary_type in (BinaryTypeEnum.Primitive,
+                               BinaryTypeEnum.PrimitiveArray):
+                extend(pack('<B', additional_info))
+            elif binary_type == BinaryTypeEnum.Class:
+                type_name, type_library_id = additional_info
+                extend(length_prefixed_string(type_name))
+                extend(pack('<I', type_library_id))
+            elif binary_type == BinaryTypeEnum.SystemClass:
+                extend(length_prefixed_string(additional_info))
+        extend(pack('<I', library_id))
+        self.write(bytes(document))
+
+    def class_with_id(self, object_id, metadata_id):
+        """
+        write ``ClassWithId`` record header, member values should follow
+
+        :param int object_id: object id
+        :param int metadata_id: class record object id
+        :rtype: None
+        :return: None
+        """
+        self.write(pack('<Bii', enums.RecordTypeEnum.ClassWithId, object_id,
+                        metadata_id))
+
+    def primitive(self, primitive_type, value):
+        self.write(pack('<' + PrimitiveTypeConversionSet[primitive_type],
+                        value))
+
+    def binary_object_string(self, object_id, value):
+        self.write(pack('<Bi', enums.RecordTypeEnum.BinaryObjectString,
+                        object_id) + length_prefixed_string(value))
+
+    def member_reference(self, id_ref):
+        self.write(pack('<BI', enums.RecordTypeEnum.MemberReference, id_ref))
+
+    def object_null(self):
+        self.write(pack('<B', enums.RecordTypeEnum.ObjectNull))
+
+    def array_single_primitive(self, object_id, primitive_type, values):
+        self.write(pack('<BiIB', enums.RecordTypeEnum.ArraySinglePrimitive,
+                        object_id, len(values), primitive_type))
+        self.write(pack(
+            '<%i%s' % (len(values), PrimitiveTypeConversionSet[primitive_type]),
+            *values
+        ))
+
+    def message_end(self):
+        self.write(pack('<B', enums.RecordTypeEnum.MessageEnd))